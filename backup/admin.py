@@ -1,5 +1,4 @@
 import io
-import json
 import os
 import shutil
 import subprocess
@@ -13,26 +12,12 @@ from django.urls import path, reverse
 from django.core.management import call_command
 from django.conf import settings
 
-from .models import DatabaseBackup
+from .archive import ARCHIVE_SUFFIX, check_restore_chain, restore_archives
+from .models import BackupRun, DatabaseBackup
 
-
-def _clear_app_data():
-    """
-    Удаляет строки из таблиц приложений в порядке, безопасном для FK.
-    НЕ трогает auth (users/groups), sessions и contenttypes —
-    иначе текущая сессия администратора будет уничтожена прямо во время запроса.
-    """
-    # Импортируем здесь, чтобы не создавать циклических зависимостей на уровне модуля.
-    from summaries.models import InsuranceOffer, InsuranceSummary, InsuranceCompany, SummaryTemplate
-    from insurance_requests.models import InsuranceRequest, RequestAttachment
-
-    # Порядок важен: сначала дочерние записи, потом родительские
-    InsuranceOffer.objects.all().delete()
-    InsuranceSummary.objects.all().delete()
-    RequestAttachment.objects.all().delete()
-    InsuranceRequest.objects.all().delete()
-    InsuranceCompany.objects.all().delete()
-    SummaryTemplate.objects.all().delete()
+# Архивы backup_db (.jsonl.gz, полные и инкрементальные) и прежний JSON
+# из «Скачать JSON-бекап» — оба грузятся через loaddata.
+RESTORE_SUFFIXES = (ARCHIVE_SUFFIX, '.json')
 
 
 def _get_db_info():
@@ -240,10 +225,10 @@ class DatabaseBackupAdmin(admin.ModelAdmin):
         if request.method != 'POST':
             return HttpResponseRedirect(reverse('admin:backup_databasebackup_changelist'))
 
-        backup_file = request.FILES.get('backup_file')
+        backup_files = request.FILES.getlist('backup_file')
         confirmed = request.POST.get('confirmed') == 'yes'
 
-        if not backup_file:
+        if not backup_files:
             self.message_user(request, 'Файл не выбран.', level=messages.ERROR)
             return HttpResponseRedirect(reverse('admin:backup_databasebackup_changelist'))
 
@@ -255,31 +240,30 @@ class DatabaseBackupAdmin(admin.ModelAdmin):
             )
             return HttpResponseRedirect(reverse('admin:backup_databasebackup_changelist'))
 
-        # Валидация JSON
+        # Полный архив и инкременты после него; по именам (в них дата) — в порядке создания
+        tmp_dir = tempfile.mkdtemp(prefix='backup_restore_')
         try:
-            raw = backup_file.read().decode('utf-8')
-            json.loads(raw)
-        except (json.JSONDecodeError, UnicodeDecodeError) as exc:
-            self.message_user(request, f'Неверный формат файла: {exc}', level=messages.ERROR)
-            return HttpResponseRedirect(reverse('admin:backup_databasebackup_changelist'))
-
-        tmp_path = None
-        try:
-            with tempfile.NamedTemporaryFile(
-                mode='w', suffix='.json', delete=False, encoding='utf-8'
-            ) as tmp:
-                tmp.write(raw)
-                tmp_path = tmp.name
-
-            # Удаляем данные только из таблиц приложений — NOT flush,
-            # чтобы не стереть django_session и не разлогинить пользователя.
-            _clear_app_data()
+            paths = []
+            for backup_file in sorted(backup_files, key=lambda f: os.path.basename(f.name)):
+                # loaddata определяет формат и сжатие по расширению — имя сохраняем
+                tmp_path = os.path.join(tmp_dir, os.path.basename(backup_file.name))
+                with open(tmp_path, 'wb') as tmp:
+                    for chunk in backup_file.chunks():
+                        tmp.write(chunk)
+                paths.append(tmp_path)
+
+            try:
+                check_restore_chain(paths, RESTORE_SUFFIXES)
+            except ValueError as exc:
+                self.message_user(request, f'Неверный набор файлов: {exc}', level=messages.ERROR)
+                return HttpResponseRedirect(reverse('admin:backup_databasebackup_changelist'))
 
-            # Загружаем данные из файла
-            call_command('loaddata', tmp_path, verbosity=0)
+            # Данные только таблиц приложений — NOT flush, чтобы не стереть
+            # django_session и не разлогинить пользователя (см. clear_app_data).
+            restore_archives(paths)
             self.message_user(
                 request,
-                'База данных успешно восстановлена из резервной копии.',
+                f'База данных успешно восстановлена из резервной копии ({len(paths)} файл(ов)).',
                 level=messages.SUCCESS,
             )
         except Exception as exc:  # noqa: BLE001
@@ -289,7 +273,28 @@ class DatabaseBackupAdmin(admin.ModelAdmin):
                 level=messages.ERROR,
             )
         finally:
-            if tmp_path and os.path.exists(tmp_path):
-                os.unlink(tmp_path)
+            shutil.rmtree(tmp_dir, ignore_errors=True)
 
         return HttpResponseRedirect(reverse('admin:backup_databasebackup_changelist'))
+
+
+@admin.register(BackupRun)
+class BackupRunAdmin(admin.ModelAdmin):
+    list_display = (
+        'started_at', 'kind', 'status', 'objects_count', 'size_bytes',
+        'duration_seconds', 'peak_memory_bytes',
+    )
+    list_filter = ('kind', 'status')
+    readonly_fields = [f.name for f in BackupRun._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_view_permission(self, request, obj=None):
+        return request.user.is_superuser
+
+    def has_module_perms(self, request):
+        return request.user.is_superuser
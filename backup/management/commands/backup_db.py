@@ -4,12 +4,17 @@ Management-команда для создания резервной копии
 Использование:
     python manage.py backup_db
     python manage.py backup_db --output-dir /var/backups/app --format json
+    python manage.py backup_db --format json --incremental   # только изменения после прошлого бекапа
+    python manage.py backup_db --format json --profile-memory  # замерить пик памяти (медленнее)
     python manage.py backup_db --format sqlite   # только для SQLite
     python manage.py backup_db --format pgdump   # только для PostgreSQL
     python manage.py backup_db --keep 7          # хранить последние 7 файлов
 
 Для cron (ежедневный бекап в 3:00):
     0 3 * * * cd /path/to/project && python manage.py backup_db --format pgdump --keep 30
+
+Формат json пишет потоковый gzip-архив JSON Lines (backup/archive.py);
+восстановление — python manage.py restore_backup.
 """
 import glob
 import os
@@ -18,9 +23,10 @@ import subprocess
 from datetime import datetime
 
 from django.conf import settings
-from django.core.management import call_command
 from django.core.management.base import BaseCommand, CommandError
 
+from backup import archive
+
 
 class Command(BaseCommand):
     help = 'Создать резервную копию базы данных (JSON, SQLite-файл или pg_dump)'
@@ -37,7 +43,7 @@ class Command(BaseCommand):
             default='json',
             help=(
                 'Формат резервной копии: '
-                'json (универсальный, только данные приложений), '
+                'json (универсальный, только данные приложений, сжатый .jsonl.gz), '
                 'sqlite (только для SQLite БД), '
                 'pgdump (только для PostgreSQL, полный дамп через pg_dump)'
             ),
@@ -48,19 +54,51 @@ class Command(BaseCommand):
             default=0,
             help='Сколько последних файлов оставлять (0 = хранить все)',
         )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Только для json: выгрузить строки, изменённые после прошлого бекапа',
+        )
+        parser.add_argument(
+            '--compress-level',
+            type=int,
+            default=archive.DEFAULT_COMPRESSLEVEL,
+            help=f'Только для json: уровень gzip 1–9 (default: {archive.DEFAULT_COMPRESSLEVEL})',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=archive.DEFAULT_CHUNK_SIZE,
+            help=f'Только для json: строк на одно чтение из БД (default: {archive.DEFAULT_CHUNK_SIZE})',
+        )
+        parser.add_argument(
+            '--profile-memory',
+            action='store_true',
+            help='Только для json: замерить пик памяти через tracemalloc (выгрузка заметно медленнее)',
+        )
 
     def handle(self, *args, **options):
         output_dir = options['output_dir']
         fmt = options['format']
         keep = options['keep']
 
+        if options['incremental'] and fmt != 'json':
+            raise CommandError('--incremental доступен только для формата json')
+        if not 1 <= options['compress_level'] <= 9:
+            raise CommandError('--compress-level должен быть от 1 до 9')
+        if options['chunk_size'] <= 0:
+            raise CommandError('--chunk-size должен быть положительным')
+
         os.makedirs(output_dir, exist_ok=True)
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
 
         if fmt == 'json':
-            self._backup_json(output_dir, timestamp)
-            pattern = os.path.join(output_dir, 'backup_*.json')
-        elif fmt == 'sqlite':
+            self._backup_json(output_dir, timestamp, options)
+            if keep > 0:
+                self._rotate_archives(output_dir, keep)
+            return
+
+        if fmt == 'sqlite':
             self._backup_sqlite(output_dir, timestamp)
             pattern = os.path.join(output_dir, 'db_backup_*.sqlite3')
         else:
@@ -72,25 +110,32 @@ class Command(BaseCommand):
 
     # ------------------------------------------------------------------ helpers
 
-    def _backup_json(self, output_dir, timestamp):
-        filename = os.path.join(output_dir, f'backup_{timestamp}.json')
-        with open(filename, 'w', encoding='utf-8') as f:
-            call_command(
-                'dumpdata',
-                '--natural-foreign',
-                '--natural-primary',
-                '--exclude', 'auth',
-                '--exclude', 'contenttypes',
-                '--exclude', 'sessions',
-                '--exclude', 'admin',
-                '--exclude', 'backup',
-                '--indent', '2',
-                stdout=f,
+    def _backup_json(self, output_dir, timestamp, options):
+        try:
+            run = archive.create_backup(
+                output_dir,
+                incremental=options['incremental'],
+                chunk_size=options['chunk_size'],
+                compresslevel=options['compress_level'],
+                timestamp=timestamp,
+                profile_memory=options['profile_memory'],
             )
-        size = os.path.getsize(filename)
-        self.stdout.write(
-            self.style.SUCCESS(f'✓ JSON-бекап сохранён: {filename} ({size:,} байт)')
-        )
+        except Exception as exc:
+            raise CommandError(f'JSON-бекап не создан: {exc}')
+
+        if options['incremental'] and run.kind == run.KIND_FULL:
+            self.stdout.write(self.style.WARNING(
+                'Предыдущих бекапов нет — вместо инкрементального создан полный.'
+            ))
+        since = f', изменения после {run.since:%Y-%m-%d %H:%M:%S}' if run.since else ''
+        memory = ''
+        if run.peak_memory_bytes is not None:
+            memory = f', пик памяти {run.peak_memory_bytes / 1024 / 1024:.1f} МБ'
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ JSON-бекап ({run.get_kind_display().lower()}{since}) сохранён: {run.file_path} '
+            f'({run.size_bytes:,} байт, {run.objects_count} объектов, '
+            f'{run.duration_seconds:.2f} с{memory})'
+        ))
 
     def _backup_sqlite(self, output_dir, timestamp):
         db_config = settings.DATABASES['default']
@@ -157,6 +202,19 @@ class Command(BaseCommand):
             self.style.SUCCESS(f'✓ pg_dump сохранён: {filename} ({size:,} байт)')
         )
 
+    def _rotate_archives(self, output_dir, keep):
+        """Оставляет `keep` последних полных архивов и инкременты после старейшего из них."""
+        files = sorted(glob.glob(os.path.join(output_dir, f'backup_*{archive.ARCHIVE_SUFFIX}')))
+        fulls = [f for f in files if not archive.is_incremental_archive(f)]
+        if len(fulls) <= keep:
+            return
+        oldest_kept = fulls[-keep]
+        to_delete = [f for f in files if f < oldest_kept]
+        for f in to_delete:
+            os.unlink(f)
+            self.stdout.write(self.style.WARNING(f'  удалён старый бекап: {f}'))
+        self.stdout.write(f'Ротация: удалено {len(to_delete)}, оставлено полных {keep}.')
+
     def _rotate(self, pattern, keep):
         """Удаляет старые файлы бекапа, оставляя последние `keep` штук."""
         files = sorted(glob.glob(pattern))
@@ -1,75 +1,196 @@
 """
-Удаляет старые записи django-easy-audit (LoginEvent, CRUDEvent, RequestEvent).
+Удаляет старые записи django-easy-audit (LoginEvent, CRUDEvent, RequestEvent)
+и строки индекса изменённых полей FieldChange — по сроку CRUDEvent.
 
 Зачем разные сроки: RequestEvent растёт быстро (одна запись на каждый
 HTTP-запрос пользователя) — хранить долго бессмысленно. LoginEvent и CRUDEvent
 нужны для разбора инцидентов и аудита, поэтому хранятся 90 дней.
 
+Как удаляем: не одним `qs.delete()` (одна длинная транзакция + коллектор
+Django, который тянет строки в память), а пачками по диапазонам первичного
+ключа — сырой `DELETE ... WHERE id BETWEEN lo AND hi AND datetime < cutoff`,
+каждая пачка в своей короткой транзакции, с паузой между пачками. На таблицы
+easy-audit никто не ссылается внешними ключами, поэтому обход коллектора
+безопасен. Так чистку можно запускать и в рабочее время: блокировка держится
+только на время одной пачки (её длительность печатается в отчёте).
+
 Использование:
     python manage.py purge_audit_log
     python manage.py purge_audit_log --dry-run
     python manage.py purge_audit_log --login-days 180 --crud-days 180 --request-days 7
+    python manage.py purge_audit_log --batch-size 2000 --sleep 0.2 -v 2
+    python manage.py purge_audit_log --workers 3   # модели параллельно (не SQLite)
 """
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max, Min
 from django.utils import timezone
 
 logger = logging.getLogger('backup.purge_audit_log')
 
+DEFAULT_BATCH_SIZE = 5000
+
+
+def purge_in_batches(model, dt_field, cutoff, *, batch_size=DEFAULT_BATCH_SIZE, sleep=0.0, on_batch=None):
+    """Удаляет строки model с dt_field < cutoff пачками по диапазонам pk.
+
+    on_batch(stats) вызывается после каждой пачки. Возвращает итоговую
+    статистику: deleted, batches, seconds, max_batch_ms.
+    """
+    stats = {'deleted': 0, 'batches': 0, 'seconds': 0.0, 'max_batch_ms': 0.0}
+    bounds = model.objects.filter(**{f'{dt_field}__lt': cutoff}).aggregate(lo=Min('pk'), hi=Max('pk'))
+    if bounds['lo'] is None:
+        return stats
+
+    qn = connection.ops.quote_name
+    pk_column = model._meta.pk.column
+    sql = (
+        f'DELETE FROM {qn(model._meta.db_table)} '
+        f'WHERE {qn(pk_column)} BETWEEN %s AND %s '
+        f'AND {qn(model._meta.get_field(dt_field).column)} < %s'
+    )
+    cutoff_param = connection.ops.adapt_datetimefield_value(cutoff)
+
+    started = time.monotonic()
+    lo = bounds['lo']
+    while lo <= bounds['hi']:
+        hi = min(lo + batch_size - 1, bounds['hi'])
+        batch_started = time.monotonic()
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [lo, hi, cutoff_param])
+                deleted = max(cursor.rowcount, 0)
+        batch_ms = (time.monotonic() - batch_started) * 1000
+
+        stats['deleted'] += deleted
+        stats['batches'] += 1
+        stats['max_batch_ms'] = max(stats['max_batch_ms'], batch_ms)
+        stats['seconds'] = time.monotonic() - started
+        if on_batch is not None:
+            on_batch({**stats, 'batch_deleted': deleted, 'batch_ms': batch_ms, 'lo': lo, 'hi': hi})
+
+        lo = hi + 1
+        if sleep and lo <= bounds['hi']:
+            time.sleep(sleep)
+
+    stats['seconds'] = time.monotonic() - started
+    return stats
+
 
 class Command(BaseCommand):
     help = (
         'Чистит старые записи django-easy-audit: LoginEvent и CRUDEvent старше '
-        '90 дней (по умолчанию), RequestEvent старше 1 дня.'
+        '90 дней (по умолчанию), RequestEvent старше 1 дня. Удаляет пачками '
+        'по диапазонам id с паузой между пачками.'
     )
 
     def add_arguments(self, parser):
         parser.add_argument('--login-days', type=int, default=90,
                             help='Срок хранения LoginEvent (default: 90)')
         parser.add_argument('--crud-days', type=int, default=90,
-                            help='Срок хранения CRUDEvent (default: 90)')
+                            help='Срок хранения CRUDEvent и индекса FieldChange (default: 90)')
         parser.add_argument('--request-days', type=int, default=1,
                             help='Срок хранения RequestEvent (default: 1)')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help=f'Ширина диапазона id на одну пачку (default: {DEFAULT_BATCH_SIZE})')
+        parser.add_argument('--sleep', type=float, default=0.0,
+                            help='Пауза между пачками в секундах (default: 0)')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Сколько моделей чистить параллельно (default: 1; на SQLite всегда 1)')
         parser.add_argument('--dry-run', action='store_true',
                             help='Показать сколько будет удалено, но не удалять')
 
     def handle(self, *args, **options):
         from easyaudit.models import CRUDEvent, LoginEvent, RequestEvent
+        from insurance_requests.models import FieldChange
+
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size должен быть положительным')
+        if options['sleep'] < 0:
+            raise CommandError('--sleep не может быть отрицательным')
+        if options['workers'] <= 0:
+            raise CommandError('--workers должен быть положительным')
 
         dry = options['dry_run']
         now = timezone.now()
+        self._verbosity = options['verbosity']
+        self._output_lock = threading.Lock()
 
         targets = [
             ('LoginEvent', LoginEvent, 'datetime', options['login_days']),
             ('CRUDEvent', CRUDEvent, 'datetime', options['crud_days']),
+            ('FieldChange', FieldChange, 'changed_at', options['crud_days']),
             ('RequestEvent', RequestEvent, 'datetime', options['request_days']),
         ]
 
-        total_deleted = 0
-        for name, model, dt_field, days in targets:
-            cutoff = now - timedelta(days=days)
-            qs = model.objects.filter(**{f'{dt_field}__lt': cutoff})
-            count = qs.count()
-
-            if dry:
-                msg = f'[dry-run] {name}: было бы удалено {count} (старше {days}д, до {cutoff:%Y-%m-%d %H:%M})'
-                self.stdout.write(msg)
-                logger.info(msg)
-                continue
-
-            if count == 0:
-                msg = f'{name}: нечего удалять (порог {days}д)'
-                self.stdout.write(msg)
-                logger.info(msg)
-                continue
-
-            qs.delete()
-            total_deleted += count
-            msg = f'{name}: удалено {count} записей старше {days}д'
-            self.stdout.write(self.style.SUCCESS(f'✓ {msg}'))
-            logger.info(msg)
-
-        if not dry:
-            logger.info('purge_audit_log completed: deleted %d records total', total_deleted)
+        if dry:
+            for name, model, dt_field, days in targets:
+                cutoff = now - timedelta(days=days)
+                count = model.objects.filter(**{f'{dt_field}__lt': cutoff}).count()
+                self._report(f'[dry-run] {name}: было бы удалено {count} (старше {days}д, до {cutoff:%Y-%m-%d %H:%M})')
+            return
+
+        workers = options['workers']
+        if workers > 1 and connection.vendor == 'sqlite':
+            # SQLite держит одну блокировку на запись на всю базу — параллельность только мешает.
+            workers = 1
+
+        def _run(target):
+            name, model, dt_field, days = target
+            try:
+                return self._purge_target(name, model, dt_field, days, now, options)
+            finally:
+                if workers > 1:
+                    connection.close()
+
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_run, targets))
+        else:
+            results = [_run(target) for target in targets]
+
+        total_deleted = sum(stats['deleted'] for stats in results)
+        logger.info('purge_audit_log completed: deleted %d records total', total_deleted)
+
+    def _purge_target(self, name, model, dt_field, days, now, options):
+        cutoff = now - timedelta(days=days)
+
+        def _on_batch(progress):
+            if self._verbosity < 2:
+                return
+            self._report(
+                f'  {name}: пачка id {progress["lo"]}–{progress["hi"]}: '
+                f'удалено {progress["batch_deleted"]} за {progress["batch_ms"]:.0f} мс '
+                f'(всего {progress["deleted"]})'
+            )
+
+        stats = purge_in_batches(
+            model, dt_field, cutoff,
+            batch_size=options['batch_size'],
+            sleep=options['sleep'],
+            on_batch=_on_batch,
+        )
+
+        if stats['deleted'] == 0:
+            self._report(f'{name}: нечего удалять (порог {days}д)')
+            return stats
+
+        rate = stats['deleted'] / stats['seconds'] if stats['seconds'] else float(stats['deleted'])
+        self._report(
+            f'{name}: удалено {stats["deleted"]} записей старше {days}д '
+            f'за {stats["batches"]} пачек, {stats["seconds"]:.2f} с '
+            f'({rate:.0f} строк/с, макс. блокировка {stats["max_batch_ms"]:.0f} мс)',
+            success=True,
+        )
+        return stats
+
+    def _report(self, msg, success=False):
+        with self._output_lock:
+            self.stdout.write(self.style.SUCCESS(f'✓ {msg}') if success else msg)
+        logger.info(msg)
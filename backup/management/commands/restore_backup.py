@@ -0,0 +1,68 @@
+"""
+Восстанавливает данные приложений из JSON-архивов backup_db (.jsonl.gz).
+
+Полный архив сначала очищает таблицы приложений (auth и сессии не трогаются),
+инкрементальные накатываются поверх. Вся цепочка грузится в одной транзакции.
+
+Использование:
+    python manage.py restore_backup --input-dir /app/backups   # последний полный + инкременты после него
+    python manage.py restore_backup backups/backup_20260101_030000.jsonl.gz
+    python manage.py restore_backup --input-dir /app/backups --dry-run
+"""
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from backup import archive
+
+
+class Command(BaseCommand):
+    help = 'Восстановить данные приложений из JSON-архивов backup_db (полный + инкременты)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'archives',
+            nargs='*',
+            help='Архивы по порядку: полный, затем инкрементальные',
+        )
+        parser.add_argument(
+            '--input-dir',
+            help='Взять последний полный архив из директории и все инкременты после него',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Показать, какие архивы будут загружены, ничего не меняя',
+        )
+
+    def handle(self, *args, **options):
+        paths = list(options['archives'])
+        if options['input_dir']:
+            if paths:
+                raise CommandError('Укажите либо архивы, либо --input-dir')
+            paths = archive.find_restore_chain(options['input_dir'])
+            if not paths:
+                raise CommandError(f'В {options["input_dir"]} нет полного архива backup_*.jsonl.gz')
+        if not paths:
+            raise CommandError('Не указан ни один архив')
+
+        for path in paths:
+            if not os.path.exists(path):
+                raise CommandError(f'Файл не найден: {path}')
+        try:
+            archive.check_restore_chain(paths)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        for path in paths:
+            kind = 'инкремент' if archive.is_incremental_archive(path) else 'полный'
+            self.stdout.write(f'  {kind}: {path}')
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('Dry-run: данные не изменены.'))
+            return
+
+        try:
+            archive.restore_archives(paths)
+        except Exception as exc:
+            raise CommandError(f'Восстановление не выполнено: {exc}')
+        self.stdout.write(self.style.SUCCESS(f'✓ Восстановлено из {len(paths)} архив(ов)'))
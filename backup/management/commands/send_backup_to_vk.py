@@ -25,6 +25,8 @@ from django.conf import settings
 from django.core.management import call_command
 from django.core.management.base import BaseCommand, CommandError
 
+from backup import archive
+
 logger = logging.getLogger('backup.send_backup_to_vk')
 
 VK_API_BASE = 'https://api.vk.com/method'
@@ -130,20 +132,30 @@ class Command(BaseCommand):
     def _select_file_to_send(self, output_dir):
         """Возвращает путь к файлу для отправки.
 
-        Приоритет: свежайший pg_dump → свежайший JSON (gzip-обёртка для экономии).
+        Приоритет: свежайший pg_dump → свежайший полный JSON-архив. Архив
+        backup_db уже сжат gzip при записи и отправляется как есть; старые
+        несжатые backup_*.json по-прежнему заворачиваются в .gz.
         """
         pgdumps = sorted(glob.glob(os.path.join(output_dir, 'pgdump_*.dump')))
         if pgdumps:
             return pgdumps[-1]
 
-        jsons = sorted(glob.glob(os.path.join(output_dir, 'backup_*.json')))
-        if not jsons:
+        archives = [
+            path for path in glob.glob(os.path.join(output_dir, f'backup_*{archive.ARCHIVE_SUFFIX}'))
+            if not archive.is_incremental_archive(path)
+        ]
+        legacy_jsons = glob.glob(os.path.join(output_dir, 'backup_*.json'))
+        candidates = sorted(archives + legacy_jsons, key=os.path.basename)
+        if not candidates:
             return None
 
-        latest = jsons[-1]
+        latest = candidates[-1]
+        if latest.endswith(archive.ARCHIVE_SUFFIX):
+            return latest
+
         gz_path = latest + '.gz'
         if not os.path.exists(gz_path):
-            with open(latest, 'rb') as src, gzip.open(gz_path, 'wb', compresslevel=9) as dst:
+            with open(latest, 'rb') as src, gzip.open(gz_path, 'wb', compresslevel=archive.DEFAULT_COMPRESSLEVEL) as dst:
                 shutil.copyfileobj(src, dst)
         return gz_path
 
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backup', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackupRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('full', 'Полный'), ('incremental', 'Инкрементальный')], max_length=16, verbose_name='Тип')),
+                ('status', models.CharField(choices=[('running', 'Выполняется'), ('success', 'Успешно'), ('failed', 'Ошибка')], default='running', max_length=16, verbose_name='Статус')),
+                ('file_path', models.CharField(blank=True, max_length=500, verbose_name='Файл')),
+                ('since', models.DateTimeField(blank=True, help_text='Водяной знак предыдущего бекапа; пусто для полного', null=True, verbose_name='Изменения после')),
+                ('started_at', models.DateTimeField(verbose_name='Начало')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Окончание')),
+                ('duration_seconds', models.FloatField(blank=True, null=True, verbose_name='Длительность, с')),
+                ('size_bytes', models.BigIntegerField(default=0, verbose_name='Размер, байт')),
+                ('objects_count', models.PositiveIntegerField(default=0, verbose_name='Объектов')),
+                ('peak_memory_bytes', models.BigIntegerField(blank=True, null=True, verbose_name='Пик памяти, байт')),
+                ('error', models.TextField(blank=True, verbose_name='Ошибка')),
+            ],
+            options={
+                'verbose_name': 'Запуск бекапа',
+                'verbose_name_plural': 'Журнал бекапов',
+                'ordering': ['-started_at'],
+            },
+        ),
+    ]
@@ -9,3 +9,56 @@ class DatabaseBackup(models.Model):
         verbose_name = 'Резервная копия'
         verbose_name_plural = 'Резервные копии базы данных'
         # Разместим в группе "Администрирование" (app_label совпадает с именем приложения)
+
+
+class BackupRun(models.Model):
+    """Журнал запусков потокового JSON-бекапа (backup_db --format json).
+
+    Время начала успешного запуска служит водяным знаком для следующего
+    инкрементального бекапа: в него попадают строки, изменённые после него.
+    """
+
+    KIND_FULL = 'full'
+    KIND_INCREMENTAL = 'incremental'
+    KIND_CHOICES = [
+        (KIND_FULL, 'Полный'),
+        (KIND_INCREMENTAL, 'Инкрементальный'),
+    ]
+
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCESS = 'success'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_RUNNING, 'Выполняется'),
+        (STATUS_SUCCESS, 'Успешно'),
+        (STATUS_FAILED, 'Ошибка'),
+    ]
+
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES, verbose_name='Тип')
+    status = models.CharField(
+        max_length=16, choices=STATUS_CHOICES, default=STATUS_RUNNING, verbose_name='Статус',
+    )
+    file_path = models.CharField(max_length=500, blank=True, verbose_name='Файл')
+    since = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Изменения после',
+        help_text='Водяной знак предыдущего бекапа; пусто для полного',
+    )
+    started_at = models.DateTimeField(verbose_name='Начало')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='Окончание')
+    duration_seconds = models.FloatField(null=True, blank=True, verbose_name='Длительность, с')
+    size_bytes = models.BigIntegerField(default=0, verbose_name='Размер, байт')
+    objects_count = models.PositiveIntegerField(default=0, verbose_name='Объектов')
+    peak_memory_bytes = models.BigIntegerField(
+        null=True, blank=True, verbose_name='Пик памяти, байт',
+    )
+    error = models.TextField(blank=True, verbose_name='Ошибка')
+
+    class Meta:
+        ordering = ['-started_at']
+        verbose_name = 'Запуск бекапа'
+        verbose_name_plural = 'Журнал бекапов'
+
+    def __str__(self):
+        return f'{self.get_kind_display()} бекап {self.started_at:%Y-%m-%d %H:%M} ({self.get_status_display()})'
@@ -0,0 +1,183 @@
+"""
+Тесты потокового JSON-бекапа (backup_db --format json), restore_backup и восстановления в админке.
+"""
+import gzip
+import json
+import os
+import shutil
+from datetime import timedelta
+from io import StringIO
+from tempfile import mkdtemp
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from backup import archive
+from backup.models import BackupRun
+from insurance_requests.models import InsuranceRequest
+from summaries.models import InsuranceOffer, InsuranceSummary
+
+
+def _read_archive(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class BackupArchiveTests(TestCase):
+    def setUp(self):
+        self.tmp_dir = mkdtemp(prefix='json_backup_test_')
+        self.old_request = InsuranceRequest.objects.create(client_name='Старый', inn='1234567890')
+        self.summary = InsuranceSummary.objects.create(request=self.old_request)
+        InsuranceOffer.objects.create(
+            summary=self.summary, company_name='Альфа', insurance_sum=1000000, insurance_year=1,
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _backup(self, *args):
+        out = StringIO()
+        call_command('backup_db', '--format=json', f'--output-dir={self.tmp_dir}', *args, stdout=out)
+        return BackupRun.objects.order_by('-started_at', '-pk').first(), out.getvalue()
+
+    def _age_everything(self, delta):
+        """Сдвигает водяные знаки и отметки строк в прошлое, чтобы не зависеть от часов."""
+        past = timezone.now() - delta
+        BackupRun.objects.update(started_at=past)
+        for model in (InsuranceRequest, InsuranceSummary):
+            model.objects.update(updated_at=past - timedelta(minutes=1))
+        InsuranceOffer.objects.update(received_at=past - timedelta(minutes=1))
+
+    def test_full_backup_streams_compressed_archive_and_records_run(self):
+        run, output = self._backup('--chunk-size=1')
+
+        self.assertEqual(run.kind, BackupRun.KIND_FULL)
+        self.assertEqual(run.status, BackupRun.STATUS_SUCCESS)
+        self.assertTrue(run.file_path.endswith('.jsonl.gz'))
+        self.assertEqual(run.size_bytes, os.path.getsize(run.file_path))
+        self.assertIsNone(run.peak_memory_bytes)
+        self.assertNotIn('пик памяти', output)
+
+        rows = _read_archive(run.file_path)
+        self.assertEqual(len(rows), run.objects_count)
+        models = [row['model'] for row in rows]
+        # родитель раньше дочерних строк — иначе loaddata упадёт на FK
+        self.assertLess(models.index('insurance_requests.insurancerequest'),
+                        models.index('summaries.insurancesummary'))
+        self.assertNotIn('backup.backuprun', models)
+        self.assertFalse(os.path.exists(run.file_path + '.part'))
+
+    def test_profile_memory_records_peak(self):
+        run, output = self._backup('--profile-memory')
+
+        self.assertGreater(run.peak_memory_bytes, 0)
+        self.assertIn('пик памяти', output)
+
+    def test_incremental_exports_only_rows_changed_after_watermark(self):
+        self._backup()
+        self._age_everything(timedelta(hours=1))
+        InsuranceRequest.objects.create(client_name='Новый', inn='1234567890')
+        InsuranceSummary.objects.filter(pk=self.summary.pk).update(updated_at=timezone.now())
+
+        run, _ = self._backup('--incremental')
+
+        self.assertEqual(run.kind, BackupRun.KIND_INCREMENTAL)
+        self.assertIsNotNone(run.since)
+        self.assertTrue(archive.is_incremental_archive(run.file_path))
+        rows = _read_archive(run.file_path)
+        requests = [r['fields']['client_name'] for r in rows if r['model'] == 'insurance_requests.insurancerequest']
+        self.assertEqual(requests, ['Новый'])
+        self.assertEqual([r['model'] for r in rows].count('summaries.insurancesummary'), 1)
+        # предложение само не менялось, но его свод обновился
+        self.assertEqual([r['model'] for r in rows].count('summaries.insuranceoffer'), 1)
+
+    def test_incremental_without_previous_run_falls_back_to_full(self):
+        run, output = self._backup('--incremental')
+
+        self.assertEqual(run.kind, BackupRun.KIND_FULL)
+        self.assertIn('создан полный', output)
+
+    def test_restore_chain_replays_full_then_incremental(self):
+        full, _ = self._backup()
+        self._age_everything(timedelta(hours=1))
+        new_request = InsuranceRequest.objects.create(client_name='Новый', inn='1234567890')
+        os.rename(full.file_path, os.path.join(self.tmp_dir, 'backup_20200101_000000.jsonl.gz'))
+        self._backup('--incremental')
+
+        InsuranceRequest.objects.all().delete()
+        out = StringIO()
+        call_command('restore_backup', f'--input-dir={self.tmp_dir}', stdout=out)
+
+        self.assertEqual(
+            set(InsuranceRequest.objects.values_list('pk', flat=True)),
+            {self.old_request.pk, new_request.pk},
+        )
+        self.assertEqual(InsuranceOffer.objects.filter(summary=self.summary).count(), 1)
+        self.assertIn('инкремент', out.getvalue())
+
+    def test_admin_restore_accepts_archive_chain(self):
+        full, _ = self._backup()
+        self._age_everything(timedelta(hours=1))
+        new_request = InsuranceRequest.objects.create(client_name='Новый', inn='1234567890')
+        os.rename(full.file_path, os.path.join(self.tmp_dir, 'backup_20200101_000000.jsonl.gz'))
+        incremental, _ = self._backup('--incremental')
+        InsuranceRequest.objects.all().delete()
+
+        admin = User.objects.create_superuser('backup_admin', password='x')
+        self.client.force_login(admin)
+        with open(incremental.file_path, 'rb') as incr_file, \
+                open(os.path.join(self.tmp_dir, 'backup_20200101_000000.jsonl.gz'), 'rb') as full_file:
+            response = self.client.post(
+                reverse('admin:backup_restore'),
+                {'backup_file': [incr_file, full_file], 'confirmed': 'yes'},
+            )
+
+        self.assertRedirects(response, reverse('admin:backup_databasebackup_changelist'))
+        self.assertEqual(
+            set(InsuranceRequest.objects.values_list('pk', flat=True)),
+            {self.old_request.pk, new_request.pk},
+        )
+
+    def test_admin_restore_rejects_incremental_before_full(self):
+        admin = User.objects.create_superuser('backup_admin', password='x')
+        self.client.force_login(admin)
+        files = [
+            SimpleUploadedFile('backup_20260101_030000_incr.jsonl.gz', gzip.compress(b'')),
+            SimpleUploadedFile('backup_20260102_030000.jsonl.gz', gzip.compress(b'')),
+        ]
+
+        response = self.client.post(
+            reverse('admin:backup_restore'), {'backup_file': files, 'confirmed': 'yes'}, follow=True,
+        )
+
+        self.assertContains(response, 'Полный архив может быть только первым')
+        self.assertTrue(InsuranceRequest.objects.filter(pk=self.old_request.pk).exists())
+
+    def test_rotation_keeps_incrementals_of_kept_fulls(self):
+        for name in (
+            'backup_20260101_030000.jsonl.gz',
+            'backup_20260101_120000_incr.jsonl.gz',
+            'backup_20260102_030000.jsonl.gz',
+            'backup_20260102_120000_incr.jsonl.gz',
+        ):
+            open(os.path.join(self.tmp_dir, name), 'wb').close()
+
+        self._backup('--keep=2')
+
+        remaining = sorted(os.listdir(self.tmp_dir))
+        self.assertEqual(len(remaining), 3)
+        self.assertEqual(remaining[:2], ['backup_20260102_030000.jsonl.gz', 'backup_20260102_120000_incr.jsonl.gz'])
+
+    def test_invalid_options_rejected(self):
+        with self.assertRaises(CommandError):
+            call_command('backup_db', '--format=sqlite', '--incremental',
+                         f'--output-dir={self.tmp_dir}', stdout=StringIO())
+        with self.assertRaises(CommandError):
+            call_command('backup_db', '--compress-level=0', f'--output-dir={self.tmp_dir}', stdout=StringIO())
+        with self.assertRaises(CommandError):
+            call_command('restore_backup', f'--input-dir={self.tmp_dir}', stdout=StringIO())
@@ -82,3 +82,36 @@ class PurgeAuditLogTests(TestCase):
         self.assertEqual(self.LoginEvent.objects.count(), 1)
         self.assertEqual(self.CRUDEvent.objects.count(), 1)
         self.assertEqual(self.RequestEvent.objects.count(), 1)
+
+    def test_small_batches_delete_same_rows_and_report_progress(self):
+        out = StringIO()
+        call_command('purge_audit_log', '--batch-size=1', '--sleep=0', '-v', '2', stdout=out)
+
+        self.assertEqual(self.LoginEvent.objects.count(), 2)
+        self.assertEqual(self.CRUDEvent.objects.count(), 2)
+        self.assertEqual(self.RequestEvent.objects.count(), 1)
+        output = out.getvalue()
+        self.assertIn('пачка id', output)
+        self.assertIn('строк/с', output)
+        self.assertIn('макс. блокировка', output)
+
+    def test_purge_in_batches_keeps_rows_inside_id_range_newer_than_cutoff(self):
+        from backup.management.commands.purge_audit_log import purge_in_batches
+
+        # Ещё одна старая запись с id больше, чем у fresh: fresh попадает внутрь диапазона
+        late_old = self.RequestEvent.objects.create(url='/old/', method='GET', remote_ip='127.0.0.1')
+        _backdate(late_old, 'datetime', self.old)
+
+        cutoff = timezone.now() - timedelta(days=2)
+        stats = purge_in_batches(self.RequestEvent, 'datetime', cutoff, batch_size=2)
+
+        self.assertEqual(stats['deleted'], 3)
+        self.assertGreaterEqual(stats['batches'], 1)
+        self.assertEqual(list(self.RequestEvent.objects.values_list('url', flat=True)), ['/test/'])
+        self.assertGreater(self.RequestEvent.objects.get().datetime, cutoff)
+
+    def test_invalid_batch_size_rejected(self):
+        from django.core.management.base import CommandError
+
+        with self.assertRaises(CommandError):
+            call_command('purge_audit_log', '--batch-size=0', stdout=StringIO())
@@ -153,3 +153,23 @@ class SendBackupToVkTests(TestCase):
                 stderr=StringIO(),
             )
         self.assertIn('Не найден', str(ctx.exception))
+
+    # ---------- JSON-архив backup_db
+
+    def test_selects_latest_full_archive_without_recompressing(self):
+        from backup.management.commands.send_backup_to_vk import Command
+
+        os.unlink(self.dump_path)
+        names = (
+            'backup_20260101_030000.json',
+            'backup_20260102_030000.jsonl.gz',
+            'backup_20260103_030000_incr.jsonl.gz',
+        )
+        for name in names:
+            with open(os.path.join(self.tmp_dir, name), 'wb') as f:
+                f.write(b'data')
+
+        selected = Command()._select_file_to_send(self.tmp_dir)
+
+        self.assertEqual(os.path.basename(selected), 'backup_20260102_030000.jsonl.gz')
+        self.assertEqual(sorted(os.listdir(self.tmp_dir)), sorted(names))
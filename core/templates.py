@@ -1,12 +1,65 @@
 """
 Генерация писем по шаблонам
+
+Скомпилированные шаблоны (string.Template) держатся в реестре модуля: файл
+читается один раз и перечитывается только при изменении mtime, так что
+генератор можно создавать на каждый запрос без обращения к диску.
 """
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, List, Optional, Tuple
 import logging
+import os
+import threading
 from string import Template
 
 logger = logging.getLogger(__name__)
 
+# template_path -> (mtime_ns, Template)
+_compiled_templates: Dict[str, Tuple[int, Template]] = {}
+_compiled_templates_lock = threading.Lock()
+
+
+def get_compiled_template(template_path: Optional[str] = None) -> Template:
+    """
+    Возвращает скомпилированный шаблон письма из реестра модуля
+
+    Args:
+        template_path: Путь к файлу шаблона; None — встроенный DEFAULT_TEMPLATE
+
+    Returns:
+        string.Template; при ошибке чтения файла — шаблон по умолчанию
+    """
+    if not template_path:
+        return _DEFAULT_COMPILED
+    try:
+        mtime = os.stat(template_path).st_mtime_ns
+    except OSError as e:
+        logger.error(f"Error loading template from {template_path}: {str(e)}")
+        return _DEFAULT_COMPILED
+
+    cached = _compiled_templates.get(template_path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    with _compiled_templates_lock:
+        cached = _compiled_templates.get(template_path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        try:
+            with open(template_path, 'r', encoding='utf-8') as f:
+                compiled = Template(f.read())
+        except Exception as e:
+            logger.error(f"Error loading template from {template_path}: {str(e)}")
+            return _DEFAULT_COMPILED
+        _compiled_templates[template_path] = (mtime, compiled)
+        logger.debug(f"Email template compiled: {template_path}")
+        return compiled
+
+
+def clear_template_cache() -> None:
+    """Сбрасывает реестр скомпилированных шаблонов (для тестов и отладки)"""
+    with _compiled_templates_lock:
+        _compiled_templates.clear()
+
 
 class EmailTemplateGenerator:
     """Класс для генерации писем по шаблонам"""
@@ -73,16 +126,17 @@ ${franshiza_text}${installment_text}${avtozapusk_text}${transportation_text}${co
         Args:
             template_path: Путь к файлу шаблона (опционально)
         """
-        self.template = self._load_template(template_path) if template_path else self.DEFAULT_TEMPLATE
+        self.template_path = template_path
     
-    def _load_template(self, template_path: str) -> str:
-        """Загружает шаблон из файла"""
-        try:
-            with open(template_path, 'r', encoding='utf-8') as f:
-                return f.read()
-        except Exception as e:
-            logger.error(f"Error loading template from {template_path}: {str(e)}")
-            return self.DEFAULT_TEMPLATE
+    @property
+    def compiled_template(self) -> Template:
+        """Скомпилированный шаблон из реестра (перечитывается при смене mtime файла)"""
+        return get_compiled_template(self.template_path)
+    
+    @property
+    def template(self) -> str:
+        """Текст шаблона"""
+        return self.compiled_template.template
     
     def _get_insurance_type_description(self, insurance_type: str) -> str:
         """
@@ -110,9 +164,8 @@ ${franshiza_text}${installment_text}${avtozapusk_text}${transportation_text}${co
             # Подготавливаем данные для подстановки
             template_data = self._prepare_template_data(data)
             
-            # Создаем Template объект и выполняем подстановку
-            template = Template(self.template)
-            email_body = template.safe_substitute(template_data)
+            # Подстановка в скомпилированный шаблон из реестра
+            email_body = self.compiled_template.safe_substitute(template_data)
             
             logger.info("Email body generated successfully")
             return email_body
@@ -121,6 +174,26 @@ ${franshiza_text}${installment_text}${avtozapusk_text}${transportation_text}${co
             logger.error(f"Error generating email body: {str(e)}")
             raise
     
+    def generate_many(self, items: Iterable[Dict[str, Any]]) -> List[Tuple[str, str]]:
+        """
+        Генерирует темы и тексты писем для набора заявок (например, партии из одной загрузки)
+        
+        Шаблон берётся из реестра один раз на весь набор.
+        
+        Args:
+            items: Словари с данными заявок (InsuranceRequest.to_dict())
+            
+        Returns:
+            Список пар (тема, текст) в порядке items
+        """
+        template = self.compiled_template
+        emails = [
+            (self.generate_subject(data), template.safe_substitute(self._prepare_template_data(data)))
+            for data in items
+        ]
+        logger.info(f"Generated {len(emails)} email(s) in bulk")
+        return emails
+    
     def _get_franchise_text(self, franchise_type: str) -> str:
         """
         Возвращает текст о франшизе в зависимости от типа
@@ -301,3 +374,6 @@ ${franshiza_text}${installment_text}${avtozapusk_text}${transportation_text}${co
             logger.debug(f"sequence_number parameter is deprecated and ignored: {sequence_number}")
         
         return f"заявка {dfa_number} - {branch} - {object_display_name} - {insurance_period}"
+
+
+_DEFAULT_COMPILED = Template(EmailTemplateGenerator.DEFAULT_TEMPLATE)
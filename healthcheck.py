@@ -1,16 +1,17 @@
 #!/usr/bin/env python3
 """
 Enhanced healthcheck script for Django application with HTTPS and domain support
+
+All domains and endpoints are probed concurrently through onlineservice.domain_monitoring.
 """
+import asyncio
 import sys
-import urllib.request
-import urllib.error
-import ssl
-import socket
 import os
 import json
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime
+
+from onlineservice.domain_monitoring import DomainMonitor, split_domain
 
 # Configure logging for SSL-related events
 logging.basicConfig(
@@ -24,117 +25,57 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-def check_endpoint(url, description, timeout=10):
-    """Check a specific endpoint and return success status"""
-    try:
-        # Create request with proper headers
-        request = urllib.request.Request(url)
-        request.add_header('User-Agent', 'HealthCheck/1.0')
-        
-        response = urllib.request.urlopen(request, timeout=timeout)
-        if response.status == 200:
-            print(f"✓ {description} - OK")
-            logger.info(f"Health check passed: {description} ({url})")
-            return True
-        else:
-            print(f"✗ {description} - Failed with status: {response.status}")
-            logger.warning(f"Health check failed: {description} ({url}) - Status: {response.status}")
-            return False
-    except urllib.error.HTTPError as e:
-        print(f"✗ {description} - HTTP Error {e.code}: {e.reason}")
-        logger.error(f"Health check HTTP error: {description} ({url}) - {e.code}: {e.reason}")
-        return False
-    except urllib.error.URLError as e:
-        print(f"✗ {description} - Failed: {e}")
-        logger.error(f"Health check URL error: {description} ({url}) - {e}")
-        return False
-    except Exception as e:
-        print(f"✗ {description} - Error: {e}")
-        logger.error(f"Health check error: {description} ({url}) - {e}")
+def check_endpoint(response, description):
+    """Report an endpoint check result and return success status"""
+    if response.status_code == 200:
+        print(f"✓ {description} - OK")
+        logger.info(f"Health check passed: {description} ({response.url}) - {response.response_time:.3f}s")
+        return True
+    if response.status_code is not None:
+        print(f"✗ {description} - Failed with status: {response.status_code}")
+        logger.warning(f"Health check failed: {description} ({response.url}) - Status: {response.status_code}")
         return False
+    print(f"✗ {description} - Failed: {response.error}")
+    logger.error(f"Health check error: {description} ({response.url}) - {response.error}")
+    return False
 
-def check_ssl_certificate(hostname, port=443):
-    """Check SSL certificate validity and expiration"""
-    try:
-        # Create SSL context
-        context = ssl.create_default_context()
-        
-        # Connect and get certificate
-        with socket.create_connection((hostname, port), timeout=10) as sock:
-            with context.wrap_socket(sock, server_hostname=hostname) as ssock:
-                cert = ssock.getpeercert()
-                
-                # Parse expiration date
-                not_after = datetime.strptime(cert['notAfter'], '%b %d %H:%M:%S %Y %Z')
-                days_until_expiry = (not_after - datetime.now()).days
-                
-                # Check certificate status
-                if days_until_expiry < 0:
-                    print(f"✗ SSL Certificate for {hostname} - EXPIRED {abs(days_until_expiry)} days ago")
-                    logger.error(f"SSL certificate expired for {hostname}: {abs(days_until_expiry)} days ago")
-                    return False
-                elif days_until_expiry <= 7:
-                    print(f"⚠ SSL Certificate for {hostname} - Expires in {days_until_expiry} days (CRITICAL)")
-                    logger.warning(f"SSL certificate for {hostname} expires in {days_until_expiry} days (CRITICAL)")
-                    return False
-                elif days_until_expiry <= 30:
-                    print(f"⚠ SSL Certificate for {hostname} - Expires in {days_until_expiry} days (WARNING)")
-                    logger.warning(f"SSL certificate for {hostname} expires in {days_until_expiry} days")
-                    return True
-                else:
-                    print(f"✓ SSL Certificate for {hostname} - Valid for {days_until_expiry} more days")
-                    logger.info(f"SSL certificate for {hostname} is valid for {days_until_expiry} more days")
-                    return True
-                    
-    except socket.timeout:
-        print(f"✗ SSL Certificate for {hostname} - Connection timeout")
-        logger.error(f"SSL certificate check timeout for {hostname}")
+def check_ssl_certificate(certificate):
+    """Report SSL certificate validity and expiration"""
+    hostname = certificate['hostname']
+    days_until_expiry = certificate['days_until_expiry']
+    status = certificate['status']
+    
+    if status == 'error':
+        print(f"✗ SSL Certificate for {hostname} - {certificate['error']}")
+        logger.error(f"SSL certificate check error for {hostname}: {certificate['error']}")
         return False
-    except ssl.SSLError as e:
-        print(f"✗ SSL Certificate for {hostname} - SSL Error: {e}")
-        logger.error(f"SSL certificate error for {hostname}: {e}")
+    elif status == 'expired':
+        print(f"✗ SSL Certificate for {hostname} - EXPIRED {abs(days_until_expiry)} days ago")
+        logger.error(f"SSL certificate expired for {hostname}: {abs(days_until_expiry)} days ago")
         return False
-    except Exception as e:
-        print(f"✗ SSL Certificate for {hostname} - Error: {e}")
-        logger.error(f"SSL certificate check error for {hostname}: {e}")
+    elif status == 'critical':
+        print(f"⚠ SSL Certificate for {hostname} - Expires in {days_until_expiry} days (CRITICAL)")
+        logger.warning(f"SSL certificate for {hostname} expires in {days_until_expiry} days (CRITICAL)")
         return False
+    elif status == 'warning':
+        print(f"⚠ SSL Certificate for {hostname} - Expires in {days_until_expiry} days (WARNING)")
+        logger.warning(f"SSL certificate for {hostname} expires in {days_until_expiry} days")
+        return True
+    else:
+        print(f"✓ SSL Certificate for {hostname} - Valid for {days_until_expiry} more days")
+        logger.info(f"SSL certificate for {hostname} is valid for {days_until_expiry} more days")
+        return True
 
-def check_https_redirect(domain):
-    """Check if HTTP to HTTPS redirect is working"""
-    try:
-        http_url = f"http://{domain}/"
-        
-        # Create request that doesn't follow redirects automatically
-        request = urllib.request.Request(http_url)
-        request.add_header('User-Agent', 'HealthCheck/1.0')
-        
-        try:
-            response = urllib.request.urlopen(request, timeout=10)
-            # If we get here, there's no redirect
-            print(f"✗ HTTPS Redirect for {domain} - No redirect found")
-            logger.warning(f"No HTTPS redirect found for {domain}")
-            return False
-        except urllib.error.HTTPError as e:
-            if e.code in [301, 302, 303, 307, 308]:
-                # Check if redirect location is HTTPS
-                location = e.headers.get('Location', '')
-                if location.startswith('https://'):
-                    print(f"✓ HTTPS Redirect for {domain} - Working ({e.code})")
-                    logger.info(f"HTTPS redirect working for {domain} ({e.code})")
-                    return True
-                else:
-                    print(f"✗ HTTPS Redirect for {domain} - Redirects to non-HTTPS: {location}")
-                    logger.warning(f"HTTPS redirect for {domain} redirects to non-HTTPS: {location}")
-                    return False
-            else:
-                print(f"✗ HTTPS Redirect for {domain} - HTTP Error {e.code}")
-                logger.error(f"HTTPS redirect check failed for {domain}: HTTP {e.code}")
-                return False
-                
-    except Exception as e:
-        print(f"✗ HTTPS Redirect for {domain} - Error: {e}")
-        logger.error(f"HTTPS redirect check error for {domain}: {e}")
-        return False
+def check_https_redirect(redirect):
+    """Report whether HTTP to HTTPS redirect is working"""
+    domain = redirect['domain']
+    if redirect['redirect_working']:
+        print(f"✓ HTTPS Redirect for {domain} - Working ({redirect['redirect_code']})")
+        logger.info(f"HTTPS redirect working for {domain} ({redirect['redirect_code']})")
+        return True
+    print(f"✗ HTTPS Redirect for {domain} - {redirect['error']}")
+    logger.warning(f"HTTPS redirect check failed for {domain}: {redirect['error']}")
+    return False
 
 def get_configured_domains():
     """Get configured domains from environment variables"""
@@ -148,42 +89,68 @@ def get_configured_domains():
     
     return main_domains, subdomains
 
-def check_domain_health(domain, is_subdomain=False):
-    """Check health of a specific domain"""
-    results = []
-    
-    print(f"\n--- Checking domain: {domain} ---")
-    
-    # Determine protocol based on environment
-    is_https_enabled = os.getenv('SECURE_SSL_REDIRECT', 'False').lower() == 'true'
-    protocol = 'https' if is_https_enabled else 'http'
-    
-    if is_https_enabled:
-        # Check SSL certificate
-        ssl_ok = check_ssl_certificate(domain)
-        results.append(ssl_ok)
-        
-        # Check HTTPS redirect
-        redirect_ok = check_https_redirect(domain)
-        results.append(redirect_ok)
-    
-    # Check main endpoints
+def domain_endpoints(domain, is_subdomain, protocol):
+    """Endpoints to check on a domain: (url, description)"""
     if is_subdomain:
         # For subdomains, check Django application endpoints
-        health_ok = check_endpoint(f'{protocol}://{domain}/healthz/', f'{domain} - Health endpoint')
-        login_ok = check_endpoint(f'{protocol}://{domain}/login/', f'{domain} - Login page')
-        results.extend([health_ok, login_ok])
+        endpoints = [
+            (f'{protocol}://{domain}/healthz/', f'{domain} - Health endpoint'),
+            (f'{protocol}://{domain}/login/', f'{domain} - Login page'),
+        ]
     else:
         # For main domains, check landing page
-        landing_ok = check_endpoint(f'{protocol}://{domain}/', f'{domain} - Landing page')
-        results.append(landing_ok)
+        endpoints = [(f'{protocol}://{domain}/', f'{domain} - Landing page')]
     
     # Check static files
-    static_ok = check_endpoint(f'{protocol}://{domain}/static/favicon.ico', f'{domain} - Static files')
-    results.append(static_ok)
+    endpoints.append((f'{protocol}://{domain}/static/favicon.ico', f'{domain} - Static files'))
+    return endpoints
+
+async def probe_domain(engine, domain, is_subdomain, is_https_enabled):
+    """Run all probes of a domain concurrently"""
+    protocol = 'https' if is_https_enabled else 'http'
+    endpoints = domain_endpoints(domain, is_subdomain, protocol)
+    fetches = [engine.fetch(url) for url, _description in endpoints]
+    
+    probes = {'certificate': None, 'redirect': None}
+    if is_https_enabled:
+        probes['certificate'], probes['redirect'], *responses = await asyncio.gather(
+            engine.check_certificate(*split_domain(domain)), engine.check_https_redirect(domain), *fetches
+        )
+    else:
+        responses = await asyncio.gather(*fetches)
+    probes['endpoints'] = [(response, description) for response, (_url, description) in zip(responses, endpoints)]
+    return probes
+
+def check_domain_health(domain, probes):
+    """Report health of a specific domain from its probes"""
+    results = []
+    
+    print(f"\n--- Checking domain: {domain} ---")
+    
+    if probes['certificate'] is not None:
+        results.append(check_ssl_certificate(probes['certificate']))
+        results.append(check_https_redirect(probes['redirect']))
+    
+    for response, description in probes['endpoints']:
+        results.append(check_endpoint(response, description))
     
     return all(results)
 
+async def probe_all(domains, is_https_enabled):
+    """Probe all (domain, is_subdomain) pairs at once"""
+    async with DomainMonitor(timeout=10, user_agent='HealthCheck/2.0') as engine:
+        return await asyncio.gather(
+            *(probe_domain(engine, domain, is_subdomain, is_https_enabled) for domain, is_subdomain in domains)
+        )
+
+async def probe_local():
+    """Probe local development endpoints at once"""
+    async with DomainMonitor(timeout=10, user_agent='HealthCheck/2.0') as engine:
+        return await asyncio.gather(
+            engine.fetch('http://localhost:8000/healthz/'),
+            engine.fetch('http://localhost:8000/landing/'),
+        )
+
 def save_health_status(results):
     """Save health check results to JSON file"""
     try:
@@ -227,24 +194,15 @@ def main():
         print(f"Main domains: {', '.join(main_domains)}")
         print(f"Subdomains: {', '.join(subdomains)}")
         
-        # Check main domains (landing pages)
-        for domain in main_domains:
-            domain_ok = check_domain_health(domain, is_subdomain=False)
-            results.append({
-                'domain': domain,
-                'type': 'main',
-                'status': domain_ok,
-                'timestamp': datetime.now().isoformat()
-            })
-            if not domain_ok:
-                all_checks_passed = False
+        # Check all domains concurrently, then report them in order
+        domains = [(domain, False) for domain in main_domains] + [(domain, True) for domain in subdomains]
+        all_probes = asyncio.run(probe_all(domains, is_https_enabled))
         
-        # Check subdomains (Django application)
-        for domain in subdomains:
-            domain_ok = check_domain_health(domain, is_subdomain=True)
+        for (domain, is_subdomain), probes in zip(domains, all_probes):
+            domain_ok = check_domain_health(domain, probes)
             results.append({
                 'domain': domain,
-                'type': 'subdomain',
+                'type': 'subdomain' if is_subdomain else 'main',
                 'status': domain_ok,
                 'timestamp': datetime.now().isoformat()
             })
@@ -254,8 +212,10 @@ def main():
     else:
         print("\nDevelopment environment - checking local endpoints")
         
+        health_response, landing_response = asyncio.run(probe_local())
+        
         # Basic health check endpoint
-        health_ok = check_endpoint('http://localhost:8000/healthz/', 'Local health endpoint')
+        health_ok = check_endpoint(health_response, 'Local health endpoint')
         results.append({
             'domain': 'localhost:8000',
             'type': 'local',
@@ -265,7 +225,7 @@ def main():
         })
         
         # Check landing page
-        landing_ok = check_endpoint('http://localhost:8000/landing/', 'Local landing page')
+        landing_ok = check_endpoint(landing_response, 'Local landing page')
         results.append({
             'domain': 'localhost:8000',
             'type': 'local',
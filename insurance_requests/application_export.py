@@ -177,13 +177,15 @@ def build_application_context(insurance_request) -> dict:
         if rows:
             sections.append({'title': section.title, 'rows': rows})
 
-    generated_at = timezone.localtime(timezone.now(), MOSCOW_TZ).strftime('%d.%m.%Y %H:%M')
+    # Отметка — последнее изменение заявки, а не время рендера: PDF кэшируется
+    # по (pk, updated_at), и одинаковые данные дают один и тот же документ
+    data_as_of = timezone.localtime(insurance_request.updated_at or timezone.now(), MOSCOW_TZ)
     return {
         'request': insurance_request,
         'title': insurance_request.get_display_name(),
         'sections': sections,
         'deadline': _deadline(insurance_request),
-        'generated_at': generated_at,
+        'data_as_of': data_as_of.strftime('%d.%m.%Y %H:%M'),
     }
 
 
@@ -204,14 +206,20 @@ def _link_callback(uri: str, rel: str) -> str:
     return uri
 
 
-def render_application_pdf(insurance_request) -> bytes:
-    """Рендерит заявку для страховой в PDF (bytes)."""
+APPLICATION_TEMPLATE = 'insurance_requests/application_pdf.html'
+
+
+def render_application_html(insurance_request) -> str:
+    """HTML «Заявки для страховой» — то, что затем превращается в PDF."""
+    return render_to_string(APPLICATION_TEMPLATE, build_application_context(insurance_request))
+
+
+def html_to_pdf(html: str) -> bytes:
+    """Конвертирует готовый HTML в PDF (bytes). Не трогает БД и настройки Django —
+    вызывается и в процессах пула рендеринга (см. pdf_rendering)."""
     # Импорт внутри функции, чтобы отсутствие пакета не ломало импорт views.
     from xhtml2pdf import pisa
 
-    context = build_application_context(insurance_request)
-    html = render_to_string('insurance_requests/application_pdf.html', context)
-
     buffer = BytesIO()
     status = pisa.CreatePDF(
         src=html,
@@ -222,3 +230,8 @@ def render_application_pdf(insurance_request) -> bytes:
     if status.err:
         raise RuntimeError(f'xhtml2pdf вернул {status.err} ошибок при генерации PDF заявки')
     return buffer.getvalue()
+
+
+def render_application_pdf(insurance_request) -> bytes:
+    """Рендерит заявку для страховой в PDF (bytes)."""
+    return html_to_pdf(render_application_html(insurance_request))
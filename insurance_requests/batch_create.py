@@ -0,0 +1,95 @@
+"""
+Пакетное создание заявок из одной загрузки Excel (Parser V2).
+
+Раньше каждая заявка партии создавалась отдельным `objects.create`: на
+каждую срабатывали pre_save/post_save (StatusEvent, rollup аналитики) и
+сигналы easy-audit, а затем отдельный UPDATE выравнивал created_at. Здесь
+партия пишется за постоянное число запросов: заявки — одним bulk_create,
+общая отметка времени — одним UPDATE, StatusEvent и CRUDEvent — каждый
+своим bulk_create. То, что делали сигналы, воспроизводится явно.
+"""
+import logging
+from datetime import timedelta
+
+import pytz
+from django.contrib.contenttypes.models import ContentType
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from onlineservice.audit import log_bulk_create
+
+from .models import InsuranceRequest
+
+logger = logging.getLogger(__name__)
+
+BULK_BATCH_SIZE = 500
+
+
+def _default_response_deadline(now):
+    """Тот же срок ответа, что ставит InsuranceRequest.save(): +3 часа по Москве."""
+    return now.astimezone(pytz.timezone('Europe/Moscow')) + timedelta(hours=3)
+
+
+def bulk_create_requests(instances, *, changed_by=None):
+    """Сохраняет несохранённые заявки партии и возвращает их с pk.
+
+    Все заявки получают одну и ту же created_at/updated_at, чтобы список
+    заявок (-created_at, source_batch_id, item_no) держал партию вместе.
+    На каждую заявку пишется StatusEvent «создание» и CRUDEvent CREATE —
+    как при обычном save(). changed_by по умолчанию берётся из
+    thread-local текущего пользователя, как в сигналах summaries.
+    """
+    from summaries._current_user import get_current_user
+    from summaries.models import StatusEvent
+    from summaries.services import analytics_rollups
+
+    if not instances:
+        return []
+    if changed_by is None:
+        changed_by = get_current_user()
+
+    now = timezone.now()
+    for instance in instances:
+        if not instance.response_deadline:
+            instance.response_deadline = _default_response_deadline(now)
+
+    using = router.db_for_write(InsuranceRequest)
+    with transaction.atomic(using=using):
+        if not connections[using].features.can_return_rows_from_bulk_insert:
+            # Бэкенд не возвращает pk из bulk INSERT — создаём по одной,
+            # сигналы сами запишут StatusEvent и аудит.
+            for instance in instances:
+                instance.save(using=using)
+        else:
+            InsuranceRequest.objects.using(using).bulk_create(instances, batch_size=BULK_BATCH_SIZE)
+
+        # auto_now_add/auto_now проставляются bulk_create на каждую строку
+        # отдельно — выравниваем их одним UPDATE.
+        pks = [instance.pk for instance in instances]
+        InsuranceRequest.objects.using(using).filter(pk__in=pks).update(created_at=now, updated_at=now)
+        for instance in instances:
+            instance.created_at = now
+            instance.updated_at = now
+
+        if connections[using].features.can_return_rows_from_bulk_insert:
+            content_type = ContentType.objects.get_for_model(InsuranceRequest)
+            StatusEvent.objects.using(using).bulk_create(
+                [
+                    StatusEvent(
+                        content_type=content_type,
+                        object_id=instance.pk,
+                        from_status='',
+                        to_status=instance.status,
+                        changed_by=changed_by,
+                    )
+                    for instance in instances
+                    if instance.status
+                ],
+                batch_size=BULK_BATCH_SIZE,
+            )
+            for created_by_id in {instance.created_by_id for instance in instances}:
+                analytics_rollups.mark_bucket_dirty(now, created_by_id)
+            log_bulk_create(instances)
+
+    logger.info('Bulk-created %d insurance request(s), ids %s..%s', len(pks), pks[0], pks[-1])
+    return instances
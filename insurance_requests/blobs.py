@@ -0,0 +1,78 @@
+"""
+Контентно-адресуемое хранилище вложений (модель AttachmentBlob).
+
+Файл читается порциями, по пути считается SHA-256 и содержимое пишется во
+временный файл; в default_storage оно попадает только если такого blob ещё
+нет. Путь в хранилище: attachments/blobs/<первые 2 символа хеша>/<хеш><расширение>.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+
+from .models import AttachmentBlob
+
+logger = logging.getLogger(__name__)
+
+BLOB_DIR = 'attachments/blobs'
+CHUNK_SIZE = 1024 * 1024
+
+
+def blob_storage_name(digest, original_name=''):
+    ext = os.path.splitext(original_name or '')[1].lower()[:16]
+    return f'{BLOB_DIR}/{digest[:2]}/{digest}{ext}'
+
+
+def store_blob(source, original_name=''):
+    """Сохраняет содержимое файлового объекта source и возвращает AttachmentBlob.
+
+    Одинаковое содержимое сохраняется один раз: при совпадении хеша
+    возвращается существующий blob, а временный файл просто удаляется.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with tempfile.TemporaryFile() as tmp:
+        for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+            tmp.write(chunk)
+            size += len(chunk)
+        sha256 = digest.hexdigest()
+
+        existing = AttachmentBlob.objects.filter(sha256=sha256).first()
+        if existing is not None and default_storage.exists(existing.file.name):
+            return existing
+
+        tmp.seek(0)
+        name = default_storage.save(blob_storage_name(sha256, original_name), File(tmp))
+
+    if existing is not None:
+        # Строка есть, а файл потерян — перезаписываем ссылку на новый файл.
+        existing.file.name = name
+        existing.size = size
+        existing.save(update_fields=['file', 'size'])
+        return existing
+    try:
+        with transaction.atomic():
+            return AttachmentBlob.objects.create(sha256=sha256, file=name, size=size)
+    except IntegrityError:
+        # Параллельная загрузка того же файла успела создать blob первой.
+        default_storage.delete(name)
+        return AttachmentBlob.objects.get(sha256=sha256)
+
+
+def release_blob(blob_id):
+    """Удаляет blob и его файл, если на него больше не ссылается ни одно вложение."""
+    blob = AttachmentBlob.objects.filter(pk=blob_id, attachments__isnull=True).first()
+    if blob is None:
+        return False
+    file_name = blob.file.name
+    blob.delete()
+    try:
+        default_storage.delete(file_name)
+    except Exception as cleanup_error:
+        logger.warning("Could not delete attachment blob %s: %s", file_name, cleanup_error)
+    return True
@@ -0,0 +1,89 @@
+"""
+Серверное хранилище черновиков Parser V2 (модель ParserV2Draft).
+
+Сессия хранит только список draft_id под PARSER_V2_SESSION_KEY; сам
+результат разбора лежит в БД и читается только на странице превью и при
+создании заявки. Доступ к черновику — только его автору.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from .models import ParserV2Draft
+
+logger = logging.getLogger(__name__)
+
+PARSER_V2_SESSION_KEY = 'parser_v2_drafts'
+
+
+def draft_ttl():
+    return timedelta(hours=getattr(settings, 'PARSER_V2_DRAFT_TTL_HOURS', 24))
+
+
+def _session_ids(request):
+    ids = request.session.get(PARSER_V2_SESSION_KEY, [])
+    # Сессии, записанные до переноса черновиков в БД, хранили здесь dict с данными.
+    return list(ids) if isinstance(ids, list) else []
+
+
+def store_draft(request, draft_id, draft):
+    """Сохраняет черновик в БД, а его id — в сессию."""
+    ParserV2Draft.objects.create(
+        draft_id=draft_id,
+        created_by=request.user,
+        storage_path=draft.get('storage_path') or '',
+        original_filename=draft.get('original_filename') or '',
+        parse_result=draft.get('parse_result') or {},
+        expires_at=timezone.now() + draft_ttl(),
+    )
+    ids = _session_ids(request)
+    ids.append(draft_id)
+    request.session[PARSER_V2_SESSION_KEY] = ids
+
+
+def get_draft(request, draft_id):
+    """Черновик в формате dict или None (чужой, просроченный, не из этой сессии)."""
+    if draft_id not in _session_ids(request):
+        return None
+    draft = (
+        ParserV2Draft.objects
+        .select_related('created_by')
+        .filter(draft_id=draft_id, created_by=request.user, expires_at__gt=timezone.now())
+        .first()
+    )
+    return draft.to_draft_dict() if draft else None
+
+
+def pop_draft(request, draft_id):
+    """Удаляет черновик (файл в хранилище остаётся — он уже прикреплён к заявке)."""
+    draft = get_draft(request, draft_id)
+    ParserV2Draft.objects.filter(draft_id=draft_id, created_by=request.user).delete()
+    request.session[PARSER_V2_SESSION_KEY] = [i for i in _session_ids(request) if i != draft_id]
+    return draft
+
+
+def purge_expired_drafts(now=None, *, dry_run=False):
+    """Удаляет просроченные черновики и их загруженные файлы.
+
+    Возвращает (число черновиков, число удалённых файлов).
+    """
+    expired = ParserV2Draft.objects.filter(expires_at__lte=now or timezone.now())
+    if dry_run:
+        return expired.count(), 0
+
+    rows = list(expired.values_list('pk', 'storage_path'))
+    files_deleted = 0
+    for _, storage_path in rows:
+        if not storage_path:
+            continue
+        try:
+            if default_storage.exists(storage_path):
+                default_storage.delete(storage_path)
+                files_deleted += 1
+        except Exception as cleanup_error:
+            logger.warning("Could not delete Parser V2 draft file %s: %s", storage_path, cleanup_error)
+    ParserV2Draft.objects.filter(pk__in=[pk for pk, _ in rows]).delete()
+    return len(rows), files_deleted
@@ -0,0 +1,107 @@
+"""
+Индекс изменённых полей (модель FieldChange) над журналом django-easy-audit.
+
+Каждое событие CRUDEvent UPDATE раскладывается на строки
+(content_type, object_id, field_name, changed_at, user_id, event_id) — JSON
+changed_fields разбирается один раз, при записи события. Бейджи «правки после
+создания», дашборд правок и timeline сотрудника читают индекс SQL-запросами.
+
+Как поддерживается:
+- CRUDEvent, записанный через ORM (штатный backend easy-audit), индексируется
+  сигналом post_save (signals.py);
+- CRUDEvent из буфера AuditSink (bulk_create, без сигналов) индексирует сам
+  AuditSink после записи пачки;
+- события, записанные до появления индекса, добавляет команда
+  backfill_field_changes (повторный запуск безопасен: пара событие+поле
+  уникальна);
+- purge_audit_log удаляет строки индекса по тому же сроку, что и CRUDEvent.
+"""
+import json
+import logging
+
+from django.db import transaction
+
+from .models import FieldChange
+
+logger = logging.getLogger(__name__)
+
+# Меняются при каждом сохранении и никем не запрашиваются
+UNINDEXED_FIELDS = frozenset({'updated_at'})
+
+BACKFILL_BATCH_SIZE = 2000
+
+
+def changed_field_names(changed_fields_raw):
+    """Имена полей из CRUDEvent.changed_fields; [] для пустого или битого JSON."""
+    if not changed_fields_raw:
+        return []
+    try:
+        delta = json.loads(changed_fields_raw)
+    except (TypeError, ValueError):
+        return []
+    if not isinstance(delta, dict):
+        return []
+    return [name for name in delta if name not in UNINDEXED_FIELDS]
+
+
+def rows_for_event(event):
+    """Строки FieldChange для одного CRUDEvent (только UPDATE)."""
+    from easyaudit.models import CRUDEvent
+
+    if event.event_type != CRUDEvent.UPDATE or not event.pk:
+        return []
+    return [
+        FieldChange(
+            content_type_id=event.content_type_id,
+            object_id=str(event.object_id),
+            field_name=field_name[:100],
+            changed_at=event.datetime,
+            user_id=event.user_id,
+            event_id=event.pk,
+        )
+        for field_name in changed_field_names(event.changed_fields)
+    ]
+
+
+def index_crud_events(events):
+    """Дописывает в индекс поля событий CRUDEvent. Возвращает число строк."""
+    rows = [row for event in events for row in rows_for_event(event)]
+    if not rows:
+        return 0
+    try:
+        # Savepoint: ошибка индекса не должна ломать внешнюю транзакцию
+        with transaction.atomic():
+            FieldChange.objects.bulk_create(rows, batch_size=BACKFILL_BATCH_SIZE, ignore_conflicts=True)
+    except Exception:
+        # Индекс — производные данные: сбой не должен ронять сохранение объекта
+        logger.exception('Failed to index %d changed fields', len(rows))
+        return 0
+    return len(rows)
+
+
+def backfill(*, batch_size=BACKFILL_BATCH_SIZE, since=None, on_batch=None):
+    """Индексирует уже записанные CRUDEvent UPDATE пачками по pk.
+
+    since — только события не раньше этой даты. on_batch(stats, last_pk)
+    вызывается после каждой пачки. Возвращает {'events': ..., 'rows': ...}.
+    """
+    from easyaudit.models import CRUDEvent
+
+    events = CRUDEvent.objects.filter(event_type=CRUDEvent.UPDATE).only(
+        'id', 'event_type', 'content_type_id', 'object_id', 'changed_fields', 'datetime', 'user_id',
+    ).order_by('pk')
+    if since is not None:
+        events = events.filter(datetime__gte=since)
+
+    stats = {'events': 0, 'rows': 0}
+    last_pk = 0
+    while True:
+        batch = list(events.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            break
+        last_pk = batch[-1].pk
+        stats['events'] += len(batch)
+        stats['rows'] += index_crud_events(batch)
+        if on_batch is not None:
+            on_batch(stats, last_pk)
+    return stats
@@ -0,0 +1,50 @@
+"""
+Заполняет индекс изменённых полей (FieldChange) по уже записанным CRUDEvent.
+
+Новые события индексируются при записи; команда нужна один раз после
+миграции — для истории — и после сбоев записи индекса. Повторный запуск
+безопасен: уже проиндексированные пары событие+поле пропускаются.
+
+Использование:
+    python manage.py backfill_field_changes
+    python manage.py backfill_field_changes --days 90
+    python manage.py backfill_field_changes --batch-size 5000 -v 2
+"""
+import logging
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from insurance_requests.field_changes import BACKFILL_BATCH_SIZE, backfill
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Заполняет индекс изменённых полей FieldChange по журналу CRUDEvent'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help='Только события за последние N дней (по умолчанию — все)')
+        parser.add_argument('--batch-size', type=int, default=BACKFILL_BATCH_SIZE,
+                            help=f'Событий в пачке (default: {BACKFILL_BATCH_SIZE})')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size должен быть положительным')
+        since = None
+        if options['days'] is not None:
+            if options['days'] <= 0:
+                raise CommandError('--days должен быть положительным')
+            since = timezone.now() - timedelta(days=options['days'])
+
+        def _on_batch(stats, last_pk):
+            if options['verbosity'] >= 2:
+                self.stdout.write(f'  событий: {stats["events"]}, строк: {stats["rows"]} (до id {last_pk})')
+
+        stats = backfill(batch_size=options['batch_size'], since=since, on_batch=_on_batch)
+        logger.info('backfill_field_changes: %d events, %d rows', stats['events'], stats['rows'])
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Обработано событий: {stats["events"]}, изменённых полей: {stats["rows"]}'
+        ))
@@ -0,0 +1,37 @@
+"""
+Удаляет просроченные черновики загрузки Parser V2 и их файлы из хранилища.
+
+Черновик создаётся при разборе файла на странице загрузки и удаляется при
+создании заявки; брошенные превью живут PARSER_V2_DRAFT_TTL_HOURS часов.
+
+Использование:
+    python manage.py purge_parser_v2_drafts
+    python manage.py purge_parser_v2_drafts --dry-run
+"""
+import logging
+
+from django.core.management.base import BaseCommand
+
+from insurance_requests.drafts import purge_expired_drafts
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Удаляет просроченные черновики загрузки Parser V2 и их файлы'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Показать сколько будет удалено, но не удалять')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            count, _ = purge_expired_drafts(dry_run=True)
+            self.stdout.write(f'[dry-run] Было бы удалено черновиков: {count}')
+            return
+
+        count, files = purge_expired_drafts()
+        logger.info('purge_parser_v2_drafts: deleted %d drafts, %d files', count, files)
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Удалено черновиков: {count}, файлов: {files}'
+        ))
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-18 21:01
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('insurance_requests', '0043_insurancerequest_object_description'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParserV2Draft',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('draft_id', models.CharField(max_length=32, unique=True, verbose_name='ID черновика')),
+                ('storage_path', models.CharField(blank=True, max_length=500, verbose_name='Файл в хранилище')),
+                ('original_filename', models.CharField(blank=True, max_length=255, verbose_name='Имя файла')),
+                ('parse_result', models.JSONField(default=dict, verbose_name='Результат разбора')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создан')),
+                ('expires_at', models.DateTimeField(db_index=True, verbose_name='Истекает')),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='parser_v2_drafts', to=settings.AUTH_USER_MODEL, verbose_name='Загрузил')),
+            ],
+            options={
+                'verbose_name': 'Черновик загрузки Parser V2',
+                'verbose_name_plural': 'Черновики загрузки Parser V2',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
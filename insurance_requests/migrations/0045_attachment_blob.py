@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-18 21:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('insurance_requests', '0044_parserv2draft'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttachmentBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True, verbose_name='SHA-256')),
+                ('file', models.FileField(max_length=255, upload_to='', verbose_name='Файл')),
+                ('size', models.BigIntegerField(default=0, verbose_name='Размер, байт')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата загрузки')),
+            ],
+            options={
+                'verbose_name': 'Содержимое вложения',
+                'verbose_name_plural': 'Содержимое вложений',
+            },
+        ),
+        migrations.AlterField(
+            model_name='requestattachment',
+            name='file',
+            field=models.FileField(max_length=255, upload_to='attachments/%Y/%m/%d/', verbose_name='Файл'),
+        ),
+        migrations.AddField(
+            model_name='requestattachment',
+            name='blob',
+            field=models.ForeignKey(blank=True, help_text='Общий файл для вложений с одинаковым содержимым; пусто у старых вложений', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='attachments', to='insurance_requests.attachmentblob', verbose_name='Содержимое'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-18 22:34
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('insurance_requests', '0045_attachment_blob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FieldChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.CharField(max_length=255, verbose_name='ID объекта')),
+                ('field_name', models.CharField(max_length=100, verbose_name='Поле')),
+                ('changed_at', models.DateTimeField(verbose_name='Дата изменения')),
+                ('event_id', models.PositiveBigIntegerField(verbose_name='ID события CRUDEvent')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype', verbose_name='Тип объекта')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Кто изменил')),
+            ],
+            options={
+                'verbose_name': 'Изменение поля',
+                'verbose_name_plural': 'Изменения полей',
+                'ordering': ['-changed_at'],
+                'indexes': [models.Index(fields=['content_type', 'object_id', 'changed_at'], name='insurance_r_content_3bca48_idx'), models.Index(fields=['content_type', 'changed_at', 'field_name'], name='insurance_r_content_b2e293_idx'), models.Index(fields=['changed_at'], name='insurance_r_changed_f4e538_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='fieldchange',
+            constraint=models.UniqueConstraint(fields=('event_id', 'field_name'), name='field_change_event_field_unique'),
+        ),
+    ]
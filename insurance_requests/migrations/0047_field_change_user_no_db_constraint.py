@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:30
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('insurance_requests', '0046_field_change'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='fieldchange',
+            name='user',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Кто изменил'),
+        ),
+    ]
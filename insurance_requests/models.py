@@ -5,7 +5,6 @@ from django.utils import timezone
 from datetime import timedelta
 from decimal import Decimal, InvalidOperation
 from typing import Dict, Any
-import json
 import pytz
 
 
@@ -479,45 +478,31 @@ class InsuranceRequest(models.Model):
     def parser_v2_post_creation_changes(self):
         """Поля, изменённые ПОСЛЕ создания заявки (точка 3 vs точка 2).
 
-        Источник — журнал django-easy-audit (CRUDEvent, UPDATE). Возвращает
-        ``{field_name: {'by': username, 'at': datetime}}`` с самым свежим
-        изменением по каждому полю. Пусто для несохранённых записей и когда
-        audit недоступен (graceful degradation: текущее значение всё равно
-        показывается, просто без подсветки «изменено после создания»).
+        Источник — индекс FieldChange над журналом django-easy-audit (CRUDEvent,
+        UPDATE). Возвращает ``{field_name: {'by': username, 'at': datetime}}``
+        с самым свежим изменением по каждому полю. Пусто для несохранённых
+        записей и когда audit недоступен (graceful degradation: текущее значение
+        всё равно показывается, просто без подсветки «изменено после создания»).
         """
         if not self.pk:
             return {}
         try:
-            from easyaudit.models import CRUDEvent
             from django.contrib.contenttypes.models import ContentType
-        except Exception:  # noqa: BLE001
-            return {}
-        try:
             ct = ContentType.objects.get_for_model(InsuranceRequest)
-            cutoff = None
-            if self.created_at:
-                cutoff = self.created_at + self._POST_CREATE_EPSILON
-            events = (
-                CRUDEvent.objects
-                .filter(content_type=ct, object_id=str(self.pk), event_type=CRUDEvent.UPDATE)
+            rows = (
+                FieldChange.objects
+                .filter(content_type=ct, object_id=str(self.pk))
+                .exclude(field_name__in=('updated_at', 'status'))
                 .select_related('user')
-                .order_by('-datetime')
+                .order_by('-changed_at', '-event_id')
             )
+            if self.created_at:
+                rows = rows.filter(changed_at__gt=self.created_at + self._POST_CREATE_EPSILON)
             changes: Dict[str, Any] = {}
-            for evt in events:
-                if cutoff and evt.datetime and evt.datetime <= cutoff:
-                    continue
-                try:
-                    delta = json.loads(evt.changed_fields) if evt.changed_fields else {}
-                except (TypeError, ValueError):
-                    continue
-                if not isinstance(delta, dict):
-                    continue
-                editor = self._user_display_name(evt.user) if evt.user_id else ''
-                for field_name in delta:
-                    if field_name in {'updated_at', 'status'} or field_name in changes:
-                        continue
-                    changes[field_name] = {'by': editor, 'at': evt.datetime}
+            for row in rows:
+                if row.field_name not in changes:
+                    editor = self._user_display_name(row.user) if row.user_id else ''
+                    changes[row.field_name] = {'by': editor, 'at': row.changed_at}
             return changes
         except Exception:  # noqa: BLE001
             return {}
@@ -533,46 +518,37 @@ class InsuranceRequest(models.Model):
     def post_creation_counts_for(cls, requests):
         """Батч-подсчёт правок после создания: {request_id: число полей}.
 
-        Один запрос к CRUDEvent на весь список (без N+1) — для бейджа в списке
-        заявок. Считаются уникальные отслеживаемые поля, изменённые после
-        создания (хвост создания в пределах эпсилона отсекается).
+        Один агрегирующий запрос к индексу FieldChange на весь список (без N+1)
+        — для бейджа в списке заявок. Считаются уникальные отслеживаемые поля,
+        изменённые после создания (хвост создания в пределах эпсилона
+        отсекается).
         """
         items = [r for r in requests if getattr(r, 'pk', None)]
         if not items:
             return {}
-        try:
-            from easyaudit.models import CRUDEvent
-            from django.contrib.contenttypes.models import ContentType
-        except Exception:  # noqa: BLE001
-            return {}
         from .edit_tracking import get_scalar_field_meta, get_object_field_meta
-        tracked = set(get_scalar_field_meta()) | set(get_object_field_meta())
+        tracked = (set(get_scalar_field_meta()) | set(get_object_field_meta())) - {'updated_at', 'status'}
         created_map = {str(r.pk): r.created_at for r in items}
         try:
+            from django.contrib.contenttypes.models import ContentType
+            from django.db.models import Max
             ct = ContentType.objects.get_for_model(cls)
-            events = CRUDEvent.objects.filter(
-                content_type=ct, event_type=CRUDEvent.UPDATE,
-                object_id__in=list(created_map.keys()),
-            ).values('object_id', 'changed_fields', 'datetime')
-            per_request = {}
-            for evt in events:
-                oid = evt['object_id']
-                created = created_map.get(oid)
-                edt = evt['datetime']
-                if created and edt and edt <= created + cls._POST_CREATE_EPSILON:
-                    continue
-                try:
-                    delta = json.loads(evt['changed_fields']) if evt['changed_fields'] else {}
-                except (TypeError, ValueError):
-                    continue
-                if not isinstance(delta, dict):
+            last_changes = (
+                FieldChange.objects
+                .filter(content_type=ct, object_id__in=list(created_map), field_name__in=tracked)
+                .values('object_id', 'field_name')
+                .annotate(last_changed_at=Max('changed_at'))
+                .order_by()
+            )
+            counts = {}
+            for row in last_changes:
+                created = created_map.get(row['object_id'])
+                # Поле правили после создания, если его последняя правка позже хвоста создания
+                if created and row['last_changed_at'] <= created + cls._POST_CREATE_EPSILON:
                     continue
-                fields = per_request.setdefault(oid, set())
-                for field_name in delta:
-                    if field_name in {'updated_at', 'status'} or field_name not in tracked:
-                        continue
-                    fields.add(field_name)
-            return {int(oid): len(fields) for oid, fields in per_request.items() if fields}
+                rid = int(row['object_id'])
+                counts[rid] = counts.get(rid, 0) + 1
+            return counts
         except Exception:  # noqa: BLE001
             return {}
 
@@ -816,11 +792,42 @@ class InsuranceRequest(models.Model):
             return 'Свод недоступен'
 
 
+class AttachmentBlob(models.Model):
+    """Содержимое файла-вложения, сохранённое один раз под своим SHA-256.
+
+    Заявки партии Parser V2 ссылаются на один и тот же исходный Excel: файл
+    пишется в хранилище один раз, а каждое вложение указывает на него через
+    `blob`. Когда на blob не остаётся ссылок, файл и строка удаляются
+    (сигнал post_delete у RequestAttachment).
+    """
+
+    sha256 = models.CharField(max_length=64, unique=True, verbose_name='SHA-256')
+    file = models.FileField(max_length=255, verbose_name='Файл')
+    size = models.BigIntegerField(default=0, verbose_name='Размер, байт')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата загрузки')
+
+    class Meta:
+        verbose_name = 'Содержимое вложения'
+        verbose_name_plural = 'Содержимое вложений'
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.size} байт)"
+
+
 class RequestAttachment(models.Model):
     """Модель вложений к заявке"""
     
     request = models.ForeignKey(InsuranceRequest, on_delete=models.CASCADE, related_name='attachments')
-    file = models.FileField(upload_to='attachments/%Y/%m/%d/', verbose_name='Файл')
+    file = models.FileField(upload_to='attachments/%Y/%m/%d/', max_length=255, verbose_name='Файл')
+    blob = models.ForeignKey(
+        AttachmentBlob,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='attachments',
+        verbose_name='Содержимое',
+        help_text='Общий файл для вложений с одинаковым содержимым; пусто у старых вложений',
+    )
     original_filename = models.CharField(max_length=255, verbose_name='Оригинальное имя файла')
     file_type = models.CharField(max_length=50, verbose_name='Тип файла')
     uploaded_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата загрузки')
@@ -884,3 +891,95 @@ class RequestFieldEdit(models.Model):
 
     def __str__(self):
         return f"{self.field_label}: {self.original_value!r} → {self.modified_value!r}"
+
+
+class ParserV2Draft(models.Model):
+    """Черновик загрузки Parser V2 между разбором файла и созданием заявки.
+
+    Результат разбора (данные, предупреждения, raw_debug, объекты партии)
+    хранится здесь, а в сессии — только список draft_id: сессия пишется на
+    каждый запрос (SESSION_SAVE_EVERY_REQUEST), и её размер не должен зависеть
+    от открытых черновиков. Просроченные черновики вместе с загруженными
+    файлами удаляет команда purge_parser_v2_drafts.
+    """
+
+    draft_id = models.CharField(max_length=32, unique=True, verbose_name='ID черновика')
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='parser_v2_drafts',
+        verbose_name='Загрузил',
+    )
+    storage_path = models.CharField(max_length=500, blank=True, verbose_name='Файл в хранилище')
+    original_filename = models.CharField(max_length=255, blank=True, verbose_name='Имя файла')
+    parse_result = models.JSONField(default=dict, verbose_name='Результат разбора')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Создан')
+    expires_at = models.DateTimeField(db_index=True, verbose_name='Истекает')
+
+    class Meta:
+        verbose_name = 'Черновик загрузки Parser V2'
+        verbose_name_plural = 'Черновики загрузки Parser V2'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.original_filename or self.draft_id} ({self.created_by})"
+
+    def to_draft_dict(self):
+        """Словарь в прежнем «сессионном» формате, который ждут views."""
+        return {
+            'storage_path': self.storage_path,
+            'original_filename': self.original_filename,
+            'parse_result': self.parse_result,
+            'created_at': self.created_at.isoformat() if self.created_at else '',
+            'created_by_user': self.created_by.username,
+        }
+
+
+class FieldChange(models.Model):
+    """Одно изменённое поле из события django-easy-audit (CRUDEvent UPDATE).
+
+    Индекс над CRUDEvent.changed_fields: вопросы «какие поля меняли после
+    создания» и «правки по полям/редакторам за период» решаются SQL-агрегатами
+    вместо разбора JSON каждого события. Строки дописываются при записи
+    CRUDEvent (field_changes.index_crud_events), историю заполняет команда
+    backfill_field_changes, старые строки чистит purge_audit_log вместе с
+    CRUDEvent. Значения «было/стало» остаются в самом событии (event_id).
+    """
+
+    content_type = models.ForeignKey(
+        'contenttypes.ContentType',
+        on_delete=models.CASCADE,
+        verbose_name='Тип объекта',
+    )
+    object_id = models.CharField(max_length=255, verbose_name='ID объекта')
+    field_name = models.CharField(max_length=100, verbose_name='Поле')
+    changed_at = models.DateTimeField(verbose_name='Дата изменения')
+    # Как у CRUDEvent.user — без ограничения в БД: старые события ссылаются
+    # на удалённых пользователей, и такая строка не должна ронять пачку индекса
+    user = models.ForeignKey(
+        User,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        db_constraint=False,
+        related_name='+',
+        verbose_name='Кто изменил',
+    )
+    # Без внешнего ключа: purge_audit_log удаляет CRUDEvent сырым DELETE в обход коллектора
+    event_id = models.PositiveBigIntegerField(verbose_name='ID события CRUDEvent')
+
+    class Meta:
+        verbose_name = 'Изменение поля'
+        verbose_name_plural = 'Изменения полей'
+        ordering = ['-changed_at']
+        constraints = [
+            models.UniqueConstraint(fields=['event_id', 'field_name'], name='field_change_event_field_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['content_type', 'object_id', 'changed_at']),
+            models.Index(fields=['content_type', 'changed_at', 'field_name']),
+            models.Index(fields=['changed_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.content_type_id}:{self.object_id}.{self.field_name} @ {self.changed_at:%Y-%m-%d %H:%M}"
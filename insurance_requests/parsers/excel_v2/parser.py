@@ -8,15 +8,19 @@ from decimal import Decimal, InvalidOperation
 import logging
 import os
 import re
+import sys
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 import pandas as pd
+from django.conf import settings
 from django.utils import timezone
 from openpyxl import load_workbook
 from openpyxl.utils import get_column_letter
 
 from core.excel_utils import AVAILABLE_BRANCHES, map_branch_name
 
+from .profiling import ParseProfiler, active_profiler, counting_regex
+
 logger = logging.getLogger(__name__)
 
 
@@ -535,7 +539,20 @@ def normalize_premium_frequency_label(value: Any) -> Optional[str]:
 class ExcelRequestParserV2:
     """Label-based Parser V2 that never blocks request creation."""
 
+    def __init__(self, profile: Optional[bool] = None) -> None:
+        # None — follow the PARSER_V2_PROFILING setting.
+        self.profile = getattr(settings, "PARSER_V2_PROFILING", False) if profile is None else profile
+
     def parse(self, file_path: str, original_filename: str = "") -> ParserV2Result:
+        if not self.profile:
+            return self._parse(file_path, original_filename)
+        profiler = ParseProfiler()
+        with profiler.activate(), profiler.instrumented(self), counting_regex(sys.modules[__name__]):
+            result = self._parse(file_path, original_filename)
+        result.raw_debug["timings"] = profiler.report()
+        return result
+
+    def _parse(self, file_path: str, original_filename: str = "") -> ParserV2Result:
         warnings: List[Dict[str, str]] = []
         source_map: Dict[str, str] = {}
 
@@ -574,8 +591,13 @@ class ExcelRequestParserV2:
                 original_filename=original_filename,
             )
 
+        profiler = active_profiler()
+        if profiler is not None:
+            cells = profiler.track(cells)
         data = self._default_data()
         rows = self._rows(cells)
+        if profiler is not None:
+            rows = profiler.track_rows(rows)
 
         client_name, source = self._extract_client_name(cells, rows)
         if client_name:
@@ -0,0 +1,243 @@
+"""Opt-in per-stage profiling for Parser V2.
+
+When profiling is on (``PARSER_V2_PROFILING`` or ``ExcelRequestParserV2(profile=True)``)
+the parser wraps its stage methods (``PROFILED_STAGES``) on the instance and
+reports, per stage:
+
+* ``calls`` — how many times the stage ran;
+* ``ms`` / ``self_ms`` — wall time including / excluding nested stages
+  (``_extract_labeled_value`` runs inside other extractors);
+* ``cells`` — grid cells iterated while the stage was innermost;
+* ``regex`` — regular-expression evaluations made by the parser module.
+
+The report lands in ``ParserV2Result.raw_debug["timings"]`` and travels with
+the request's ``additional_data["parser_v2"]["raw_debug"]``. With profiling
+off nothing is wrapped and the parser calls the plain ``re`` module: the
+counting proxy replaces the module's ``re`` global only while a profiled
+parse runs (``counting_regex``). Patterns compiled at import time are not
+counted.
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+import re as _re
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# Stage methods of ExcelRequestParserV2 that get timed, in pipeline order.
+PROFILED_STAGES = (
+    "_read_cells",
+    "_rows",
+    "_extract_client_name",
+    "_extract_inn",
+    "_extract_labeled_value",
+    "_extract_branch",
+    "_extract_dfa_number",
+    "_extract_insurance_type",
+    "_extract_insurance_period",
+    "_extract_objects",
+    "_detect_application_type",
+    "_extract_franchise_type",
+    "_extract_autostart",
+    "_extract_transportation_required",
+    "_extract_transportation_details",
+    "_contains_any",
+    "_extract_manufacturing_year",
+    "_extract_asset_status",
+    "_extract_telematics_complex",
+    "_extract_insured_party",
+    "_extract_property_location_right_holder",
+    "_extract_premium_frequency",
+    "_build_warnings",
+    "_build_notes",
+    "_calculate_confidence",
+)
+# Work done in parse() itself (grouping, payload assembly) is reported here.
+OTHER_STAGE = "parse"
+
+_active = threading.local()
+
+_swap_lock = threading.Lock()
+_swap_depth = 0
+
+
+def active_profiler() -> Optional["ParseProfiler"]:
+    return getattr(_active, "profiler", None)
+
+
+class ParseProfiler:
+    """Collects timings and counters for one parse() call."""
+
+    def __init__(self) -> None:
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        # [stage name, ms spent in stages nested into it]
+        self._stack: List[list] = [[OTHER_STAGE, 0.0]]
+        self._started = 0.0
+        self.total_ms = 0.0
+
+    def _stage(self, name: str) -> Dict[str, Any]:
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = {"calls": 0, "ms": 0.0, "self_ms": 0.0, "cells": 0, "regex": 0}
+        return stage
+
+    @contextmanager
+    def activate(self) -> Iterator["ParseProfiler"]:
+        """Make this profiler current for the thread for the duration of a parse."""
+        previous = active_profiler()
+        _active.profiler = self
+        self._started = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.total_ms = (time.perf_counter() - self._started) * 1e3
+            _active.profiler = previous
+
+    @contextmanager
+    def instrumented(self, parser: Any) -> Iterator[Any]:
+        """Shadow the stage methods of ``parser`` with timed wrappers (instance only)."""
+        wrapped = []
+        for name in PROFILED_STAGES:
+            method = getattr(parser, name, None)
+            if method is not None and name not in vars(parser):
+                setattr(parser, name, self._timed(name, method))
+                wrapped.append(name)
+        try:
+            yield parser
+        finally:
+            for name in wrapped:
+                delattr(parser, name)
+
+    def _timed(self, name: str, method):
+        def timed(*args, **kwargs):
+            stage = self._stage(name)
+            stage["calls"] += 1
+            frame = [name, 0.0]
+            self._stack.append(frame)
+            started = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = (time.perf_counter() - started) * 1e3
+                self._stack.pop()
+                self._stack[-1][1] += elapsed
+                stage["ms"] += elapsed
+                stage["self_ms"] += elapsed - frame[1]
+
+        return timed
+
+    def count_cells(self, n: int = 1) -> None:
+        self._stage(self._stack[-1][0])["cells"] += n
+
+    def count_regex(self) -> None:
+        self._stage(self._stack[-1][0])["regex"] += 1
+
+    def track(self, cells: Iterable[Any]) -> "CountingCells":
+        return CountingCells(cells, self)
+
+    def track_rows(self, rows: Dict[int, List[Any]]) -> Dict[int, "CountingCells"]:
+        return {row: CountingCells(row_cells, self) for row, row_cells in rows.items()}
+
+    def report(self) -> Dict[str, Any]:
+        other = self._stage(OTHER_STAGE)
+        other["calls"] = 1
+        other["ms"] = self.total_ms
+        other["self_ms"] = max(self.total_ms - self._stack[0][1], 0.0)
+        stages = {
+            name: {
+                "calls": stage["calls"],
+                "ms": round(stage["ms"], 3),
+                "self_ms": round(stage["self_ms"], 3),
+                "cells": stage["cells"],
+                "regex": stage["regex"],
+            }
+            for name, stage in sorted(self.stages.items(), key=lambda item: -item[1]["self_ms"])
+        }
+        return {
+            "total_ms": round(self.total_ms, 3),
+            "cells_scanned": sum(stage["cells"] for stage in self.stages.values()),
+            "regex_evals": sum(stage["regex"] for stage in self.stages.values()),
+            "stages": stages,
+        }
+
+
+class CountingCells(list):
+    """A list of GridCell that reports every iterated cell to its profiler."""
+
+    def __init__(self, cells: Iterable[Any], profiler: ParseProfiler) -> None:
+        super().__init__(cells)
+        self._profiler = profiler
+
+    def __iter__(self):
+        count = self._profiler.count_cells
+        for cell in super().__iter__():
+            count()
+            yield cell
+
+
+def _counted(name: str):
+    def evaluate(self, *args, **kwargs):
+        profiler = active_profiler()
+        if profiler is not None:
+            profiler.count_regex()
+        return getattr(self._target, name)(*args, **kwargs)
+
+    evaluate.__name__ = name
+    return evaluate
+
+
+_EVALUATIONS = ("search", "match", "fullmatch", "sub", "subn", "findall", "finditer", "split")
+
+
+class _CountingPattern:
+    """Compiled pattern whose evaluations are counted by the active profiler."""
+
+    def __init__(self, pattern: "_re.Pattern[str]") -> None:
+        self._target = pattern
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._target, name)
+
+
+class _CountingRegex:
+    """Drop-in for the ``re`` module that counts evaluations while a profiler is active."""
+
+    _target = _re
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(_re, name)
+
+    def compile(self, pattern, flags: int = 0) -> _CountingPattern:
+        return _CountingPattern(_re.compile(pattern, flags))
+
+
+for _name in _EVALUATIONS:
+    setattr(_CountingPattern, _name, _counted(_name))
+    setattr(_CountingRegex, _name, _counted(_name))
+del _name
+
+regex = _CountingRegex()
+
+
+@contextmanager
+def counting_regex(module: Any) -> Iterator[None]:
+    """Point ``module.re`` at the counting proxy while any profiled parse runs.
+
+    The swap is process-wide, so it is reference-counted across threads.
+    Unprofiled parses that overlap it are not counted (there is no active
+    profiler in their thread); they only pay the proxy's overhead meanwhile.
+    """
+    global _swap_depth
+    with _swap_lock:
+        if _swap_depth == 0:
+            module.re = regex
+        _swap_depth += 1
+    try:
+        yield
+    finally:
+        with _swap_lock:
+            _swap_depth -= 1
+            if _swap_depth == 0:
+                module.re = _re
@@ -0,0 +1,199 @@
+"""Рендеринг PDF «Заявки для страховой» в отдельных процессах.
+
+xhtml2pdf — чистый Python и держит GIL: один PDF — это сотни миллисекунд
+CPU, а первый рендер в процессе дольше секунды (импорт reportlab, разбор
+TTF-шрифтов из core/fonts). Поэтому:
+
+- HTML рендерится в веб-воркере (нужны БД и шаблоны Django), а конвертация
+  HTML → PDF уходит в пул процессов размером PDF_RENDER_WORKERS. Каждый
+  процесс пула при старте один раз прогревается пробным документом с теми же
+  шрифтами.
+- Одновременно в пуле не больше PDF_RENDER_MAX_PENDING задач; если места нет
+  дольше PDF_RENDER_TIMEOUT секунд, поднимается PdfRenderBusy.
+- Готовые PDF кладутся в кэш (пространство application_pdf) с ключом по pk
+  и updated_at заявки: любое сохранение заявки меняет updated_at, и старый
+  PDF больше не находится.
+
+PDF_RENDER_WORKERS = 0 отключает пул: PDF рендерится в текущем процессе
+(так работают тесты).
+"""
+import atexit
+import logging
+import multiprocessing
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+
+from django.conf import settings
+
+from onlineservice.cache import CacheNamespace
+
+from .application_export import (
+    APPLICATION_TEMPLATE,
+    build_application_filename,
+    html_to_pdf,
+    render_application_html,
+)
+
+logger = logging.getLogger(__name__)
+
+# Меняется вместе с шаблоном/манифестом секций, чтобы не отдавать PDF старой вёрстки.
+CACHE_VERSION = 2
+
+APPLICATION_PDF_CACHE = CacheNamespace('application_pdf', description='PDF «Заявка для страховой»')
+
+_WARM_UP_HTML = """<html><head><meta charset="utf-8"><style>
+@font-face { font-family: 'DejaVu'; src: url(fonts/DejaVuSans.ttf); }
+@font-face { font-family: 'DejaVu'; src: url(fonts/DejaVuSans-Bold.ttf); font-weight: bold; }
+body { font-family: 'DejaVu'; }
+</style></head><body><p>Прогрев <b>шрифтов</b></p></body></html>"""
+
+
+class PdfRenderBusy(RuntimeError):
+    """Пул рендеринга занят дольше PDF_RENDER_TIMEOUT."""
+
+
+def warm_up():
+    """Инициализатор процесса пула: импорт xhtml2pdf и разбор шрифтов заранее."""
+    try:
+        html_to_pdf(_WARM_UP_HTML)
+    except Exception:  # noqa: BLE001 — прогрев не должен ронять процесс
+        logger.exception('PDF worker warm-up failed')
+
+
+class PdfRenderPool:
+    """Ограниченный пул процессов для html_to_pdf."""
+
+    def __init__(self, workers, max_pending, timeout):
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn, а не fork: веб-воркер к этому моменту держит потоки
+                # (AuditSink) и соединения с БД, которые дочернему процессу не нужны.
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=warm_up,
+                )
+            return self._executor
+
+    def submit(self, html):
+        """Ставит HTML в очередь пула и возвращает Future с PDF."""
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PdfRenderBusy(f'Очередь рендеринга PDF занята дольше {self.timeout} с')
+        try:
+            future = self._get_executor().submit(html_to_pdf, html)
+        except BrokenProcessPool:
+            self._slots.release()
+            self._reset()
+            raise
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _f: self._slots.release())
+        return future
+
+    def result(self, future):
+        try:
+            return future.result(timeout=self.timeout)
+        except BrokenProcessPool:
+            # Процесс пула упал (например, OOM) — следующий вызов создаст пул заново.
+            self._reset()
+            raise
+
+    def _reset(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        self._reset()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Общий на процесс пул рендеринга или None, если пул отключён."""
+    global _pool
+    workers = getattr(settings, 'PDF_RENDER_WORKERS', 0)
+    if workers <= 0:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PdfRenderPool(
+                    workers=workers,
+                    max_pending=getattr(settings, 'PDF_RENDER_MAX_PENDING', workers * 2),
+                    timeout=getattr(settings, 'PDF_RENDER_TIMEOUT', 60),
+                )
+                atexit.register(_pool.shutdown)
+    return _pool
+
+
+def application_cache_key(insurance_request):
+    updated_at = insurance_request.updated_at.isoformat() if insurance_request.updated_at else ''
+    return f'v{CACHE_VERSION}:{insurance_request.pk}:{updated_at}'
+
+
+def render_application_pdfs(insurance_requests):
+    """PDF «Заявки для страховой» для каждой заявки, в порядке входного списка.
+
+    Сначала смотрит кэш, недостающие документы рендерит параллельно в пуле
+    (или по очереди в текущем процессе, если пул отключён) и кладёт в кэш.
+    """
+    insurance_requests = list(insurance_requests)
+    keys = [application_cache_key(r) for r in insurance_requests]
+    cached = APPLICATION_PDF_CACHE.get_many(keys)
+    missing = [(key, r) for key, r in zip(keys, insurance_requests) if key not in cached]
+
+    if missing:
+        pool = get_pool()
+        rendered = {}
+        if pool is None:
+            for key, insurance_request in missing:
+                rendered[key] = html_to_pdf(render_application_html(insurance_request))
+        else:
+            futures = [
+                (key, pool.submit(render_application_html(insurance_request)))
+                for key, insurance_request in missing
+            ]
+            for key, future in futures:
+                rendered[key] = pool.result(future)
+        APPLICATION_PDF_CACHE.set_many(rendered, timeout=getattr(settings, 'PDF_CACHE_TIMEOUT', 24 * 60 * 60))
+        cached.update(rendered)
+        logger.info(
+            'Rendered %d application PDF(s) from %s, %d served from cache',
+            len(missing), APPLICATION_TEMPLATE, len(insurance_requests) - len(missing),
+        )
+
+    return [cached[key] for key in keys]
+
+
+def render_application_pdf_cached(insurance_request):
+    """PDF одной заявки через кэш и пул рендеринга."""
+    return render_application_pdfs([insurance_request])[0]
+
+
+def build_applications_zip(insurance_requests):
+    """ZIP-архив с PDF «Заявки для страховой» для нескольких заявок (bytes).
+
+    Имя каждого файла начинается с id заявки: у сестёр партии общий номер ДФА,
+    и без префикса имена совпали бы.
+    """
+    insurance_requests = list(insurance_requests)
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for insurance_request, pdf_bytes in zip(insurance_requests, render_application_pdfs(insurance_requests)):
+            archive.writestr(f'{insurance_request.pk}_{build_application_filename(insurance_request)}', pdf_bytes)
+    return buffer.getvalue()
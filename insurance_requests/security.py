@@ -9,7 +9,14 @@ import time
 from typing import Tuple
 
 from django.conf import settings
-from django.core.cache import cache
+
+from onlineservice.cache import CacheNamespace
+
+# Attempt counters and locks; shared between workers when CACHE_BACKEND is file/redis.
+# Not resettable from the cache page: that would lift active lockouts.
+LOGIN_RATE_LIMIT_CACHE = CacheNamespace(
+    "login_rate_limit", description="Failed login counters and lockouts", manual_invalidation=False
+)
 
 
 @dataclass(frozen=True)
@@ -61,11 +68,11 @@ def _build_scopes(request, username: str | None) -> Tuple[Tuple[str, str], ...]:
 
 
 def _attempts_key(scope_value: str) -> str:
-    return f"auth_login_attempts:{scope_value}"
+    return f"attempts:{scope_value}"
 
 
 def _lock_key(scope_value: str) -> str:
-    return f"auth_login_lock:{scope_value}"
+    return f"lock:{scope_value}"
 
 
 def get_login_lock_state(request, username: str | None) -> LoginLockState:
@@ -81,19 +88,19 @@ def get_login_lock_state(request, username: str | None) -> LoginLockState:
     active_scope = ""
 
     for scope_name, scope_value in _build_scopes(request, username):
-        lock_until = cache.get(_lock_key(scope_value))
+        lock_until = LOGIN_RATE_LIMIT_CACHE.get(_lock_key(scope_value))
         if lock_until is None:
             continue
 
         try:
             lock_until_ts = float(lock_until)
         except (TypeError, ValueError):
-            cache.delete(_lock_key(scope_value))
+            LOGIN_RATE_LIMIT_CACHE.delete(_lock_key(scope_value))
             continue
 
         remaining = int(lock_until_ts - now)
         if remaining <= 0:
-            cache.delete(_lock_key(scope_value))
+            LOGIN_RATE_LIMIT_CACHE.delete(_lock_key(scope_value))
             continue
 
         if remaining > max_remaining:
@@ -140,7 +147,7 @@ def register_failed_login_attempt(request, username: str | None) -> LoginLockSta
             continue
 
         attempts_cache_key = _attempts_key(scope_value)
-        attempts_payload = cache.get(attempts_cache_key)
+        attempts_payload = LOGIN_RATE_LIMIT_CACHE.get(attempts_cache_key)
         if not isinstance(attempts_payload, dict):
             attempts_payload = {"count": 0, "first_attempt_at": now}
 
@@ -152,11 +159,11 @@ def register_failed_login_attempt(request, username: str | None) -> LoginLockSta
         remaining_window = max(
             1, int(attempt_window - (now - float(attempts_payload["first_attempt_at"])))
         )
-        cache.set(attempts_cache_key, attempts_payload, timeout=remaining_window)
+        LOGIN_RATE_LIMIT_CACHE.set(attempts_cache_key, attempts_payload, timeout=remaining_window)
 
         if attempts_payload["count"] >= scope_limit:
             lock_until = now + lockout_seconds
-            cache.set(_lock_key(scope_value), lock_until, timeout=lockout_seconds)
+            LOGIN_RATE_LIMIT_CACHE.set(_lock_key(scope_value), lock_until, timeout=lockout_seconds)
 
     return get_login_lock_state(request, username)
 
@@ -171,8 +178,8 @@ def clear_login_failures(request, username: str | None) -> None:
 
     scope_name, scope_value = _build_scopes(request, username)[0]  # ip_user scope
     if scope_name:
-        cache.delete(_attempts_key(scope_value))
-        cache.delete(_lock_key(scope_value))
+        LOGIN_RATE_LIMIT_CACHE.delete(_attempts_key(scope_value))
+        LOGIN_RATE_LIMIT_CACHE.delete(_lock_key(scope_value))
 
 
 def format_lockout_message(remaining_seconds: int) -> str:
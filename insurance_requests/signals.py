@@ -1,21 +1,33 @@
 """
 Сигналы insurance_requests.
 
-Сейчас здесь живёт ровно одно правило: при добавлении пользователя в группу
-`Администраторы` ему автоматически выставляется `is_staff=True`. Иначе админу,
+При добавлении пользователя в группу `Администраторы` ему автоматически
+выставляется `is_staff=True`. Иначе админу,
 заведённому через /admin/auth/user/, придётся отдельно ставить галочку
 "Сотрудник", и без неё он не попадёт в Django admin (в т.ч. в журналы аудита).
 
 Снятие из группы НЕ снимает is_staff — это сознательно асимметрично, чтобы
 случайным движением мыши не выкинуть кого-то из админки.
+
+Удаление вложения освобождает его общий AttachmentBlob: когда ссылок на
+содержимое не остаётся, файл удаляется из хранилища (после коммита).
+
+Каждый новый CRUDEvent UPDATE раскладывается по полям в индекс FieldChange.
 """
 import logging
 
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
-from django.db.models.signals import m2m_changed
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 
+from easyaudit.models import CRUDEvent
+
+from .blobs import release_blob
+from .field_changes import index_crud_events
+from .models import RequestAttachment
+
 logger = logging.getLogger(__name__)
 
 ADMIN_GROUP_NAME = 'Администраторы'
@@ -51,3 +63,16 @@ def grant_is_staff_when_added_to_admin_group(sender, instance, action, reverse,
             "Auto-set is_staff=True for user '%s' added to '%s'",
             instance.username, ADMIN_GROUP_NAME,
         )
+
+
+@receiver(post_delete, sender=RequestAttachment)
+def release_attachment_blob(sender, instance, **kwargs):
+    if instance.blob_id:
+        blob_id = instance.blob_id
+        transaction.on_commit(lambda: release_blob(blob_id))
+
+
+@receiver(post_save, sender=CRUDEvent)
+def index_crud_event_fields(sender, instance, created, **kwargs):
+    if created:
+        index_crud_events([instance])
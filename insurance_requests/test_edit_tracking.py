@@ -15,7 +15,7 @@ from .edit_tracking import (
     object_comparison_rows,
     scalar_comparison_rows,
 )
-from .models import InsuranceRequest
+from .models import FieldChange, InsuranceRequest
 
 
 class DiffFieldsTests(SimpleTestCase):
@@ -319,6 +319,7 @@ class PostCreationComparisonTests(TestCase):
         # datetime — auto_now_add, выставляем явно: правка должна быть позже
         # создания заявки, иначе попадёт в «хвост создания».
         CRUDEvent.objects.filter(pk=ev.pk).update(datetime=when)
+        FieldChange.objects.filter(event_id=ev.pk).update(changed_at=when)
         return ev
 
     def test_changed_after_create_flagged_with_author(self):
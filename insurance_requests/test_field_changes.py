@@ -0,0 +1,98 @@
+"""Тесты индекса изменённых полей FieldChange."""
+import datetime as dt
+import json
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from easyaudit.models import CRUDEvent
+
+from .field_changes import backfill, changed_field_names
+from .models import FieldChange, InsuranceRequest
+
+
+def _make_request(**extra):
+    defaults = dict(client_name='ООО Индекс', inn='1234567890', insurance_type='КАСКО')
+    defaults.update(extra)
+    return InsuranceRequest.objects.create(**defaults)
+
+
+def _update_event(req, changed_fields, *, user=None):
+    return CRUDEvent.objects.create(
+        event_type=CRUDEvent.UPDATE, object_id=str(req.pk),
+        content_type=ContentType.objects.get_for_model(InsuranceRequest),
+        object_repr='req', changed_fields=json.dumps(changed_fields), user=user,
+    )
+
+
+class ChangedFieldNamesTests(TestCase):
+    def test_skips_updated_at_and_bad_json(self):
+        raw = json.dumps({'inn': ['1', '2'], 'updated_at': ['a', 'b']})
+        self.assertEqual(changed_field_names(raw), ['inn'])
+        self.assertEqual(changed_field_names('not json'), [])
+        self.assertEqual(changed_field_names(None), [])
+
+
+class FieldChangeIndexTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('indexer')
+        self.req = _make_request()
+
+    def test_update_event_is_indexed_on_write(self):
+        ev = _update_event(self.req, {'inn': ['1', '2'], 'notes': ['', 'x'], 'updated_at': ['a', 'b']},
+                           user=self.user)
+        rows = FieldChange.objects.filter(event_id=ev.pk)
+        self.assertEqual(sorted(rows.values_list('field_name', flat=True)), ['inn', 'notes'])
+        row = rows.first()
+        self.assertEqual(row.object_id, str(self.req.pk))
+        self.assertEqual(row.user_id, self.user.pk)
+        self.assertEqual(row.changed_at, ev.datetime)
+
+    def test_create_event_is_not_indexed(self):
+        CRUDEvent.objects.create(
+            event_type=CRUDEvent.CREATE, object_id=str(self.req.pk),
+            content_type=ContentType.objects.get_for_model(InsuranceRequest), object_repr='req',
+        )
+        self.assertFalse(FieldChange.objects.filter(field_name='inn').exists())
+
+    def test_backfill_is_idempotent(self):
+        ev = _update_event(self.req, {'inn': ['1', '2'], 'client_name': ['a', 'b']})
+        FieldChange.objects.all().delete()
+
+        stats = backfill(batch_size=1)
+        self.assertGreaterEqual(stats['events'], 1)
+        self.assertEqual(FieldChange.objects.filter(event_id=ev.pk).count(), 2)
+
+        call_command('backfill_field_changes', '--batch-size', '1', stdout=StringIO())
+        self.assertEqual(FieldChange.objects.filter(event_id=ev.pk).count(), 2)
+
+    def test_backfill_keeps_events_of_deleted_users(self):
+        # CRUDEvent.user без ограничения в БД: событие может ссылаться на удалённого пользователя
+        valid = _update_event(self.req, {'inn': ['1', '2']}, user=self.user)
+        dangling = _update_event(self.req, {'notes': ['', 'x']})
+        CRUDEvent.objects.filter(pk=dangling.pk).update(user_id=987654)
+        FieldChange.objects.all().delete()
+
+        stats = backfill(batch_size=100)
+
+        self.assertEqual(stats, {'events': 2, 'rows': 2})
+        self.assertTrue(FieldChange.objects.filter(event_id=valid.pk, user=self.user).exists())
+        self.assertTrue(FieldChange.objects.filter(event_id=dangling.pk, user_id=987654).exists())
+        connection.check_constraints(table_names=[FieldChange._meta.db_table])
+
+    def test_post_creation_counts_read_index(self):
+        req = _make_request(parser_confidence=0.9)
+        late = req.created_at + dt.timedelta(hours=1)
+        for fields in ({'inn': ['1', '2']}, {'inn': ['2', '3'], 'client_name': ['a', 'b']}):
+            ev = _update_event(req, fields, user=self.user)
+            CRUDEvent.objects.filter(pk=ev.pk).update(datetime=late)
+            FieldChange.objects.filter(event_id=ev.pk).update(changed_at=late)
+        # Правка в «хвосте создания» не считается
+        _update_event(req, {'notes': ['', 'x']})
+        FieldChange.objects.filter(field_name='notes').update(changed_at=req.created_at)
+
+        counts = InsuranceRequest.post_creation_counts_for([req])
+        self.assertEqual(counts.get(req.pk), 2)
@@ -1,19 +1,24 @@
-from datetime import date
+from datetime import date, timedelta
 from decimal import Decimal
-from io import BytesIO
+from io import BytesIO, StringIO
 import os
+import re
 import shutil
 import tempfile
 
 from django import forms as forms_module
 from django.contrib.auth.models import Group, User
+from django.core.files.storage import default_storage
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from django.utils import timezone
 from openpyxl import Workbook
 
+from .drafts import PARSER_V2_SESSION_KEY
 from .forms import DEFAULT_BRANCH, ParserV2PreviewForm
-from .models import InsuranceRequest, RequestAttachment
+from .models import AttachmentBlob, InsuranceRequest, ParserV2Draft, RequestAttachment
 from .parsers.excel_v2 import ExcelRequestParserV2
 from .parsers.excel_v2.parser import (
     GridCell,
@@ -823,6 +828,57 @@ class CustomerDealPayloadIntegrationTests(TestCase):
         self.assertEqual(result.data.get('creditor_bank', ''), 'ВТБ')
 
 
+class ParserV2ProfilingTests(TestCase):
+    """Opt-in stage profiling: raw_debug['timings'] without changing the parse result."""
+
+    def setUp(self):
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet['C5'] = 'Иванов Иван'
+        sheet['D7'] = 'ООО Ромашка'
+        sheet['D9'] = '1234567890'
+        sheet['D21'] = 'КАСКО'
+        sheet['B24'] = 'Предмет лизинга'
+        sheet['B25'] = 'Мини-погрузчик Sunward SWL 4028, 2024 г.в.'
+        handle, self.path = tempfile.mkstemp(suffix='.xlsx')
+        os.close(handle)
+        workbook.save(self.path)
+        self.addCleanup(os.remove, self.path)
+
+    def test_profiling_is_off_by_default(self):
+        result = ExcelRequestParserV2().parse(self.path)
+        self.assertNotIn('timings', result.raw_debug)
+
+    def test_profiled_parse_reports_stages_and_keeps_result(self):
+        parser = ExcelRequestParserV2(profile=True)
+        profiled = parser.parse(self.path)
+        plain = ExcelRequestParserV2(profile=False).parse(self.path)
+
+        data, plain_data = dict(profiled.data), dict(plain.data)
+        data.pop('response_deadline'), plain_data.pop('response_deadline')
+        self.assertEqual(data, plain_data)
+
+        timings = profiled.raw_debug['timings']
+        self.assertGreater(timings['cells_scanned'], 0)
+        self.assertGreater(timings['regex_evals'], 0)
+        stages = timings['stages']
+        self.assertEqual(stages['_read_cells']['calls'], 1)
+        self.assertGreater(stages['_extract_labeled_value']['calls'], 1)
+        self.assertGreater(stages['_extract_objects']['cells'], 0)
+        self.assertAlmostEqual(
+            sum(stage['self_ms'] for stage in stages.values()), timings['total_ms'], delta=1.0,
+        )
+        # Подсчёт регулярных выражений — только на время разбора
+        from insurance_requests.parsers.excel_v2 import parser as parser_module
+        self.assertIs(parser_module.re, re)
+        # Обёртки этапов снимаются после разбора
+        self.assertNotIn('_read_cells', vars(parser))
+
+    @override_settings(PARSER_V2_PROFILING=True)
+    def test_setting_enables_profiling(self):
+        self.assertIn('timings', ExcelRequestParserV2().parse(self.path).raw_debug)
+
+
 class ParserV2UploadTests(TestCase):
     def setUp(self):
         self.client = Client()
@@ -1274,6 +1330,59 @@ class ParserV2UploadTests(TestCase):
         self.assertEqual(created_request.additional_data['parser_v2']['version'], '2.0.0')
         self.assertTrue(RequestAttachment.objects.filter(request=created_request).exists())
 
+    def test_parser_v2_draft_lives_in_db_and_session_keeps_only_id(self):
+        self.client.login(username='parser_v2_root', password='pwd')
+        upload_response = self.client.post(
+            reverse('insurance_requests:upload_excel_v2'),
+            {'excel_file': self._xlsx_upload()},
+        )
+        draft_id = upload_response.context['draft_id']
+
+        self.assertEqual(self.client.session[PARSER_V2_SESSION_KEY], [draft_id])
+        draft = ParserV2Draft.objects.get(draft_id=draft_id)
+        self.assertEqual(draft.created_by, self.superuser)
+        self.assertEqual(draft.parse_result['data']['client_name'], 'ООО Ромашка')
+
+        self.client.post(reverse('insurance_requests:upload_excel_v2'), self._post_data_from_preview(upload_response))
+
+        self.assertFalse(ParserV2Draft.objects.exists())
+        self.assertEqual(self.client.session[PARSER_V2_SESSION_KEY], [])
+
+    def test_parser_v2_expired_or_foreign_draft_is_rejected(self):
+        self.client.login(username='parser_v2_root', password='pwd')
+        upload_response = self.client.post(
+            reverse('insurance_requests:upload_excel_v2'),
+            {'excel_file': self._xlsx_upload()},
+        )
+        post_data = self._post_data_from_preview(upload_response)
+        ParserV2Draft.objects.update(expires_at=timezone.now() - timedelta(minutes=1))
+
+        response = self.client.post(reverse('insurance_requests:upload_excel_v2'), post_data)
+
+        self.assertRedirects(response, reverse('insurance_requests:upload_excel'), fetch_redirect_response=False)
+        self.assertFalse(InsuranceRequest.objects.exists())
+
+        self.client.logout()
+        self.client.login(username='parser_v2_user', password='pwd')
+        response = self.client.post(reverse('insurance_requests:upload_excel_v2'), post_data)
+        self.assertFalse(InsuranceRequest.objects.exists())
+
+    def test_purge_command_removes_expired_drafts_and_files(self):
+        self.client.login(username='parser_v2_root', password='pwd')
+        for _ in range(2):
+            self.client.post(
+                reverse('insurance_requests:upload_excel_v2'),
+                {'excel_file': self._xlsx_upload()},
+            )
+        expired, fresh = ParserV2Draft.objects.order_by('pk')
+        ParserV2Draft.objects.filter(pk=expired.pk).update(expires_at=timezone.now() - timedelta(hours=1))
+
+        call_command('purge_parser_v2_drafts', stdout=StringIO())
+
+        self.assertEqual(list(ParserV2Draft.objects.values_list('pk', flat=True)), [fresh.pk])
+        self.assertFalse(default_storage.exists(expired.storage_path))
+        self.assertTrue(default_storage.exists(fresh.storage_path))
+
     def test_parser_v2_tracks_scalar_edit_and_stores_original_snapshot(self):
         """Фаза 1: ручная правка основного поля попадает в tracking, полный
         снимок распознанных данных сохраняется, а блок виден в карточке."""
@@ -1604,10 +1713,17 @@ class ParserV2UploadTests(TestCase):
         for s in siblings:
             self.assertEqual(s.acquisition_cost_currency, 'RUB')
 
-        # Original Excel is attached to every sibling.
+        # Original Excel is attached to every sibling — stored once as a shared blob.
         self.assertEqual(RequestAttachment.objects.count(), 3)
         for s in siblings:
             self.assertTrue(RequestAttachment.objects.filter(request=s).exists())
+        blob = AttachmentBlob.objects.get()
+        self.assertEqual(set(RequestAttachment.objects.values_list('blob', flat=True)), {blob.pk})
+        self.assertEqual(set(RequestAttachment.objects.values_list('file', flat=True)), {blob.file.name})
+        stored = []
+        for root, _dirs, files in os.walk(self.media_root):
+            stored.extend(files)
+        self.assertEqual(stored, [os.path.basename(blob.file.name)])
 
         # The view redirects to the first request of the batch.
         self.assertRedirects(
@@ -1615,6 +1731,100 @@ class ParserV2UploadTests(TestCase):
             reverse('insurance_requests:request_detail', kwargs={'pk': first.pk}),
         )
 
+    def test_parser_v2_blob_is_shared_across_uploads_and_released_with_last_reference(self):
+        self.client.login(username='parser_v2_root', password='pwd')
+        for _ in range(2):
+            upload_response = self.client.post(
+                reverse('insurance_requests:upload_excel_v2'),
+                {'excel_file': self._xlsx_upload_with_multiple_objects(object_count=2)},
+            )
+            self.client.post(
+                reverse('insurance_requests:upload_excel_v2'),
+                self._post_data_from_preview(upload_response),
+            )
+
+        self.assertEqual(RequestAttachment.objects.count(), 4)
+        blob = AttachmentBlob.objects.get()
+        self.assertTrue(default_storage.exists(blob.file.name))
+
+        first_batch, second_batch = (
+            list(InsuranceRequest.objects.filter(source_batch_id=batch_id))
+            for batch_id in InsuranceRequest.objects.values_list('source_batch_id', flat=True).distinct()
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            for insurance_request in first_batch:
+                insurance_request.delete()
+        self.assertTrue(AttachmentBlob.objects.filter(pk=blob.pk).exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for insurance_request in second_batch:
+                insurance_request.delete()
+        self.assertFalse(AttachmentBlob.objects.exists())
+        self.assertFalse(default_storage.exists(blob.file.name))
+
+    def test_parser_v2_batch_writes_status_and_audit_events_in_bulk(self):
+        from django.contrib.contenttypes.models import ContentType
+        from easyaudit.models import CRUDEvent
+        from summaries.models import StatusEvent
+
+        self.client.login(username='parser_v2_root', password='pwd')
+        upload_response = self.client.post(
+            reverse('insurance_requests:upload_excel_v2'),
+            {'excel_file': self._xlsx_upload_with_multiple_objects(object_count=3)},
+        )
+        CRUDEvent.objects.all().delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse('insurance_requests:upload_excel_v2'),
+                self._post_data_from_preview(upload_response),
+            )
+
+        siblings = list(InsuranceRequest.objects.order_by('item_no'))
+        self.assertEqual(len(siblings), 3)
+        self.assertEqual(len({s.created_at for s in siblings}), 1)
+        for s in siblings:
+            self.assertIsNotNone(s.response_deadline)
+
+        events = StatusEvent.objects.filter(
+            content_type=ContentType.objects.get_for_model(InsuranceRequest),
+        )
+        self.assertEqual(sorted(events.values_list('object_id', flat=True)), [s.pk for s in siblings])
+        for event in events:
+            self.assertEqual((event.from_status, event.to_status), ('', 'uploaded'))
+            self.assertEqual(event.changed_by, self.superuser)
+
+        created_events = CRUDEvent.objects.filter(event_type=CRUDEvent.CREATE)
+        self.assertEqual(
+            sorted(int(pk) for pk in created_events.filter(
+                content_type=ContentType.objects.get_for_model(InsuranceRequest),
+            ).values_list('object_id', flat=True)),
+            [s.pk for s in siblings],
+        )
+        self.assertEqual(
+            created_events.filter(content_type=ContentType.objects.get_for_model(RequestAttachment)).count(),
+            3,
+        )
+
+    def test_parser_v2_batch_creation_query_count_does_not_grow_with_objects(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        self.client.login(username='parser_v2_root', password='pwd')
+        query_counts = []
+        # Первый проход прогревает кэш ContentType и создаёт строку rollup.
+        for object_count in (3, 2, 4):
+            upload_response = self.client.post(
+                reverse('insurance_requests:upload_excel_v2'),
+                {'excel_file': self._xlsx_upload_with_multiple_objects(object_count=object_count)},
+            )
+            post_data = self._post_data_from_preview(upload_response)
+            with CaptureQueriesContext(connection) as ctx, self.captureOnCommitCallbacks(execute=True):
+                self.client.post(reverse('insurance_requests:upload_excel_v2'), post_data)
+            query_counts.append(len(ctx.captured_queries))
+
+        self.assertEqual(InsuranceRequest.objects.count(), 9)
+        self.assertEqual(query_counts[1], query_counts[2])
+
     def test_parser_v2_single_object_file_keeps_batch_fields_null(self):
         """Stage 4.1: 1 object → 1 request, source_batch_id stays NULL."""
         self.client.login(username='parser_v2_root', password='pwd')
@@ -1827,6 +2037,19 @@ class ParserV2UploadTests(TestCase):
         self.assertIsNone(created.source_batch_id)
         self.assertIsNone(created.item_count)
 
+    @override_settings(PARSER_V2_PROFILING=True)
+    def test_parser_v2_profiling_report_is_stored_with_request(self):
+        self.client.login(username='parser_v2_root', password='pwd')
+        upload_response = self.client.post(
+            reverse('insurance_requests:upload_excel_v2'),
+            {'excel_file': self._xlsx_upload()},
+        )
+        self.client.post(reverse('insurance_requests:upload_excel_v2'), self._post_data_from_preview(upload_response))
+
+        timings = InsuranceRequest.objects.get().additional_data['parser_v2']['raw_debug']['timings']
+        self.assertIn('_extract_objects', timings['stages'])
+        self.assertGreater(timings['total_ms'], 0)
+
     def test_parser_v2_can_create_minimal_request_after_unreadable_file(self):
         self.client.login(username='parser_v2_root', password='pwd')
         unreadable_file = SimpleUploadedFile(
@@ -1,6 +1,8 @@
 """
 Tests for insurance_requests app
 """
+import shutil
+import tempfile
 import uuid
 from email.header import decode_header, make_header
 from io import BytesIO
@@ -106,6 +108,13 @@ class RequestDatabaseExportTest(TestCase):
     """Tests for XLSX export of the request card data."""
 
     def setUp(self):
+        # Вложения-источники пишутся во временный MEDIA_ROOT, а не в media/ проекта
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.addCleanup(self.settings_override.disable)
+
         self.user = User.objects.create_user(
             username='exportuser',
             password='testpass123',
@@ -226,6 +235,58 @@ class RequestDatabaseExportTest(TestCase):
         self.assertEqual(response.status_code, 403)
         self.assertContains(response, 'Superuser', status_code=403)
 
+    def test_export_request_list_writes_same_card_rows_for_filtered_requests(self):
+        cache.clear()
+        InsuranceRequest.objects.create(
+            client_name='ООО Другой филиал', inn='0987654321', insurance_type='КАСКО',
+            dfa_number='ДФА-OTHER', branch='Казань', created_by=self.user,
+        )
+
+        response = self.superuser_client.get(
+            reverse('insurance_requests:export_request_list') + '?branch=Москва'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        worksheet = load_workbook(BytesIO(response.content))['Карточки заявок']
+        rows = list(worksheet.iter_rows(values_only=True))
+        self.assertEqual(rows[0], ('Заявка', 'Раздел', 'Ключ', 'Значение'))
+        self.assertEqual({row[0] for row in rows[1:]}, {self.request.get_display_name()})
+        list_pairs = [(row[2], row[3]) for row in rows[1:] if row[2]]
+
+        single = self.superuser_client.get(
+            reverse('insurance_requests:export_request_database', kwargs={'pk': self.request.pk})
+        )
+        card = load_workbook(BytesIO(single.content))['Карточка заявки']
+        card_pairs = [(row[1], row[2]) for row in card.iter_rows(values_only=True) if row[1]][1:]
+        self.assertEqual(list_pairs, card_pairs)
+
+    def test_export_request_list_caches_flat_additional_data_until_save(self):
+        from unittest import mock
+        from insurance_requests import exporters
+
+        cache.clear()
+        url = reverse('insurance_requests:export_request_list')
+        with mock.patch.object(exporters, '_append_flat_rows', wraps=exporters._append_flat_rows) as flatten:
+            self.superuser_client.get(url)
+            first_calls = flatten.call_count
+            self.assertGreater(first_calls, 0)
+            self.superuser_client.get(url)
+            self.assertEqual(flatten.call_count, first_calls)
+
+            self.request.additional_data = {'application_type': 'individual'}
+            self.request.save()
+            response = self.superuser_client.get(url)
+            self.assertGreater(flatten.call_count, first_calls)
+
+        worksheet = load_workbook(BytesIO(response.content))['Карточки заявок']
+        pairs = {(row[2], row[3]) for row in worksheet.iter_rows(values_only=True)}
+        self.assertIn(('additional_data.application_type', 'individual'), pairs)
+        self.assertNotIn(('additional_data.application_format', 'property'), pairs)
+
+    def test_export_request_list_forbidden_for_regular_user(self):
+        response = self.user_client.get(reverse('insurance_requests:export_request_list'))
+        self.assertEqual(response.status_code, 403)
+
 
 class RequestApplicationPdfExportTest(TestCase):
     """Tests for the "Заявка для страховой" PDF export (insurer-facing subset)."""
@@ -330,6 +391,78 @@ class RequestApplicationPdfExportTest(TestCase):
         )
         self.assertEqual(response.status_code, 403)
 
+    def test_export_application_is_cached_until_request_is_saved(self):
+        from unittest import mock
+        from insurance_requests import pdf_rendering
+
+        cache.clear()
+        url = reverse('insurance_requests:export_request_application', kwargs={'pk': self.request.pk})
+        with mock.patch.object(pdf_rendering, 'html_to_pdf', wraps=pdf_rendering.html_to_pdf) as render:
+            first = self.superuser_client.get(url)
+            second = self.superuser_client.get(url)
+            self.assertEqual(render.call_count, 1)
+            self.assertEqual(first.content, second.content)
+
+            self.request.client_name = 'ООО Лютик'
+            self.request.save()
+            third = self.superuser_client.get(url)
+            self.assertEqual(render.call_count, 2)
+        self.assertIn('ООО Лютик', self._extract_text(third.content))
+
+    def test_application_stamp_is_request_update_time(self):
+        # PDF кэшируется по updated_at — отметка в колонтитуле от него же, а не от времени рендера
+        from datetime import datetime
+
+        from insurance_requests.application_export import MOSCOW_TZ, build_application_context
+
+        InsuranceRequest.objects.filter(pk=self.request.pk).update(
+            updated_at=MOSCOW_TZ.localize(datetime(2026, 1, 15, 9, 30)),
+        )
+        self.request.refresh_from_db()
+
+        self.assertEqual(build_application_context(self.request)['data_as_of'], '15.01.2026 09:30')
+
+    def test_batch_export_returns_zip_with_pdf_per_sibling(self):
+        import zipfile
+
+        cache.clear()
+        batch_id = uuid.uuid4()
+        siblings = [
+            InsuranceRequest.objects.create(
+                client_name='ООО Партия', inn='7701234567', insurance_type='КАСКО',
+                dfa_number='ДФА-ZIP', brand=brand, source_batch_id=batch_id,
+                item_no=idx, item_count=2, created_by=self.user,
+            )
+            for idx, brand in enumerate(('КАМАЗ', 'МАЗ'), start=1)
+        ]
+        url = reverse('insurance_requests:export_request_applications') + f'?batch={batch_id}'
+
+        response = self.superuser_client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        with zipfile.ZipFile(BytesIO(response.content)) as archive:
+            names = archive.namelist()
+            self.assertEqual(len(names), 2)
+            for sibling, name in zip(siblings, names):
+                self.assertTrue(name.startswith(f'{sibling.pk}_application_'))
+                self.assertIn(sibling.brand, self._extract_text(archive.read(name)))
+
+        self.assertEqual(self.user_client.get(url).status_code, 403)
+        by_ids = self.superuser_client.get(
+            reverse('insurance_requests:export_request_applications') + f'?ids={siblings[0].pk}'
+        )
+        with zipfile.ZipFile(BytesIO(by_ids.content)) as archive:
+            self.assertEqual(len(archive.namelist()), 1)
+
+    def test_render_pool_rejects_work_when_queue_is_full(self):
+        from insurance_requests.pdf_rendering import PdfRenderBusy, PdfRenderPool
+
+        pool = PdfRenderPool(workers=1, max_pending=1, timeout=0.01)
+        pool._slots.acquire()
+        with self.assertRaises(PdfRenderBusy):
+            pool.submit('<html></html>')
+
 
 class RequestV1V2DisplayCompatibilityTest(TestCase):
     """Old V1 requests and structured Parser V2 requests render side by side."""
@@ -585,6 +718,48 @@ class EmailTemplateGeneratorTest(TestCase):
         self.assertEqual(req.get_display_name(), f'#{req.id} / объект 2 из 4')
 
 
+    def test_template_file_is_compiled_once_and_reloaded_when_mtime_changes(self):
+        import os
+        import tempfile
+        from core.templates import clear_template_cache, get_compiled_template
+
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', encoding='utf-8', delete=False) as f:
+            f.write('ИНН ${inn}')
+        self.addCleanup(os.unlink, f.name)
+        self.addCleanup(clear_template_cache)
+
+        compiled = get_compiled_template(f.name)
+        self.assertIs(get_compiled_template(f.name), compiled)
+        self.assertEqual(EmailTemplateGenerator(f.name).generate_email_body({'inn': '123'}), 'ИНН 123')
+
+        with open(f.name, 'w', encoding='utf-8') as out:
+            out.write('Клиент ${inn}')
+        stat = os.stat(f.name)
+        os.utime(f.name, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        self.assertIsNot(get_compiled_template(f.name), compiled)
+        self.assertEqual(EmailTemplateGenerator(f.name).generate_email_body({'inn': '123'}), 'Клиент 123')
+
+    def test_missing_template_file_falls_back_to_default(self):
+        generator = EmailTemplateGenerator('/nonexistent/template.txt')
+        self.assertEqual(generator.template, EmailTemplateGenerator.DEFAULT_TEMPLATE)
+
+    def test_generate_many_matches_per_request_generation(self):
+        requests = [
+            InsuranceRequest(dfa_number=f'ДФА-{i}', branch='Москва', inn=f'77000000{i}', brand=f'Brand{i}',
+                             insurance_period='1 год', has_installment=bool(i % 2))
+            for i in range(3)
+        ]
+        generator = EmailTemplateGenerator()
+        data = [r.to_dict() for r in requests]
+
+        emails = generator.generate_many(data)
+
+        self.assertEqual(
+            emails,
+            [(generator.generate_subject(d), generator.generate_email_body(d)) for d in data],
+        )
+
 class RequestListBatchGroupingTest(TestCase):
     """Stage 4.3: batch siblings must look like a group in /request_list/."""
 
@@ -709,6 +884,70 @@ class RequestDetailBatchPanelTest(TestCase):
         self.assertEqual(response.context['batch_siblings'], [])
 
 
+    def test_batch_panel_offers_bulk_email_generation(self):
+        url = reverse('insurance_requests:request_detail', kwargs={'pk': self.siblings[0].pk})
+        response = self.client.get(url)
+        self.assertEqual(response.context['batch_emails_pending'], 3)
+        self.assertContains(response, 'Сгенерировать письма для партии (3)')
+
+    def test_generate_batch_emails_fills_every_uploaded_sibling(self):
+        from django.contrib.contenttypes.models import ContentType
+        from summaries.models import StatusEvent
+
+        already = self.siblings[2]
+        already.email_body = 'ручной текст'
+        already.status = 'email_generated'
+        already.save()
+
+        response = self.client.post(
+            reverse('insurance_requests:generate_batch_emails', kwargs={'pk': self.siblings[0].pk})
+        )
+
+        self.assertRedirects(
+            response, reverse('insurance_requests:request_detail', kwargs={'pk': self.siblings[0].pk})
+        )
+        for sibling in self.siblings[:2]:
+            sibling.refresh_from_db()
+            self.assertEqual(sibling.status, 'email_generated')
+            self.assertIn(sibling.brand, sibling.email_subject)
+            self.assertIn('ИНН клиента – 3333333333', sibling.email_body)
+            self.assertTrue(StatusEvent.objects.filter(
+                content_type=ContentType.objects.get_for_model(InsuranceRequest),
+                object_id=sibling.pk,
+                to_status='email_generated',
+                changed_by=self.user,
+            ).exists())
+        already.refresh_from_db()
+        self.assertEqual(already.email_body, 'ручной текст')
+
+    def test_generate_batch_emails_writes_audit_update_events(self):
+        import json
+
+        from django.contrib.contenttypes.models import ContentType
+        from easyaudit.models import CRUDEvent
+
+        from .models import FieldChange
+
+        content_type = ContentType.objects.get_for_model(InsuranceRequest)
+        CRUDEvent.objects.all().delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse('insurance_requests:generate_batch_emails', kwargs={'pk': self.siblings[0].pk})
+            )
+
+        for sibling in self.siblings:
+            sibling.refresh_from_db()
+            event = CRUDEvent.objects.get(
+                content_type=content_type, object_id=str(sibling.pk),
+                event_type=CRUDEvent.UPDATE, changed_fields__contains='email_body',
+            )
+            self.assertEqual(event.user, self.user)
+            delta = json.loads(event.changed_fields)
+            self.assertEqual(delta['email_body'][1], sibling.email_body)
+            self.assertTrue(FieldChange.objects.filter(
+                event_id=event.pk, object_id=str(sibling.pk), field_name='email_subject',
+            ).exists())
+
 class ObjectFieldsTest(TestCase):
     """Этап 2.1: новые поля объекта живут прямо в InsuranceRequest."""
 
@@ -954,6 +1193,7 @@ class RequestListEditBadgesTest(TestCase):
         import json as _json
         from django.contrib.contenttypes.models import ContentType
         from easyaudit.models import CRUDEvent
+        from .models import FieldChange
 
         self.client = Client()
         self.user = User.objects.create_user(
@@ -975,9 +1215,9 @@ class RequestListEditBadgesTest(TestCase):
             event_type=CRUDEvent.UPDATE, object_id=str(self.req.pk), content_type=ct,
             object_repr='r', changed_fields=_json.dumps({'inn': ['1', '2']}), user=self.user,
         )
-        CRUDEvent.objects.filter(pk=ev.pk).update(
-            datetime=self.req.created_at + _dt.timedelta(hours=1)
-        )
+        when = self.req.created_at + _dt.timedelta(hours=1)
+        CRUDEvent.objects.filter(pk=ev.pk).update(datetime=when)
+        FieldChange.objects.filter(event_id=ev.pk).update(changed_at=when)
 
     def test_batch_counts_helper(self):
         counts = InsuranceRequest.post_creation_counts_for([self.req])
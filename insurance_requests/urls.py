@@ -9,6 +9,7 @@ app_name = 'insurance_requests'
 urlpatterns = [
     # Main application URLs
     path('', views.request_list, name='request_list'),
+    path('export/', views.export_request_list, name='export_request_list'),
     path('upload/', views.upload_excel_v2, name='upload_excel'),
     path('upload-old/', views.upload_excel, name='upload_excel_legacy'),
     path('upload-v2/', views.upload_excel_v2, name='upload_excel_v2'),
@@ -16,8 +17,10 @@ urlpatterns = [
     path('<int:pk>/comparison/', views.request_comparison, name='request_comparison'),
     path('<int:pk>/export-card/', views.export_request_database, name='export_request_database'),
     path('<int:pk>/export-application/', views.export_request_application, name='export_request_application'),
+    path('export-applications/', views.export_request_applications, name='export_request_applications'),
     path('<int:pk>/edit/', views.edit_request, name='edit_request'),
     path('<int:pk>/generate-email/', views.generate_email, name='generate_email'),
+    path('<int:pk>/generate-batch-emails/', views.generate_batch_emails, name='generate_batch_emails'),
     path('<int:pk>/preview-email/', views.preview_email, name='preview_email'),
     path('<int:pk>/send-email/', views.send_email, name='send_email'),
     path('<int:pk>/change-status/', views.change_request_status, name='change_request_status'),
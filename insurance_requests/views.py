@@ -1,14 +1,13 @@
 """
 Представления для работы со страховыми заявками
 """
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth import login, logout
 from django.http import JsonResponse, HttpResponse
 from django.views.decorators.http import require_http_methods
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from django.core.files import File
-from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
 from django.db import transaction
 from django.utils import timezone
@@ -30,16 +29,19 @@ from .forms import (
     ParserV2ObjectFormSet,
     parser_v2_object_initial_from_payload,
 )
+from . import drafts
+from .batch_create import bulk_create_requests
+from .blobs import store_blob
 from .decorators import superuser_required, user_required
 from .edit_tracking import build_edit_tracking
 from .exporters import (
     build_request_export_filename,
     build_request_export_workbook,
+    build_requests_export_filename,
+    build_requests_export_workbook,
 )
-from .application_export import (
-    build_application_filename,
-    render_application_pdf,
-)
+from .application_export import build_application_filename
+from .pdf_rendering import build_applications_zip, render_application_pdf_cached
 from .security import (
     clear_login_failures,
     format_lockout_message,
@@ -50,10 +52,17 @@ from .security import (
 from .parsers.excel_v2 import ExcelRequestParserV2
 from core.excel_utils import ExcelReader
 from core.templates import EmailTemplateGenerator
+from onlineservice.audit import log_bulk_create, log_bulk_update
+from onlineservice.cache import CacheNamespace
 
 
 logger = logging.getLogger(__name__)
-PARSER_V2_SESSION_KEY = 'parser_v2_drafts'
+
+# Отрисованные строки списка заявок (cache_fragment в request_list.html): ключ —
+# pk, updated_at и счётчики правок, которые меняются без сохранения заявки.
+REQUEST_LIST_ROWS_CACHE = CacheNamespace(
+    'request_list_rows', timeout=settings.FRAGMENT_CACHE_TIMEOUT, description='Строки списка заявок',
+)
 
 
 def _get_format_context_for_logging(application_type=None, application_format=None):
@@ -92,35 +101,24 @@ def _get_detailed_format_context_for_logging(application_type=None, application_
     return f"application_type: {application_type}, application_format: {application_format}"
 
 
-def _get_parser_v2_drafts(request):
-    return request.session.get(PARSER_V2_SESSION_KEY, {})
-
-
 def _store_parser_v2_draft(request, draft_id, draft):
-    drafts = _get_parser_v2_drafts(request)
-    drafts[draft_id] = draft
-    request.session[PARSER_V2_SESSION_KEY] = drafts
-    request.session.modified = True
+    drafts.store_draft(request, draft_id, draft)
 
 
 def _pop_parser_v2_draft(request, draft_id):
-    drafts = _get_parser_v2_drafts(request)
-    draft = drafts.pop(draft_id, None)
-    request.session[PARSER_V2_SESSION_KEY] = drafts
-    request.session.modified = True
-    return draft
+    return drafts.pop_draft(request, draft_id)
 
 
 def _get_parser_v2_draft(request, draft_id):
-    return _get_parser_v2_drafts(request).get(draft_id)
+    return drafts.get_draft(request, draft_id)
 
 
 def _save_parser_v2_upload(uploaded_file):
     original_name = os.path.basename(uploaded_file.name)
     safe_name = get_valid_filename(original_name) or 'insurance_request.xlsx'
     storage_path = f"parser_v2_uploads/{uuid.uuid4().hex}_{safe_name}"
-    content = ContentFile(b''.join(uploaded_file.chunks()))
-    return default_storage.save(storage_path, content)
+    # Storage streams the upload chunk by chunk — no full copy in memory.
+    return default_storage.save(storage_path, uploaded_file)
 
 
 def _get_parser_v2_file_path(storage_path):
@@ -193,34 +191,40 @@ def _build_parser_v2_additional_data(draft, request_fields, user, tracking=None)
     }
 
 
-def _attach_parser_v2_original_file(insurance_request, draft, *, cleanup_source=True):
-    """Attach the original Excel to a created request.
+def _attach_parser_v2_original_file(created_requests, draft):
+    """Attach the original Excel to every created request of a batch.
 
-    With cleanup_source=False the source file in storage is kept after the
-    attach, so the same draft can be attached to several sibling requests in
-    a batch (stage 4 splitting). The caller is responsible for deleting the
-    storage file once after all siblings have been attached.
+    The upload is stored once in the content-addressed blob store and all
+    siblings reference it, so a 40-object batch writes one file, not 40.
+    The temporary upload in parser_v2_uploads/ is removed afterwards.
     """
     storage_path = draft.get('storage_path')
     original_filename = draft.get('original_filename') or os.path.basename(storage_path or '')
     if not storage_path or not default_storage.exists(storage_path):
-        logger.warning("Parser V2 original file is missing for request #%s", insurance_request.pk)
-        return None
+        logger.warning(
+            "Parser V2 original file is missing for request(s) %s",
+            ', '.join(f'#{r.pk}' for r in created_requests),
+        )
+        return []
 
-    safe_name = get_valid_filename(os.path.basename(original_filename)) or 'insurance_request.xlsx'
     with default_storage.open(storage_path, 'rb') as source:
-        attachment = RequestAttachment.objects.create(
+        blob = store_blob(source, original_filename)
+    attachments = RequestAttachment.objects.bulk_create([
+        RequestAttachment(
             request=insurance_request,
-            file=File(source, name=safe_name),
+            file=blob.file.name,
+            blob=blob,
             original_filename=original_filename,
-            file_type=os.path.splitext(original_filename)[1]
+            file_type=os.path.splitext(original_filename)[1],
         )
-    if cleanup_source:
-        try:
-            default_storage.delete(storage_path)
-        except Exception as cleanup_error:
-            logger.warning("Could not delete Parser V2 temporary file %s: %s", storage_path, cleanup_error)
-    return attachment
+        for insurance_request in created_requests
+    ])
+    log_bulk_create(attachments)
+    try:
+        default_storage.delete(storage_path)
+    except Exception as cleanup_error:
+        logger.warning("Could not delete Parser V2 temporary file %s: %s", storage_path, cleanup_error)
+    return attachments
 
 
 def _parser_v2_object_fields(payload_object):
@@ -312,7 +316,12 @@ def _record_request_field_edits(created, tracking):
     Общие правки (field_edits) записываются один раз на партию — к первой
     заявке, чтобы не множить их по сёстрам и не искажать агрегаты.
     Объектные правки (object_edits) пишутся к своей заявке по позиции.
+    После коммита пересчитываются дневные агрегаты качества парсера — в том
+    числе для партий без правок (они входят в знаменатель долей).
     """
+    from summaries.services import analytics_parser_rollups
+
+    analytics_parser_rollups.mark_requests_dirty(created)
     field_edits = tracking.get('field_edits') or []
     object_edits = tracking.get('object_edits') or []
     if not field_edits and not object_edits:
@@ -355,11 +364,10 @@ def _create_requests_with_splitting(*, request_fields, additional_data, object_k
       and item_count=N. Common fields are duplicated; per-object fields
       (brand/model/condition/cost/...) come from each object_kwargs_list[i].
 
-    The original Excel is attached to every created request; the source file
-    in storage is removed once after the loop.
+    The original Excel is attached to every created request through one
+    shared blob; the temporary upload is removed afterwards.
     """
     common = _build_common_request_kwargs(request_fields, additional_data, user)
-    created: list = []
 
     # Per-request manual-edit count = common field edits + this sibling's
     # object edits (by creation position). Denormalized into
@@ -375,56 +383,46 @@ def _create_requests_with_splitting(*, request_fields, additional_data, object_k
             count += len(object_edits[index])
         return count
 
-    with transaction.atomic():
-        if not object_kwargs_list:
-            # Legacy fallback — no objects parsed, use the form values.
-            instance = InsuranceRequest.objects.create(
-                vehicle_info=request_fields['vehicle_info'],
-                manufacturing_year=request_fields['manufacturing_year'],
-                manual_edits_count=_edit_count_for(1),
-                **common,
-            )
-            created.append(instance)
-        elif len(object_kwargs_list) == 1:
-            instance = InsuranceRequest.objects.create(
-                manual_edits_count=_edit_count_for(1),
-                **object_kwargs_list[0],
+    if not object_kwargs_list:
+        # Legacy fallback — no objects parsed, use the form values.
+        instances = [InsuranceRequest(
+            vehicle_info=request_fields['vehicle_info'],
+            manufacturing_year=request_fields['manufacturing_year'],
+            manual_edits_count=_edit_count_for(1),
+            **common,
+        )]
+    elif len(object_kwargs_list) == 1:
+        instances = [InsuranceRequest(
+            manual_edits_count=_edit_count_for(1),
+            **object_kwargs_list[0],
+            **common,
+        )]
+    else:
+        batch_id = uuid.uuid4()
+        item_count = len(object_kwargs_list)
+        instances = [
+            InsuranceRequest(
+                source_batch_id=batch_id,
+                item_no=idx,
+                item_count=item_count,
+                manual_edits_count=_edit_count_for(idx),
+                **object_kwargs,
                 **common,
             )
-            created.append(instance)
-        else:
-            batch_id = uuid.uuid4()
-            item_count = len(object_kwargs_list)
-            for idx, object_kwargs in enumerate(object_kwargs_list, start=1):
-                instance = InsuranceRequest.objects.create(
-                    source_batch_id=batch_id,
-                    item_no=idx,
-                    item_count=item_count,
-                    manual_edits_count=_edit_count_for(idx),
-                    **object_kwargs,
-                    **common,
-                )
-                created.append(instance)
-
-            # Sync created_at across siblings so the request_list query
-            # (-created_at, source_batch_id, item_no) groups them together
-            # in the right order. Without this every sibling gets its own
-            # auto_now_add timestamp from the loop above and they end up
-            # interleaved with other requests.
-            batch_created_at = created[0].created_at
-            InsuranceRequest.objects.filter(pk__in=[r.pk for r in created]).update(
-                created_at=batch_created_at
-            )
-            for r in created:
-                r.created_at = batch_created_at
+            for idx, object_kwargs in enumerate(object_kwargs_list, start=1)
+        ]
+
+    with transaction.atomic():
+        # One INSERT for the whole batch with a shared created_at, so the
+        # request_list query (-created_at, source_batch_id, item_no) keeps
+        # siblings together; StatusEvent and audit rows are written in bulk.
+        created = bulk_create_requests(instances, changed_by=user)
 
         # Записываем нормализованные строки правок для аналитики (фаза 4).
         _record_request_field_edits(created, tracking)
 
-    # Attach the original Excel to every sibling, clean storage at the end.
-    last_index = len(created) - 1
-    for idx, instance in enumerate(created):
-        _attach_parser_v2_original_file(instance, draft, cleanup_source=(idx == last_index))
+    # One blob for the original Excel, referenced by every sibling.
+    _attach_parser_v2_original_file(created, draft)
 
     return created
 
@@ -562,9 +560,12 @@ def access_denied_view(request):
     })
 
 
-@user_required
-def request_list(request):
-    """Список всех заявок с поддержкой фильтрации по филиалу, дате и номеру ДФА"""
+def _filtered_request_list_queryset(request):
+    """Заявки по фильтрам списка (филиал, год, месяц, номер ДФА) в порядке списка.
+
+    Возвращает (queryset, filters), где filters — значения фильтров для
+    шаблона, включая очищенный dfa_filter и текст ошибки dfa_filter_error.
+    """
     # Получаем параметры фильтрации из GET запроса
     branch_filter = request.GET.get('branch', '').strip()
     month_filter = request.GET.get('month', '').strip()
@@ -626,6 +627,25 @@ def request_list(request):
     # сёстры партии идут подряд по item_no, чтобы оператор видел партию целым
     # блоком. Заявки без партии (V1 и одиночные V2) — без вторичной сортировки.
     queryset = queryset.order_by('-created_at', 'source_batch_id', 'item_no')
+
+    return queryset, {
+        'branch_filter': branch_filter,
+        'month_filter': month_filter,
+        'year_filter': year_filter,
+        'dfa_filter': dfa_filter,
+        'dfa_filter_error': dfa_filter_error,
+    }
+
+
+@user_required
+def request_list(request):
+    """Список всех заявок с поддержкой фильтрации по филиалу, дате и номеру ДФА"""
+    queryset, filters = _filtered_request_list_queryset(request)
+    branch_filter = filters['branch_filter']
+    month_filter = filters['month_filter']
+    year_filter = filters['year_filter']
+    dfa_filter = filters['dfa_filter']
+    dfa_filter_error = filters['dfa_filter_error']
     
     # Применяем пагинацию. Размер страницы выбирается оператором из белого
     # списка, чтобы нельзя было запросить произвольно большой объём данных.
@@ -1184,10 +1204,15 @@ def request_detail(request, pk):
             .order_by('item_no')
         )
 
+    batch_emails_pending = sum(
+        1 for item in [insurance_request, *batch_siblings] if item.status == 'uploaded'
+    ) if batch_siblings else 0
+
     return render(request, 'insurance_requests/request_detail.html', {
         'request': insurance_request,
         'status_form': status_form,
         'batch_siblings': batch_siblings,
+        'batch_emails_pending': batch_emails_pending,
     })
 
 
@@ -1274,6 +1299,38 @@ def export_request_database(request, pk):
     return response
 
 
+@superuser_required
+def export_request_list(request):
+    """Полные карточки всех заявок по текущим фильтрам списка в одном XLSX."""
+    queryset, _filters = _filtered_request_list_queryset(request)
+    try:
+        workbook_bytes = build_requests_export_workbook(queryset)
+        filename = build_requests_export_filename()
+    except Exception as exc:
+        logger.error(
+            "Request list export failed for user %s: %s",
+            request.user.username,
+            exc,
+            exc_info=True,
+        )
+        messages.error(request, 'Не удалось сформировать выгрузку заявок.')
+        return redirect('insurance_requests:request_list')
+
+    response = HttpResponse(
+        workbook_bytes,
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+
+    logger.info(
+        "Request list export generated by user %s: %s (%s)",
+        request.user.username,
+        filename,
+        request.GET.urlencode() or 'no filters',
+    )
+    return response
+
+
 @superuser_required
 def export_request_application(request, pk):
     """Скачивание «Заявки для страховой» в PDF — только нужные поля.
@@ -1288,7 +1345,7 @@ def export_request_application(request, pk):
     )
 
     try:
-        pdf_bytes = render_application_pdf(insurance_request)
+        pdf_bytes = render_application_pdf_cached(insurance_request)
         filename = build_application_filename(insurance_request)
     except Exception as exc:
         logger.error(
@@ -1313,6 +1370,65 @@ def export_request_application(request, pk):
     return response
 
 
+@superuser_required
+def export_request_applications(request):
+    """Несколько «Заявок для страховой» одним ZIP.
+
+    Заявки задаются параметром ?batch=<source_batch_id> (вся партия) или
+    ?ids=1,2,3. PDF берутся из кэша или рендерятся параллельно в пуле.
+    """
+    from django.conf import settings
+
+    queryset = InsuranceRequest.objects.select_related('created_by')
+    batch_id = request.GET.get('batch')
+    if batch_id:
+        try:
+            queryset = queryset.filter(source_batch_id=uuid.UUID(batch_id)).order_by('item_no')
+        except ValueError:
+            return HttpResponse('Некорректный идентификатор партии', status=400)
+        label = f'batch_{batch_id[:8]}'
+    else:
+        try:
+            ids = [int(value) for value in request.GET.get('ids', '').split(',') if value.strip()]
+        except ValueError:
+            return HttpResponse('Некорректный список заявок', status=400)
+        queryset = queryset.filter(pk__in=ids).order_by('pk')
+        label = 'requests'
+
+    insurance_requests = list(queryset[:settings.PDF_BATCH_MAX_REQUESTS + 1])
+    if not insurance_requests:
+        return HttpResponse('Заявки не найдены', status=404)
+    if len(insurance_requests) > settings.PDF_BATCH_MAX_REQUESTS:
+        return HttpResponse(
+            f'За раз можно выгрузить не больше {settings.PDF_BATCH_MAX_REQUESTS} заявок', status=400,
+        )
+
+    try:
+        archive = build_applications_zip(insurance_requests)
+    except Exception as exc:
+        logger.error(
+            "Batch application PDF export failed for %d request(s) by user %s: %s",
+            len(insurance_requests),
+            request.user.username,
+            exc,
+            exc_info=True,
+        )
+        messages.error(request, 'Не удалось сформировать PDF заявок для страховой.')
+        return redirect('insurance_requests:request_detail', pk=insurance_requests[0].pk)
+
+    filename = f'applications_{label}_{timezone.localtime().strftime("%Y%m%d_%H%M")}.zip'
+    response = HttpResponse(archive, content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+
+    logger.info(
+        "Batch application PDF export generated for %d request(s) by user %s: %s",
+        len(insurance_requests),
+        request.user.username,
+        filename,
+    )
+    return response
+
+
 @user_required
 def edit_request(request, pk):
     """Редактирование заявки с улучшенной предзаполнением формы"""
@@ -1427,6 +1543,60 @@ def generate_email(request, pk):
     return redirect('insurance_requests:request_detail', pk=pk)
 
 
+@require_http_methods(["POST"])
+@user_required
+def generate_batch_emails(request, pk):
+    """Генерация писем сразу для всех заявок партии, ещё не получивших письмо.
+
+    Шаблон компилируется один раз на партию (EmailTemplateGenerator.generate_many),
+    письма пишутся одним bulk_update (в журнал easy-audit — log_bulk_update),
+    статусы — через bulk_transition_status.
+    """
+    from summaries.services.status_transitions import bulk_transition_status
+
+    insurance_request = get_object_or_404(InsuranceRequest, pk=pk)
+    if not insurance_request.source_batch_id:
+        return redirect('insurance_requests:generate_email', pk=pk)
+
+    siblings = list(
+        InsuranceRequest.objects
+        .filter(source_batch_id=insurance_request.source_batch_id, status='uploaded')
+        .order_by('item_no')
+    )
+    if not siblings:
+        messages.info(request, 'Для всех заявок партии письма уже сгенерированы')
+        return redirect('insurance_requests:request_detail', pk=pk)
+
+    try:
+        emails = EmailTemplateGenerator().generate_many(sibling.to_dict() for sibling in siblings)
+        now = timezone.now()
+        for sibling, (email_subject, email_body) in zip(siblings, emails):
+            sibling.email_subject = email_subject
+            sibling.email_body = email_body
+            sibling.updated_at = now
+        with transaction.atomic():
+            # bulk_update мимо easy-audit: правки писем в историю пишем сами
+            fields = ['email_subject', 'email_body', 'updated_at']
+            log_bulk_update(siblings, fields=fields)
+            InsuranceRequest.objects.bulk_update(siblings, fields)
+            bulk_transition_status(
+                InsuranceRequest.objects.filter(pk__in=[sibling.pk for sibling in siblings]),
+                'email_generated',
+                changed_by=request.user,
+            )
+    except Exception as e:
+        logger.error(f"Error generating batch emails for request {pk}: {str(e)}")
+        messages.error(request, f'Ошибка при генерации писем для партии: {str(e)}')
+        return redirect('insurance_requests:request_detail', pk=pk)
+
+    messages.success(request, f'Письма сгенерированы для {len(siblings)} заявок партии')
+    logger.info(
+        "Batch emails generated for %d request(s) of batch %s by user %s",
+        len(siblings), insurance_request.source_batch_id, request.user.username,
+    )
+    return redirect('insurance_requests:request_detail', pk=pk)
+
+
 @user_required
 def preview_email(request, pk):
     """Редактирование письма"""
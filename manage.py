@@ -6,7 +6,9 @@ import sys
 
 def main():
     """Run administrative tasks."""
-    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'onlineservice.settings')
+    # The test suite runs with its own settings (onlineservice/settings_test.py)
+    default_settings = 'onlineservice.settings_test' if sys.argv[1:2] == ['test'] else 'onlineservice.settings'
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', default_settings)
     try:
         from django.core.management import execute_from_command_line
     except ImportError as exc:
@@ -3,15 +3,16 @@
 Domain monitoring script for insflow.tw1.su infrastructure
 Monitors both main domain and subdomain availability
 """
+import asyncio
 import sys
-import urllib.request
-import urllib.error
 import json
 import time
 import logging
 from datetime import datetime
 import os
 
+from onlineservice import domain_monitoring
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -32,96 +33,48 @@ class DomainMonitor:
         self.subdomain = os.getenv('SUBDOMAIN', 'zs.insflow.tw1.su')
         self.timeout = 10
         
-    def check_domain(self, domain, path='/', expected_status=200):
-        """Check if a domain is accessible"""
-        url = f"https://{domain}{path}"
-        start_time = time.time()
+    def _build_result(self, domain, path, response, expected_status):
+        """Convert an engine response into the monitoring result format"""
+        result = {
+            'domain': domain,
+            'path': path,
+            'status': 'success',
+            'status_code': response.status_code,
+            'response_time': response.response_time,
+            'timestamp': datetime.now().isoformat()
+        }
         
-        try:
-            request = urllib.request.Request(url)
-            request.add_header('User-Agent', 'DomainMonitor/1.0')
-            
-            response = urllib.request.urlopen(request, timeout=self.timeout)
-            response_time = time.time() - start_time
-            
-            result = {
-                'domain': domain,
-                'path': path,
-                'status': 'success',
-                'status_code': response.status,
-                'response_time': round(response_time, 3),
-                'timestamp': datetime.now().isoformat()
-            }
-            
-            if response.status == expected_status:
-                logger.info(f"✓ {domain}{path} - OK ({response.status}) - {response_time:.3f}s")
-            else:
-                logger.warning(f"⚠ {domain}{path} - Unexpected status {response.status} - {response_time:.3f}s")
-                result['status'] = 'warning'
-                
-            return result
-            
-        except urllib.error.HTTPError as e:
-            response_time = time.time() - start_time
-            result = {
-                'domain': domain,
-                'path': path,
-                'status': 'error',
-                'status_code': e.code,
-                'error': str(e),
-                'response_time': round(response_time, 3),
-                'timestamp': datetime.now().isoformat()
-            }
-            logger.error(f"✗ {domain}{path} - HTTP Error {e.code} - {response_time:.3f}s")
-            return result
-            
-        except urllib.error.URLError as e:
-            response_time = time.time() - start_time
-            result = {
-                'domain': domain,
-                'path': path,
-                'status': 'error',
-                'error': str(e),
-                'response_time': round(response_time, 3),
-                'timestamp': datetime.now().isoformat()
-            }
-            logger.error(f"✗ {domain}{path} - URL Error: {e}")
-            return result
-            
-        except Exception as e:
-            response_time = time.time() - start_time
-            result = {
-                'domain': domain,
-                'path': path,
-                'status': 'error',
-                'error': str(e),
-                'response_time': round(response_time, 3),
-                'timestamp': datetime.now().isoformat()
-            }
-            logger.error(f"✗ {domain}{path} - Error: {e}")
-            return result
-    
-    def check_landing_page(self):
-        """Check landing page on main domain"""
-        return self.check_domain(self.main_domain, '/')
+        if response.error is not None:
+            result['status'] = 'error'
+            result['error'] = response.error
+            if response.status_code is None:
+                del result['status_code']
+            logger.error(f"✗ {domain}{path} - {response.error} - {response.response_time:.3f}s")
+        elif response.status_code == expected_status:
+            logger.info(f"✓ {domain}{path} - OK ({response.status_code}) - {response.response_time:.3f}s")
+        else:
+            logger.warning(f"⚠ {domain}{path} - Unexpected status {response.status_code} - {response.response_time:.3f}s")
+            result['status'] = 'warning'
+        
+        return result
     
-    def check_subdomain_app(self):
-        """Check main application on subdomain"""
-        return self.check_domain(self.subdomain, '/login/')
+    async def _check_all(self, targets):
+        """Check all (domain, path) targets concurrently"""
+        async with domain_monitoring.DomainMonitor(timeout=self.timeout, user_agent='DomainMonitor/2.0') as engine:
+            responses = await asyncio.gather(
+                *(engine.fetch(f"https://{domain}{path}") for domain, path in targets)
+            )
+        return [
+            self._build_result(domain, path, response, expected_status=200)
+            for (domain, path), response in zip(targets, responses)
+        ]
     
-    def check_static_files(self):
-        """Check static file serving on both domains"""
-        results = []
-        
-        # Check CSS file on main domain
-        css_result = self.check_domain(self.main_domain, '/static/css/landing.css')
-        results.append(css_result)
-        
-        # Check CSS file on subdomain
-        css_result_sub = self.check_domain(self.subdomain, '/static/css/custom.css')
-        results.append(css_result_sub)
-        
-        return results
+    def check_domain(self, domain, path='/', expected_status=200):
+        """Check if a domain is accessible"""
+        async def check():
+            async with domain_monitoring.DomainMonitor(timeout=self.timeout, user_agent='DomainMonitor/2.0') as engine:
+                return await engine.fetch(f"https://{domain}{path}")
+        return self._build_result(domain, path, asyncio.run(check()), expected_status)
     
     def run_full_check(self):
         """Run complete domain monitoring check"""
@@ -132,17 +85,14 @@ class DomainMonitor:
             'checks': []
         }
         
-        # Check landing page
-        landing_result = self.check_landing_page()
-        results['checks'].append(landing_result)
-        
-        # Check subdomain application
-        app_result = self.check_subdomain_app()
-        results['checks'].append(app_result)
-        
-        # Check static files
-        static_results = self.check_static_files()
-        results['checks'].extend(static_results)
+        # Landing page, application and static files on both domains - all at once
+        targets = [
+            (self.main_domain, '/'),
+            (self.subdomain, '/login/'),
+            (self.main_domain, '/static/css/landing.css'),
+            (self.subdomain, '/static/css/custom.css'),
+        ]
+        results['checks'] = asyncio.run(self._check_all(targets))
         
         # Calculate overall status
         error_count = sum(1 for check in results['checks'] if check['status'] == 'error')
@@ -0,0 +1,321 @@
+"""
+Буферизованная запись журнала django-easy-audit.
+
+Штатный ModelBackend пакета пишет RequestEvent отдельным INSERT прямо в
+обработчике request_started — до того, как запрос дойдёт до view, — и так на
+каждую страницу. Здесь события складываются в очередь процесса, а фоновый
+поток раз в AUDIT_SINK_FLUSH_INTERVAL секунд (или по набору
+AUDIT_SINK_BATCH_SIZE) пишет их одним bulk_create.
+
+Подключение — через штатную точку расширения пакета:
+    DJANGO_EASY_AUDIT_LOGGING_BACKEND = 'onlineservice.audit.BufferedAuditBackend'
+
+Что теряем: при аварийном завершении процесса недописанный буфер пропадает
+(при обычной остановке он сбрасывается через atexit); при переполнении очереди
+новые события отбрасываются и считаются в stats()['dropped']. Поэтому CRUD-
+события по умолчанию пишутся синхронно (AUDIT_SINK_BUFFER_CRUD) — их читают
+бейджи и история правок заявок, — а LoginEvent пишется синхронно всегда.
+
+log_bulk_create() и log_bulk_update() дописывают CRUDEvent для объектов,
+сохранённых bulk_create и bulk_update (сигналы pre_save/post_save для них не
+срабатывают). По той же причине CRUDEvent из буфера и из этих пачек
+раскладываются в индекс полей FieldChange здесь, после записи.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from functools import partial
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+from easyaudit.backends import ModelBackend
+
+logger = logging.getLogger('onlineservice.audit')
+
+SAMPLED_METHODS = ('GET', 'HEAD')
+
+
+class AuditSink:
+    """Очередь событий аудита с фоновым потоком записи.
+
+    Поток стартует лениво при первом событии и перезапускается после fork
+    (gunicorn --preload), чтобы не унаследовать мёртвый поток родителя.
+    """
+
+    def __init__(self, *, batch_size=None, flush_interval=None, max_queue=None):
+        self.batch_size = batch_size or getattr(settings, 'AUDIT_SINK_BATCH_SIZE', 200)
+        self.flush_interval = flush_interval or getattr(settings, 'AUDIT_SINK_FLUSH_INTERVAL', 2.0)
+        self.max_queue = max_queue or getattr(settings, 'AUDIT_SINK_MAX_QUEUE', 10000)
+        self._write_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._queue = queue.Queue(maxsize=self.max_queue)
+        self._thread = None
+        self._stats = {'enqueued': 0, 'written': 0, 'dropped': 0, 'failed': 0, 'flushes': 0}
+
+    def put(self, model, values):
+        """Ставит событие в очередь; при переполнении отбрасывает его."""
+        if os.getpid() != self._pid:
+            self._reset()
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait((model, values))
+        except queue.Full:
+            self._stats['dropped'] += 1
+            if self._stats['dropped'] % 1000 == 1:
+                logger.warning('Audit queue is full (%d), dropped %d events so far',
+                               self.max_queue, self._stats['dropped'])
+            return
+        self._stats['enqueued'] += 1
+
+    def flush(self, timeout=None):
+        """Синхронно дописывает очередь и ждёт пачку, которую пишет фоновый поток.
+
+        Возвращает число событий, записанных из очереди текущим потоком.
+        """
+        batch = self._drain(limit=None)
+        self._write(batch)
+        deadline = time.monotonic() + (self.flush_interval * 2 if timeout is None else timeout)
+        while (self._stats['written'] + self._stats['failed'] < self._stats['enqueued']
+               and time.monotonic() < deadline):
+            time.sleep(0.01)
+        return len(batch)
+
+    def stats(self):
+        return {**self._stats, 'queued': self._queue.qsize()}
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='audit-sink', daemon=True)
+                self._thread.start()
+
+    def _drain(self, limit):
+        batch = []
+        while limit is None or len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            deadline = time.monotonic() + self.flush_interval
+            batch = [first]
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write(batch)
+
+    def _write(self, batch):
+        if not batch:
+            return
+        by_model = {}
+        for model, values in batch:
+            by_model.setdefault(model, []).append(model(**values))
+        with self._write_lock:
+            # Соединение потока живёт между сбросами — соблюдаем CONN_MAX_AGE.
+            close_old_connections()
+            for model, objs in by_model.items():
+                try:
+                    model.objects.using(_database_alias()).bulk_create(objs, batch_size=self.batch_size)
+                except Exception:
+                    self._stats['failed'] += len(objs)
+                    logger.exception('Failed to write %d %s audit events', len(objs), model.__name__)
+                else:
+                    self._stats['written'] += len(objs)
+                    if model.__name__ == 'CRUDEvent':
+                        # bulk_create не шлёт post_save — индекс полей дописываем сами
+                        from insurance_requests.field_changes import index_crud_events
+                        index_crud_events(objs)
+            self._stats['flushes'] += 1
+
+
+def _database_alias():
+    from easyaudit.settings import DATABASE_ALIAS
+    return DATABASE_ALIAS
+
+
+_sink = None
+_sink_lock = threading.Lock()
+
+
+def get_sink():
+    """Общий на процесс AuditSink."""
+    global _sink
+    if _sink is None:
+        with _sink_lock:
+            if _sink is None:
+                _sink = AuditSink()
+                atexit.register(_sink.flush)
+    return _sink
+
+
+def request_sample_rate(url, method):
+    """Доля запросов url, попадающих в журнал. Изменяющие методы пишутся всегда."""
+    if method not in SAMPLED_METHODS:
+        return 1.0
+    for pattern, rate in getattr(settings, 'AUDIT_REQUEST_SAMPLED_URLS', []):
+        if re.match(pattern, url):
+            return float(rate)
+    return getattr(settings, 'AUDIT_REQUEST_SAMPLE_RATE', 1.0)
+
+
+class BufferedAuditBackend(ModelBackend):
+    """LOGGING_BACKEND для easy-audit: RequestEvent (и по желанию CRUDEvent) через AuditSink."""
+
+    def request(self, request_info):
+        rate = request_sample_rate(request_info.get('url') or '', request_info.get('method') or '')
+        if rate < 1.0 and random.random() >= rate:
+            return None
+        if not getattr(settings, 'AUDIT_SINK_ASYNC', False):
+            return super().request(request_info)
+        from easyaudit.models import RequestEvent
+        get_sink().put(RequestEvent, request_info)
+        return None
+
+    def crud(self, crud_info):
+        if not (getattr(settings, 'AUDIT_SINK_ASYNC', False)
+                and getattr(settings, 'AUDIT_SINK_BUFFER_CRUD', False)):
+            return super().crud(crud_info)
+        from easyaudit.models import CRUDEvent
+        get_sink().put(CRUDEvent, crud_info)
+        return None
+
+
+def _write_crud_events(events):
+    """Пишет готовые значения CRUDEvent: в AuditSink или одним bulk_create."""
+    from easyaudit.models import CRUDEvent
+
+    if getattr(settings, 'AUDIT_SINK_ASYNC', False) and getattr(settings, 'AUDIT_SINK_BUFFER_CRUD', False):
+        sink = get_sink()
+        for values in events:
+            sink.put(CRUDEvent, values)
+        return
+    try:
+        objs = CRUDEvent.objects.using(_database_alias()).bulk_create(
+            [CRUDEvent(**values) for values in events],
+            batch_size=getattr(settings, 'AUDIT_SINK_BATCH_SIZE', 200),
+        )
+    except Exception:
+        logger.exception('Failed to write %d CRUD events', len(events))
+        return
+    # bulk_create не шлёт post_save — индекс полей дописываем сами
+    from insurance_requests.field_changes import index_crud_events
+    index_crud_events(objs)
+
+
+def log_bulk_create(instances):
+    """Пишет CRUDEvent CREATE для объектов, сохранённых через bulk_create.
+
+    bulk_create не шлёт post_save, и easy-audit таких объектов не видит.
+    События собираются так же, как в easyaudit.signals.crud_flows, и после
+    коммита пишутся одним bulk_create (или уходят в AuditSink, если CRUD
+    буферизуется). Возвращает число запланированных событий.
+    """
+    from django.contrib.contenttypes.models import ContentType
+    from django.core import serializers
+    from django.db import transaction
+    from easyaudit.models import CRUDEvent
+    from easyaudit.settings import WATCH_MODEL_EVENTS
+    from easyaudit.signals.crud_flows import get_current_user_details
+    from easyaudit.signals.model_signals import should_audit
+
+    instances = [obj for obj in instances if should_audit(obj)]
+    if not WATCH_MODEL_EVENTS or not instances:
+        return 0
+
+    user_id, user_pk_as_string = get_current_user_details()
+    now = timezone.now()
+    events = [
+        {
+            'content_type_id': ContentType.objects.get_for_model(obj).id,
+            'datetime': now,
+            'event_type': CRUDEvent.CREATE,
+            'object_id': obj.pk,
+            'object_json_repr': serializers.serialize('json', [obj]),
+            'object_repr': str(obj),
+            'user_id': user_id or None,
+            'user_pk_as_string': user_pk_as_string,
+        }
+        for obj in instances
+    ]
+
+    transaction.on_commit(partial(_write_crud_events, events), using=_database_alias())
+    return len(events)
+
+
+def log_bulk_update(instances, fields=None):
+    """Пишет CRUDEvent UPDATE для объектов, сохраняемых через bulk_update.
+
+    Вызывать до bulk_update: прежние значения читаются из базы одним запросом,
+    changed_fields считается easyaudit.utils.model_delta, как в pre_save пакета
+    (fields — ограничить дельту этими полями). События пишутся после коммита,
+    как у log_bulk_create. Возвращает число запланированных событий.
+    """
+    from django.contrib.contenttypes.models import ContentType
+    from django.core import serializers
+    from django.db import transaction
+    from easyaudit.models import CRUDEvent
+    from easyaudit.settings import WATCH_MODEL_EVENTS
+    from easyaudit.signals.crud_flows import get_current_user_details
+    from easyaudit.signals.model_signals import should_audit
+    from easyaudit.utils import model_delta
+
+    instances = [obj for obj in instances if obj.pk is not None and should_audit(obj)]
+    if not WATCH_MODEL_EVENTS or not instances:
+        return 0
+
+    model = type(instances[0])
+    previous = model._default_manager.in_bulk([obj.pk for obj in instances])
+    skip_empty = getattr(settings, 'DJANGO_EASY_AUDIT_CRUD_EVENT_NO_CHANGED_FIELDS_SKIP', False)
+    user_id, user_pk_as_string = get_current_user_details()
+    now = timezone.now()
+    events = []
+    for obj in instances:
+        old = previous.get(obj.pk)
+        if old is None:
+            continue
+        delta = model_delta(old, obj) or {}
+        if fields is not None:
+            delta = {name: values for name, values in delta.items() if name in fields}
+        if not delta and skip_empty:
+            continue
+        events.append({
+            'changed_fields': json.dumps(delta),
+            'content_type_id': ContentType.objects.get_for_model(obj).id,
+            'datetime': now,
+            'event_type': CRUDEvent.UPDATE,
+            'object_id': obj.pk,
+            'object_json_repr': serializers.serialize('json', [obj]),
+            'object_repr': str(obj),
+            'user_id': user_id or None,
+            'user_pk_as_string': user_pk_as_string,
+        })
+    if not events:
+        return 0
+
+    transaction.on_commit(partial(_write_crud_events, events), using=_database_alias())
+    return len(events)
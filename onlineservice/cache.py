@@ -0,0 +1,190 @@
+"""
+Пространства имён кэша: ключи по функциям, сброс версией, статистика.
+
+Backend кэша выбирается в settings (CACHE_BACKEND): память процесса, файлы или
+Redis; все считают попадания и промахи для /metrics (onlineservice/metrics.py).
+Функция, которая что-то кэширует, заводит своё пространство на уровне модуля:
+
+    APPLICATION_PDF_CACHE = CacheNamespace('application_pdf')
+    cached = APPLICATION_PDF_CACHE.get_many(keys)
+    APPLICATION_PDF_CACHE.set_many(rendered, timeout=...)
+
+Ключ в кэше — '<имя>:v<версия>:<ключ>'. Версия пространства хранится в самом
+кэше (общая для всех процессов при file/redis); invalidate() увеличивает её,
+и все прежние записи разом перестают находиться — они дотлевают по timeout.
+invalidate_on — модели ('app_label.Model'), после сохранения или удаления
+которых пространство сбрасывается сигналами post_save/post_delete.
+manual_invalidation=False — пространство нельзя сбросить со страницы «Кэш»:
+там хранится состояние, а не копия данных (счётчики входов, блокировки).
+
+Версия читается из кэша один раз на HTTP-запрос: между сигналами
+request_started и request_finished она запоминается в потоке, и страница со
+многими get/get_many не делает лишний GET версии на каждый вызов. Свои
+invalidate() запрос видит сразу, чужие — со следующего запроса.
+
+Попадания, промахи и сбросы по пространствам копятся в реестре метрик процесса
+(cache_namespace_events_total в /metrics); страница «Кэш» раздела аналитики
+показывает их вместе с долей попаданий.
+"""
+import threading
+import time
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.signals import request_finished, request_started
+from django.db.models.signals import post_delete, post_save
+
+from onlineservice.metrics import registry
+
+_namespaces = {}
+
+# Версии пространств, прочитанные в текущем HTTP-запросе (versions is None — вне запроса)
+_request_versions = threading.local()
+
+
+def _start_request_versions(**kwargs):
+    _request_versions.versions = {}
+
+
+def _finish_request_versions(**kwargs):
+    _request_versions.versions = None
+
+
+request_started.connect(_start_request_versions, dispatch_uid='cache_namespace_versions_start')
+request_finished.connect(_finish_request_versions, dispatch_uid='cache_namespace_versions_finish')
+
+
+def namespaces():
+    """Зарегистрированные пространства имён, по имени."""
+    return [_namespaces[name] for name in sorted(_namespaces)]
+
+
+def get_namespace(name):
+    return _namespaces.get(name)
+
+
+class CacheNamespace:
+    """Набор ключей одной функции в кэше alias с общей версией."""
+
+    def __init__(self, name, *, timeout=DEFAULT_TIMEOUT, alias='default', invalidate_on=(), description='',
+                 manual_invalidation=True):
+        self.name = name
+        self.timeout = timeout
+        self.alias = alias
+        self.invalidate_on = tuple(invalidate_on)
+        self.description = description
+        self.manual_invalidation = manual_invalidation
+        self._version_key = f'cache_namespace_version:{name}'
+        for label in self.invalidate_on:
+            for signal in (post_save, post_delete):
+                signal.connect(self._on_model_change, sender=label, weak=False,
+                               dispatch_uid=f'cache_namespace:{name}:{label}')
+        _namespaces[name] = self
+
+    def __repr__(self):
+        return f'<CacheNamespace {self.name}>'
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def version(self):
+        """Текущая версия пространства.
+
+        Пропавшая из кэша версия (вытеснение, перезапуск locmem) заводится
+        заново от текущего времени, а не с 1 — старые записи не оживают.
+        """
+        versions = getattr(_request_versions, 'versions', None)
+        if versions is not None and self.name in versions:
+            return versions[self.name]
+        version = self.cache.get(self._version_key)
+        if version is None:
+            self.cache.add(self._version_key, time.time_ns(), timeout=None)
+            version = self.cache.get(self._version_key, time.time_ns())
+        self._remember_version(version)
+        return version
+
+    def invalidate(self):
+        """Сбросить все ключи пространства во всех процессах."""
+        try:
+            version = self.cache.incr(self._version_key)
+        except ValueError:
+            version = time.time_ns()
+            self.cache.set(self._version_key, version, timeout=None)
+        self._remember_version(version)
+        registry.observe_cache_namespace(self.name, invalidations=1)
+
+    def _remember_version(self, version):
+        versions = getattr(_request_versions, 'versions', None)
+        if versions is not None:
+            versions[self.name] = version
+
+    def make_key(self, key, version=None):
+        return f'{self.name}:v{self.version() if version is None else version}:{key}'
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version=version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        """{ключ: значение} для найденных ключей.
+
+        version — версия, прочитанная заранее (один раз на страницу, см.
+        cache_fragment); по умолчанию читается из кэша.
+        """
+        keys = list(keys)
+        version = self.version() if version is None else version
+        full_keys = {self.make_key(key, version): key for key in keys}
+        found = self.cache.get_many(full_keys)
+        registry.observe_cache_namespace(self.name, hits=len(found), misses=len(keys) - len(found))
+        return {full_keys[full_key]: value for full_key, value in found.items()}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout=timeout, version=version)
+
+    def set_many(self, mapping, timeout=DEFAULT_TIMEOUT, version=None):
+        version = self.version() if version is None else version
+        self.cache.set_many(
+            {self.make_key(key, version): value for key, value in mapping.items()},
+            timeout=self.timeout if timeout is DEFAULT_TIMEOUT else timeout,
+        )
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        """Значение ключа; при промахе — default() (или default), сохранённое в кэш."""
+        version = self.version() if version is None else version
+        found = self.get_many([key], version=version)
+        if key in found:
+            return found[key]
+        value = default() if callable(default) else default
+        self.set(key, value, timeout=timeout, version=version)
+        return value
+
+    def delete(self, key):
+        self.cache.delete(self.make_key(key))
+
+    def _on_model_change(self, sender, **kwargs):
+        self.invalidate()
+
+
+def stats():
+    """Строки для страницы «Кэш»: пространства имён с попаданиями процесса.
+
+    timeout None — срок хранения backend'а по умолчанию.
+    """
+    counters = registry.cache_namespace_stats()
+    rows = []
+    for namespace in namespaces():
+        counts = counters.get(namespace.name, {'hit': 0, 'miss': 0, 'invalidation': 0})
+        lookups = counts['hit'] + counts['miss']
+        rows.append({
+            'name': namespace.name,
+            'description': namespace.description,
+            'alias': namespace.alias,
+            'timeout': None if namespace.timeout is DEFAULT_TIMEOUT else namespace.timeout,
+            'invalidate_on': namespace.invalidate_on,
+            'manual_invalidation': namespace.manual_invalidation,
+            'hits': counts['hit'],
+            'misses': counts['miss'],
+            'invalidations': counts['invalidation'],
+            'hit_ratio_percent': round(100 * counts['hit'] / lookups, 1) if lookups else None,
+        })
+    return rows
@@ -1,16 +1,32 @@
-"""Context processors for navigation and page orientation."""
+"""Context processors for navigation and page orientation.
 
-from django.urls import NoReverseMatch, reverse
+The navigation structure depends only on the current (app, url_name) and the
+user's role, so it is built once per combination and memoized for the life of
+the process; URL names are reversed once per script prefix. Both memos are
+dropped when ROOT_URLCONF changes (tests). The admin-group lookup is memoized
+on the user object, i.e. once per request.
+"""
 
+from functools import lru_cache
 
-def _safe_reverse(route_name):
-    """Resolve URL name safely for template navigation items."""
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.urls import NoReverseMatch, get_script_prefix, reverse
+
+
+@lru_cache(maxsize=None)
+def _reverse_cached(route_name, script_prefix):
     try:
         return reverse(route_name)
     except NoReverseMatch:
         return '#'
 
 
+def _safe_reverse(route_name):
+    """Resolve URL name safely for template navigation items."""
+    return _reverse_cached(route_name, get_script_prefix())
+
+
 MAIN_NAV_ITEMS = [
     {
         'label': 'Загрузить заявку',
@@ -333,11 +349,17 @@ def _has_admin_navigation_access(user):
     if not getattr(user, 'is_authenticated', False):
         return False
 
+    cached = getattr(user, '_navigation_admin_access', None)
+    if cached is not None:
+        return cached
+
     user_groups = getattr(user, 'groups', None)
     if user_groups is None:
         return False
 
-    return user_groups.filter(name='Администраторы').exists()
+    has_access = user_groups.filter(name='Администраторы').exists()
+    user._navigation_admin_access = has_access
+    return has_access
 
 
 def _has_superuser_navigation_access(user):
@@ -350,6 +372,19 @@ def navigation_context(request):
     resolver_match = getattr(request, 'resolver_match', None)
     app_name = getattr(resolver_match, 'app_name', '') or ''
     url_name = getattr(resolver_match, 'url_name', '') or ''
+    user = getattr(request, 'user', None)
+    return _build_navigation(
+        app_name,
+        url_name,
+        _has_admin_navigation_access(user),
+        _has_superuser_navigation_access(user),
+        get_script_prefix(),
+    )
+
+
+@lru_cache(maxsize=1024)
+def _build_navigation(app_name, url_name, user_has_admin_access, user_has_superuser_access, script_prefix):
+    """Navigation context for one page and role; shared between requests, never mutate it."""
     section_key = SECTION_ROUTE_OVERRIDES.get((app_name, url_name), app_name)
 
     section = SECTION_CONFIG.get(section_key, {
@@ -361,9 +396,6 @@ def navigation_context(request):
             ('Своды', 'summaries:summary_list'),
         ],
     })
-    user_has_admin_access = _has_admin_navigation_access(getattr(request, 'user', None))
-    user_has_superuser_access = _has_superuser_navigation_access(getattr(request, 'user', None))
-
     main_items = []
     for item in MAIN_NAV_ITEMS:
         if item.get('requires_admin') and not user_has_admin_access:
@@ -458,3 +490,10 @@ def navigation_context(request):
             'container_class': layout_container_class,
         },
     }
+
+
+@receiver(setting_changed)
+def _clear_navigation_caches(*, setting, **kwargs):
+    if setting == 'ROOT_URLCONF':
+        _reverse_cached.cache_clear()
+        _build_navigation.cache_clear()
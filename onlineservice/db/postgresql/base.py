@@ -0,0 +1,160 @@
+"""
+PostgreSQL-бэкенд (psycopg2) со временем получения соединения и необязательным пулом.
+
+Подключается в settings.DATABASES как ENGINE 'onlineservice.db.postgresql'.
+От штатного django.db.backends.postgresql отличается двумя вещами:
+
+- каждое получение соединения (новое или из пула) пишется в логгер
+  onlineservice.db: сколько миллисекунд ждали, откуда взято соединение;
+  дольше DB_ACQUIRE_WARN_MS — предупреждение;
+- при OPTIONS['pool'] соединения берутся из psycopg2.pool.ThreadedConnectionPool
+  процесса, а закрытие соединения Django возвращает его в пул. Настройки пула:
+      'pool': {'min_size': 2, 'max_size': 10, 'timeout': 10, 'check': True}
+  min_size — сколько простаивающих соединений пул держит открытыми (лишние
+  при возврате закрываются), max_size — предел одновременно выданных,
+  timeout — сколько секунд ждать свободного соединения, check — перед выдачей
+  проверять соединение запросом SELECT 1 и заменять «мёртвое» новым.
+
+С пулом CONN_MAX_AGE должен быть 0: Django «закрывает» соединение в конце
+запроса, и оно сразу возвращается в пул для следующего. Пул свой у каждого
+процесса и создаётся при первом соединении — уже после fork воркера.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.postgresql import base as postgresql_base
+from django.db.utils import OperationalError
+
+try:
+    import psycopg2
+    import psycopg2.extras
+    import psycopg2.pool
+except ImportError as exc:  # pragma: no cover - psycopg2 есть в requirements.txt
+    raise ImproperlyConfigured(f'onlineservice.db.postgresql requires psycopg2: {exc}') from exc
+
+logger = logging.getLogger('onlineservice.db')
+
+POOL_DEFAULTS = {'min_size': 2, 'max_size': 10, 'timeout': 10.0, 'check': True}
+# Пауза между попытками взять соединение из исчерпанного пула, секунды.
+POOL_RETRY_DELAY = 0.05
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _pool_key(alias, conn_params):
+    return (alias, conn_params.get('dbname'), conn_params.get('host'), conn_params.get('port'),
+            conn_params.get('user'))
+
+
+def get_pool(alias, conn_params, options):
+    """Пул процесса для (alias, база, хост, порт, пользователь); создаётся при первом обращении."""
+    key = _pool_key(alias, conn_params)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = _pools[key] = psycopg2.pool.ThreadedConnectionPool(
+                    options['min_size'], options['max_size'], **conn_params,
+                )
+    return pool
+
+
+def close_pools():
+    """Закрыть все соединения всех пулов процесса (тесты, остановка воркера)."""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.closeall()
+        _pools.clear()
+
+
+class DatabaseWrapper(postgresql_base.DatabaseWrapper):
+    def __init__(self, settings_dict, alias='default'):
+        super().__init__(settings_dict, alias)
+        pool_options = self.settings_dict['OPTIONS'].get('pool')
+        if pool_options in (None, False):
+            self.pool_options = None
+        else:
+            self.pool_options = {**POOL_DEFAULTS, **(pool_options if isinstance(pool_options, dict) else {})}
+        if self.pool_options and self.settings_dict.get('CONN_MAX_AGE'):
+            raise ImproperlyConfigured('CONN_MAX_AGE must be 0 when OPTIONS["pool"] is set')
+        self._pool = None
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop('pool', None)
+        return conn_params
+
+    def get_new_connection(self, conn_params):
+        started = time.perf_counter()
+        if self.pool_options is None:
+            connection = super().get_new_connection(conn_params)
+            source = 'new'
+        else:
+            connection, source = self._acquire_from_pool(conn_params)
+            self._configure_pooled(connection)
+        self._log_acquire(source, time.perf_counter() - started)
+        return connection
+
+    def _acquire_from_pool(self, conn_params):
+        self._pool = pool = get_pool(self.alias, conn_params, self.pool_options)
+        deadline = time.monotonic() + self.pool_options['timeout']
+        while True:
+            try:
+                connection = pool.getconn()
+            except psycopg2.pool.PoolError:
+                if time.monotonic() >= deadline:
+                    raise OperationalError(
+                        f'connection pool for {self.alias!r} exhausted '
+                        f'(max_size={self.pool_options["max_size"]})'
+                    )
+                time.sleep(POOL_RETRY_DELAY)
+                continue
+            if self._usable(connection):
+                return connection, 'pool'
+            pool.putconn(connection, close=True)
+
+    def _usable(self, connection):
+        if connection.closed:
+            return False
+        if not self.pool_options['check']:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            connection.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _configure_pooled(self, connection):
+        # То же, что делает штатный get_new_connection после connect().
+        isolation_level = self.settings_dict['OPTIONS'].get('isolation_level')
+        if isolation_level is not None:
+            self.isolation_level = postgresql_base.IsolationLevel(isolation_level)
+            connection.isolation_level = self.isolation_level
+        else:
+            self.isolation_level = postgresql_base.IsolationLevel.READ_COMMITTED
+        psycopg2.extras.register_default_jsonb(conn_or_curs=connection, loads=lambda x: x)
+
+    def _close(self):
+        if self.connection is None or self._pool is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            try:
+                self._pool.putconn(self.connection)
+            except psycopg2.pool.PoolError:
+                # Пул закрыт (close_pools) или соединение не из него — просто закрываем.
+                self.connection.close()
+
+    def _log_acquire(self, source, seconds):
+        elapsed_ms = round(seconds * 1000, 2)
+        level = logging.WARNING if elapsed_ms >= settings.DB_ACQUIRE_WARN_MS else logging.INFO
+        logger.log(
+            level, 'DB connection acquired in %.2f ms (%s, alias=%s)', elapsed_ms, source, self.alias,
+            extra={'alias': self.alias, 'acquire_ms': elapsed_ms, 'source': source},
+        )
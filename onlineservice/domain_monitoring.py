@@ -0,0 +1,444 @@
+"""
+Асинхронная проверка доменов: HTTP-эндпоинты, редирект на HTTPS и TLS-сертификат.
+
+Раньше healthcheck.py, monitor_domains.py, scripts/monitor-domains-https.py и
+scripts/ssl-monitoring-system.py проверяли домены по очереди блокирующими
+urllib/socket с таймаутом 10 секунд, и один медленный хост задерживал весь
+прогон. Здесь все проверки всех доменов идут одновременно в одном цикле asyncio:
+
+- у каждой проверки свой срок (timeout) на соединение и ответ;
+- соединения с хостом переиспользуются (HTTP/1.1 keep-alive): сертификат
+  берётся из того же TLS-соединения, по которому потом идут запросы путей,
+  поэтому на хост обычно нужно одно-два TLS-рукопожатия;
+- одновременных соединений с одним хостом не больше connections_per_host.
+
+Модуль не зависит от Django и сторонних пакетов: его импортируют скрипты,
+которые запускаются без настроенного окружения (healthcheck в контейнере).
+
+Результат run_monitoring() — словарь в формате
+scripts/monitor-domains-https.py --json (domains + summary); его же читает
+scripts/monitoring-dashboard.py.
+"""
+import asyncio
+import logging
+import math
+import os
+import ssl
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, NamedTuple, Optional
+from urllib.parse import urljoin, urlsplit
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'DomainMonitor/2.0'
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+MAX_REDIRECTS = 5
+SECURITY_HEADERS = (
+    'Strict-Transport-Security',
+    'X-Frame-Options',
+    'X-Content-Type-Options',
+    'Referrer-Policy',
+    'X-XSS-Protection',
+)
+
+# Пути, которые проверяются по умолчанию: лендинг на основных доменах,
+# приложение Django на поддоменах.
+MAIN_DOMAIN_PATHS = ('/',)
+SUBDOMAIN_PATHS = ('/login/', '/healthz/')
+
+DEFAULT_MAIN_DOMAINS = ('insflow.ru', 'insflow.tw1.su')
+DEFAULT_SUBDOMAINS = ('zs.insflow.ru', 'zs.insflow.tw1.su')
+
+
+class HttpResult(NamedTuple):
+    """Ответ на один запрос (после редиректов, если они разрешены)."""
+    url: str
+    status_code: Optional[int]
+    headers: Dict[str, str]  # имена в нижнем регистре
+    response_time: float
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.status_code is not None and self.status_code < 400
+
+
+class _Connection:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.peercert = writer.get_extra_info('peercert')
+
+    def close(self):
+        self.writer.close()
+
+
+class _HostPool:
+    """Свободные keep-alive соединения с одним (scheme, host, port)."""
+
+    def __init__(self, limit):
+        self.slots = asyncio.Semaphore(limit)
+        self.idle: List[_Connection] = []
+        self.opened = 0
+
+
+def domains_from_env(env_var: str, default: Iterable[str]) -> List[str]:
+    """Список доменов из переменной окружения через запятую или default."""
+    env_value = os.getenv(env_var)
+    if env_value:
+        return [domain.strip() for domain in env_value.split(',') if domain.strip()]
+    return list(default)
+
+
+def _now() -> str:
+    return datetime.now().isoformat()
+
+
+def split_domain(domain: str):
+    """'example.com' или 'example.com:8443' → (host, port или None)."""
+    parts = urlsplit(f'//{domain}')
+    return parts.hostname, parts.port
+
+
+class DomainMonitor:
+    """Общий движок проверок; использовать как async-контекст:
+
+        async with DomainMonitor(timeout=10) as monitor:
+            result = await monitor.fetch('https://example.com/healthz/')
+    """
+
+    def __init__(self, timeout: float = 10, connections_per_host: int = 2,
+                 ssl_context: Optional[ssl.SSLContext] = None,
+                 warning_days: int = 30, critical_days: int = 7,
+                 user_agent: str = USER_AGENT):
+        self.timeout = timeout
+        self.connections_per_host = connections_per_host
+        self.ssl_context = ssl_context or ssl.create_default_context()
+        self.warning_days = warning_days
+        self.critical_days = critical_days
+        self.user_agent = user_agent
+        self._pools: Dict[tuple, _HostPool] = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        for pool in self._pools.values():
+            for connection in pool.idle:
+                connection.close()
+            pool.idle.clear()
+
+    @property
+    def connections_opened(self) -> int:
+        """Сколько соединений открыто за всё время (для диагностики и тестов)."""
+        return sum(pool.opened for pool in self._pools.values())
+
+    # --- соединения -------------------------------------------------------
+
+    def _pool(self, key) -> _HostPool:
+        pool = self._pools.get(key)
+        if pool is None:
+            pool = self._pools[key] = _HostPool(self.connections_per_host)
+        return pool
+
+    async def _open(self, pool, scheme, host, port) -> _Connection:
+        if scheme == 'https':
+            reader, writer = await asyncio.open_connection(
+                host, port, ssl=self.ssl_context, server_hostname=host,
+            )
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        pool.opened += 1
+        return _Connection(reader, writer)
+
+    async def _checkout(self, pool, scheme, host, port):
+        """Свободное соединение из пула или новое; второй элемент — взято ли из пула."""
+        while pool.idle:
+            connection = pool.idle.pop()
+            if not connection.reader.at_eof() and not connection.writer.is_closing():
+                return connection, True
+            connection.close()
+        return await self._open(pool, scheme, host, port), False
+
+    # --- HTTP ---------------------------------------------------------------
+
+    async def _request(self, connection, method, host_header, target):
+        request = (
+            f'{method} {target} HTTP/1.1\r\n'
+            f'Host: {host_header}\r\n'
+            f'User-Agent: {self.user_agent}\r\n'
+            'Accept: */*\r\n'
+            'Connection: keep-alive\r\n\r\n'
+        )
+        connection.writer.write(request.encode('latin-1'))
+        await connection.writer.drain()
+
+        status_line = await connection.reader.readline()
+        if not status_line:
+            raise ConnectionResetError('Соединение закрыто сервером')
+        status_code = int(status_line.split()[1])
+
+        headers = {}
+        while True:
+            line = await connection.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        reusable = headers.get('connection', '').lower() != 'close'
+        if method == 'HEAD' or status_code in (204, 304) or 100 <= status_code < 200:
+            pass
+        elif headers.get('transfer-encoding', '').lower() == 'chunked':
+            while True:
+                size = int((await connection.reader.readline()).split(b';')[0], 16)
+                await connection.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        elif 'content-length' in headers:
+            await connection.reader.readexactly(int(headers['content-length']))
+        else:
+            await connection.reader.read()
+            reusable = False
+        return status_code, headers, reusable
+
+    async def _fetch_once(self, method, url):
+        parts = urlsplit(url)
+        scheme = parts.scheme
+        host = parts.hostname
+        port = parts.port or (443 if scheme == 'https' else 80)
+        target = parts.path or '/'
+        if parts.query:
+            target = f'{target}?{parts.query}'
+        pool = self._pool((scheme, host, port))
+
+        async with pool.slots:
+            connection, reused = await self._checkout(pool, scheme, host, port)
+            try:
+                try:
+                    status_code, headers, reusable = await self._request(connection, method, parts.netloc, target)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    if not reused:
+                        raise
+                    # Сервер закрыл простаивавшее keep-alive соединение — повторяем на новом.
+                    connection.close()
+                    connection = await self._open(pool, scheme, host, port)
+                    status_code, headers, reusable = await self._request(connection, method, parts.netloc, target)
+            except BaseException:
+                connection.close()
+                raise
+            if reusable:
+                pool.idle.append(connection)
+            else:
+                connection.close()
+        return status_code, headers
+
+    async def fetch(self, url: str, method: str = 'GET', follow_redirects: bool = True) -> HttpResult:
+        """Запрос url в пределах self.timeout (вместе с редиректами)."""
+        started = time.perf_counter()
+        try:
+            async with asyncio.timeout(self.timeout):
+                current = url
+                for _ in range(MAX_REDIRECTS + 1):
+                    status_code, headers = await self._fetch_once(method, current)
+                    if not (follow_redirects and status_code in REDIRECT_CODES and 'location' in headers):
+                        break
+                    current = urljoin(current, headers['location'])
+            error = f'HTTP {status_code}' if status_code >= 400 else None
+            return HttpResult(url, status_code, headers, round(time.perf_counter() - started, 3), error)
+        except TimeoutError:
+            return HttpResult(url, None, {}, round(time.perf_counter() - started, 3), 'Connection timeout')
+        except ssl.SSLError as e:
+            return HttpResult(url, None, {}, round(time.perf_counter() - started, 3), f'SSL Error: {e}')
+        except Exception as e:  # noqa: BLE001 — любая ошибка сети = недоступность
+            return HttpResult(url, None, {}, round(time.perf_counter() - started, 3), str(e) or type(e).__name__)
+
+    # --- проверки -----------------------------------------------------------
+
+    async def check_certificate(self, hostname: str, port: Optional[int] = None) -> Dict:
+        """Сертификат хоста; соединение после проверки остаётся в пуле для запросов."""
+        port = port or 443
+        result = {
+            'hostname': hostname,
+            'port': port,
+            'status': 'unknown',
+            'valid': False,
+            'days_until_expiry': 0,
+            'issuer': '',
+            'subject': '',
+            'not_before': '',
+            'not_after': '',
+            'error': None,
+            'timestamp': _now(),
+        }
+        pool = self._pool(('https', hostname, port))
+        try:
+            async with pool.slots:
+                async with asyncio.timeout(self.timeout):
+                    connection, _reused = await self._checkout(pool, 'https', hostname, port)
+                pool.idle.append(connection)
+            cert = connection.peercert
+        except TimeoutError:
+            result.update(status='error', error='Connection timeout')
+            return result
+        except ssl.SSLError as e:
+            result.update(status='error', error=f'SSL Error: {e}')
+            return result
+        except Exception as e:  # noqa: BLE001
+            result.update(status='error', error=str(e) or type(e).__name__)
+            return result
+
+        not_before = ssl.cert_time_to_seconds(cert['notBefore'])
+        not_after = ssl.cert_time_to_seconds(cert['notAfter'])
+        days_until_expiry = math.floor((not_after - time.time()) / 86400)
+        issuer = dict(item for rdn in cert.get('issuer', ()) for item in rdn)
+        subject = dict(item for rdn in cert.get('subject', ()) for item in rdn)
+        if days_until_expiry < 0:
+            status = 'expired'
+        elif days_until_expiry <= self.critical_days:
+            status = 'critical'
+        elif days_until_expiry <= self.warning_days:
+            status = 'warning'
+        else:
+            status = 'valid'
+        result.update({
+            'status': status,
+            'valid': True,
+            'days_until_expiry': days_until_expiry,
+            'issuer': issuer.get('organizationName', 'Unknown'),
+            'subject': subject.get('commonName', hostname),
+            'not_before': datetime.fromtimestamp(not_before, tz=timezone.utc).isoformat(),
+            'not_after': datetime.fromtimestamp(not_after, tz=timezone.utc).isoformat(),
+        })
+        return result
+
+    async def check_https_redirect(self, domain: str) -> Dict:
+        """Отвечает ли http://domain/ редиректом на https://."""
+        result = {
+            'domain': domain,
+            'redirect_working': False,
+            'redirect_code': None,
+            'redirect_location': '',
+            'error': None,
+            'timestamp': _now(),
+        }
+        response = await self.fetch(f'http://{domain}/', follow_redirects=False)
+        if response.status_code in REDIRECT_CODES:
+            location = response.headers.get('location', '')
+            result.update(redirect_code=response.status_code, redirect_location=location)
+            if location.startswith('https://'):
+                result['redirect_working'] = True
+            else:
+                result['error'] = f'Redirects to non-HTTPS: {location}'
+        elif response.status_code is not None and response.status_code < 400:
+            result['error'] = 'No redirect found'
+        else:
+            result['error'] = response.error
+        return result
+
+    async def check_domain(self, domain: str, domain_type: str, paths: Optional[Iterable[str]] = None) -> Dict:
+        """Все проверки одного домена одновременно."""
+        if paths is None:
+            paths = MAIN_DOMAIN_PATHS if domain_type == 'main' else SUBDOMAIN_PATHS
+        paths = list(paths)
+        host, port = split_domain(domain)
+
+        # Сертификат проверяется первым: его соединение потом берут запросы путей.
+        certificate = await self.check_certificate(host, port)
+        # Заголовки безопасности читаются из ответа на '/', поэтому он
+        # запрашивается один раз, даже если '/' есть среди путей.
+        urls = list(dict.fromkeys(paths + ['/']))
+        redirect, *responses = await asyncio.gather(
+            self.check_https_redirect(domain),
+            *(self.fetch(f'https://{domain}{path}') for path in urls),
+        )
+        by_path = dict(zip(urls, responses))
+
+        availability = {
+            'domain': domain,
+            'paths': {},
+            'overall_available': True,
+            'timestamp': _now(),
+        }
+        for path in paths:
+            response = by_path[path]
+            availability['paths'][path] = {
+                'path': path,
+                'available': response.ok,
+                'status_code': response.status_code,
+                'response_time': response.response_time,
+                'error': response.error,
+            }
+            if not response.ok:
+                availability['overall_available'] = False
+
+        root = by_path['/']
+        security = {'domain': domain, 'headers': {}, 'security_score': 0, 'timestamp': _now()}
+        if root.status_code is None:
+            security['error'] = root.error
+        else:
+            for header in SECURITY_HEADERS:
+                value = root.headers.get(header.lower())
+                security['headers'][header] = {'present': value is not None, 'value': value}
+            present = sum(1 for info in security['headers'].values() if info['present'])
+            security['security_score'] = round(present / len(SECURITY_HEADERS) * 100)
+
+        healthy = (
+            certificate['status'] not in ('expired', 'critical', 'error')
+            and redirect['redirect_working']
+            and availability['overall_available']
+        )
+        return {
+            'domain': domain,
+            'type': domain_type,
+            'ssl_certificate': certificate,
+            'https_redirect': redirect,
+            'availability': availability,
+            'security_headers': security,
+            'overall_healthy': healthy,
+        }
+
+    async def check_domains(self, main_domains: Iterable[str], subdomains: Iterable[str]) -> Dict:
+        """Проверки всех доменов в формате monitor-domains-https.py --json."""
+        domains = [(domain, 'main') for domain in main_domains] + [(domain, 'subdomain') for domain in subdomains]
+        started = time.perf_counter()
+        checked = await asyncio.gather(*(self.check_domain(domain, kind) for domain, kind in domains))
+
+        summary = {
+            'total_domains': len(domains),
+            'healthy_domains': sum(1 for result in checked if result['overall_healthy']),
+            'ssl_issues': sum(1 for result in checked if result['ssl_certificate']['status'] in ('expired', 'critical', 'error')),
+            'availability_issues': sum(1 for result in checked if not result['availability']['overall_available']),
+            'redirect_issues': sum(1 for result in checked if not result['https_redirect']['redirect_working']),
+        }
+        duration = round(time.perf_counter() - started, 3)
+        logger.info('Checked %d domains in %.3fs over %d connections', len(domains), duration, self.connections_opened)
+        return {
+            'timestamp': _now(),
+            'duration': duration,
+            'domains': {result['domain']: result for result in checked},
+            'summary': summary,
+        }
+
+
+def run_certificate_checks(domains: Iterable[str], **options) -> List[Dict]:
+    """Только сертификаты доменов, все одновременно (для ssl-monitoring-system.py)."""
+    async def run():
+        async with DomainMonitor(**options) as monitor:
+            return await asyncio.gather(*(
+                monitor.check_certificate(host, port)
+                for host, port in map(split_domain, domains)
+            ))
+    return asyncio.run(run())
+
+
+def run_monitoring(main_domains: Iterable[str], subdomains: Iterable[str], **options) -> Dict:
+    """Синхронная обёртка для скриптов: один прогон check_domains()."""
+    async def run():
+        async with DomainMonitor(**options) as monitor:
+            return await monitor.check_domains(main_domains, subdomains)
+    return asyncio.run(run())
@@ -0,0 +1,185 @@
+"""
+Запись логов через очередь и JSON-формат записей.
+
+Штатные FileHandler/StreamHandler пишут в файл прямо в потоке запроса: каждая
+запись — это форматирование и системный вызов write() под блокировкой
+обработчика. Здесь обработчики из settings.LOGGING оборачиваются в
+QueuedHandler: в потоке запроса запись только собирается (сообщение
+подставляется в шаблон, traceback превращается в текст) и кладётся в очередь
+процесса, а форматирование и запись в файл делает один фоновый поток
+QueueListener.
+
+Подключение — в settings.LOGGING через фабрику обработчика:
+    'file': {
+        '()': 'onlineservice.logging_pipeline.QueuedHandler',
+        'target_class': 'logging.FileHandler',
+        'filename': BASE_DIR / 'logs' / 'django.log',
+        'level': 'INFO',
+        'formatter': 'json',
+    }
+
+Что теряем: при аварийном завершении процесса недописанная очередь пропадает
+(при обычной остановке она дописывается через atexit). LOG_QUEUE_ENABLED = False
+возвращает синхронную запись (так работают тесты).
+
+JsonFormatter пишет запись одной строкой JSON; поля из extra=... попадают в
+объект как есть.
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+
+from django.utils.module_loading import import_string
+
+# Атрибуты, которые есть у любой LogRecord: всё остальное пришло через extra=...
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_exception_formatter = logging.Formatter()
+
+
+class JsonFormatter(logging.Formatter):
+    """Запись лога одной строкой JSON."""
+
+    def format(self, record):
+        payload = {
+            'ts': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'process': record.process,
+            'thread': record.thread,
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                payload[key] = value
+        if record.exc_info:
+            payload['exc_info'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload['exc_info'] = record.exc_text
+        if record.stack_info:
+            payload['stack_info'] = self.formatStack(record.stack_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class _TargetDispatcher:
+    """«Обработчик» QueueListener: отдаёт запись тому обработчику, что её поставил.
+
+    В очереди лежат пары (target, record) — один поток и одна очередь на все
+    файлы, запись знает, в какой обработчик её отдать.
+    """
+
+    def handle(self, item):
+        target, record = item
+        target.handle(record)
+
+
+class LogPipeline:
+    """Очередь записей и общий на процесс QueueListener.
+
+    Поток слушателя стартует лениво при первой записи и перезапускается после
+    fork (gunicorn --preload), чтобы не унаследовать мёртвый поток родителя.
+    """
+
+    def __init__(self):
+        self._start_lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self.queue = queue.SimpleQueue()
+        self._listener = None
+
+    def put(self, item):
+        if os.getpid() != self._pid:
+            self._reset()
+        if self._listener is None:
+            with self._start_lock:
+                if self._listener is None:
+                    listener = logging.handlers.QueueListener(self.queue, _TargetDispatcher())
+                    listener.start()
+                    self._listener = listener
+        self.queue.put_nowait(item)
+
+    def stop(self):
+        """Дописывает очередь и останавливает поток слушателя."""
+        with self._start_lock:
+            listener, self._listener = self._listener, None
+        if listener is not None and os.getpid() == self._pid:
+            listener.stop()
+
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+
+def get_pipeline():
+    """Общий на процесс LogPipeline."""
+    global _pipeline
+    if _pipeline is None:
+        with _pipeline_lock:
+            if _pipeline is None:
+                _pipeline = LogPipeline()
+                # Регистрируется после logging.shutdown, поэтому выполнится раньше
+                # него: очередь дописывается, пока файлы ещё открыты.
+                atexit.register(_pipeline.stop)
+    return _pipeline
+
+
+class QueuedHandler(logging.handlers.QueueHandler):
+    """QueueHandler, который пишет в свой target-обработчик из фонового потока.
+
+    target_class и остальные именованные аргументы описывают настоящий
+    обработчик (FileHandler, StreamHandler, ...). Уровень проверяется ещё в
+    потоке запроса, форматтер из конфигурации передаётся target.
+    """
+
+    def __init__(self, target_class='logging.FileHandler', **target_kwargs):
+        from django.conf import settings
+
+        self.target = import_string(target_class)(**target_kwargs)
+        self.queued = getattr(settings, 'LOG_QUEUE_ENABLED', True)
+        super().__init__(None)
+
+    def setFormatter(self, fmt):
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        # Как штатный QueueHandler.prepare, работаем с копией: запись общая
+        # для всех обработчиков логгера, и следующим (почта админам, консоль)
+        # нужен исходный exc_info. В отличие от штатного не форматируем запись
+        # целиком — в потоке запроса фиксируем только сообщение и traceback,
+        # которые могут измениться к моменту записи, остальное сделает target.
+        record = copy.copy(record)
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        get_pipeline().put((self.target, record))
+
+    def emit(self, record):
+        if not self.queued:
+            self.target.handle(record)
+            return
+        super().emit(record)
+
+    def flush(self):
+        self.target.flush()
+
+    def close(self):
+        try:
+            self.target.close()
+        finally:
+            super().close()
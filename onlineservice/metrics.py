@@ -0,0 +1,307 @@
+"""
+Метрики процесса для /metrics: время ответа по view, запросы к БД, кэш.
+
+MetricsMiddleware стоит в начале цепочки (сразу за HealthCheckMiddleware) и
+для каждого запроса записывает в реестр процесса:
+
+- гистограмму времени ответа по имени view (resolver_match.view_name);
+- число SQL-запросов и время в БД за запрос — через execute_wrapper
+  соединений, без DEBUG и без connection.queries;
+- число ответов по view и классу статуса (2xx, 4xx, ...).
+
+Попадания и промахи кэша считают Metered*Cache (backend из CACHES), а по
+пространствам имён — onlineservice.cache.CacheNamespace.
+
+GET /metrics отдаёт реестр в текстовом формате Prometheus и обрабатывается
+здесь же, до сессий, аутентификации и easy-audit. Доступ — по заголовку
+Authorization: Bearer <METRICS_TOKEN>; без METRICS_TOKEN адрес отключён.
+
+Реестр свой у каждого процесса: за gunicorn с несколькими воркерами каждый
+ответ /metrics описывает один воркер (его pid есть в метке process).
+"""
+import hmac
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+from django.db import connections
+from django.http import HttpResponse
+
+METRICS_PATH = '/metrics'
+
+# Границы корзин гистограммы времени ответа, секунды.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Границы корзин числа SQL-запросов на один ответ.
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+_MISSING = object()
+
+
+class Histogram:
+    """Накопительная гистограмма в терминах Prometheus: корзины ≤ le, sum, count."""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """Пары (le, накопленное число) включая +Inf."""
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            yield bound, total
+
+
+class MetricsRegistry:
+    """Метрики процесса; все изменения под одной блокировкой."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+            self.queries = defaultdict(lambda: Histogram(QUERY_BUCKETS))
+            self.db_time = defaultdict(float)
+            self.responses = defaultdict(int)
+            self.cache = defaultdict(int)
+            self.cache_namespaces = defaultdict(int)
+
+    def observe_request(self, view, status_code, duration, query_count, db_time):
+        with self._lock:
+            self.latency[view].observe(duration)
+            self.queries[view].observe(query_count)
+            self.db_time[view] += db_time
+            self.responses[(view, f'{status_code // 100}xx')] += 1
+
+    def observe_cache(self, cache_name, hits, misses):
+        with self._lock:
+            if hits:
+                self.cache[(cache_name, 'hit')] += hits
+            if misses:
+                self.cache[(cache_name, 'miss')] += misses
+
+    def observe_cache_namespace(self, namespace, hits=0, misses=0, invalidations=0):
+        with self._lock:
+            for result, count in (('hit', hits), ('miss', misses), ('invalidation', invalidations)):
+                if count:
+                    self.cache_namespaces[(namespace, result)] += count
+
+    def cache_namespace_stats(self):
+        """{пространство: {'hit': .., 'miss': .., 'invalidation': ..}} по обращениям процесса."""
+        stats = defaultdict(lambda: {'hit': 0, 'miss': 0, 'invalidation': 0})
+        with self._lock:
+            for (namespace, result), count in self.cache_namespaces.items():
+                stats[namespace][result] = count
+        return dict(stats)
+
+    def cache_hit_ratio(self, cache_name):
+        """Доля попаданий в кэш cache_name или None, если к нему не обращались."""
+        with self._lock:
+            hits = self.cache.get((cache_name, 'hit'), 0)
+            misses = self.cache.get((cache_name, 'miss'), 0)
+        return hits / (hits + misses) if hits + misses else None
+
+    def render(self):
+        """Реестр в текстовом формате Prometheus 0.0.4."""
+        process = os.getpid()
+        lines = []
+
+        def histogram(name, help_text, histograms):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} histogram')
+            for view, hist in sorted(histograms.items()):
+                labels = f'view="{_escape(view)}",process="{process}"'
+                for bound, total in hist.cumulative():
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'{name}_bucket{{{labels},le="{le}"}} {total}')
+                lines.append(f'{name}_sum{{{labels}}} {hist.sum:.6f}')
+                lines.append(f'{name}_count{{{labels}}} {hist.count}')
+
+        with self._lock:
+            histogram('http_request_duration_seconds', 'Время ответа по view.', self.latency)
+            histogram('db_queries_per_request', 'Число SQL-запросов на один ответ по view.', self.queries)
+
+            lines.append('# HELP db_query_seconds_total Суммарное время SQL-запросов по view.')
+            lines.append('# TYPE db_query_seconds_total counter')
+            for view, seconds in sorted(self.db_time.items()):
+                lines.append(f'db_query_seconds_total{{view="{_escape(view)}",process="{process}"}} {seconds:.6f}')
+
+            lines.append('# HELP http_responses_total Ответы по view и классу статуса.')
+            lines.append('# TYPE http_responses_total counter')
+            for (view, status), count in sorted(self.responses.items()):
+                lines.append(f'http_responses_total{{view="{_escape(view)}",status="{status}",process="{process}"}} {count}')
+
+            lines.append('# HELP cache_requests_total Обращения к кэшу: попадания и промахи.')
+            lines.append('# TYPE cache_requests_total counter')
+            for (cache_name, result), count in sorted(self.cache.items()):
+                lines.append(f'cache_requests_total{{cache="{_escape(cache_name)}",result="{result}",process="{process}"}} {count}')
+
+            lines.append('# HELP cache_namespace_events_total Пространства имён кэша: попадания, промахи, сбросы.')
+            lines.append('# TYPE cache_namespace_events_total counter')
+            for (namespace, result), count in sorted(self.cache_namespaces.items()):
+                lines.append(f'cache_namespace_events_total{{namespace="{_escape(namespace)}",result="{result}",process="{process}"}} {count}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = MetricsRegistry()
+
+
+class QueryCounter:
+    """execute_wrapper: число запросов и время в БД.
+
+    С fingerprint (функция SQL → отпечаток) ещё и считает повторы отпечатков —
+    так его использует бюджет запросов (onlineservice/query_budget.py).
+    """
+
+    __slots__ = ('count', 'seconds', 'fingerprint', 'fingerprints')
+
+    def __init__(self, fingerprint=None):
+        self.count = 0
+        self.seconds = 0.0
+        self.fingerprint = fingerprint
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+            if self.fingerprint is not None:
+                self.fingerprints[self.fingerprint(sql)] += 1
+
+    def duplicates(self, more_than=1):
+        """Отпечатки, повторённые больше more_than раз, от частых к редким."""
+        return [(sql, n) for sql, n in self.fingerprints.most_common() if n > more_than]
+
+    @property
+    def max_repeats(self):
+        return max(self.fingerprints.values(), default=0)
+
+
+@contextmanager
+def count_queries(counter=None, aliases=None):
+    """Подключает counter к соединениям всех (или перечисленных) БД внутри блока."""
+    counter = QueryCounter() if counter is None else counter
+    wrapped = []
+    try:
+        for alias in aliases or connections:
+            connection = connections[alias]
+            connection.execute_wrappers.append(counter)
+            wrapped.append(connection)
+        yield counter
+    finally:
+        for connection in wrapped:
+            connection.execute_wrappers.remove(counter)
+
+
+def view_name(request, default='unresolved'):
+    """Имя view запроса: view_name из resolver_match, иначе путь к функции."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return default
+    return match.view_name or match._func_path
+
+
+def _metrics_authorized(request):
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if not token:
+        return False
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    return hmac.compare_digest(header.encode(), f'Bearer {token}'.encode())
+
+
+class MetricsMiddleware:
+    """Собирает метрики запросов и отдаёт GET /metrics."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'METRICS_ENABLED', True)
+
+    def __call__(self, request):
+        if request.path_info == METRICS_PATH and _metrics_authorized(request):
+            return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+        if not self.enabled:
+            return self.get_response(request)
+
+        started = time.perf_counter()
+        # Счётчик запроса доступен слоям ниже: QueryBudgetMiddleware считает
+        # по нему же, а не ставит на соединения второй execute_wrapper
+        with count_queries() as counter:
+            request.query_counter = counter
+            response = self.get_response(request)
+
+        registry.observe_request(view_name(request), response.status_code, time.perf_counter() - started,
+                                 counter.count, counter.seconds)
+        return response
+
+
+class MeteredCacheMixin:
+    """Считает попадания и промахи get/has_key кэша для /metrics.
+
+    Имя кэша в метриках — metrics_name ('default', у MeteredLocMemCache — LOCATION).
+    get_many/get_or_set базового класса идут через get и учитываются там.
+    """
+
+    metrics_name = 'default'
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        hit = value is not _MISSING
+        registry.observe_cache(self.metrics_name, int(hit), int(not hit))
+        return value if hit else default
+
+    def has_key(self, key, version=None):
+        hit = super().has_key(key, version)
+        registry.observe_cache(self.metrics_name, int(hit), int(not hit))
+        return hit
+
+
+class MeteredLocMemCache(MeteredCacheMixin, LocMemCache):
+    """Кэш в памяти процесса (CACHE_BACKEND=locmem)."""
+
+    def __init__(self, name, params):
+        super().__init__(name, params)
+        self.metrics_name = name or 'default'
+
+
+class MeteredFileBasedCache(MeteredCacheMixin, FileBasedCache):
+    """Кэш в файлах каталога LOCATION, общий для процессов сервера (CACHE_BACKEND=file)."""
+
+
+class MeteredRedisCache(MeteredCacheMixin, RedisCache):
+    """Кэш в Redis, общий для всех процессов (CACHE_BACKEND=redis, нужен пакет redis).
+
+    get_many у Redis — один MGET мимо get, поэтому учитывается отдельно.
+    """
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = super().get_many(keys, version)
+        registry.observe_cache(self.metrics_name, len(found), len(keys) - len(found))
+        return found
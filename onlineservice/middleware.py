@@ -2,7 +2,7 @@
 Custom middleware for domain-based routing with HTTPS support.
 """
 import logging
-from django.http import Http404, HttpResponseBadRequest, HttpResponsePermanentRedirect
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, HttpResponsePermanentRedirect
 from django.shortcuts import render
 from django.conf import settings
 from django.urls import reverse
@@ -12,6 +12,26 @@ from django.utils.deprecation import MiddlewareMixin
 logger = logging.getLogger(__name__)
 
 
+class HealthCheckMiddleware:
+    """
+    Liveness fast path: answers /healthz before any other middleware runs.
+
+    Must be first in MIDDLEWARE. The probe skips host validation, domain
+    routing, sessions, auth and easy-audit, so it costs no database queries
+    and keeps working when those layers are misconfigured.
+    """
+
+    HEALTH_PATHS = frozenset({'/healthz', '/healthz/'})
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.path_info in self.HEALTH_PATHS and request.method in ('GET', 'HEAD'):
+            return HttpResponse('OK', content_type='text/plain')
+        return self.get_response(request)
+
+
 class DomainRoutingMiddleware:
     """
     Middleware for handling domain-based routing between main domains and subdomains with HTTPS support.
@@ -0,0 +1,164 @@
+"""
+Бюджет SQL-запросов на запрос и детектор N+1 — для разработки и стенда.
+
+QueryBudgetMiddleware (включается QUERY_BUDGET_ENABLED, иначе Django убирает
+её из цепочки через MiddlewareNotUsed) берёт счётчик запросов, который уже
+поставила на соединения MetricsMiddleware (onlineservice.metrics.QueryCounter;
+при выключенных метриках — свой), и для каждого ответа считает:
+
+- число SQL-запросов и время в БД;
+- «отпечатки» запросов — SQL без значений, с IN (...) любой длины в одном
+  виде. Один отпечаток много раз за ответ — это N+1: запрос в цикле по строкам.
+
+Каждый ответ пишется одной записью в логгер query_budget
+(logs/query_budget.log, JSON). Если view превысил бюджет
+(QUERY_BUDGET_DEFAULT или своё значение в QUERY_BUDGET_VIEWS) или повторил
+один запрос больше QUERY_BUDGET_MAX_DUPLICATES раз, нарушение пишется в лог
+приложения, а при QUERY_BUDGET_MODE = 'raise' ещё и поднимается
+QueryBudgetExceeded — так регрессия видна прямо в браузере на стенде.
+
+Худшие view по накопленному логу: python scripts/query_budget_report.py
+
+В тестах тот же учёт доступен через capture_queries():
+    with capture_queries() as queries:
+        self.client.get(url)
+    self.assertLessEqual(queries.count, 12)
+"""
+import logging
+import re
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from onlineservice.metrics import QueryCounter, count_queries, view_name
+
+logger = logging.getLogger(__name__)
+# Поток записей «view → запросы» для отчёта; в settings.LOGGING пишется в отдельный файл.
+samples_logger = logging.getLogger('query_budget')
+
+# Сколько повторяющихся отпечатков показывать в логе нарушения.
+TOP_DUPLICATES = 3
+
+_IN_LIST_RE = re.compile(r'\bIN\s*\((?:\s*%s\s*,?)+\)', re.IGNORECASE)
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_SPACE_RE = re.compile(r'\s+')
+
+
+class QueryBudgetExceeded(Exception):
+    """View превысил бюджет запросов (QUERY_BUDGET_MODE = 'raise')."""
+
+
+def fingerprint(sql):
+    """SQL без значений: одинаковые по форме запросы дают один отпечаток."""
+    sql = _STRING_RE.sub('?', sql)
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    return _SPACE_RE.sub(' ', sql).strip()
+
+
+def capture_queries(aliases=None):
+    """Учитывает запросы ко всем (или перечисленным) БД внутри блока, с отпечатками."""
+    return count_queries(QueryCounter(fingerprint), aliases)
+
+
+def budget_for(view):
+    return getattr(settings, 'QUERY_BUDGET_VIEWS', {}).get(view, settings.QUERY_BUDGET_DEFAULT)
+
+
+class QueryBudgetMiddleware:
+    """Считает запросы каждого ответа и проверяет бюджет view."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_BUDGET_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.max_duplicates = settings.QUERY_BUDGET_MAX_DUPLICATES
+        self.raise_on_violation = settings.QUERY_BUDGET_MODE == 'raise'
+
+    def __call__(self, request):
+        queries = getattr(request, 'query_counter', None)
+        if queries is None:
+            with capture_queries() as queries:
+                response = self.get_response(request)
+        else:
+            # Запросы уже считает MetricsMiddleware — включаем на её счётчике отпечатки
+            queries.fingerprint = fingerprint
+            response = self.get_response(request)
+
+        view = view_name(request, default=None)
+        if view is None:
+            return response
+        budget = budget_for(view)
+        duplicates = queries.duplicates(more_than=self.max_duplicates)
+
+        samples_logger.info(
+            'query budget sample',
+            extra={
+                'view': view,
+                'path': request.path,
+                'status': response.status_code,
+                'queries': queries.count,
+                'db_ms': round(queries.seconds * 1000, 2),
+                'max_repeats': queries.max_repeats,
+                'top_repeated': queries.duplicates()[:1],
+                'budget': budget,
+            },
+        )
+
+        problems = []
+        if queries.count > budget:
+            problems.append(f'{queries.count} queries > budget {budget}')
+        if duplicates:
+            problems.append(f'query repeated {duplicates[0][1]} times > {self.max_duplicates}')
+        if not problems:
+            return response
+
+        message = f'{view}: ' + '; '.join(problems)
+        logger.warning(
+            'Query budget exceeded: %s', message,
+            extra={'view': view, 'queries': queries.count, 'duplicates': duplicates[:TOP_DUPLICATES]},
+        )
+        if self.raise_on_violation:
+            top = '\n'.join(f'  {n}× {sql}' for sql, n in duplicates[:TOP_DUPLICATES])
+            raise QueryBudgetExceeded(f'{message}\n{top}' if top else message)
+        return response
+
+
+def summarize(samples, top=20):
+    """Худшие view по записям лога query_budget: [{view, requests, avg/max queries, ...}]."""
+    views = {}
+    for sample in samples:
+        view = sample.get('view')
+        if not view:
+            continue
+        row = views.setdefault(view, {
+            'view': view, 'requests': 0, 'queries_total': 0, 'max_queries': 0, 'db_ms_total': 0.0,
+            'max_repeats': 0, 'top_repeated': '', 'over_budget': 0,
+        })
+        queries = int(sample.get('queries') or 0)
+        row['requests'] += 1
+        row['queries_total'] += queries
+        row['max_queries'] = max(row['max_queries'], queries)
+        row['db_ms_total'] += float(sample.get('db_ms') or 0)
+        if queries > int(sample.get('budget') or queries):
+            row['over_budget'] += 1
+        repeats = int(sample.get('max_repeats') or 0)
+        if repeats > row['max_repeats']:
+            row['max_repeats'] = repeats
+            repeated = sample.get('top_repeated') or []
+            row['top_repeated'] = repeated[0][0] if repeated else ''
+
+    rows = []
+    for row in views.values():
+        requests = row.pop('requests')
+        queries_total = row.pop('queries_total')
+        db_ms_total = row.pop('db_ms_total')
+        rows.append({
+            **row,
+            'requests': requests,
+            'avg_queries': round(queries_total / requests, 1),
+            'avg_db_ms': round(db_ms_total / requests, 2),
+        })
+    rows.sort(key=lambda r: (-r['max_queries'], -r['max_repeats'], r['view']))
+    return rows[:top]
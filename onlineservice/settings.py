@@ -4,6 +4,7 @@ Django settings for onlineservice project.
 
 from pathlib import Path
 from decouple import config
+from django.core.exceptions import ImproperlyConfigured
 import os
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -38,6 +39,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # /healthz отвечает до всех остальных слоёв; метрики собираются по всей цепочке ниже
+    'onlineservice.middleware.HealthCheckMiddleware',
+    'onlineservice.metrics.MetricsMiddleware',
+    # Бюджет SQL-запросов и детектор N+1 (только при QUERY_BUDGET_ENABLED)
+    'onlineservice.query_budget.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'onlineservice.middleware.DomainRoutingMiddleware',  # Domain routing middleware
     'onlineservice.middleware.HTTPSSecurityMiddleware',  # HTTPS security headers middleware
@@ -83,10 +89,33 @@ DATABASES = {
         'PASSWORD': config('DB_PASSWORD', default=''),
         'HOST': config('DB_HOST', default=''),
         'PORT': config('DB_PORT', default=''),
-
+        # Постоянные соединения: сколько секунд держать соединение между запросами
+        # (0 — закрывать после каждого запроса). Перед повторным использованием
+        # соединение проверяется (CONN_HEALTH_CHECKS), «мёртвое» заменяется новым.
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=0, cast=int),
+        'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
     }
 }
 
+# PostgreSQL идёт через onlineservice.db.postgresql: штатный бэкенд psycopg2 плюс
+# время получения соединения в logs/db.log и необязательный пул соединений процесса.
+# DB_POOL_MAX_SIZE > 0 включает пул (тогда CONN_MAX_AGE принудительно 0: соединение
+# возвращается в пул в конце запроса); DB_POOL_MIN_SIZE — сколько держать открытыми.
+DB_POOL_MAX_SIZE = config('DB_POOL_MAX_SIZE', default=0, cast=int)
+DB_POOL_MIN_SIZE = config('DB_POOL_MIN_SIZE', default=2, cast=int)
+DB_POOL_TIMEOUT = config('DB_POOL_TIMEOUT', default=10, cast=float)
+# Получение соединения дольше стольких миллисекунд пишется в лог как предупреждение
+DB_ACQUIRE_WARN_MS = config('DB_ACQUIRE_WARN_MS', default=100, cast=float)
+if DATABASES['default']['ENGINE'] in ('django.db.backends.postgresql', 'django.db.backends.postgresql_psycopg2'):
+    DATABASES['default']['ENGINE'] = 'onlineservice.db.postgresql'
+    if DB_POOL_MAX_SIZE > 0:
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS'] = {'pool': {
+            'min_size': min(DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE),
+            'max_size': DB_POOL_MAX_SIZE,
+            'timeout': DB_POOL_TIMEOUT,
+        }}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -147,6 +176,74 @@ SESSION_EXPIRE_AT_BROWSER_CLOSE = True
 SESSION_COOKIE_HTTPONLY = True
 SESSION_COOKIE_SAMESITE = config('SESSION_COOKIE_SAMESITE', default='Lax')
 
+# Черновики загрузки Parser V2 лежат в БД (ParserV2Draft), в сессии — только id.
+# Просроченные удаляет: python manage.py purge_parser_v2_drafts
+PARSER_V2_DRAFT_TTL_HOURS = config('PARSER_V2_DRAFT_TTL_HOURS', default=24, cast=int)
+
+# Профилирование этапов Parser V2: время каждого извлекателя, просмотренные ячейки
+# и вычисления регулярных выражений пишутся в raw_debug['timings'] заявки.
+# Сводка по медленным этапам: /summaries/analytics/parser-timings/
+PARSER_V2_PROFILING = config('PARSER_V2_PROFILING', default=False, cast=bool)
+
+# PDF «Заявки для страховой» рендерится в пуле процессов (insurance_requests.pdf_rendering).
+# 0 воркеров — рендер в текущем процессе (так в тестах, см. settings_test.py).
+PDF_RENDER_WORKERS = config('PDF_RENDER_WORKERS', default=2, cast=int)
+PDF_RENDER_MAX_PENDING = config('PDF_RENDER_MAX_PENDING', default=8, cast=int)
+PDF_RENDER_TIMEOUT = config('PDF_RENDER_TIMEOUT', default=60, cast=int)
+PDF_CACHE_TIMEOUT = config('PDF_CACHE_TIMEOUT', default=24 * 60 * 60, cast=int)
+# Сколько заявок можно выгрузить одним ZIP
+PDF_BATCH_MAX_REQUESTS = config('PDF_BATCH_MAX_REQUESTS', default=50, cast=int)
+
+# Кэш (пространства имён — onlineservice/cache.py). CACHE_BACKEND:
+#   locmem — память процесса: у каждого воркера свой, пропадает при перезапуске;
+#   file   — файлы в каталоге CACHE_LOCATION, общие для процессов одного сервера;
+#   redis  — сервер CACHE_LOCATION (redis://host:6379/0), общий для всех; нужен пакет redis.
+# В тестах всегда память процесса (settings_test.py). Любой backend считает попадания и промахи для /metrics.
+CACHE_BACKENDS = {
+    'locmem': ('onlineservice.metrics.MeteredLocMemCache', 'default'),
+    'file': ('onlineservice.metrics.MeteredFileBasedCache', str(BASE_DIR / 'cache')),
+    'redis': ('onlineservice.metrics.MeteredRedisCache', 'redis://localhost:6379/0'),
+}
+CACHE_BACKEND = config('CACHE_BACKEND', default='locmem')
+if CACHE_BACKEND not in CACHE_BACKENDS:
+    raise ImproperlyConfigured(f'CACHE_BACKEND must be one of {", ".join(CACHE_BACKENDS)}, got {CACHE_BACKEND!r}')
+CACHE_BACKEND_CLASS, CACHE_LOCATION = CACHE_BACKENDS[CACHE_BACKEND]
+if CACHE_BACKEND != 'locmem':
+    CACHE_LOCATION = config('CACHE_LOCATION', default='') or CACHE_LOCATION
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND_CLASS,
+        'LOCATION': CACHE_LOCATION,
+        # Префикс ключей — если один Redis делят несколько инсталляций
+        'KEY_PREFIX': config('CACHE_KEY_PREFIX', default=''),
+    }
+}
+if CACHE_BACKEND != 'redis':
+    # Строки списков — сотни записей; при 300 по умолчанию кэш вытеснял бы сам себя
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=10000, cast=int)}
+
+# Сколько секунд хранить отрисованные строки списков заявок, сводов и сделок
+# (тег cache_fragment; ключ включает updated_at, так что срок — лишь потолок)
+FRAGMENT_CACHE_TIMEOUT = config('FRAGMENT_CACHE_TIMEOUT', default=24 * 60 * 60, cast=int)
+
+# Метрики процесса (onlineservice/metrics.py): время ответа по view, SQL-запросы, кэш
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+# Токен для GET /metrics (Authorization: Bearer <токен>); пустой — адрес отключён
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# Бюджет SQL-запросов на ответ (onlineservice/query_budget.py) — для разработки и стенда.
+# Нарушение: больше QUERY_BUDGET_DEFAULT запросов (или своего бюджета view из
+# QUERY_BUDGET_VIEWS) либо один запрос повторён больше QUERY_BUDGET_MAX_DUPLICATES раз.
+# QUERY_BUDGET_MODE: 'log' — предупреждение в лог, 'raise' — исключение QueryBudgetExceeded.
+# Отчёт по logs/query_budget.log: python scripts/query_budget_report.py
+QUERY_BUDGET_ENABLED = config('QUERY_BUDGET_ENABLED', default=False, cast=bool)
+QUERY_BUDGET_MODE = config('QUERY_BUDGET_MODE', default='log')
+QUERY_BUDGET_DEFAULT = config('QUERY_BUDGET_DEFAULT', default=50, cast=int)
+QUERY_BUDGET_MAX_DUPLICATES = config('QUERY_BUDGET_MAX_DUPLICATES', default=10, cast=int)
+QUERY_BUDGET_VIEWS = {
+    # 'summaries:deal_list': 30,
+}
+
 # HTTPS Security settings - Environment controlled
 ENABLE_HTTPS = config('ENABLE_HTTPS', default=False, cast=bool)
 
@@ -218,6 +315,13 @@ CSRF_COOKIE_SAMESITE = config('CSRF_COOKIE_SAMESITE', default='Lax')
 # Logging
 os.makedirs(BASE_DIR / 'logs', exist_ok=True)
 
+# Обработчики пишут в файлы из фонового потока (onlineservice.logging_pipeline);
+# в тестах — синхронно (settings_test.py).
+LOG_QUEUE_ENABLED = config('LOG_QUEUE_ENABLED', default=True, cast=bool)
+# Уровень логгеров разбора Excel (core, multiple_file_processor). На DEBUG они
+# пишут по строке на каждую ячейку — включать только для диагностики.
+PARSER_LOG_LEVEL = config('PARSER_LOG_LEVEL', default='INFO')
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -226,58 +330,79 @@ LOGGING = {
             'format': '{levelname} {asctime} {module} {process:d} {thread:d} {message}',
             'style': '{',
         },
-        'domain_format': {
-            'format': '{levelname} {asctime} [{name}] {message}',
-            'style': '{',
+        'json': {
+            '()': 'onlineservice.logging_pipeline.JsonFormatter',
         },
     },
     'handlers': {
         'file': {
+            '()': 'onlineservice.logging_pipeline.QueuedHandler',
+            'target_class': 'logging.FileHandler',
             'level': 'INFO',
-            'class': 'logging.FileHandler',
             'filename': BASE_DIR / 'logs' / 'django.log',
-            'formatter': 'verbose',
+            'formatter': 'json',
         },
         'console': {
+            '()': 'onlineservice.logging_pipeline.QueuedHandler',
+            'target_class': 'logging.StreamHandler',
             'level': 'DEBUG',
-            'class': 'logging.StreamHandler',
             'formatter': 'verbose',
         },
         'multiple_upload_file': {
+            '()': 'onlineservice.logging_pipeline.QueuedHandler',
+            'target_class': 'logging.FileHandler',
             'level': 'DEBUG',
-            'class': 'logging.FileHandler',
             'filename': BASE_DIR / 'logs' / 'multiple_upload.log',
-            'formatter': 'verbose',
+            'formatter': 'json',
         },
         'landing_file': {
+            '()': 'onlineservice.logging_pipeline.QueuedHandler',
+            'target_class': 'logging.FileHandler',
             'level': 'INFO',
-            'class': 'logging.FileHandler',
             'filename': BASE_DIR / 'logs' / 'landing.log',
-            'formatter': 'domain_format',
+            'formatter': 'json',
         },
         'domain_routing_file': {
+            '()': 'onlineservice.logging_pipeline.QueuedHandler',
+            'target_class': 'logging.FileHandler',
             'level': 'INFO',
-            'class': 'logging.FileHandler',
             'filename': BASE_DIR / 'logs' / 'domain_routing.log',
-            'formatter': 'domain_format',
+            'formatter': 'json',
         },
         'security_file': {
+            '()': 'onlineservice.logging_pipeline.QueuedHandler',
+            'target_class': 'logging.FileHandler',
             'level': 'WARNING',
-            'class': 'logging.FileHandler',
             'filename': BASE_DIR / 'logs' / 'security.log',
-            'formatter': 'verbose',
+            'formatter': 'json',
         },
         'https_file': {
+            '()': 'onlineservice.logging_pipeline.QueuedHandler',
+            'target_class': 'logging.FileHandler',
             'level': 'INFO',
-            'class': 'logging.FileHandler',
             'filename': BASE_DIR / 'logs' / 'https.log',
-            'formatter': 'domain_format',
+            'formatter': 'json',
+        },
+        'query_budget_file': {
+            '()': 'onlineservice.logging_pipeline.QueuedHandler',
+            'target_class': 'logging.FileHandler',
+            'level': 'INFO',
+            'filename': BASE_DIR / 'logs' / 'query_budget.log',
+            'formatter': 'json',
+        },
+        'db_file': {
+            '()': 'onlineservice.logging_pipeline.QueuedHandler',
+            'target_class': 'logging.FileHandler',
+            'level': 'INFO',
+            'filename': BASE_DIR / 'logs' / 'db.log',
+            'formatter': 'json',
         },
         'backup_file': {
+            '()': 'onlineservice.logging_pipeline.QueuedHandler',
+            'target_class': 'logging.FileHandler',
             'level': 'INFO',
-            'class': 'logging.FileHandler',
             'filename': BASE_DIR / 'logs' / 'backup.log',
-            'formatter': 'verbose',
+            'formatter': 'json',
         },
     },
     'root': {
@@ -297,7 +422,7 @@ LOGGING = {
         },
         'core': {
             'handlers': ['console', 'file'],
-            'level': 'DEBUG',
+            'level': PARSER_LOG_LEVEL,
             'propagate': False,
         },
         'summaries.excel_export': {
@@ -307,7 +432,7 @@ LOGGING = {
         },
         'summaries.services.multiple_file_processor': {
             'handlers': ['console', 'file', 'multiple_upload_file'],
-            'level': 'DEBUG',
+            'level': PARSER_LOG_LEVEL,
             'propagate': False,
         },
         'onlineservice.middleware': {
@@ -315,6 +440,16 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        'onlineservice.db': {
+            'handlers': ['db_file'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'query_budget': {
+            'handlers': ['query_budget_file'],
+            'level': 'INFO',
+            'propagate': False,
+        },
         'onlineservice.views': {
             'handlers': ['console', 'landing_file'],
             'level': 'INFO',
@@ -355,6 +490,20 @@ VK_BACKUP_TOKEN = config('VK_BACKUP_TOKEN', default='')
 VK_BACKUP_PEER_ID = config('VK_BACKUP_PEER_ID', default='')
 VK_API_VERSION = config('VK_API_VERSION', default='5.199')
 
+# Аналитика сотрудников: читать метрики из дневных агрегатов ManagerDailyRollup
+# вместо сырых заявок/сводов. Включать после первичного заполнения:
+#   python manage.py rebuild_manager_rollups
+MANAGER_ANALYTICS_USE_ROLLUPS = config('MANAGER_ANALYTICS_USE_ROLLUPS', default=False, cast=bool)
+
+# Дашборд правок распознавания: читать из дневных агрегатов ParserDailyRollup /
+# ParserFieldEditDailyRollup. Включать после первичного заполнения:
+#   python manage.py rebuild_parser_rollups
+PARSER_EDITS_USE_ROLLUPS = config('PARSER_EDITS_USE_ROLLUPS', default=False, cast=bool)
+
+# Справочник страховых компаний в памяти (summaries/company_registry.py): в своём
+# процессе сбрасывается сигналами, в остальных воркерах перечитывается через TTL секунд
+COMPANY_REGISTRY_TTL = config('COMPANY_REGISTRY_TTL', default=300, cast=int)
+
 # ---------------------------------------------------------------------------
 # django-easy-audit: журнал действий пользователей в Django admin
 # ---------------------------------------------------------------------------
@@ -377,6 +526,12 @@ DJANGO_EASY_AUDIT_UNREGISTERED_CLASSES_EXTRA = [
     # Строки правок создаются пакетно при сохранении заявки; отдельный аудит
     # их дублировал бы и так уже трекаемое создание заявки.
     'insurance_requests.RequestFieldEdit',
+    # Производные агрегаты аналитики пересобираются целиком — не пользовательские правки.
+    'summaries.ManagerDailyRollup',
+    'summaries.ParserDailyRollup',
+    'summaries.ParserFieldEditDailyRollup',
+    # Черновики превью Parser V2 — временные данные, в CRUDEvent попал бы весь результат разбора.
+    'insurance_requests.ParserV2Draft',
 ]
 
 # Не пишем RequestEvent на статику, healthcheck и landing-health,
@@ -390,6 +545,22 @@ DJANGO_EASY_AUDIT_UNREGISTERED_URLS_EXTRA = [
     r'^/favicon\.ico$',
 ]
 
+# Журнал пишется через буферизованный backend: RequestEvent копятся в очереди
+# процесса и сбрасываются фоновым потоком одним bulk_create (onlineservice/audit.py).
+DJANGO_EASY_AUDIT_LOGGING_BACKEND = 'onlineservice.audit.BufferedAuditBackend'
+# В тестах пишем синхронно (settings_test.py): фоновый поток не видит транзакцию TestCase.
+AUDIT_SINK_ASYNC = config('AUDIT_SINK_ASYNC', default=True, cast=bool)
+# CRUDEvent читают бейджи и история правок заявок — по умолчанию пишем сразу.
+AUDIT_SINK_BUFFER_CRUD = config('AUDIT_SINK_BUFFER_CRUD', default=False, cast=bool)
+AUDIT_SINK_FLUSH_INTERVAL = config('AUDIT_SINK_FLUSH_INTERVAL', default=2.0, cast=float)
+AUDIT_SINK_BATCH_SIZE = config('AUDIT_SINK_BATCH_SIZE', default=200, cast=int)
+AUDIT_SINK_MAX_QUEUE = config('AUDIT_SINK_MAX_QUEUE', default=10000, cast=int)
+# Доля GET/HEAD-запросов, попадающих в RequestEvent (POST и прочие пишутся всегда).
+# AUDIT_REQUEST_SAMPLED_URLS задаёт долю для отдельных путей: [(regex, rate), ...].
+# Только для частого read-only опроса; выгрузки (XLSX) — выдача данных, их пишем всегда.
+AUDIT_REQUEST_SAMPLE_RATE = config('AUDIT_REQUEST_SAMPLE_RATE', default=1.0, cast=float)
+AUDIT_REQUEST_SAMPLED_URLS = []
+
 # Domain configuration for multi-domain support
 MAIN_DOMAINS = config('MAIN_DOMAINS', default='insflow.tw1.su', cast=lambda v: [s.strip() for s in v.split(',')])
 SUBDOMAINS = config('SUBDOMAINS', default='zs.insflow.tw1.su', cast=lambda v: [s.strip() for s in v.split(',')])
@@ -0,0 +1,31 @@
+"""
+Django settings for the test suite.
+
+python manage.py test picks this module up by itself (see manage.py); other
+runners need DJANGO_SETTINGS_MODULE=onlineservice.settings_test.
+"""
+
+from decouple import config
+
+from .settings import *  # noqa: F401,F403
+from .settings import CACHE_BACKENDS, CACHES
+
+# Журнал и логи пишем синхронно: фоновый поток не видит транзакцию TestCase,
+# а тесты читают записанное сразу после запроса.
+AUDIT_SINK_ASYNC = False
+LOG_QUEUE_ENABLED = False
+
+# PDF рендерится в текущем процессе — без пула процессов
+PDF_RENDER_WORKERS = 0
+
+# Кэш — всегда память процесса, независимо от CACHE_BACKEND в окружении
+CACHE_BACKEND = 'locmem'
+CACHE_BACKEND_CLASS, CACHE_LOCATION = CACHE_BACKENDS[CACHE_BACKEND]
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND_CLASS,
+        'LOCATION': CACHE_LOCATION,
+        'KEY_PREFIX': CACHES['default']['KEY_PREFIX'],
+        'OPTIONS': {'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=10000, cast=int)},
+    }
+}
@@ -0,0 +1,90 @@
+"""
+Тесты буферизованного backend'а easy-audit (onlineservice/audit.py).
+
+Фоновый поток в тестах не запускаем: он пишет через своё соединение и не
+видит транзакцию TestCase. Сброс очереди проверяем синхронным flush().
+"""
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from easyaudit.models import RequestEvent
+
+from onlineservice.audit import AuditSink, BufferedAuditBackend, request_sample_rate
+
+
+def _request_info(url='/requests/', method='GET'):
+    return {
+        'url': url,
+        'method': method,
+        'query_string': '',
+        'user_id': None,
+        'remote_ip': '127.0.0.1',
+        'datetime': timezone.now(),
+    }
+
+
+@patch.object(AuditSink, '_ensure_thread')
+class AuditSinkTests(TestCase):
+    def setUp(self):
+        RequestEvent.objects.all().delete()
+
+    def test_events_are_buffered_and_flushed_with_one_insert(self, _thread):
+        sink = AuditSink(batch_size=100)
+        for url in ('/a/', '/b/', '/c/'):
+            sink.put(RequestEvent, _request_info(url))
+        self.assertFalse(RequestEvent.objects.exists())
+
+        with self.assertNumQueries(1):
+            self.assertEqual(sink.flush(), 3)
+
+        self.assertEqual(
+            sorted(RequestEvent.objects.values_list('url', flat=True)), ['/a/', '/b/', '/c/'],
+        )
+        self.assertEqual(sink.stats()['written'], 3)
+        self.assertEqual(sink.stats()['queued'], 0)
+
+    def test_full_queue_drops_new_events(self, _thread):
+        sink = AuditSink(max_queue=2)
+        for url in ('/a/', '/b/', '/c/'):
+            sink.put(RequestEvent, _request_info(url))
+
+        self.assertEqual(sink.stats()['dropped'], 1)
+        self.assertEqual(sink.flush(), 2)
+
+    @override_settings(AUDIT_SINK_ASYNC=True)
+    def test_async_backend_enqueues_instead_of_inserting(self, _thread):
+        sink = AuditSink()
+        with patch('onlineservice.audit.get_sink', return_value=sink):
+            BufferedAuditBackend().request(_request_info())
+
+        self.assertFalse(RequestEvent.objects.exists())
+        self.assertEqual(sink.stats()['enqueued'], 1)
+
+
+class AuditSamplingTests(TestCase):
+    def setUp(self):
+        RequestEvent.objects.all().delete()
+
+    @override_settings(
+        AUDIT_REQUEST_SAMPLE_RATE=1.0,
+        AUDIT_REQUEST_SAMPLED_URLS=[(r'^/poll/', 0.0)],
+    )
+    def test_sampled_paths_skip_reads_but_keep_writes(self):
+        backend = BufferedAuditBackend()
+        backend.request(_request_info('/poll/'))
+        backend.request(_request_info('/poll/', method='POST'))
+        backend.request(_request_info('/requests/'))
+
+        self.assertEqual(
+            sorted(RequestEvent.objects.values_list('url', 'method')),
+            [('/poll/', 'POST'), ('/requests/', 'GET')],
+        )
+
+    def test_exports_are_not_sampled_by_default(self):
+        self.assertEqual(request_sample_rate('/summaries/analytics/managers/export/', 'GET'), 1.0)
+
+    @override_settings(AUDIT_REQUEST_SAMPLE_RATE=0.25, AUDIT_REQUEST_SAMPLED_URLS=[])
+    def test_global_rate_applies_to_reads_only(self):
+        self.assertEqual(request_sample_rate('/requests/', 'GET'), 0.25)
+        self.assertEqual(request_sample_rate('/requests/', 'DELETE'), 1.0)
@@ -0,0 +1,137 @@
+"""
+Тесты пространств имён кэша (onlineservice/cache.py) и учёта попаданий backend'ами.
+"""
+import tempfile
+from unittest.mock import patch
+
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.test import SimpleTestCase, TestCase
+
+from onlineservice import cache as cache_module
+from onlineservice.cache import CacheNamespace
+from onlineservice.metrics import MeteredFileBasedCache, MeteredRedisCache, registry
+
+
+class CacheNamespaceTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        self.addCleanup(registry.reset)
+
+    def _namespace(self, name, **kwargs):
+        namespace = CacheNamespace(name, **kwargs)
+        self.addCleanup(cache_module._namespaces.pop, name)
+        for label in namespace.invalidate_on:
+            for signal in (post_save, post_delete):
+                self.addCleanup(signal.disconnect, sender=label, dispatch_uid=f'cache_namespace:{name}:{label}')
+        return namespace
+
+    def test_keys_are_prefixed_and_invalidated_by_version(self):
+        namespace = self._namespace('test_rows', timeout=60)
+        namespace.set_many({'a': 1, 'b': 2})
+
+        self.assertEqual(namespace.get_many(['a', 'b', 'c']), {'a': 1, 'b': 2})
+        self.assertTrue(namespace.make_key('a').startswith('test_rows:v'))
+        self.assertEqual(cache.get(namespace.make_key('a')), 1)
+
+        namespace.invalidate()
+        self.assertIsNone(namespace.get('a'))
+        self.assertEqual(namespace.get_or_set('a', lambda: 10), 10)
+        self.assertEqual(namespace.get('a'), 10)
+
+    def test_lost_version_does_not_revive_old_entries(self):
+        namespace = self._namespace('test_lost')
+        namespace.set('a', 'old')
+        cache.delete(namespace._version_key)  # вытеснена
+
+        self.assertIsNone(namespace.get('a'))
+
+    def test_model_signals_invalidate_namespace(self):
+        namespace = self._namespace('test_groups', invalidate_on=('auth.Group',))
+        namespace.set('menu', ['a'])
+
+        group = Group.objects.create(name='Тестовая')
+        self.assertIsNone(namespace.get('menu'))
+
+        namespace.set('menu', ['b'])
+        group.delete()
+        self.assertIsNone(namespace.get('menu'))
+
+    def test_version_is_read_once_per_request(self):
+        namespace = self._namespace('test_request_version')
+        namespace.set('a', 1)
+        cache_module._start_request_versions()
+        self.addCleanup(cache_module._finish_request_versions)
+
+        with patch.object(cache, 'get', wraps=cache.get) as cache_get:
+            namespace.get('a')
+            namespace.get_many(['a', 'b'])
+        version_reads = [call for call in cache_get.call_args_list if call.args[0] == namespace._version_key]
+        self.assertEqual(len(version_reads), 1)
+
+        namespace.invalidate()
+        self.assertIsNone(namespace.get('a'))
+
+        cache.incr(namespace._version_key)  # сброс в другом процессе
+        namespace.set('b', 2)
+        cache_module._finish_request_versions()
+        self.assertIsNone(namespace.get('b'))
+
+    def test_stats_report_hit_ratio_per_namespace(self):
+        namespace = self._namespace('test_stats', description='Тест')
+        namespace.set('a', 1)
+        namespace.get('a')
+        namespace.get('a')
+        namespace.get_many(['a', 'missing'])
+        namespace.invalidate()
+
+        row = next(row for row in cache_module.stats() if row['name'] == 'test_stats')
+        self.assertEqual((row['hits'], row['misses'], row['invalidations']), (3, 1, 1))
+        self.assertEqual(row['hit_ratio_percent'], 75.0)
+        self.assertIn('cache_namespace_events_total{namespace="test_stats",result="hit"', registry.render())
+
+    def test_existing_caches_are_registered(self):
+        names = {namespace.name for namespace in cache_module.namespaces()}
+        self.assertTrue({'application_pdf', 'request_card_rows', 'login_rate_limit'} <= names)
+
+
+class _FakeRedisClient:
+    """Клиент Redis в памяти: только то, что вызывает RedisCache в тесте."""
+
+    def __init__(self):
+        self.data = {}
+
+    def set(self, key, value, timeout):
+        self.data[key] = value
+
+    def get(self, key, default):
+        return self.data.get(key, default)
+
+    def get_many(self, keys):
+        return {key: self.data[key] for key in keys if key in self.data}
+
+
+class MeteredBackendTests(SimpleTestCase):
+    def setUp(self):
+        registry.reset()
+        self.addCleanup(registry.reset)
+
+    def test_file_backend_counts_hits(self):
+        with tempfile.TemporaryDirectory() as directory:
+            backend = MeteredFileBasedCache(directory, {})
+            backend.set('a', 1)
+            backend.get('a')
+            backend.get('missing')
+
+        self.assertEqual(registry.cache_hit_ratio('default'), 0.5)
+
+    def test_redis_backend_counts_get_many(self):
+        backend = MeteredRedisCache('redis://localhost:6379/0', {})
+        backend.__dict__['_cache'] = _FakeRedisClient()
+        backend.set('a', 1)
+
+        self.assertEqual(backend.get_many(['a', 'b', 'c']), {'a': 1})
+        self.assertEqual(backend.get('a'), 1)
+        self.assertEqual(registry.cache_hit_ratio('default'), 0.5)
@@ -0,0 +1,102 @@
+"""
+Тесты PostgreSQL-бэкенда с пулом (onlineservice/db/postgresql) без живого сервера:
+пул и соединения psycopg2 подменяются заглушками.
+"""
+from unittest.mock import patch
+
+import psycopg2
+import psycopg2.pool
+from django.core.exceptions import ImproperlyConfigured
+from django.db.utils import OperationalError
+from django.test import SimpleTestCase
+
+from onlineservice.db.postgresql.base import DatabaseWrapper
+
+
+class FakeConnection:
+    def __init__(self, broken=False):
+        self.closed = False
+        self.broken = broken
+        self.isolation_level = None
+
+    def cursor(self):
+        connection = self
+
+        class Cursor:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def execute(self, sql):
+                if connection.broken:
+                    raise psycopg2.OperationalError('server closed the connection')
+
+        return Cursor()
+
+    def rollback(self):
+        pass
+
+
+class FakePool:
+    def __init__(self, *connections):
+        self.idle = list(connections)
+        self.returned = []
+
+    def getconn(self):
+        if not self.idle:
+            raise psycopg2.pool.PoolError('connection pool exhausted')
+        return self.idle.pop(0)
+
+    def putconn(self, connection, close=False):
+        self.returned.append((connection, close))
+
+
+def _wrapper(pool_options, conn_max_age=0):
+    return DatabaseWrapper({
+        'ENGINE': 'onlineservice.db.postgresql', 'NAME': 'app', 'USER': 'app', 'PASSWORD': '',
+        'HOST': 'db', 'PORT': '', 'ATOMIC_REQUESTS': False, 'AUTOCOMMIT': True,
+        'CONN_MAX_AGE': conn_max_age, 'CONN_HEALTH_CHECKS': False, 'TIME_ZONE': None,
+        'OPTIONS': {'pool': pool_options}, 'TEST': {},
+    })
+
+
+@patch('psycopg2.extras.register_default_jsonb')
+class PooledBackendTests(SimpleTestCase):
+    def test_connections_come_from_pool_and_go_back(self, _jsonb):
+        connection = FakeConnection()
+        pool = FakePool(connection)
+        wrapper = _wrapper({'max_size': 2})
+        params = wrapper.get_connection_params()
+        self.assertNotIn('pool', params)
+
+        with patch('onlineservice.db.postgresql.base.get_pool', return_value=pool), \
+                self.assertLogs('onlineservice.db', 'INFO') as logs:
+            self.assertIs(wrapper.get_new_connection(params), connection)
+        self.assertEqual(logs.records[0].source, 'pool')
+        self.assertGreaterEqual(logs.records[0].acquire_ms, 0)
+
+        wrapper.connection = connection
+        wrapper._close()
+        self.assertEqual(pool.returned, [(connection, False)])
+
+    def test_dead_connection_is_replaced(self, _jsonb):
+        dead, alive = FakeConnection(broken=True), FakeConnection()
+        pool = FakePool(dead, alive)
+        wrapper = _wrapper({})
+
+        with patch('onlineservice.db.postgresql.base.get_pool', return_value=pool), \
+                self.assertLogs('onlineservice.db', 'INFO'):
+            self.assertIs(wrapper.get_new_connection(wrapper.get_connection_params()), alive)
+        self.assertEqual(pool.returned, [(dead, True)])
+
+    def test_exhausted_pool_times_out(self, _jsonb):
+        wrapper = _wrapper({'timeout': 0})
+        with patch('onlineservice.db.postgresql.base.get_pool', return_value=FakePool()), \
+                self.assertRaisesMessage(OperationalError, 'exhausted'):
+            wrapper.get_new_connection(wrapper.get_connection_params())
+
+    def test_pool_requires_non_persistent_connections(self, _jsonb):
+        with self.assertRaises(ImproperlyConfigured):
+            _wrapper({}, conn_max_age=60)
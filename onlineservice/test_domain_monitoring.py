@@ -0,0 +1,169 @@
+"""
+Тесты движка проверки доменов (onlineservice/domain_monitoring.py) на локальных
+TLS-серверах с самоподписанными сертификатами.
+"""
+import asyncio
+import shutil
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import skipUnless
+
+from django.test import SimpleTestCase
+
+from onlineservice.domain_monitoring import DomainMonitor
+
+
+def _make_certificate(directory, days):
+    """Самоподписанный сертификат для localhost на days дней."""
+    cert, key = Path(directory) / f'cert{days}.pem', Path(directory) / f'key{days}.pem'
+    subprocess.run(
+        ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', str(days),
+         '-subj', '/CN=localhost/O=Test CA', '-addext', 'subjectAltName=DNS:localhost',
+         '-keyout', str(key), '-out', str(cert)],
+        check=True, capture_output=True,
+    )
+    return cert, key
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_GET(self):
+        if self.path == '/slow/':
+            time.sleep(1)
+        status, headers = self.server.routes.get(self.path, (404, {}))
+        body = b'ok'
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class _StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, routes, certificate=None):
+        super().__init__(('localhost', 0), _Handler)
+        self.routes = routes
+        self.connections = 0
+        if certificate is not None:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(*certificate)
+            self.socket = context.wrap_socket(self.socket, server_side=True)
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    def handle_error(self, request, client_address):
+        # Клиент, не дождавшийся /slow/, закрывает соединение — это ожидаемо.
+        pass
+
+    @property
+    def domain(self):
+        return f'localhost:{self.server_address[1]}'
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+@skipUnless(shutil.which('openssl'), 'openssl CLI is required to create test certificates')
+class DomainMonitorTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.certificate = _make_certificate(cls.tmp.name, 365)
+        cls.expiring_certificate = _make_certificate(cls.tmp.name, 3)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+        super().tearDownClass()
+
+    def _server(self, routes, certificate=None):
+        server = _StandInServer(routes, certificate)
+        self.addCleanup(server.stop)
+        return server
+
+    def _monitor(self, certificate=None, timeout=5):
+        context = ssl.create_default_context(cafile=str((certificate or self.certificate)[0]))
+        return DomainMonitor(timeout=timeout, ssl_context=context)
+
+    def _run(self, monitor, coroutine_factory):
+        async def run():
+            async with monitor:
+                return await coroutine_factory(monitor)
+        return asyncio.run(run())
+
+    def test_domain_checks_share_one_tls_connection(self):
+        server = self._server({
+            '/': (200, {'Strict-Transport-Security': 'max-age=31536000', 'X-Frame-Options': 'DENY'}),
+            '/login/': (302, {'Location': '/'}),
+            '/healthz/': (200, {}),
+        }, self.certificate)
+        monitor = self._monitor()
+        monitor.connections_per_host = 1
+
+        result = self._run(monitor, lambda m: m.check_domain(server.domain, 'subdomain'))
+
+        self.assertEqual(result['ssl_certificate']['status'], 'valid')
+        self.assertEqual(result['ssl_certificate']['subject'], 'localhost')
+        self.assertTrue(result['availability']['overall_available'])
+        self.assertEqual(result['availability']['paths']['/login/']['status_code'], 200)
+        self.assertEqual(result['security_headers']['security_score'], 40)
+        # Сертификат, /login/ (+ редирект на /), /healthz/ и / — одно TLS-соединение
+        # (http:// на TLS-порт не проходит рукопожатие и не считается).
+        self.assertEqual(server.connections, 1)
+        self.assertFalse(result['https_redirect']['redirect_working'])
+        self.assertFalse(result['overall_healthy'])
+
+    def test_expiring_certificate_is_critical(self):
+        server = self._server({'/': (200, {})}, self.expiring_certificate)
+        monitor = self._monitor(self.expiring_certificate)
+
+        certificate = self._run(monitor, lambda m: m.check_certificate('localhost', server.server_address[1]))
+
+        self.assertEqual(certificate['status'], 'critical')
+        self.assertLessEqual(certificate['days_until_expiry'], 3)
+
+    def test_untrusted_certificate_is_an_error(self):
+        server = self._server({'/': (200, {})}, self.expiring_certificate)
+        monitor = self._monitor(self.certificate)
+
+        certificate = self._run(monitor, lambda m: m.check_certificate('localhost', server.server_address[1]))
+
+        self.assertEqual(certificate['status'], 'error')
+        self.assertIn('SSL Error', certificate['error'])
+
+    def test_slow_hosts_are_probed_concurrently_within_deadline(self):
+        slow = [self._server({'/slow/': (200, {})}) for _ in range(3)]
+        fast = self._server({'/': (301, {'Location': 'https://example.com/'})})
+        monitor = self._monitor(timeout=0.3)
+
+        async def probe(m):
+            return await asyncio.gather(
+                *(m.fetch(f'http://{server.domain}/slow/') for server in slow),
+                m.check_https_redirect(fast.domain),
+            )
+
+        started = time.perf_counter()
+        *slow_results, redirect = self._run(monitor, probe)
+        elapsed = time.perf_counter() - started
+
+        self.assertLess(elapsed, 0.9)
+        self.assertEqual([r.error for r in slow_results], ['Connection timeout'] * 3)
+        self.assertTrue(redirect['redirect_working'])
+        self.assertEqual(redirect['redirect_code'], 301)
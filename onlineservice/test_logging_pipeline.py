@@ -0,0 +1,104 @@
+"""
+Тесты записи логов через очередь (onlineservice/logging_pipeline.py).
+"""
+import json
+import logging
+import os
+import tempfile
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+
+from onlineservice.logging_pipeline import JsonFormatter, LogPipeline, QueuedHandler
+
+
+class LoggingPipelineTests(SimpleTestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.log')
+        os.close(fd)
+        self.addCleanup(os.unlink, self.path)
+        self.pipeline = LogPipeline()
+        patcher = patch('onlineservice.logging_pipeline.get_pipeline', return_value=self.pipeline)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _logger(self, handler):
+        logger = logging.getLogger(f'onlineservice.test_logging_pipeline.{self._testMethodName}')
+        logger.propagate = False
+        logger.setLevel(logging.DEBUG)
+        logger.addHandler(handler)
+        self.addCleanup(logger.removeHandler, handler)
+        self.addCleanup(handler.close)
+        return logger
+
+    def _read_records(self):
+        with open(self.path, encoding='utf-8') as stream:
+            return [json.loads(line) for line in stream]
+
+    @override_settings(LOG_QUEUE_ENABLED=True)
+    def test_records_are_written_by_listener_as_json(self):
+        handler = QueuedHandler(filename=self.path, encoding='utf-8')
+        handler.setFormatter(JsonFormatter())
+        logger = self._logger(handler)
+
+        logger.info('Заявка %s обработана', 42, extra={'upload_id': 'abc'})
+        try:
+            raise ValueError('bad cell')
+        except ValueError:
+            logger.exception('Ошибка разбора')
+        self.pipeline.stop()
+
+        first, second = self._read_records()
+        self.assertEqual(first['message'], 'Заявка 42 обработана')
+        self.assertEqual(first['level'], 'INFO')
+        self.assertEqual(first['upload_id'], 'abc')
+        self.assertEqual(second['level'], 'ERROR')
+        self.assertIn('ValueError: bad cell', second['exc_info'])
+
+    @override_settings(LOG_QUEUE_ENABLED=True)
+    def test_other_handlers_see_original_record(self):
+        handler = QueuedHandler(filename=self.path, encoding='utf-8')
+        handler.setFormatter(JsonFormatter())
+        logger = self._logger(handler)
+        seen = []
+        other = logging.Handler()
+        other.emit = seen.append
+        logger.addHandler(other)
+        self.addCleanup(logger.removeHandler, other)
+
+        try:
+            raise ValueError('bad cell')
+        except ValueError:
+            logger.exception('Ошибка в строке %s', 6)
+        self.pipeline.stop()
+
+        self.assertEqual(seen[0].args, (6,))
+        self.assertIs(seen[0].exc_info[0], ValueError)
+        self.assertIn('ValueError: bad cell', self._read_records()[0]['exc_info'])
+
+    @override_settings(LOG_QUEUE_ENABLED=True)
+    def test_message_is_fixed_when_record_is_enqueued(self):
+        handler = QueuedHandler(filename=self.path, encoding='utf-8')
+        handler.setFormatter(JsonFormatter())
+        logger = self._logger(handler)
+
+        rows = [6]
+        logger.info('Строки с данными: %s', rows)
+        rows.append(7)
+        self.pipeline.stop()
+
+        self.assertEqual(self._read_records()[0]['message'], 'Строки с данными: [6]')
+
+    @override_settings(LOG_QUEUE_ENABLED=False)
+    def test_disabled_queue_writes_synchronously(self):
+        handler = QueuedHandler(filename=self.path, encoding='utf-8')
+        handler.setFormatter(JsonFormatter())
+        handler.setLevel(logging.WARNING)
+        logger = self._logger(handler)
+
+        logger.info('отфильтровано уровнем обработчика')
+        logger.warning('записано сразу')
+        handler.flush()
+
+        self.assertEqual([r['message'] for r in self._read_records()], ['записано сразу'])
+        self.assertIsNone(self.pipeline._listener)
@@ -0,0 +1,76 @@
+"""
+Тесты /healthz в начале цепочки middleware и метрик процесса (onlineservice/metrics.py).
+"""
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from onlineservice.metrics import registry
+
+
+class HealthCheckMiddlewareTests(TestCase):
+    def test_healthz_answers_before_sessions_and_host_validation(self):
+        with patch('django.contrib.sessions.middleware.SessionMiddleware.process_request') as sessions, \
+                self.assertNumQueries(0):
+            response = self.client.get('/healthz/', HTTP_HOST='unknown.example')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'OK')
+        sessions.assert_not_called()
+
+    def test_healthz_without_trailing_slash(self):
+        self.assertEqual(self.client.get('/healthz').status_code, 200)
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        registry.reset()
+        self.addCleanup(registry.reset)
+
+    def test_request_latency_and_queries_are_recorded_per_view(self):
+        user = User.objects.create_user('metrics', password='pass')
+        self.client.force_login(user)
+
+        self.client.get('/login/')
+        self.client.get('/login/')
+
+        self.assertEqual(registry.latency['login'].count, 2)
+        self.assertEqual(registry.responses[('login', '3xx')] + registry.responses[('login', '2xx')], 2)
+        # Сессия и пользователь читаются из БД — запросы попали в счётчик view
+        self.assertGreater(registry.queries['login'].sum, 0)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_endpoint_requires_token(self):
+        self.client.get('/login/')
+
+        # Без верного токена запрос уходит в обычную цепочку (редирект на вход)
+        self.assertNotContains(self.client.get('/metrics'), 'http_request_duration_seconds', status_code=302)
+        self.assertNotContains(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong'),
+                               'http_request_duration_seconds', status_code=302)
+
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('# TYPE http_request_duration_seconds histogram', body)
+        self.assertIn('http_request_duration_seconds_bucket{view="login"', body)
+        self.assertIn('le="+Inf"} 1', body)
+
+    @override_settings(METRICS_TOKEN='')
+    def test_metrics_endpoint_is_disabled_without_token(self):
+        self.assertNotContains(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer '),
+                               'http_request_duration_seconds', status_code=302)
+
+    def test_cache_hit_ratio(self):
+        cache = caches['default']
+        cache.set('metrics-test', 1)
+        self.addCleanup(cache.delete, 'metrics-test')
+
+        cache.get('metrics-test')
+        cache.get('metrics-test')
+        cache.get('metrics-missing')
+        cache.get_many(['metrics-test', 'metrics-missing'])
+
+        self.assertEqual(registry.cache_hit_ratio('default'), 3 / 5)
+        self.assertIn('cache_requests_total{cache="default",result="hit"', registry.render())
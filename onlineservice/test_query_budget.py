@@ -0,0 +1,150 @@
+"""
+Тесты бюджета SQL-запросов (onlineservice/query_budget.py) и бюджеты ключевых страниц.
+
+Бюджет страницы проверяется двумя способами: число запросов не превышает
+потолок и не растёт с числом строк — рост означает запрос в цикле (N+1).
+"""
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth.models import Group, User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from insurance_requests.models import InsuranceRequest
+from onlineservice.query_budget import QueryBudgetExceeded, capture_queries, fingerprint, summarize
+from summaries.models import InsuranceOffer, InsuranceSummary
+
+
+class FingerprintTests(TestCase):
+    def test_values_and_in_lists_are_collapsed(self):
+        self.assertEqual(
+            fingerprint('SELECT "a" FROM "t" WHERE "id" IN (%s, %s, %s) AND "n" = \'x\' LIMIT 21'),
+            fingerprint('SELECT "a"  FROM "t" WHERE "id" IN (%s) AND "n" = \'y\' LIMIT 1'),
+        )
+        self.assertNotEqual(fingerprint('SELECT 1 FROM "t1"'), fingerprint('SELECT 1 FROM "t2"'))
+
+    def test_recorder_counts_repeated_queries(self):
+        user = User.objects.create_user('qb')
+        with capture_queries() as queries:
+            for _ in range(3):
+                User.objects.get(pk=user.pk)
+        self.assertEqual(queries.count, 3)
+        self.assertEqual(queries.max_repeats, 3)
+        self.assertEqual(queries.duplicates()[0][1], 3)
+
+
+class QueryBudgetMiddlewareTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('budget', password='pass')
+        self.client.force_login(self.user)
+
+    @override_settings(QUERY_BUDGET_ENABLED=True, QUERY_BUDGET_DEFAULT=1, QUERY_BUDGET_MODE='log')
+    def test_over_budget_view_is_logged(self):
+        with self.assertLogs('onlineservice.query_budget', 'WARNING') as violations, \
+                self.assertLogs('query_budget', 'INFO') as samples:
+            response = self.client.get('/login/')
+
+        self.assertIn(response.status_code, (200, 302))
+        self.assertIn('login:', violations.output[0])
+        sample = samples.records[0]
+        self.assertEqual(sample.view, 'login')
+        self.assertGreater(sample.queries, 1)
+
+    @override_settings(QUERY_BUDGET_ENABLED=True, QUERY_BUDGET_DEFAULT=1, QUERY_BUDGET_MODE='raise')
+    def test_raise_mode_raises(self):
+        with self.assertRaises(QueryBudgetExceeded), self.assertLogs('onlineservice.query_budget', 'WARNING'), \
+                self.assertLogs('django.request', 'ERROR'):
+            self.client.get('/login/')
+
+    @override_settings(QUERY_BUDGET_ENABLED=True, QUERY_BUDGET_DEFAULT=1, QUERY_BUDGET_VIEWS={'login': 100},
+                       QUERY_BUDGET_MODE='raise')
+    def test_per_view_budget_overrides_default(self):
+        with self.assertLogs('query_budget', 'INFO'):
+            self.client.get('/login/')
+
+    @override_settings(QUERY_BUDGET_ENABLED=True, QUERY_BUDGET_DEFAULT=100, QUERY_BUDGET_MODE='log')
+    def test_reuses_metrics_query_counter(self):
+        with patch('onlineservice.query_budget.capture_queries') as own_counter, \
+                self.assertLogs('query_budget', 'INFO') as samples:
+            self.client.get('/login/')
+
+        own_counter.assert_not_called()
+        self.assertGreater(samples.records[0].queries, 0)
+
+    def test_disabled_by_default(self):
+        with self.assertNoLogs('query_budget', 'INFO'):
+            self.client.get('/login/')
+
+    def test_summarize_ranks_views(self):
+        rows = summarize([
+            {'view': 'a', 'queries': 5, 'db_ms': 1.0, 'max_repeats': 1, 'budget': 50},
+            {'view': 'b', 'queries': 80, 'db_ms': 9.0, 'max_repeats': 30, 'budget': 50,
+             'top_repeated': [['SELECT ? FROM "offers"', 30]]},
+            {'view': 'b', 'queries': 20, 'db_ms': 3.0, 'max_repeats': 5, 'budget': 50},
+        ])
+        self.assertEqual([row['view'] for row in rows], ['b', 'a'])
+        self.assertEqual(rows[0]['avg_queries'], 50.0)
+        self.assertEqual(rows[0]['over_budget'], 1)
+        self.assertEqual(rows[0]['top_repeated'], 'SELECT ? FROM "offers"')
+
+
+class KeyViewQueryBudgetTests(TestCase):
+    """Списки и карточки не должны делать запросов на каждую строку."""
+
+    def setUp(self):
+        admin_group, _ = Group.objects.get_or_create(name='Администраторы')
+        self.user = User.objects.create_user('budget_admin', password='pass', first_name='Иван', last_name='Петров')
+        self.user.groups.add(admin_group)
+        self.client.force_login(self.user)
+        self.created = 0
+
+    def _add_summaries(self, count):
+        summary = None
+        for _ in range(count):
+            self.created += 1
+            request_obj = InsuranceRequest.objects.create(
+                created_by=self.user, client_name=f'ООО Клиент {self.created}', inn='1234567890',
+                insurance_type='КАСКО', insurance_period='1 год', dfa_number=f'ДФА-{self.created}',
+                branch='Казань',
+            )
+            summary = InsuranceSummary.objects.create(
+                request=request_obj, status='completed_accepted', selected_company='Абсолют',
+                selected_franchise_variant=1,
+            )
+            for company in ('Абсолют', 'Ингосстрах'):
+                for year in (1, 2):
+                    InsuranceOffer.objects.create(
+                        summary=summary, company_name=company, insurance_year=year,
+                        insurance_sum=Decimal('1000000'), franchise_1=Decimal('0'),
+                        premium_with_franchise_1=Decimal('10000'),
+                    )
+        return summary
+
+    def _queries(self, url):
+        self.client.get(url)  # прогрев: сессия, справочники в кэше процесса
+        with capture_queries() as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return queries
+
+    def assertQueryBudget(self, url_for, budget):
+        small = self._queries(url_for(self._add_summaries(2)))
+        large = self._queries(url_for(self._add_summaries(6)))
+        self.assertLessEqual(large.count, budget, large.duplicates())
+        self.assertEqual(large.count, small.count, 'число запросов растёт с числом строк (N+1)')
+
+    def test_summary_list(self):
+        self.assertQueryBudget(lambda summary: reverse('summaries:summary_list'), 20)
+
+    def test_deal_list(self):
+        self.assertQueryBudget(lambda summary: reverse('summaries:deal_list'), 20)
+
+    def test_request_list(self):
+        self.assertQueryBudget(lambda summary: reverse('insurance_requests:request_list'), 20)
+
+    def test_summary_detail(self):
+        self.assertQueryBudget(lambda summary: reverse('summaries:summary_detail', args=[summary.pk]), 15)
+
+    def test_request_detail(self):
+        self.assertQueryBudget(lambda summary: reverse('insurance_requests:request_detail', args=[summary.request_id]), 15)
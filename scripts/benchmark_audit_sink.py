@@ -0,0 +1,115 @@
+"""Бенчмарк аудита запросов: сколько easy-audit добавляет к каждой странице.
+
+Сравнивает штатный ModelBackend (INSERT RequestEvent в request_started) с
+BufferedAuditBackend (очередь + фоновый bulk_create) на тестовой БД:
+  * backend — только вызов audit_logger.request(), мкс на событие;
+  * page    — полный GET /login/ через django.test.Client, мс на запрос.
+
+Запуск из корня проекта:
+    python scripts/benchmark_audit_sink.py
+    python scripts/benchmark_audit_sink.py --requests 2000
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Django bootstrap
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "onlineservice.settings")
+os.environ.setdefault("ENABLE_HTTPS", "false")
+os.environ.setdefault("DB_ENGINE", "django.db.backends.sqlite3")
+os.environ.setdefault("DEBUG", "false")
+os.environ.setdefault("SECRET_KEY", "benchmark-only")
+os.environ.setdefault("ALLOWED_HOSTS", "localhost,testserver")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test import Client, override_settings  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from easyaudit.backends import ModelBackend  # noqa: E402
+from easyaudit.models import RequestEvent  # noqa: E402
+from easyaudit.signals import request_signals  # noqa: E402
+
+from onlineservice.audit import BufferedAuditBackend, get_sink  # noqa: E402
+
+
+def _info(i):
+    return {
+        "url": f"/requests/{i}/",
+        "method": "GET",
+        "query_string": "",
+        "user_id": None,
+        "remote_ip": "127.0.0.1",
+        "datetime": timezone.now(),
+    }
+
+
+def bench_backend(backend, n):
+    timings = []
+    for i in range(n):
+        started = time.perf_counter()
+        backend.request(_info(i))
+        timings.append((time.perf_counter() - started) * 1e6)
+    return timings
+
+
+def bench_pages(n):
+    client = Client()
+    timings = []
+    for _ in range(n):
+        started = time.perf_counter()
+        client.get("/login/", HTTP_HOST="localhost")
+        timings.append((time.perf_counter() - started) * 1e3)
+    return timings
+
+
+def _row(label, timings, unit):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    return f"  {label:<10} median {statistics.median(timings):8.1f} {unit}   p95 {p95:8.1f} {unit}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500, help="Событий/страниц на замер (default: 500)")
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    original_logger = request_signals.audit_logger
+    try:
+        print(f"audit_logger.request(), {args.requests} событий:")
+        print(_row("sync", bench_backend(ModelBackend(), args.requests), "мкс"))
+        with override_settings(AUDIT_SINK_ASYNC=True):
+            buffered = bench_backend(BufferedAuditBackend(), args.requests)
+            flush_started = time.perf_counter()
+            get_sink().flush()
+            flush_ms = (time.perf_counter() - flush_started) * 1e3
+        print(_row("buffered", buffered, "мкс"))
+        print(f"  (остаток очереди дописан за {flush_ms:.1f} мс, всего строк: {RequestEvent.objects.count()})")
+
+        print(f"\nGET /login/ целиком, {args.requests} запросов:")
+        request_signals.audit_logger = ModelBackend()
+        print(_row("sync", bench_pages(args.requests), "мс"))
+        request_signals.audit_logger = BufferedAuditBackend()
+        with override_settings(AUDIT_SINK_ASYNC=True):
+            print(_row("buffered", bench_pages(args.requests), "мс"))
+            get_sink().flush()
+        print(f"  статистика очереди: {get_sink().stats()}")
+    finally:
+        request_signals.audit_logger = original_logger
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Бенчмарк соединений с БД: задержка страниц без пула, с постоянными соединениями и с пулом.
+
+Для каждого режима запускается отдельный процесс (настройки БД читаются при
+старте Django), который создаёт тестовую базу, наполняет её заявками и сводами
+и меряет p50/p95 времени ответа request_list и analytics_managers через
+тестовый клиент. Между запросами, как и в настоящем обработчике, вызывается
+close_old_connections(): без пула и CONN_MAX_AGE каждый запрос открывает
+новое соединение.
+
+Режимы:
+  * direct     — CONN_MAX_AGE=0, соединение на каждый запрос (как было);
+  * persistent — CONN_MAX_AGE=60 с проверкой соединения (CONN_HEALTH_CHECKS);
+  * pool       — пул onlineservice.db.postgresql (только PostgreSQL).
+
+База берётся из окружения (DB_ENGINE, DB_NAME, DB_USER, DB_PASSWORD, DB_HOST,
+DB_PORT); тестовая база test_<DB_NAME> создаётся и удаляется. Без DB_ENGINE
+бенчмарк идёт на SQLite — только проверка самого скрипта, режим pool пропускается.
+
+Запуск из корня проекта:
+    DB_ENGINE=django.db.backends.postgresql DB_NAME=onlineservice DB_USER=postgres \\
+        DB_HOST=localhost python scripts/benchmark_db_connections.py
+    python scripts/benchmark_db_connections.py --requests 200 --modes direct pool
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+MODES = {
+    "direct": {"DB_CONN_MAX_AGE": "0", "DB_POOL_MAX_SIZE": "0"},
+    "persistent": {"DB_CONN_MAX_AGE": "60", "DB_POOL_MAX_SIZE": "0"},
+    "pool": {"DB_CONN_MAX_AGE": "0", "DB_POOL_MAX_SIZE": "4"},
+}
+PAGES = {
+    "request_list": "insurance_requests:request_list",
+    "analytics_managers": "summaries:analytics_managers",
+}
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def worker(requests, rows):
+    """Замер в текущем процессе; результат — JSON в stdout."""
+    sys.path.insert(0, str(ROOT))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "onlineservice.settings")
+    os.environ.setdefault("ENABLE_HTTPS", "false")
+    os.environ.setdefault("DEBUG", "false")
+    os.environ.setdefault("SECRET_KEY", "benchmark-only")
+    os.environ.setdefault("ALLOWED_HOSTS", "localhost,testserver")
+
+    import logging
+
+    import django
+
+    django.setup()
+    logging.disable(logging.CRITICAL)
+
+    from django.contrib.auth.models import Group, User
+    from django.db import close_old_connections, connection
+    from django.test import Client
+    from django.test.utils import setup_test_environment
+    from django.urls import reverse
+
+    from insurance_requests.models import InsuranceRequest
+    from summaries.models import InsuranceSummary
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        admin_group, _ = Group.objects.get_or_create(name="Администраторы")
+        user = User.objects.create_user("benchmark", first_name="Иван", last_name="Петров")
+        user.groups.add(admin_group)
+        for idx in range(rows):
+            request_obj = InsuranceRequest.objects.create(
+                created_by=user, client_name=f"ООО Клиент {idx}", inn="1234567890",
+                insurance_type="КАСКО", branch="Казань", dfa_number=f"ДФА-{idx}",
+            )
+            InsuranceSummary.objects.create(request=request_obj, status="collecting")
+
+        client = Client()
+        client.force_login(user)
+        results = {"vendor": connection.vendor, "pages": {}}
+        for page, url_name in PAGES.items():
+            url = reverse(url_name)
+            latencies = []
+            for attempt in range(requests + 3):
+                # Как BaseHandler: старые соединения закрываются на границах запроса
+                close_old_connections()
+                started = time.perf_counter()
+                response = client.get(url)
+                elapsed = (time.perf_counter() - started) * 1e3
+                close_old_connections()
+                if response.status_code != 200:
+                    raise SystemExit(f"{url}: HTTP {response.status_code}")
+                if attempt >= 3:  # первые три — прогрев
+                    latencies.append(elapsed)
+            results["pages"][page] = {
+                "p50_ms": round(statistics.median(latencies), 2),
+                "p95_ms": round(_percentile(latencies, 0.95), 2),
+            }
+    finally:
+        connection.close()
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+    print(json.dumps(results))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=100, help="Запросов на страницу (default: 100)")
+    parser.add_argument("--rows", type=int, default=200, help="Заявок в тестовой базе (default: 200)")
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES),
+                        help="Какие режимы сравнивать (default: все)")
+    parser.add_argument("--worker", choices=list(MODES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.requests, args.rows)
+        return
+
+    postgres = "postgresql" in os.environ.get("DB_ENGINE", "")
+    print(f"{args.requests} запросов на страницу, {args.rows} заявок; p50 / p95, мс:")
+    for mode in args.modes:
+        if mode == "pool" and not postgres:
+            print(f"  {mode:<11} пропущен: пул есть только у PostgreSQL (DB_ENGINE)")
+            continue
+        env = {**os.environ, **MODES[mode]}
+        completed = subprocess.run(
+            [sys.executable, __file__, "--worker", mode, "--requests", str(args.requests), "--rows", str(args.rows)],
+            env=env, capture_output=True, text=True, cwd=ROOT,
+        )
+        if completed.returncode != 0:
+            print(f"  {mode:<11} ошибка:\n{completed.stderr[-2000:]}")
+            continue
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        cells = "  ".join(
+            f"{page} {stats['p50_ms']:8.2f} / {stats['p95_ms']:8.2f}" for page, stats in result["pages"].items()
+        )
+        print(f"  {mode:<11} [{result['vendor']}]  {cells}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""Бенчмарк логирования разбора Excel: сколько логи добавляют к одной загрузке.
+
+Одна «загрузка» — ExcelReader.read_insurance_request() по заявке ИП (формат
+«имущество», все смещения строк) и ExcelResponseProcessor._extract_all_years_data()
+по ответу страховой на 5 лет. Файлы синтетические, создаются во временной
+папке; логи тоже пишутся туда (консоль — в /dev/null).
+
+Режимы --logging:
+  * none    — логирование отключено, чистое время разбора;
+  * legacy  — прежняя конфигурация: синхронные FileHandler, core и
+              multiple_file_processor на DEBUG;
+  * current — settings.LOGGING как есть (очередь + JSON, PARSER_LOG_LEVEL).
+
+Запуск из корня проекта:
+    python scripts/benchmark_logging.py
+    python scripts/benchmark_logging.py --uploads 200 --logging legacy current
+"""
+from __future__ import annotations
+
+import argparse
+import copy
+import logging
+import logging.config
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Django bootstrap
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "onlineservice.settings")
+os.environ.setdefault("ENABLE_HTTPS", "false")
+os.environ.setdefault("DB_ENGINE", "django.db.backends.sqlite3")
+os.environ.setdefault("DEBUG", "false")
+os.environ.setdefault("SECRET_KEY", "benchmark-only")
+os.environ.setdefault("ALLOWED_HOSTS", "localhost")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from openpyxl import Workbook, load_workbook  # noqa: E402
+
+from core.excel_utils import ExcelReader  # noqa: E402
+from summaries.services.excel_services import ExcelResponseProcessor  # noqa: E402
+
+
+ROUND_SIZE = 20
+
+
+def make_request_file(path):
+    """Заявка с заполненными ячейками в тех строках, что читает ExcelReader."""
+    workbook = Workbook()
+    sheet = workbook.active
+    for row in range(1, 60):
+        for column in "CDEFGHIJKLMN":
+            sheet[f"{column}{row}"] = f"{column}{row}"
+    sheet["D9"] = "ООО Бенчмарк"
+    sheet["D10"] = "7700000000"
+    workbook.save(path)
+
+
+def make_response_file(path):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet["B2"] = "Абсолют"
+    for offset, row in enumerate(range(6, 11), start=1):
+        sheet[f"A{row}"] = offset
+        sheet[f"B{row}"] = 1_000_000 * offset
+        sheet[f"D{row}"] = 10_000 * offset
+        sheet[f"E{row}"] = 0
+        sheet[f"F{row}"] = 1
+    workbook.save(path)
+
+
+def _redirect(config, log_dir, devnull):
+    for name, handler in config["handlers"].items():
+        if "filename" in handler:
+            handler["filename"] = Path(log_dir) / f"{name}.log"
+        else:
+            handler["stream"] = devnull
+    return config
+
+
+def legacy_logging(log_dir, devnull):
+    config = _redirect(copy.deepcopy(settings.LOGGING), log_dir, devnull)
+    config["formatters"]["json"] = {"format": "{levelname} {asctime} {module} {process:d} {thread:d} {message}", "style": "{"}
+    for handler in config["handlers"].values():
+        if "target_class" in handler:
+            handler.pop("()")
+            handler["class"] = handler.pop("target_class")
+    for name in ("core", "summaries.services.multiple_file_processor"):
+        config["loggers"][name]["level"] = "DEBUG"
+    return config
+
+
+def current_logging(log_dir, devnull):
+    return _redirect(copy.deepcopy(settings.LOGGING), log_dir, devnull)
+
+
+def one_upload(request_path, response_path):
+    reader = ExcelReader(str(request_path), "individual_entrepreneur", "property")
+    reader.read_insurance_request()
+    worksheet = load_workbook(response_path, data_only=True).active
+    ExcelResponseProcessor()._extract_all_years_data(worksheet)
+
+
+def bench(uploads, request_path, response_path):
+    """Время загрузки: по часам и CPU потока, который разбирает файлы.
+
+    CPU потока не включает работу фонового потока логов — это и есть то, что
+    логирование отнимает у запроса.
+    """
+    wall, cpu = [], []
+    for _ in range(uploads):
+        started, started_cpu = time.perf_counter(), time.thread_time()
+        one_upload(request_path, response_path)
+        cpu.append((time.thread_time() - started_cpu) * 1e3)
+        wall.append((time.perf_counter() - started) * 1e3)
+    return wall, cpu
+
+
+def _row(label, wall, cpu, baseline=None):
+    wall_median, cpu_median = statistics.median(wall), statistics.median(cpu)
+    overhead = f"   логи: +{cpu_median - baseline:5.2f} мс CPU" if baseline is not None else ""
+    return f"  {label:<8} median {wall_median:7.2f} мс   CPU потока {cpu_median:7.2f} мс{overhead}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--uploads", type=int, default=100, help="Загрузок на замер (default: 100)")
+    parser.add_argument(
+        "--logging", nargs="+", choices=("none", "legacy", "current"),
+        default=["none", "legacy", "current"], help="Конфигурации логирования для сравнения",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        request_path = Path(tmp) / "request.xlsx"
+        response_path = Path(tmp) / "response.xlsx"
+        make_request_file(request_path)
+        make_response_file(response_path)
+        logging.disable(logging.CRITICAL)
+        one_upload(request_path, response_path)  # прогрев импортов и openpyxl
+
+        print(f"Разбор заявки + ответа страховой, {args.uploads} загрузок:")
+        # Режимы чередуются порциями по ROUND_SIZE загрузок, чтобы дрейф
+        # частоты CPU и кэшей не приписывался одному из них.
+        results = {mode: ([], []) for mode in args.logging}
+        written = dict.fromkeys(args.logging, 0)
+        for round_start in range(0, args.uploads, ROUND_SIZE):
+            uploads = min(ROUND_SIZE, args.uploads - round_start)
+            for mode in args.logging:
+                log_dir = Path(tmp) / f"{mode}_{round_start}"
+                log_dir.mkdir()
+                if mode == "none":
+                    logging.disable(logging.CRITICAL)
+                else:
+                    logging.disable(logging.NOTSET)
+                    builder = legacy_logging if mode == "legacy" else current_logging
+                    logging.config.dictConfig(builder(log_dir, devnull))
+                wall, cpu = bench(uploads, request_path, response_path)
+                if mode == "current":
+                    from onlineservice.logging_pipeline import get_pipeline
+                    get_pipeline().stop()  # дописываем очередь до подсчёта размера логов
+                results[mode][0].extend(wall)
+                results[mode][1].extend(cpu)
+                written[mode] += sum(p.stat().st_size for p in log_dir.glob("*.log"))
+
+        baseline = statistics.median(results["none"][1]) if "none" in results else None
+        for mode, (wall, cpu) in results.items():
+            print(_row(mode, wall, cpu, baseline if mode != "none" else None)
+                  + f", {written[mode] / args.uploads / 1024:.1f} КБ/загрузку")
+        logging.disable(logging.NOTSET)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,445 @@
+"""Регрессионный бенчмарк разбора Excel на синтетическом эталонном корпусе.
+
+Корпус генерируется детерминированно во временной папке:
+  * заявки — КАСКО (юрлицо), имущество (юрлицо), КАСКО от ИП (смещение строк
+    на +1) с растущим числом объектов и «шумом» на листе (размеры s/m/l);
+  * ответы страховых — 1/3/5 лет страхования, те же размеры листа.
+
+Замеры (медиана по --repeat прогонам после прогрева):
+  * parser_v2    — ExcelRequestParserV2.parse: read (_read_cells),
+                   index (_rows), extract (извлечение полей и объектов),
+                   warnings (_build_warnings, notes, confidence);
+  * excel_reader — ExcelReader.read_insurance_request: read (_load_grid),
+                   extract (_extract_data);
+  * response     — ExcelResponseProcessor.process_excel_file: read (загрузка
+                   книги), extract (extract_company_data), validate,
+                   write (create_offers, тестовая БД);
+  плюс пик памяти (tracemalloc, отдельный прогон) и пропускная способность
+  (файлов/с, непустых ячеек/с). Каждый результат сверяется с эталоном
+  корпуса — быстрый, но неверный разбор считается провалом.
+
+Логирование на время замеров отключено: меряется сам разбор
+(цену логов меряет scripts/benchmark_logging.py).
+
+Запуск из корня проекта:
+    python scripts/benchmark_parsers.py
+    python scripts/benchmark_parsers.py --quick --save baseline.json
+    python scripts/benchmark_parsers.py --compare baseline.json --threshold 0.25
+
+В режиме --compare код выхода 1, если хоть один случай медленнее (или
+прожорливее по памяти) базовой линии больше чем на --threshold, либо
+разбор разошёлся с эталоном — так его можно ставить шагом CI.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+from typing import NamedTuple
+
+# Django bootstrap
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "onlineservice.settings")
+os.environ.setdefault("ENABLE_HTTPS", "false")
+os.environ.setdefault("DB_ENGINE", "django.db.backends.sqlite3")
+os.environ.setdefault("DEBUG", "false")
+os.environ.setdefault("SECRET_KEY", "benchmark-only")
+os.environ.setdefault("ALLOWED_HOSTS", "localhost")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from openpyxl import Workbook  # noqa: E402
+
+from core.excel_utils import ExcelReader  # noqa: E402
+from insurance_requests.models import InsuranceRequest  # noqa: E402
+from insurance_requests.parsers.excel_v2.parser import ExcelRequestParserV2  # noqa: E402
+from summaries.models import InsuranceCompany, InsuranceSummary  # noqa: E402
+from summaries.services.excel_services import ExcelResponseProcessor  # noqa: E402
+
+
+BASELINE_FORMAT = 1
+DEFAULT_THRESHOLD = 0.25
+# Абсолютные пороги шума: разница меньше них регрессией не считается.
+MIN_DELTA_MS = 1.0
+MIN_DELTA_KB = 64.0
+
+
+class Size(NamedTuple):
+    objects: int
+    noise_rows: int
+
+
+# Объекты КАСКО ищутся в 35 строках от шапки таблицы, имущества — в 24.
+SIZES = {
+    "s": Size(objects=1, noise_rows=0),
+    "m": Size(objects=8, noise_rows=300),
+    "l": Size(objects=20, noise_rows=2000),
+}
+QUICK_SIZES = ("s", "m")
+RESPONSE_YEARS = (1, 3, 5)
+NOISE_COLUMNS = "RSTUVWXYZ"
+
+
+# --- Корпус ------------------------------------------------------------------
+
+
+class Case(NamedTuple):
+    name: str
+    kind: str  # parser_v2 | excel_reader | response
+    path: Path
+    cells: int
+    golden: dict
+    options: dict
+
+
+def _add_noise(sheet, rows, first_row):
+    """Заполняет служебные столбцы справа: растит лист, не задевая разметку."""
+    for offset in range(rows):
+        row = first_row + offset
+        for column in NOISE_COLUMNS:
+            sheet[f"{column}{row}"] = f"служебная отметка {row}-{column}"
+
+
+def _count_cells(sheet):
+    return sum(1 for row in sheet.iter_rows() for cell in row if cell.value not in (None, ""))
+
+
+def _request_workbook(variant, size):
+    """Заявка в раскладке реальных шаблонов; для ИП строки ниже 8-й сдвинуты на +1."""
+    ip = variant == "casco_ip"
+    shift = 1 if ip else 0
+    client = "ИП Бенчмарков Иван Иванович" if ip else "ООО Бенчмарк"
+    inn = "770000000012" if ip else "7700000001"
+
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet["H2"] = "ДФА-2026-0001"
+    sheet["C4"] = "Казанский филиал"
+    sheet["C5"] = "Петров Пётр"
+    sheet["B7"] = "Наименование лизингополучателя"
+    sheet["D7"] = client
+    if ip:
+        sheet["B8"] = "Индивидуальный предприниматель"
+        sheet["B9"] = "ОГРНИП"
+        sheet["D9"] = "320000000000001"
+    sheet[f"B{9 + shift}"] = "ИНН"
+    sheet[f"D{9 + shift}"] = inn
+    sheet[f"N{17 + shift}"] = "1 год"
+
+    if variant == "property":
+        sheet["B22"] = "Страхование имущества"
+        sheet["B41"] = "№ п/п"
+        sheet["C41"] = "Наименование и описание имущества"
+        sheet["K41"] = "Год выпуска"
+        sheet["M41"] = "Стоимость"
+        sheet["N41"] = "Валюта"
+        for idx in range(size.objects):
+            row = 42 + idx
+            sheet[f"B{row}"] = idx + 1
+            sheet[f"C{row}"] = f"Станок токарный модель ТК-{100 + idx}"
+            sheet[f"K{row}"] = 2020 + idx % 5
+            sheet[f"L{row}"] = "новое"
+            sheet[f"M{row}"] = 1_000_000 + idx * 10_000
+            sheet[f"N{row}"] = "руб"
+        insurance_type = "страхование имущества"
+        last_row = 42 + size.objects
+    else:
+        sheet[f"D{21 + shift}"] = "КАСКО"
+        header = 41 + shift
+        sheet[f"C{header}"] = "Наименование и описание имущества"
+        sheet[f"J{header}"] = "Год выпуска"
+        sheet[f"M{header}"] = "Стоимость на момент приобретения"
+        sheet[f"N{header}"] = "Валюта"
+        for idx in range(size.objects):
+            row = header + 2 + idx
+            sheet[f"C{row}"] = f"Грузовой тягач SITRAK C7H-{idx:03d}"
+            sheet[f"J{row}"] = 2021 + idx % 4
+            sheet[f"K{row}"] = "новое"
+            sheet[f"M{row}"] = 9_000_000 + idx * 25_000
+            sheet[f"N{row}"] = "руб"
+        insurance_type = "КАСКО"
+        last_row = header + 2 + size.objects
+
+    _add_noise(sheet, size.noise_rows, last_row + 40)
+    golden = {
+        "client_name": client,
+        "inn": inn,
+        "insurance_type": insurance_type,
+        "objects": size.objects,
+        "application_type": "individual_entrepreneur" if ip else "legal_entity",
+    }
+    return workbook, golden
+
+
+def _response_workbook(company, years, size):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet["B2"] = company
+    for year in range(1, years + 1):
+        row = 5 + year
+        sheet[f"A{row}"] = year
+        sheet[f"B{row}"] = 5_000_000 - (year - 1) * 500_000
+        sheet[f"D{row}"] = 150_000 - (year - 1) * 10_000
+        sheet[f"E{row}"] = 0
+        sheet[f"F{row}"] = 1
+        sheet[f"H{row}"] = 120_000 - (year - 1) * 8_000
+        sheet[f"I{row}"] = 50_000
+        sheet[f"J{row}"] = 1
+    _add_noise(sheet, size.noise_rows, 20)
+    return workbook, {"company_name": company, "offers_created": years}
+
+
+def build_corpus(directory, sizes, company):
+    cases = []
+
+    def _save(workbook, filename):
+        path = Path(directory) / filename
+        workbook.save(path)
+        return path, _count_cells(workbook.active)
+
+    for variant in ("casco_legal", "property", "casco_ip"):
+        for size_name in sizes:
+            workbook, golden = _request_workbook(variant, SIZES[size_name])
+            path, cells = _save(workbook, f"request_{variant}_{size_name}.xlsx")
+            cases.append(Case(f"parser_v2/{variant}/{size_name}", "parser_v2", path, cells, golden, {}))
+            options = {
+                "application_type": golden["application_type"],
+                "application_format": "property" if variant == "property" else "casco_equipment",
+            }
+            cases.append(Case(f"excel_reader/{variant}/{size_name}", "excel_reader", path, cells,
+                              golden, options))
+
+    for years in RESPONSE_YEARS:
+        for size_name in sizes:
+            workbook, golden = _response_workbook(company, years, SIZES[size_name])
+            path, cells = _save(workbook, f"response_{years}y_{size_name}.xlsx")
+            cases.append(Case(f"response/{years}y/{size_name}", "response", path, cells, golden, {}))
+    return cases
+
+
+# --- Замеры ------------------------------------------------------------------
+
+
+class StageTimer:
+    """Подменяет методы экземпляра обёртками, копящими время по этапам."""
+
+    def __init__(self):
+        self.seconds = defaultdict(float)
+
+    def wrap(self, obj, stage, *methods):
+        for method in methods:
+            original = getattr(obj, method)
+
+            def timed(*args, __original=original, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return __original(*args, **kwargs)
+                finally:
+                    self.seconds[stage] += time.perf_counter() - started
+
+            setattr(obj, method, timed)
+        return obj
+
+
+def _run_parser_v2(case, timer):
+    parser = timer.wrap(ExcelRequestParserV2(), "read", "_read_cells")
+    timer.wrap(parser, "index", "_rows")
+    timer.wrap(parser, "warnings", "_build_warnings", "_build_notes", "_calculate_confidence")
+    result = parser.parse(str(case.path), original_filename=case.path.name)
+    payload = result.data.get("parser_v2_payload") or {}
+    return {
+        "client_name": result.data.get("client_name"),
+        "inn": result.data.get("inn"),
+        "insurance_type": result.data.get("insurance_type"),
+        "objects": len(payload.get("insured_objects") or []),
+        "application_type": payload.get("application_type"),
+    }
+
+
+def _run_excel_reader(case, timer):
+    reader = ExcelReader(str(case.path), **case.options)
+    timer.wrap(reader, "read", "_load_grid")
+    timer.wrap(reader, "extract", "_extract_data")
+    data = reader.read_insurance_request()
+    return {
+        "client_name": data.get("client_name"),
+        "inn": data.get("inn"),
+        "insurance_type": data.get("insurance_type"),
+    }
+
+
+def _run_response(case, timer):
+    # Каждый прогон — в новый свод: повторная загрузка в тот же дала бы дубликаты.
+    request = InsuranceRequest.objects.create(client_name="Бенчмарк", inn="7700000001")
+    summary = InsuranceSummary.objects.create(request=request)
+    processor = ExcelResponseProcessor()
+    timer.wrap(processor, "read", "_load_excel_file", "_get_worksheet")
+    timer.wrap(processor, "extract", "extract_company_data")
+    timer.wrap(processor, "validate", "validate_extracted_data")
+    timer.wrap(processor, "write", "create_offers")
+    with open(case.path, "rb") as file:
+        result = processor.process_excel_file(file, summary)
+    return {"company_name": result["company_name"], "offers_created": result["offers_created"]}
+
+
+RUNNERS = {
+    "parser_v2": _run_parser_v2,
+    "excel_reader": _run_excel_reader,
+    "response": _run_response,
+}
+
+
+def _golden_mismatches(case, observed):
+    return {
+        key: {"expected": expected, "got": observed.get(key)}
+        for key, expected in case.golden.items()
+        if key in observed and observed[key] != expected
+    }
+
+
+def measure(case, repeat):
+    runner = RUNNERS[case.kind]
+    runner(case, StageTimer())  # прогрев: импорты, кэши openpyxl и справочников
+
+    totals, stages = [], defaultdict(list)
+    observed = {}
+    for _ in range(repeat):
+        timer = StageTimer()
+        started = time.perf_counter()
+        observed = runner(case, timer)
+        total = time.perf_counter() - started
+        totals.append(total * 1e3)
+        measured = sum(timer.seconds.values())
+        for stage, seconds in timer.seconds.items():
+            stages[stage].append(seconds * 1e3)
+        if case.kind == "parser_v2":
+            stages["extract"].append((total - measured) * 1e3)
+
+    tracemalloc.start()
+    runner(case, StageTimer())
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    median_ms = statistics.median(totals)
+    return {
+        "median_ms": round(median_ms, 3),
+        "p95_ms": round(sorted(totals)[max(0, int(len(totals) * 0.95) - 1)], 3),
+        "stages_ms": {stage: round(statistics.median(values), 3) for stage, values in sorted(stages.items())},
+        "peak_kb": round(peak / 1024, 1),
+        "cells": case.cells,
+        "files_per_s": round(1e3 / median_ms, 2) if median_ms else None,
+        "cells_per_s": round(case.cells * 1e3 / median_ms) if median_ms else None,
+        "golden_mismatches": _golden_mismatches(case, observed),
+    }
+
+
+# --- Базовая линия и сравнение -------------------------------------------------
+
+
+def compare(current, baseline, threshold):
+    """Регрессии current относительно baseline: список (случай, метрика, было, стало)."""
+    regressions = []
+    for name, now in current.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if (now["median_ms"] > before["median_ms"] * (1 + threshold)
+                and now["median_ms"] - before["median_ms"] >= MIN_DELTA_MS):
+            regressions.append((name, "median_ms", before["median_ms"], now["median_ms"]))
+        if (before.get("peak_kb") and now["peak_kb"] > before["peak_kb"] * (1 + threshold)
+                and now["peak_kb"] - before["peak_kb"] >= MIN_DELTA_KB):
+            regressions.append((name, "peak_kb", before["peak_kb"], now["peak_kb"]))
+    return regressions
+
+
+def _print_case(name, result):
+    stages = " ".join(f"{stage}={ms:.2f}" for stage, ms in result["stages_ms"].items())
+    print(f"  {name:<28} {result['median_ms']:9.2f} мс  {result['peak_kb']:9.1f} КБ  "
+          f"{result['files_per_s']:8.1f} ф/с  {result['cells_per_s']:>9} яч/с  [{stages}]")
+    if result["golden_mismatches"]:
+        print(f"  {'':<28} РАСХОЖДЕНИЕ С ЭТАЛОНОМ: {result['golden_mismatches']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10, help="Прогонов на случай (default: 10)")
+    parser.add_argument("--quick", action="store_true", help=f"Только размеры {', '.join(QUICK_SIZES)}")
+    parser.add_argument("--only", default="", help="Подстрока имени случая, например parser_v2/ или /l")
+    parser.add_argument("--save", type=Path, help="Записать результаты как базовую линию (JSON)")
+    parser.add_argument("--compare", type=Path, help="Сравнить с базовой линией (JSON)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Допустимый рост времени/памяти, доля (default: {DEFAULT_THRESHOLD})")
+    args = parser.parse_args()
+    if args.repeat <= 0:
+        parser.error("--repeat должен быть положительным")
+
+    baseline = None
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        if baseline.get("format") != BASELINE_FORMAT:
+            parser.error(f"{args.compare}: неизвестный формат базовой линии")
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    logging.disable(logging.CRITICAL)
+    try:
+        company = InsuranceCompany.objects.exclude(name="другое").order_by("sort_order", "name").first()
+        company_name = company.name if company else "Абсолют"
+        sizes = QUICK_SIZES if args.quick else tuple(SIZES)
+        results = {}
+        with tempfile.TemporaryDirectory() as tmp:
+            cases = [c for c in build_corpus(tmp, sizes, company_name) if args.only in c.name]
+            print(f"{len(cases)} случаев, {args.repeat} прогонов на случай (медиана):")
+            for case in cases:
+                results[case.name] = measure(case, args.repeat)
+                _print_case(case.name, results[case.name])
+    finally:
+        logging.disable(logging.NOTSET)
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    failed = [name for name, result in results.items() if result["golden_mismatches"]]
+
+    if args.save:
+        args.save.write_text(json.dumps({
+            "format": BASELINE_FORMAT,
+            "created_at": datetime.now(dt_timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": f"{platform.system()} {platform.machine()}",
+            "repeat": args.repeat,
+            "cases": results,
+        }, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"\nБазовая линия записана: {args.save}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline.get("cases", {}), args.threshold)
+        missing = sorted(set(results) - set(baseline.get("cases", {})))
+        print(f"\nСравнение с {args.compare} (порог +{args.threshold:.0%}):")
+        for name, metric, before, now in regressions:
+            print(f"  РЕГРЕССИЯ {name} {metric}: {before} → {now} ({now / before - 1:+.0%})")
+        if missing:
+            print(f"  нет в базовой линии: {', '.join(missing)}")
+        if not regressions:
+            print("  регрессий нет")
+        if regressions or failed:
+            sys.exit(1)
+    elif failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+#!/bin/bash
+
+# Cron wrapper for hourly Parser V2 draft purge.
+
+set -euo pipefail
+
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+PROJECT_DIR="$(dirname "$SCRIPT_DIR")"
+LOG_DIR="$PROJECT_DIR/logs"
+LOG_FILE="$LOG_DIR/cron_purge_parser_v2_drafts.log"
+PYTHON_BIN="${PYTHON_BIN:-python}"
+USE_DOCKER="${USE_DOCKER:-0}"
+
+mkdir -p "$LOG_DIR"
+cd "$PROJECT_DIR"
+
+echo "$(date '+%Y-%m-%d %H:%M:%S') - START purge_parser_v2_drafts (USE_DOCKER=$USE_DOCKER)" >> "$LOG_FILE"
+
+if [ "$USE_DOCKER" = "1" ]; then
+  CMD=(docker compose exec -T web python manage.py purge_parser_v2_drafts)
+else
+  CMD=("$PYTHON_BIN" manage.py purge_parser_v2_drafts)
+fi
+
+if "${CMD[@]}" >> "$LOG_FILE" 2>&1; then
+  echo "$(date '+%Y-%m-%d %H:%M:%S') - END success" >> "$LOG_FILE"
+else
+  EXIT_CODE=$?
+  echo "$(date '+%Y-%m-%d %H:%M:%S') - END failed (exit_code=$EXIT_CODE)" >> "$LOG_FILE"
+  exit "$EXIT_CODE"
+fi
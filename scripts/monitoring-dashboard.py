@@ -12,6 +12,15 @@ from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from onlineservice.domain_monitoring import (  # noqa: E402
+    DEFAULT_MAIN_DOMAINS,
+    DEFAULT_SUBDOMAINS,
+    domains_from_env,
+    run_monitoring,
+)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -81,52 +90,17 @@ class MonitoringDashboard:
             }
     
     def run_https_monitoring(self) -> Dict:
-        """Run HTTPS domain monitoring"""
+        """Run HTTPS domain monitoring (in-process, all domains concurrently)"""
         try:
             logger.info("Running HTTPS monitoring...")
             
-            script_path = self.scripts_dir / 'monitor-domains-https.py'
-            
-            if not script_path.exists():
-                logger.error(f"HTTPS monitoring script not found: {script_path}")
-                return {
-                    'timestamp': datetime.now().isoformat(),
-                    'error': 'HTTPS monitoring script not found'
-                }
-            
-            result = subprocess.run(
-                [sys.executable, str(script_path), '--json'],
-                capture_output=True,
-                text=True,
-                timeout=120
+            https_data = run_monitoring(
+                domains_from_env('MAIN_DOMAINS', DEFAULT_MAIN_DOMAINS),
+                domains_from_env('SUBDOMAINS', DEFAULT_SUBDOMAINS),
             )
+            logger.info(f"HTTPS monitoring completed successfully in {https_data['duration']:.3f}s")
+            return https_data
             
-            if result.returncode in [0, 1, 2]:  # 0=success, 1=warnings, 2=critical
-                try:
-                    https_data = json.loads(result.stdout)
-                    logger.info("HTTPS monitoring completed successfully")
-                    return https_data
-                except json.JSONDecodeError as e:
-                    logger.error(f"Failed to parse HTTPS monitoring output: {e}")
-                    return {
-                        'timestamp': datetime.now().isoformat(),
-                        'error': f'Failed to parse output: {e}',
-                        'raw_output': result.stdout
-                    }
-            else:
-                logger.error(f"HTTPS monitoring failed with exit code {result.returncode}")
-                return {
-                    'timestamp': datetime.now().isoformat(),
-                    'error': f'HTTPS monitoring failed: {result.stderr}',
-                    'exit_code': result.returncode
-                }
-                
-        except subprocess.TimeoutExpired:
-            logger.error("HTTPS monitoring timed out")
-            return {
-                'timestamp': datetime.now().isoformat(),
-                'error': 'HTTPS monitoring timed out'
-            }
         except Exception as e:
             logger.error(f"HTTPS monitoring failed: {e}")
             return {
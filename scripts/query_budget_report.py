@@ -0,0 +1,60 @@
+"""Отчёт по бюджету SQL-запросов: худшие view из logs/query_budget.log.
+
+Лог пишет QueryBudgetMiddleware (onlineservice/query_budget.py) при
+QUERY_BUDGET_ENABLED=true — по записи на ответ. Для каждого view отчёт
+показывает число ответов, среднее и максимум запросов, время в БД, сколько
+раз подряд повторялся самый частый запрос (признак N+1) и сколько ответов
+превысили бюджет.
+
+Запуск из корня проекта:
+    python scripts/query_budget_report.py
+    python scripts/query_budget_report.py --log /var/log/app/query_budget.log --top 10
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from onlineservice.query_budget import summarize  # noqa: E402
+
+
+def read_samples(path):
+    samples = []
+    with open(path, encoding="utf-8") as log:
+        for line in log:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("logger") == "query_budget":
+                samples.append(record)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--log", type=Path, default=ROOT / "logs" / "query_budget.log",
+                        help="JSON-лог query_budget (default: logs/query_budget.log)")
+    parser.add_argument("--top", type=int, default=20, help="Сколько view показать (default: 20)")
+    args = parser.parse_args()
+    if not args.log.exists():
+        parser.error(f"{args.log} не найден — включите QUERY_BUDGET_ENABLED и пройдитесь по страницам")
+
+    samples = read_samples(args.log)
+    rows = summarize(samples, top=args.top)
+    print(f"{len(samples)} ответов, {len(rows)} view (по максимуму запросов):")
+    print(f"  {'view':<48} {'ответов':>8} {'ср.запр':>8} {'макс':>6} {'ср.БД,мс':>9} {'повтор':>7} {'>бюдж':>6}")
+    for row in rows:
+        print(f"  {row['view']:<48} {row['requests']:>8} {row['avg_queries']:>8} {row['max_queries']:>6} "
+              f"{row['avg_db_ms']:>9} {row['max_repeats']:>7} {row['over_budget']:>6}")
+        if row["max_repeats"] > 1 and row["top_repeated"]:
+            print(f"  {'':<48} ↳ {row['top_repeated'][:110]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,20 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from onlineservice.domain_monitoring import run_certificate_checks  # noqa: E402
+
+# Live certificate check status -> (status, alert_level) as reported by ssl/monitor-ssl-status.sh
+LIVE_CERTIFICATE_STATUSES = {
+    'valid': ('valid', 'none'),
+    'warning': ('expiring_warning', 'warning'),
+    'critical': ('expiring_soon', 'critical'),
+    'expired': ('expired', 'critical'),
+    'error': ('error', 'error'),
+    'unknown': ('error', 'error'),
+}
+
 # Configure logging for SSL events
 class SSLEventLogger:
     """Specialized logger for SSL-related events"""
@@ -94,7 +108,6 @@ class SSLMonitoringSystem:
     def __init__(self):
         self.logger = SSLEventLogger()
         self.domains = self._get_domains()
-        self.scripts_dir = Path('scripts/ssl')
         
         # Monitoring configuration
         self.check_interval = int(os.getenv('SSL_CHECK_INTERVAL', '3600'))  # 1 hour default
@@ -115,47 +128,42 @@ class SSLMonitoringSystem:
         return all_domains
     
     def run_ssl_status_check(self) -> Dict:
-        """Run the existing SSL status monitoring script"""
+        """Check live TLS certificates of all domains concurrently"""
         try:
-            script_path = self.scripts_dir / 'monitor-ssl-status.sh'
-            
-            if not script_path.exists():
-                self.logger.log_ssl_event('SCRIPT_ERROR', 'system', 
-                                        f'SSL monitoring script not found: {script_path}', 'error')
-                return {'error': 'SSL monitoring script not found'}
-            
-            # Run the script in JSON mode
-            result = subprocess.run(
-                [str(script_path), '--json'],
-                capture_output=True,
-                text=True,
-                timeout=300  # 5 minutes timeout
+            certificates = run_certificate_checks(
+                self.domains,
+                warning_days=self.warning_days,
+                critical_days=self.alert_days,
             )
-            
-            if result.returncode == 0:
-                try:
-                    status_data = json.loads(result.stdout)
-                    self.logger.log_ssl_event('SCRIPT_SUCCESS', 'system', 
-                                            'SSL status check completed successfully')
-                    return status_data
-                except json.JSONDecodeError as e:
-                    self.logger.log_ssl_event('SCRIPT_ERROR', 'system', 
-                                            f'Failed to parse SSL script output: {e}', 'error')
-                    return {'error': f'Failed to parse script output: {e}'}
-            else:
-                error_msg = result.stderr or 'Unknown error'
-                self.logger.log_ssl_event('SCRIPT_ERROR', 'system', 
-                                        f'SSL script failed with code {result.returncode}: {error_msg}', 'error')
-                return {'error': f'Script failed: {error_msg}'}
-                
-        except subprocess.TimeoutExpired:
-            self.logger.log_ssl_event('SCRIPT_ERROR', 'system', 
-                                    'SSL monitoring script timed out', 'error')
-            return {'error': 'Script execution timed out'}
         except Exception as e:
             self.logger.log_ssl_event('SCRIPT_ERROR', 'system', 
-                                    f'Failed to run SSL script: {e}', 'error')
-            return {'error': f'Failed to run script: {e}'}
+                                    f'Failed to check SSL certificates: {e}', 'error')
+            return {'error': f'Failed to check certificates: {e}'}
+        
+        status_data = {
+            'timestamp': datetime.now().isoformat(),
+            'domains': []
+        }
+        for domain, certificate in zip(self.domains, certificates):
+            # Keep the status vocabulary of ssl/monitor-ssl-status.sh --json
+            status, alert_level = LIVE_CERTIFICATE_STATUSES[certificate['status']]
+            status_data['domains'].append({
+                'domain': domain,
+                'status': status,
+                'days_until_expiry': certificate['days_until_expiry'],
+                'start_date': certificate['not_before'],
+                'end_date': certificate['not_after'],
+                'subject': certificate['subject'],
+                'issuer': certificate['issuer'],
+                'alert_level': alert_level,
+                'error': certificate['error'],
+            })
+            if certificate['error']:
+                self.logger.log_ssl_event('CERT_CHECK_ERROR', domain, certificate['error'], 'error')
+        
+        self.logger.log_ssl_event('SCRIPT_SUCCESS', 'system', 
+                                'SSL status check completed successfully')
+        return status_data
     
     def check_certificate_renewal_status(self) -> Dict:
         """Check if certificates need renewal"""
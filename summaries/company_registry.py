@@ -0,0 +1,135 @@
+"""
+Справочник страховых компаний в памяти процесса.
+
+Список компаний нужен при каждом сохранении предложения (full_clean проверяет
+название), при каждом создании формы (choices) и при сопоставлении названий
+из ответов страховщиков. Раньше каждый такой вызов шёл в таблицу
+InsuranceCompany, а `constants.INSURANCE_COMPANIES` читал её ещё при импорте —
+до миграций.
+
+CompanyRegistry загружает активные компании одним запросом при первом
+обращении и отдаёт из памяти:
+
+- names — названия в порядке sort_order, name;
+- name_set — для проверки названия;
+- choices — выборы для форм (с пустым значением);
+- lookup() — каноническое название по нормализованному (регистр, пробелы,
+  кавычки, дефисы и точки не учитываются).
+
+Сброс — по post_save/post_delete InsuranceCompany и post_migrate (см.
+signals.py). Изменение внутри транзакции, которая затем откатилась, сигналов
+отката не даёт, поэтому после изменений внутри atomic справочник не кэширует
+загрузки, пока не прочитает таблицу вне транзакции. Другие процессы
+(воркеры gunicorn) сигналов не видят — у них справочник перечитывается не
+реже раза в COMPANY_REGISTRY_TTL секунд. Массовые update()/bulk_create() в обход
+save() сигналов не шлют — после них нужен company_registry.invalidate().
+
+Если таблица недоступна (нет миграций, приложения ещё не готовы),
+используется FALLBACK_INSURANCE_COMPANIES — без кэширования.
+"""
+import logging
+import re
+import threading
+import time
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db import connection
+
+from .constants import FALLBACK_INSURANCE_COMPANIES
+
+logger = logging.getLogger(__name__)
+
+EMPTY_CHOICE = ('', 'Выберите страховщика')
+
+
+def normalize_for_lookup(name):
+    """Ключ для сравнения названий: нижний регистр, один пробел, без кавычек, дефисов и точек."""
+    if not name:
+        return ''
+    normalized = re.sub(r'\s+', ' ', str(name).lower().strip())
+    return re.sub(r'["\'\-\.]', '', normalized)
+
+
+class CompanySnapshot(NamedTuple):
+    names: tuple
+    name_set: frozenset
+    choices: tuple
+    normalized: dict
+
+    @classmethod
+    def build(cls, companies):
+        """companies — пары (name, display_name) в порядке отображения."""
+        names = tuple(name for name, _ in companies)
+        normalized = {}
+        for name in names:
+            normalized.setdefault(normalize_for_lookup(name), name)
+        return cls(
+            names=names,
+            name_set=frozenset(names),
+            choices=(EMPTY_CHOICE,) + tuple((name, display_name or name) for name, display_name in companies),
+            normalized=normalized,
+        )
+
+
+FALLBACK_SNAPSHOT = CompanySnapshot.build([choice for choice in FALLBACK_INSURANCE_COMPANIES if choice[0]])
+
+
+class CompanyRegistry:
+    """Активные страховые компании, загруженные один раз на процесс."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._loaded_at = 0.0
+        # Были изменения внутри транзакции, исход которой неизвестен
+        self._pending_transaction = False
+
+    def invalidate(self):
+        with self._lock:
+            self._snapshot = None
+            if connection.in_atomic_block:
+                self._pending_transaction = True
+
+    def snapshot(self):
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._loaded_at < settings.COMPANY_REGISTRY_TTL:
+            return snapshot
+        with self._lock:
+            if self._snapshot is not None and time.monotonic() - self._loaded_at < settings.COMPANY_REGISTRY_TTL:
+                return self._snapshot
+            try:
+                snapshot = self._load()
+            except Exception as exc:
+                logger.warning('Справочник страховых компаний недоступен, используем резервный список: %s', exc)
+                return FALLBACK_SNAPSHOT
+            if self._pending_transaction and not connection.in_atomic_block:
+                self._pending_transaction = False
+            if not self._pending_transaction:
+                self._snapshot, self._loaded_at = snapshot, time.monotonic()
+            return snapshot
+
+    @staticmethod
+    def _load():
+        from .models import InsuranceCompany
+
+        companies = InsuranceCompany.objects.filter(is_active=True).order_by('sort_order', 'name')
+        return CompanySnapshot.build(list(companies.values_list('name', 'display_name')))
+
+    @property
+    def names(self):
+        return list(self.snapshot().names)
+
+    @property
+    def choices(self):
+        return list(self.snapshot().choices)
+
+    def is_valid(self, name):
+        return bool(name) and name in self.snapshot().name_set
+
+    def lookup(self, name):
+        """Каноническое название компании по нормализованному или None."""
+        return self.snapshot().normalized.get(normalize_for_lookup(name))
+
+
+company_registry = CompanyRegistry()
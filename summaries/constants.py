@@ -30,13 +30,9 @@ def get_company_names():
     Returns:
         list: Список названий компаний
     """
-    try:
-        # Пытаемся получить данные из модели
-        from .models import InsuranceCompany
-        return InsuranceCompany.get_company_names()
-    except (ImportError, Exception):
-        # Если модель недоступна, используем резервный список
-        return [choice[0] for choice in FALLBACK_INSURANCE_COMPANIES if choice[0]]
+    # Справочник в памяти; при недоступной модели отдаёт резервный список
+    from .company_registry import company_registry
+    return company_registry.names
 
 
 def get_company_choices():
@@ -46,17 +42,16 @@ def get_company_choices():
     Returns:
         list: Список кортежей (значение, отображаемое_название)
     """
-    try:
-        # Пытаемся получить данные из модели
-        from .models import InsuranceCompany
-        return InsuranceCompany.get_choices_for_forms()
-    except (ImportError, Exception):
-        # Если модель недоступна, используем резервный список
-        return FALLBACK_INSURANCE_COMPANIES
+    from .company_registry import company_registry
+    return company_registry.choices
 
 
-# Для обратной совместимости
-INSURANCE_COMPANIES = get_company_choices()
+def __getattr__(name):
+    # Для обратной совместимости: INSURANCE_COMPANIES читается при обращении,
+    # а не при импорте модуля (тогда таблица может быть ещё не создана)
+    if name == 'INSURANCE_COMPANIES':
+        return get_company_choices()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
 
 def is_valid_company_name(name):
@@ -69,17 +64,8 @@ def is_valid_company_name(name):
     Returns:
         bool: True если название валидно, False в противном случае
     """
-    if not name:
-        return False
-    
-    try:
-        # Пытаемся использовать модель
-        from .models import InsuranceCompany
-        return InsuranceCompany.is_valid_company_name(name)
-    except (ImportError, Exception):
-        # Если модель недоступна, используем резервный список
-        valid_names = [choice[0] for choice in FALLBACK_INSURANCE_COMPANIES if choice[0]]
-        return name in valid_names
+    from .company_registry import company_registry
+    return company_registry.is_valid(name)
 
 
 def get_matchable_company_names():
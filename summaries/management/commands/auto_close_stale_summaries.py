@@ -5,6 +5,9 @@ Rule:
 - If summary is older than N days (default: 30),
 - And summary is not completed with acceptance,
 - Then move summary to "completed_rejected".
+
+The transition goes through bulk_transition_status, so every closed summary
+gets a StatusEvent row (a plain queryset.update() would bypass the signals).
 """
 
 from datetime import timedelta
@@ -15,6 +18,7 @@ from django.db import transaction
 from django.utils import timezone
 
 from summaries.models import InsuranceSummary
+from summaries.services.status_transitions import bulk_transition_status
 
 
 logger = logging.getLogger(__name__)
@@ -70,11 +74,15 @@ class Command(BaseCommand):
             return
 
         with transaction.atomic():
-            updated_count = stale_summaries.update(
-                status="completed_rejected",
-                selected_company=None,
-                selected_franchise_variant=None,
-                updated_at=now,
+            updated_count = bulk_transition_status(
+                stale_summaries,
+                "completed_rejected",
+                note=f"auto_close_stale_summaries: older than {days} days",
+                extra_updates={
+                    "selected_company": None,
+                    "selected_franchise_variant": None,
+                    "updated_at": now,
+                },
             )
 
         logger.info(
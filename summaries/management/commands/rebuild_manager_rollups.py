@@ -0,0 +1,90 @@
+"""
+Management command to backfill and reconcile manager analytics rollups.
+
+Daily ManagerDailyRollup rows are maintained incrementally by signals; this
+command rebuilds them for a date range (default: whole history) and, with
+--reconcile, rewrites only buckets that drifted from the raw data
+(e.g. after queryset.update() calls that bypass signals).
+"""
+
+from datetime import datetime
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+
+from summaries.services.analytics_rollups import rebuild_rollups
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Backfill or reconcile daily manager analytics rollups (ManagerDailyRollup)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--start",
+            help="First day to rebuild, YYYY-MM-DD (default: first request).",
+        )
+        parser.add_argument(
+            "--end",
+            help="Last day to rebuild, YYYY-MM-DD (default: last request).",
+        )
+        parser.add_argument(
+            "--reconcile",
+            action="store_true",
+            help="Only rewrite buckets that differ from the raw data.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report how many buckets would change without writing.",
+        )
+        parser.add_argument(
+            "--chunk-days",
+            type=int,
+            default=31,
+            help="Days loaded per query window (default: 31).",
+        )
+
+    def _parse_day(self, value, name):
+        if not value:
+            return None
+        try:
+            return datetime.strptime(value, "%Y-%m-%d").date()
+        except ValueError as exc:
+            raise CommandError(f"--{name} must be in YYYY-MM-DD format") from exc
+
+    def handle(self, *args, **options):
+        start = self._parse_day(options["start"], "start")
+        end = self._parse_day(options["end"], "end")
+        if start and end and start > end:
+            raise CommandError("--start must not be later than --end")
+        if options["chunk_days"] <= 0:
+            raise CommandError("--chunk-days must be a positive integer")
+
+        stats = rebuild_rollups(
+            start,
+            end,
+            reconcile=options["reconcile"],
+            dry_run=options["dry_run"],
+            chunk_days=options["chunk_days"],
+        )
+
+        logger.info(
+            "Manager rollups rebuilt: buckets=%s rows=%s changed=%s reconcile=%s dry_run=%s",
+            stats["buckets"],
+            stats["rows"],
+            stats["changed"],
+            options["reconcile"],
+            options["dry_run"],
+        )
+
+        message = (
+            f"Buckets scanned: {stats['buckets']}, rows: {stats['rows']}, "
+            f"changed: {stats['changed']}."
+        )
+        if options["dry_run"]:
+            self.stdout.write(self.style.WARNING(f"Dry-run mode: {message}"))
+        else:
+            self.stdout.write(self.style.SUCCESS(message))
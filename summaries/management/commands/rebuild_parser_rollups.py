@@ -0,0 +1,66 @@
+"""
+Management command to backfill parser quality rollups.
+
+Daily ParserDailyRollup / ParserFieldEditDailyRollup rows are maintained
+incrementally when V2 requests are created or saved; this command rebuilds
+them for a date range (default: whole V2 history), e.g. before enabling
+PARSER_EDITS_USE_ROLLUPS or after RequestFieldEdit rows were changed directly.
+"""
+
+from datetime import datetime
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+
+from summaries.services.analytics_parser_rollups import rebuild_rollups
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Backfill daily parser quality rollups (ParserDailyRollup, ParserFieldEditDailyRollup)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--start",
+            help="First day to rebuild, YYYY-MM-DD (default: first V2 request).",
+        )
+        parser.add_argument(
+            "--end",
+            help="Last day to rebuild, YYYY-MM-DD (default: last V2 request).",
+        )
+        parser.add_argument(
+            "--chunk-days",
+            type=int,
+            default=31,
+            help="Days loaded per query window (default: 31).",
+        )
+
+    def _parse_day(self, value, name):
+        if not value:
+            return None
+        try:
+            return datetime.strptime(value, "%Y-%m-%d").date()
+        except ValueError as exc:
+            raise CommandError(f"--{name} must be in YYYY-MM-DD format") from exc
+
+    def handle(self, *args, **options):
+        start = self._parse_day(options["start"], "start")
+        end = self._parse_day(options["end"], "end")
+        if start and end and start > end:
+            raise CommandError("--start must not be later than --end")
+        if options["chunk_days"] <= 0:
+            raise CommandError("--chunk-days must be a positive integer")
+
+        stats = rebuild_rollups(start, end, chunk_days=options["chunk_days"])
+
+        logger.info(
+            "Parser rollups rebuilt: days=%s rows=%s removed=%s",
+            stats["days"],
+            stats["rows"],
+            stats["removed"],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Days scanned: {stats['days']}, rows: {stats['rows']}, replaced: {stats['removed']}."
+        ))
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:38
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('summaries', '0017_statusevent_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ManagerDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День')),
+                ('branch', models.CharField(blank=True, default='', max_length=255, verbose_name='Филиал')),
+                ('insurance_type', models.CharField(blank=True, default='', max_length=100, verbose_name='Тип страхования')),
+                ('deal_status', models.CharField(blank=True, default='', max_length=32, verbose_name='Статус сделки')),
+                ('requests_count', models.PositiveIntegerField(default=0, verbose_name='Заявок')),
+                ('summaries_count', models.PositiveIntegerField(default=0, verbose_name='Сводов')),
+                ('accepted_count', models.PositiveIntegerField(default=0, verbose_name='Акцептов')),
+                ('rejected_count', models.PositiveIntegerField(default=0, verbose_name='Отказов')),
+                ('active_requests_count', models.PositiveIntegerField(default=0, verbose_name='Активных заявок')),
+                ('active_summaries_count', models.PositiveIntegerField(default=0, verbose_name='Активных сводов')),
+                ('premium_total', models.DecimalField(decimal_places=2, default=0, max_digits=17, verbose_name='Σ премий')),
+                ('sum_total', models.DecimalField(decimal_places=2, default=0, max_digits=17, verbose_name='Σ страховых сумм')),
+                ('time_to_totals', models.JSONField(blank=True, default=dict, verbose_name='Суммы time-to-*')),
+                ('cycle_histogram', models.JSONField(blank=True, default=list, verbose_name='Гистограмма цикла')),
+                ('base_filled', models.PositiveIntegerField(default=0)),
+                ('base_total', models.PositiveIntegerField(default=0)),
+                ('casco_filled', models.PositiveIntegerField(default=0)),
+                ('casco_total', models.PositiveIntegerField(default=0)),
+                ('property_filled', models.PositiveIntegerField(default=0)),
+                ('property_total', models.PositiveIntegerField(default=0)),
+                ('inn_invalid_count', models.PositiveIntegerField(default=0)),
+                ('other_type_count', models.PositiveIntegerField(default=0)),
+                ('edited_count', models.PositiveIntegerField(default=0)),
+                ('prolongation_count', models.PositiveIntegerField(default=0)),
+                ('flag_counts', models.JSONField(blank=True, default=dict, verbose_name='Счётчики флагов')),
+                ('late_count', models.PositiveIntegerField(default=0)),
+                ('weekend_count', models.PositiveIntegerField(default=0)),
+                ('first_request_at', models.DateTimeField(blank=True, null=True, verbose_name='Первая заявка')),
+                ('last_request_at', models.DateTimeField(blank=True, null=True, verbose_name='Последняя заявка')),
+                ('refreshed_at', models.DateTimeField(auto_now=True, verbose_name='Пересчитано')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='manager_daily_rollups', to=settings.AUTH_USER_MODEL, verbose_name='Сотрудник')),
+            ],
+            options={
+                'verbose_name': 'Дневной агрегат по сотруднику',
+                'verbose_name_plural': 'Дневные агрегаты по сотрудникам',
+                'ordering': ['-day'],
+                'indexes': [models.Index(fields=['day', 'user'], name='summaries_m_day_1b50e6_idx'), models.Index(fields=['user', 'day'], name='summaries_m_user_id_7dd422_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 4.2.7 on 2026-10-18 22:46
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('summaries', '0018_manager_daily_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParserFieldEditDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День')),
+                ('parser_version', models.CharField(blank=True, default='', max_length=32, verbose_name='Версия парсера')),
+                ('application_format', models.CharField(blank=True, default='', max_length=32, verbose_name='Формат заявки')),
+                ('application_type', models.CharField(blank=True, default='', max_length=32, verbose_name='Тип страхователя')),
+                ('branch', models.CharField(blank=True, default='', max_length=255, verbose_name='Филиал')),
+                ('scope', models.CharField(max_length=10, verbose_name='Область')),
+                ('field_name', models.CharField(max_length=100, verbose_name='Поле')),
+                ('field_label', models.CharField(blank=True, default='', max_length=255, verbose_name='Подпись поля')),
+                ('edit_type', models.CharField(max_length=10, verbose_name='Тип правки')),
+                ('edits_count', models.PositiveIntegerField(default=0, verbose_name='Правок')),
+                ('requests_count', models.PositiveIntegerField(default=0, verbose_name='Заявок')),
+                ('refreshed_at', models.DateTimeField(auto_now=True, verbose_name='Пересчитано')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Сотрудник')),
+            ],
+            options={
+                'verbose_name': 'Дневной агрегат правок по полю',
+                'verbose_name_plural': 'Дневные агрегаты правок по полям',
+                'ordering': ['-day'],
+                'indexes': [models.Index(fields=['day', 'user'], name='summaries_p_day_d784e5_idx'), models.Index(fields=['field_name', 'day'], name='summaries_p_field_n_466c7c_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ParserDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День')),
+                ('parser_version', models.CharField(blank=True, default='', max_length=32, verbose_name='Версия парсера')),
+                ('application_format', models.CharField(blank=True, default='', max_length=32, verbose_name='Формат заявки')),
+                ('application_type', models.CharField(blank=True, default='', max_length=32, verbose_name='Тип страхователя')),
+                ('branch', models.CharField(blank=True, default='', max_length=255, verbose_name='Филиал')),
+                ('requests_count', models.PositiveIntegerField(default=0, verbose_name='V2-заявок')),
+                ('with_edits_count', models.PositiveIntegerField(default=0, verbose_name='Заявок с правками')),
+                ('edited_requests_count', models.PositiveIntegerField(default=0, verbose_name='Заявок со строками правок')),
+                ('edits_total', models.PositiveIntegerField(default=0, verbose_name='Σ правок на входе')),
+                ('confidence_sum', models.FloatField(default=0, verbose_name='Σ уверенности')),
+                ('confidence_with_edits_sum', models.FloatField(default=0, verbose_name='Σ уверенности (с правками)')),
+                ('refreshed_at', models.DateTimeField(auto_now=True, verbose_name='Пересчитано')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Сотрудник')),
+            ],
+            options={
+                'verbose_name': 'Дневной агрегат качества парсера',
+                'verbose_name_plural': 'Дневные агрегаты качества парсера',
+                'ordering': ['-day'],
+                'indexes': [models.Index(fields=['day', 'user'], name='summaries_p_day_bada1f_idx'), models.Index(fields=['parser_version', 'day'], name='summaries_p_parser__459e0b_idx')],
+            },
+        ),
+    ]
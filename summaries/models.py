@@ -4,6 +4,7 @@ from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ValidationError
 from insurance_requests.models import InsuranceRequest
+from .offer_matrix import OfferMatrix
 from decimal import Decimal
 
 
@@ -81,22 +82,20 @@ class InsuranceCompany(models.Model):
     @classmethod
     def get_choices_for_forms(cls):
         """Возвращает список выборов для использования в формах"""
-        companies = cls.objects.filter(is_active=True).order_by('sort_order', 'name')
-        choices = [('', 'Выберите страховщика')]
-        choices.extend([(company.name, company.display_name) for company in companies])
-        return choices
+        from .company_registry import company_registry
+        return company_registry.choices
     
     @classmethod
     def get_company_names(cls):
         """Возвращает список названий активных компаний"""
-        return list(cls.objects.filter(is_active=True).values_list('name', flat=True))
+        from .company_registry import company_registry
+        return company_registry.names
     
     @classmethod
     def is_valid_company_name(cls, name):
         """Проверяет, является ли название компании валидным"""
-        if not name:
-            return False
-        return cls.objects.filter(name=name, is_active=True).exists()
+        from .company_registry import company_registry
+        return company_registry.is_valid(name)
 
 
 class InsuranceSummary(models.Model):
@@ -203,88 +202,51 @@ class InsuranceSummary(models.Model):
                 return choice_display
         return self.status
     
+    def get_offer_matrix(self):
+        """Матрица валидных предложений свода (OfferMatrix).
+
+        Если offers загружены через prefetch_related('offers'), матрица строится из
+        них без запросов и переиспользуется, пока жив этот prefetch-кэш; иначе —
+        один запрос на каждый вызов, как у прежних методов.
+        """
+        prefetched = getattr(self, '_prefetched_objects_cache', {}).get('offers')
+        if prefetched is None:
+            return OfferMatrix(self.offers.filter(is_valid=True))
+
+        source = prefetched._result_cache
+        cached = getattr(self, '_offer_matrix_cache', None)
+        if cached is None or cached[0] is not source:
+            cached = (source, OfferMatrix(offer for offer in prefetched if offer.is_valid))
+            self._offer_matrix_cache = cached
+        return cached[1]
+
     def get_offers_by_year(self, year=1):
         """Получает предложения для конкретного года страхования"""
         return self.offers.filter(insurance_year=year, is_valid=True)
     
     def get_companies_with_years(self):
         """Возвращает словарь компаний с их предложениями по годам"""
-        companies = {}
-        for offer in self.offers.filter(is_valid=True):
-            if offer.company_name not in companies:
-                companies[offer.company_name] = {}
-            companies[offer.company_name][offer.insurance_year] = offer
-        return companies
+        return self.get_offer_matrix().companies_with_years()
     
     def get_offers_grouped_by_company(self):
         """Returns offers organized by company with year breakdown and proper sorting"""
-        companies = {}
-        
-        # Group offers by company
-        for offer in self.offers.filter(is_valid=True).select_related():
-            company_name = offer.company_name
-            if company_name not in companies:
-                companies[company_name] = []
-            companies[company_name].append(offer)
-        
-        # Sort companies alphabetically and years numerically within each company
-        sorted_companies = {}
-        for company_name in sorted(companies.keys()):
-            # Sort offers by year number within each company
-            sorted_offers = sorted(companies[company_name], key=lambda x: x.get_year_number())
-            sorted_companies[company_name] = sorted_offers
-            
-        return sorted_companies
+        return self.get_offer_matrix().grouped_by_company()
     
     def get_company_year_matrix(self):
         """Returns structured data for template rendering with company-year organization"""
-        companies_data = {}
-        
-        # Get grouped offers
-        grouped_offers = self.get_offers_grouped_by_company()
-        
-        # Structure data for template consumption
-        for company_name, offers in grouped_offers.items():
-            companies_data[company_name] = {
-                'name': company_name,
-                'years': {},
-                'offer_count': len(offers)
-            }
-            
-            # Organize offers by year within company
-            for offer in offers:
-                year_key = offer.get_insurance_year_display()
-                companies_data[company_name]['years'][year_key] = {
-                    'offer': offer,
-                    'year_number': offer.get_year_number(),
-                    'insurance_sum': offer.insurance_sum,
-                    'franchise_1': offer.get_franchise_display_variant1(),
-                    'premium_1': offer.get_premium_with_franchise1(),
-                    'franchise_2': offer.get_franchise_display_variant2(), 
-                    'premium_2': offer.get_premium_with_franchise2()
-                }
-        
-        return companies_data
+        return self.get_offer_matrix().company_year_matrix()
     
     def get_unique_companies_count(self):
         """Возвращает количество уникальных компаний в своде"""
-        return self.offers.filter(is_valid=True).values('company_name').distinct().count()
+        return self.get_offer_matrix().companies_count()
     
     def get_companies_with_year_counts(self):
         """Возвращает словарь компаний с количеством лет страхования"""
-        companies = {}
-        for offer in self.offers.filter(is_valid=True):
-            if offer.company_name not in companies:
-                companies[offer.company_name] = 0
-            companies[offer.company_name] += 1
-        return companies
+        return self.get_offer_matrix().year_counts()
     
     def get_unique_companies_list(self):
         """Возвращает список уникальных названий компаний (без дублирования для многолетних предложений)"""
-        # Используем set() для гарантированной уникальности названий компаний
-        # Это важно для многолетних предложений - одна компания должна быть в списке только один раз
-        companies = set(self.offers.filter(is_valid=True).values_list('company_name', flat=True))
-        return sorted(list(companies))
+        return self.get_offer_matrix().company_names
     
     def get_companies_choices(self):
         """Возвращает список выборов компаний для формы (только компании из предложений свода)"""
@@ -294,33 +256,8 @@ class InsuranceSummary(models.Model):
 
     def get_company_available_variants(self, company_name):
         """Возвращает список доступных вариантов франшизы для выбранной компании"""
-        if not company_name:
-            return []
-        
-        company_offers = self.offers.filter(is_valid=True, company_name=company_name)
-        offers_count = company_offers.count()
-        if offers_count == 0:
-            return []
-        
         # Вариант доступен, если для всех лет выбранной компании есть валидная премия по этому варианту
-        variant_1_count = company_offers.exclude(
-            premium_with_franchise_1__isnull=True
-        ).exclude(
-            premium_with_franchise_1__lte=0
-        ).count()
-        variant_2_count = company_offers.exclude(
-            premium_with_franchise_2__isnull=True
-        ).exclude(
-            premium_with_franchise_2__lte=0
-        ).count()
-        
-        available_variants = []
-        if variant_1_count == offers_count:
-            available_variants.append(1)
-        if variant_2_count == offers_count:
-            available_variants.append(2)
-        
-        return available_variants
+        return self.get_offer_matrix().available_variants(company_name)
 
     def requires_variant_choice(self, company_name):
         """Определяет, требуется ли ручной выбор варианта (когда доступны оба варианта)"""
@@ -340,30 +277,7 @@ class InsuranceSummary(models.Model):
     
     def get_companies_summary_data(self):
         """Возвращает сводные данные о компаниях для отображения в интерфейсе"""
-        companies_data = {}
-        for offer in self.offers.filter(is_valid=True):
-            company_name = offer.company_name
-            if company_name not in companies_data:
-                companies_data[company_name] = {
-                    'name': company_name,
-                    'years_count': 0,
-                    'years': [],
-                    'min_premium': None,
-                    'max_premium': None,
-                }
-            
-            company_data = companies_data[company_name]
-            company_data['years_count'] += 1
-            company_data['years'].append(offer.insurance_year)
-            
-            # Обновляем минимальную и максимальную премии
-            premium = offer.premium_with_franchise_1 or 0
-            if company_data['min_premium'] is None or premium < company_data['min_premium']:
-                company_data['min_premium'] = premium
-            if company_data['max_premium'] is None or premium > company_data['max_premium']:
-                company_data['max_premium'] = premium
-        
-        return companies_data
+        return self.get_offer_matrix().summary_data()
     
     def get_status_display_with_color(self):
         """Возвращает статус с соответствующим цветом для Bootstrap"""
@@ -371,49 +285,12 @@ class InsuranceSummary(models.Model):
         return get_status_display_data(self.status, self.get_status_display())
     
     def get_company_notes(self):
-        """Возвращает комментарии, сгруппированные по компаниям"""
-        company_notes = {}
-        for offer in self.offers.filter(is_valid=True, notes__isnull=False).exclude(notes=''):
-            company_name = offer.company_name
-            if company_name not in company_notes:
-                company_notes[company_name] = []
-            if offer.notes.strip():
-                company_notes[company_name].append(offer.notes.strip())
-        
-        # Объединяем комментарии от разных лет для каждой компании
-        for company_name in company_notes:
-            # Удаляем дубликаты, сохраняя порядок
-            unique_notes = []
-            for note in company_notes[company_name]:
-                if note not in unique_notes:
-                    unique_notes.append(note)
-            company_notes[company_name] = unique_notes
-        
-        return company_notes
+        """Возвращает комментарии, сгруппированные по компаниям (без дубликатов, с сохранением порядка)"""
+        return self.get_offer_matrix().notes()
     
     def get_company_totals(self):
         """Возвращает итоговые суммы по компаниям для многолетних предложений"""
-        companies_data = {}
-        
-        for offer in self.offers.filter(is_valid=True).order_by('company_name', 'insurance_year'):
-            company_name = offer.company_name
-            if company_name not in companies_data:
-                companies_data[company_name] = {
-                    'offers': [],
-                    'total_premium_1': Decimal('0'),
-                    'total_premium_2': Decimal('0'),
-                    'is_multiyear': False
-                }
-            
-            companies_data[company_name]['offers'].append(offer)
-            companies_data[company_name]['total_premium_1'] += offer.premium_with_franchise_1 or Decimal('0')
-            companies_data[company_name]['total_premium_2'] += offer.premium_with_franchise_2 or Decimal('0')
-        
-        # Определяем многолетние предложения (более одного года)
-        for company_name, data in companies_data.items():
-            data['is_multiyear'] = len(data['offers']) > 1
-        
-        return companies_data
+        return self.get_offer_matrix().totals()
 
 
 class InsuranceOffer(models.Model):
@@ -773,3 +650,163 @@ class StatusEvent(models.Model):
 
     def __str__(self):
         return f'{self.content_type} #{self.object_id}: {self.from_status or "—"} → {self.to_status}'
+
+
+class ManagerDailyRollup(models.Model):
+    """Дневной агрегат аналитики сотрудников.
+
+    Одна строка — заявки, созданные сотрудником за локальный день, в разрезе
+    филиала, типа страхования и статуса сделки (те же измерения, что и фильтры
+    дашборда). Поддерживается инкрементально сигналами сохранения заявок,
+    сводов и предложений (см. summaries.services.analytics_rollups), полная
+    пересборка/сверка — командой rebuild_manager_rollups.
+    """
+
+    day = models.DateField(verbose_name='День')
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='manager_daily_rollups',
+        verbose_name='Сотрудник',
+    )
+    branch = models.CharField(max_length=255, blank=True, default='', verbose_name='Филиал')
+    insurance_type = models.CharField(max_length=100, blank=True, default='', verbose_name='Тип страхования')
+    deal_status = models.CharField(max_length=32, blank=True, default='', verbose_name='Статус сделки')
+
+    requests_count = models.PositiveIntegerField(default=0, verbose_name='Заявок')
+    summaries_count = models.PositiveIntegerField(default=0, verbose_name='Сводов')
+    accepted_count = models.PositiveIntegerField(default=0, verbose_name='Акцептов')
+    rejected_count = models.PositiveIntegerField(default=0, verbose_name='Отказов')
+    active_requests_count = models.PositiveIntegerField(default=0, verbose_name='Активных заявок')
+    active_summaries_count = models.PositiveIntegerField(default=0, verbose_name='Активных сводов')
+    premium_total = models.DecimalField(max_digits=17, decimal_places=2, default=0, verbose_name='Σ премий')
+    sum_total = models.DecimalField(max_digits=17, decimal_places=2, default=0, verbose_name='Σ страховых сумм')
+
+    # {метрика time-to-*: [сумма часов, количество]} — для средних без сырых строк
+    time_to_totals = models.JSONField(default=dict, blank=True, verbose_name='Суммы time-to-*')
+    # Счётчики по корзинам CYCLE_HISTOGRAM_EDGES_HOURS (последняя — открытая)
+    cycle_histogram = models.JSONField(default=list, blank=True, verbose_name='Гистограмма цикла')
+
+    base_filled = models.PositiveIntegerField(default=0)
+    base_total = models.PositiveIntegerField(default=0)
+    casco_filled = models.PositiveIntegerField(default=0)
+    casco_total = models.PositiveIntegerField(default=0)
+    property_filled = models.PositiveIntegerField(default=0)
+    property_total = models.PositiveIntegerField(default=0)
+    inn_invalid_count = models.PositiveIntegerField(default=0)
+    other_type_count = models.PositiveIntegerField(default=0)
+    edited_count = models.PositiveIntegerField(default=0)
+    prolongation_count = models.PositiveIntegerField(default=0)
+    flag_counts = models.JSONField(default=dict, blank=True, verbose_name='Счётчики флагов')
+    late_count = models.PositiveIntegerField(default=0)
+    weekend_count = models.PositiveIntegerField(default=0)
+
+    first_request_at = models.DateTimeField(null=True, blank=True, verbose_name='Первая заявка')
+    last_request_at = models.DateTimeField(null=True, blank=True, verbose_name='Последняя заявка')
+    refreshed_at = models.DateTimeField(auto_now=True, verbose_name='Пересчитано')
+
+    class Meta:
+        verbose_name = 'Дневной агрегат по сотруднику'
+        verbose_name_plural = 'Дневные агрегаты по сотрудникам'
+        ordering = ['-day']
+        indexes = [
+            models.Index(fields=['day', 'user']),
+            models.Index(fields=['user', 'day']),
+        ]
+
+    def __str__(self):
+        return f'{self.day} · {self.user_id or "—"} · {self.requests_count}'
+
+
+class ParserDailyRollup(models.Model):
+    """Дневной агрегат качества парсера V2 по заявкам.
+
+    Одна строка — V2-заявки (parser_confidence проставлен), созданные
+    сотрудником за локальный день, в разрезе версии парсера, шаблона заявки
+    (формат/тип) и филиала. Вместе с ParserFieldEditDailyRollup заменяет
+    дашборду правок сырые заявки и RequestFieldEdit. Поддерживается
+    инкрементально (см. summaries.services.analytics_parser_rollups), полная
+    пересборка — командой rebuild_parser_rollups.
+    """
+
+    day = models.DateField(verbose_name='День')
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Сотрудник',
+    )
+    parser_version = models.CharField(max_length=32, blank=True, default='', verbose_name='Версия парсера')
+    application_format = models.CharField(max_length=32, blank=True, default='', verbose_name='Формат заявки')
+    application_type = models.CharField(max_length=32, blank=True, default='', verbose_name='Тип страхователя')
+    branch = models.CharField(max_length=255, blank=True, default='', verbose_name='Филиал')
+
+    requests_count = models.PositiveIntegerField(default=0, verbose_name='V2-заявок')
+    with_edits_count = models.PositiveIntegerField(default=0, verbose_name='Заявок с правками')
+    # Заявки со строками RequestFieldEdit (для разбивки правок по филиалам)
+    edited_requests_count = models.PositiveIntegerField(default=0, verbose_name='Заявок со строками правок')
+    edits_total = models.PositiveIntegerField(default=0, verbose_name='Σ правок на входе')
+    # Суммы уверенности — для средних без сырых строк
+    confidence_sum = models.FloatField(default=0, verbose_name='Σ уверенности')
+    confidence_with_edits_sum = models.FloatField(default=0, verbose_name='Σ уверенности (с правками)')
+
+    refreshed_at = models.DateTimeField(auto_now=True, verbose_name='Пересчитано')
+
+    class Meta:
+        verbose_name = 'Дневной агрегат качества парсера'
+        verbose_name_plural = 'Дневные агрегаты качества парсера'
+        ordering = ['-day']
+        indexes = [
+            models.Index(fields=['day', 'user']),
+            models.Index(fields=['parser_version', 'day']),
+        ]
+
+    def __str__(self):
+        return f'{self.day} · {self.parser_version or "—"} · {self.requests_count}'
+
+
+class ParserFieldEditDailyRollup(models.Model):
+    """Дневной агрегат правок распознавания по полям.
+
+    Измерения заявки — те же, что у ParserDailyRollup, плюс поле, область и
+    тип правки из RequestFieldEdit.
+    """
+
+    day = models.DateField(verbose_name='День')
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Сотрудник',
+    )
+    parser_version = models.CharField(max_length=32, blank=True, default='', verbose_name='Версия парсера')
+    application_format = models.CharField(max_length=32, blank=True, default='', verbose_name='Формат заявки')
+    application_type = models.CharField(max_length=32, blank=True, default='', verbose_name='Тип страхователя')
+    branch = models.CharField(max_length=255, blank=True, default='', verbose_name='Филиал')
+    scope = models.CharField(max_length=10, verbose_name='Область')
+    field_name = models.CharField(max_length=100, verbose_name='Поле')
+    field_label = models.CharField(max_length=255, blank=True, default='', verbose_name='Подпись поля')
+    edit_type = models.CharField(max_length=10, verbose_name='Тип правки')
+
+    edits_count = models.PositiveIntegerField(default=0, verbose_name='Правок')
+    requests_count = models.PositiveIntegerField(default=0, verbose_name='Заявок')
+
+    refreshed_at = models.DateTimeField(auto_now=True, verbose_name='Пересчитано')
+
+    class Meta:
+        verbose_name = 'Дневной агрегат правок по полю'
+        verbose_name_plural = 'Дневные агрегаты правок по полям'
+        ordering = ['-day']
+        indexes = [
+            models.Index(fields=['day', 'user']),
+            models.Index(fields=['field_name', 'day']),
+        ]
+
+    def __str__(self):
+        return f'{self.day} · {self.field_name} · {self.edits_count}'
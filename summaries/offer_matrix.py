@@ -0,0 +1,154 @@
+"""
+Матрица предложений свода: компании × годы, собранная один раз из списка предложений.
+
+Страница свода раньше получала группировки, итоги, комментарии и доступные
+варианты франшизы отдельными запросами (`self.offers.filter(...)` в каждом
+методе модели, по три COUNT на компанию для вариантов). OfferMatrix строится из
+одного списка валидных предложений и отвечает на все эти вопросы в памяти;
+методы InsuranceSummary делегируют ей (см. InsuranceSummary.get_offer_matrix).
+
+Порядок исходного списка сохраняется там, где от него зависел результат
+(порядок компаний в словарях, порядок комментариев) — это порядок Meta.ordering
+модели InsuranceOffer, как и у прежних запросов.
+"""
+from decimal import Decimal
+
+
+class OfferMatrix:
+    """Валидные предложения свода, сгруппированные по компаниям и годам."""
+
+    def __init__(self, offers):
+        self.offers = list(offers)
+        self._by_company = {}
+        for offer in self.offers:
+            self._by_company.setdefault(offer.company_name, []).append(offer)
+
+    def __len__(self):
+        return len(self.offers)
+
+    def __bool__(self):
+        return bool(self.offers)
+
+    @property
+    def company_names(self):
+        """Названия компаний по алфавиту."""
+        return sorted(self._by_company)
+
+    def company_offers(self, company_name):
+        return self._by_company.get(company_name, [])
+
+    def ordered_offers(self):
+        """Предложения по компании и году (как order_by('company_name', 'insurance_year'))."""
+        return sorted(self.offers, key=lambda offer: (offer.company_name, offer.insurance_year))
+
+    def offers_by_year(self, year):
+        return [offer for offer in self.offers if offer.insurance_year == year]
+
+    def companies_with_years(self):
+        """{компания: {год: предложение}}"""
+        return {
+            company_name: {offer.insurance_year: offer for offer in offers}
+            for company_name, offers in self._by_company.items()
+        }
+
+    def grouped_by_company(self):
+        """{компания: [предложения по годам]}, компании по алфавиту."""
+        return {
+            company_name: sorted(self._by_company[company_name], key=lambda offer: offer.get_year_number())
+            for company_name in self.company_names
+        }
+
+    def company_year_matrix(self):
+        """Данные для шаблона: компания → годы с франшизами и премиями."""
+        companies_data = {}
+        for company_name, offers in self.grouped_by_company().items():
+            companies_data[company_name] = {
+                'name': company_name,
+                'years': {},
+                'offer_count': len(offers)
+            }
+            for offer in offers:
+                companies_data[company_name]['years'][offer.get_insurance_year_display()] = {
+                    'offer': offer,
+                    'year_number': offer.get_year_number(),
+                    'insurance_sum': offer.insurance_sum,
+                    'franchise_1': offer.get_franchise_display_variant1(),
+                    'premium_1': offer.get_premium_with_franchise1(),
+                    'franchise_2': offer.get_franchise_display_variant2(),
+                    'premium_2': offer.get_premium_with_franchise2()
+                }
+        return companies_data
+
+    def companies_count(self):
+        return len(self._by_company)
+
+    def year_counts(self):
+        """{компания: количество лет}"""
+        return {company_name: len(offers) for company_name, offers in self._by_company.items()}
+
+    def available_variants(self, company_name):
+        """Варианты франшизы, по которым у компании есть положительная премия за все годы."""
+        offers = self._by_company.get(company_name) if company_name else None
+        if not offers:
+            return []
+        available_variants = []
+        if all(offer.premium_with_franchise_1 is not None and offer.premium_with_franchise_1 > 0 for offer in offers):
+            available_variants.append(1)
+        if all(offer.premium_with_franchise_2 is not None and offer.premium_with_franchise_2 > 0 for offer in offers):
+            available_variants.append(2)
+        return available_variants
+
+    def variant_requirements(self):
+        """{компания: available_variants / requires_choice / default_variant} для всех компаний."""
+        requirements = {}
+        for company_name in self.company_names:
+            variants = self.available_variants(company_name)
+            requirements[company_name] = {
+                'available_variants': variants,
+                'requires_choice': len(variants) > 1,
+                'default_variant': variants[0] if len(variants) == 1 else None,
+            }
+        return requirements
+
+    def summary_data(self):
+        """Сводка по компаниям: годы, минимальная и максимальная премия по варианту 1."""
+        companies_data = {}
+        for company_name, offers in self._by_company.items():
+            premiums = [offer.premium_with_franchise_1 or 0 for offer in offers]
+            companies_data[company_name] = {
+                'name': company_name,
+                'years_count': len(offers),
+                'years': [offer.insurance_year for offer in offers],
+                'min_premium': min(premiums),
+                'max_premium': max(premiums),
+            }
+        return companies_data
+
+    def notes(self):
+        """{компания: [уникальные комментарии в исходном порядке]}; компании без комментариев не попадают."""
+        company_notes = {}
+        for offer in self.offers:
+            if not offer.notes:
+                continue
+            notes = company_notes.setdefault(offer.company_name, [])
+            note = offer.notes.strip()
+            if note and note not in notes:
+                notes.append(note)
+        return company_notes
+
+    def totals(self):
+        """Итоговые премии по компаниям для многолетних предложений."""
+        companies_data = {}
+        for offer in self.ordered_offers():
+            data = companies_data.setdefault(offer.company_name, {
+                'offers': [],
+                'total_premium_1': Decimal('0'),
+                'total_premium_2': Decimal('0'),
+                'is_multiyear': False
+            })
+            data['offers'].append(offer)
+            data['total_premium_1'] += offer.premium_with_franchise_1 or Decimal('0')
+            data['total_premium_2'] += offer.premium_with_franchise_2 or Decimal('0')
+        for data in companies_data.values():
+            data['is_multiyear'] = len(data['offers']) > 1
+        return companies_data
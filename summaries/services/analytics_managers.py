@@ -11,18 +11,21 @@ Phase 2: качество данных, портфель, heatmap-связи, а
 from __future__ import annotations
 
 import json
+from bisect import bisect_left
 from collections import defaultdict
 from datetime import date, datetime, timedelta
 from decimal import Decimal
 from statistics import median
 from typing import Any, Iterable
 
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.db.models import Count, Q, QuerySet
+from django.db.models import Count, Exists, Max, Min, OuterRef, Q, QuerySet, Sum
 from django.utils import timezone
 
-from insurance_requests.models import InsuranceRequest
-from ..models import InsuranceSummary
+from insurance_requests.models import FieldChange, InsuranceRequest
+from ..models import InsuranceSummary, ManagerDailyRollup
+from .analytics_stats import percentile
 
 # --- Константы --------------------------------------------------------------
 
@@ -73,6 +76,14 @@ COMPLETENESS_FIELD_FALLBACKS = {
     'asset_status': ('condition_label', 'condition'),
 }
 
+# Границы корзин гистограммы полного цикла (часы) в дневных rollup’ах:
+# сутки, 3 дня, неделя, 2 недели, месяц, 2 месяца, квартал, полгода, далее — открытая.
+CYCLE_HISTOGRAM_EDGES_HOURS = (24, 72, 168, 336, 720, 1440, 2160, 4320)
+TIME_TO_KEYS = (
+    'upload_to_summary_h', 'summary_to_first_offer_h',
+    'summary_to_sent_h', 'sent_to_completed_h', 'total_cycle_h',
+)
+
 HEATMAP_TOP_LIMIT = 8  # сколько значений измерения показывать в heatmap’е
 HEATMAP_OUTLIER_LIMIT = 50
 
@@ -213,18 +224,71 @@ def _median(values: Iterable[float | None]) -> float | None:
     return float(median(cleaned))
 
 
-def _percentile(values: list[float], q: float) -> float | None:
-    """Линейная интерполяция p-квантили. q ∈ [0, 1]."""
-    if not values:
+# --- Дневные rollup’ы ---------------------------------------------------------
+
+
+def use_rollups() -> bool:
+    """Читать метрики из ManagerDailyRollup вместо сырых заявок/сводов.
+
+    Включается настройкой MANAGER_ANALYTICS_USE_ROLLUPS после первичного
+    заполнения командой rebuild_manager_rollups.
+    """
+    return bool(getattr(settings, 'MANAGER_ANALYTICS_USE_ROLLUPS', False))
+
+
+def _build_rollup_qs(filters: dict) -> QuerySet:
+    """Аналог _build_request_qs поверх дневных агрегатов."""
+    qs = ManagerDailyRollup.objects.all()
+    if filters['start_date']:
+        qs = qs.filter(day__gte=filters['start_date'])
+    if filters['end_date']:
+        qs = qs.filter(day__lte=filters['end_date'])
+    if filters['branch']:
+        qs = qs.filter(branch=filters['branch'])
+    if filters['insurance_type']:
+        qs = qs.filter(insurance_type=filters['insurance_type'])
+    if filters['deal_status']:
+        qs = qs.filter(deal_status=filters['deal_status'])
+    if filters['user_ids']:
+        if filters['include_unassigned']:
+            qs = qs.filter(Q(user_id__in=filters['user_ids']) | Q(user__isnull=True))
+        else:
+            qs = qs.filter(user_id__in=filters['user_ids'])
+    elif not filters['include_unassigned']:
+        qs = qs.filter(user__isnull=False)
+    return qs
+
+
+def cycle_histogram_bucket(hours: float) -> int:
+    """Индекс корзины гистограммы цикла для значения в часах."""
+    return bisect_left(CYCLE_HISTOGRAM_EDGES_HOURS, hours)
+
+
+def _empty_cycle_histogram() -> list[int]:
+    return [0] * (len(CYCLE_HISTOGRAM_EDGES_HOURS) + 1)
+
+
+def _histogram_percentile(counts: list[int], q: float) -> float | None:
+    """Оценка p-квантили по гистограмме (интерполяция внутри корзины).
+
+    Для открытой последней корзины возвращается её нижняя граница.
+    """
+    total = sum(counts)
+    if not total:
         return None
-    if len(values) == 1:
-        return float(values[0])
-    sorted_v = sorted(values)
-    pos = q * (len(sorted_v) - 1)
-    lo = int(pos)
-    hi = min(lo + 1, len(sorted_v) - 1)
-    frac = pos - lo
-    return float(sorted_v[lo] + (sorted_v[hi] - sorted_v[lo]) * frac)
+    rank = q * (total - 1)
+    seen = 0
+    for idx, count in enumerate(counts):
+        if not count:
+            continue
+        if rank < seen + count:
+            lower = float(CYCLE_HISTOGRAM_EDGES_HOURS[idx - 1]) if idx else 0.0
+            if idx >= len(CYCLE_HISTOGRAM_EDGES_HOURS):
+                return lower
+            upper = float(CYCLE_HISTOGRAM_EDGES_HOURS[idx])
+            return lower + (upper - lower) * (rank - seen + 0.5) / count
+        seen += count
+    return None
 
 
 def _is_field_filled(value) -> bool:
@@ -305,101 +369,126 @@ def _completeness_for_request(req: InsuranceRequest) -> dict[str, Any]:
     }
 
 
-def _aggregate_completeness(requests: list[InsuranceRequest]) -> dict[str, Any]:
-    """Агрегирует completeness-метрики по списку заявок одного сотрудника."""
-    if not requests:
-        return {
-            'base_pct': None, 'casco_pct': None, 'property_pct': None,
-            'overall_pct': None,
-            'inn_invalid_count': 0, 'inn_invalid_pct': None,
-            'other_type_count': 0, 'other_type_pct': None,
-            'edited_count': 0, 'edited_pct': None,
-        }
+COMPLETENESS_COUNTER_KEYS = (
+    'base_filled', 'base_total',
+    'casco_filled', 'casco_total',
+    'property_filled', 'property_total',
+    'inn_invalid_count', 'other_type_count', 'edited_count',
+)
+PORTFOLIO_FLAGS = (
+    'franchise', 'has_installment',
+    'has_autostart', 'has_casco_ce',
+    'has_transportation', 'has_construction_work',
+)
 
-    base_filled = base_total = 0
-    casco_filled = casco_total = 0
-    property_filled = property_total = 0
-    inn_invalid = 0
-    other_type = 0
-    edited = 0
 
+def _completeness_counters(requests: Iterable[InsuranceRequest]) -> dict[str, int]:
+    """Суммирует сырые счётчики completeness (их же хранят дневные rollup’ы)."""
+    counters = dict.fromkeys(COMPLETENESS_COUNTER_KEYS, 0)
     for req in requests:
         c = _completeness_for_request(req)
-        base_filled += c['base_filled']
-        base_total += c['base_total']
+        counters['base_filled'] += c['base_filled']
+        counters['base_total'] += c['base_total']
         if c['casco_total']:
-            casco_filled += c['casco_filled']
-            casco_total += c['casco_total']
+            counters['casco_filled'] += c['casco_filled']
+            counters['casco_total'] += c['casco_total']
         if c['property_total']:
-            property_filled += c['property_filled']
-            property_total += c['property_total']
+            counters['property_filled'] += c['property_filled']
+            counters['property_total'] += c['property_total']
         if not c['inn_valid']:
-            inn_invalid += 1
+            counters['inn_invalid_count'] += 1
         if c['is_other_type']:
-            other_type += 1
+            counters['other_type_count'] += 1
         if c['edited_after_create']:
-            edited += 1
+            counters['edited_count'] += 1
+    return counters
+
+
+def _completeness_from_counters(counters: dict[str, int], n: int) -> dict[str, Any]:
+    """Проценты completeness по сырым счётчикам и числу заявок."""
+    if not n:
+        return {
+            'base_pct': None, 'casco_pct': None, 'property_pct': None,
+            'overall_pct': None,
+            'inn_invalid_count': 0, 'inn_invalid_pct': None,
+            'other_type_count': 0, 'other_type_pct': None,
+            'edited_count': 0, 'edited_pct': None,
+        }
+
+    def _pct(filled_key: str, total_key: str) -> float | None:
+        total = counters[total_key]
+        return counters[filled_key] / total * 100 if total else None
 
-    base_pct = base_filled / base_total * 100 if base_total else None
-    casco_pct = casco_filled / casco_total * 100 if casco_total else None
-    property_pct = property_filled / property_total * 100 if property_total else None
+    base_pct = _pct('base_filled', 'base_total')
+    casco_pct = _pct('casco_filled', 'casco_total')
+    property_pct = _pct('property_filled', 'property_total')
 
     # Общий процент — среднее по доступным группам
     available = [pct for pct in (base_pct, casco_pct, property_pct) if pct is not None]
     overall_pct = sum(available) / len(available) if available else None
 
-    n = len(requests)
     return {
         'base_pct': base_pct,
         'casco_pct': casco_pct,
         'property_pct': property_pct,
         'overall_pct': overall_pct,
-        'inn_invalid_count': inn_invalid,
-        'inn_invalid_pct': inn_invalid / n * 100,
-        'other_type_count': other_type,
-        'other_type_pct': other_type / n * 100,
-        'edited_count': edited,
-        'edited_pct': edited / n * 100,
+        'inn_invalid_count': counters['inn_invalid_count'],
+        'inn_invalid_pct': counters['inn_invalid_count'] / n * 100,
+        'other_type_count': counters['other_type_count'],
+        'other_type_pct': counters['other_type_count'] / n * 100,
+        'edited_count': counters['edited_count'],
+        'edited_pct': counters['edited_count'] / n * 100,
     }
 
 
-def _portfolio_for_user(requests: list[InsuranceRequest]) -> dict[str, Any]:
-    """Распределение по типу страхования, deal_status и булевым флагам."""
-    if not requests:
-        return {
-            'by_insurance_type': {},
-            'prolongation_pct': None, 'new_deal_pct': None,
-            'flag_pct': {},
-        }
+def _aggregate_completeness(requests: list[InsuranceRequest]) -> dict[str, Any]:
+    """Агрегирует completeness-метрики по списку заявок одного сотрудника."""
+    return _completeness_from_counters(_completeness_counters(requests), len(requests))
 
+
+def _portfolio_counters(requests: Iterable[InsuranceRequest]) -> dict[str, Any]:
+    """Сырые счётчики портфеля: типы страхования, пролонгации, булевы флаги."""
     by_type: dict[str, int] = defaultdict(int)
-    new_count = prolong_count = 0
-    flag_counters = {
-        'franchise': 0, 'has_installment': 0,
-        'has_autostart': 0, 'has_casco_ce': 0,
-        'has_transportation': 0, 'has_construction_work': 0,
-    }
-    n = len(requests)
+    prolong_count = 0
+    flag_counters = dict.fromkeys(PORTFOLIO_FLAGS, 0)
     for req in requests:
         by_type[req.insurance_type or 'не указан'] += 1
         if req.deal_status == 'prolongation':
             prolong_count += 1
-        else:
-            new_count += 1
         if req.franchise_type != 'none':
             flag_counters['franchise'] += 1
         for flag in flag_counters:
             if flag != 'franchise' and getattr(req, flag, False):
                 flag_counters[flag] += 1
-
     return {
         'by_insurance_type': dict(by_type),
-        'new_deal_pct': new_count / n * 100,
+        'prolongation_count': prolong_count,
+        'flag_counts': flag_counters,
+    }
+
+
+def _portfolio_from_counters(counters: dict[str, Any], n: int) -> dict[str, Any]:
+    """Распределение портфеля в процентах по сырым счётчикам."""
+    if not n:
+        return {
+            'by_insurance_type': {},
+            'prolongation_pct': None, 'new_deal_pct': None,
+            'flag_pct': {},
+        }
+    prolong_count = counters['prolongation_count']
+    return {
+        'by_insurance_type': dict(counters['by_insurance_type']),
+        'new_deal_pct': (n - prolong_count) / n * 100,
         'prolongation_pct': prolong_count / n * 100,
-        'flag_pct': {k: v / n * 100 for k, v in flag_counters.items()},
+        'flag_pct': {k: counters['flag_counts'].get(k, 0) / n * 100 for k in PORTFOLIO_FLAGS},
     }
 
 
+def _portfolio_for_user(requests: list[InsuranceRequest]) -> dict[str, Any]:
+    """Распределение по типу страхования, deal_status и булевым флагам."""
+    return _portfolio_from_counters(_portfolio_counters(requests), len(requests))
+
+
 LATE_HOUR_THRESHOLD = 22  # «поздняя» загрузка с 22:00
 WEEKEND_DAYS = (5, 6)  # суббота, воскресенье
 
@@ -506,6 +595,8 @@ def _team_trend(filters: dict) -> dict[str, Any]:
     today = timezone.localdate()
 
     def _stats(start: date, end: date) -> dict[str, Any]:
+        if use_rollups():
+            return _rollup_stats(start, end)
         qs = InsuranceRequest.objects.filter(
             created_at__date__gte=start, created_at__date__lte=end
         )
@@ -534,6 +625,27 @@ def _team_trend(filters: dict) -> dict[str, Any]:
             'premium': premium_total,
         }
 
+    def _rollup_stats(start: date, end: date) -> dict[str, Any]:
+        qs = ManagerDailyRollup.objects.filter(day__gte=start, day__lte=end)
+        if filters['user_ids']:
+            qs = qs.filter(user_id__in=filters['user_ids'])
+        if filters['branch']:
+            qs = qs.filter(branch=filters['branch'])
+        if filters['insurance_type']:
+            qs = qs.filter(insurance_type=filters['insurance_type'])
+        if filters['deal_status']:
+            qs = qs.filter(deal_status=filters['deal_status'])
+        totals = qs.aggregate(
+            requests=Sum('requests_count'),
+            accepted=Sum('accepted_count'),
+            premium=Sum('premium_total'),
+        )
+        return {
+            'requests': totals['requests'] or 0,
+            'accepted': totals['accepted'] or 0,
+            'premium': totals['premium'] or Decimal('0'),
+        }
+
     def _delta_pct(cur: float | int | Decimal, prev: float | int | Decimal) -> float | None:
         if not prev:
             return None
@@ -679,6 +791,41 @@ def _summary_time_to_metrics(summary: InsuranceSummary) -> dict[str, float | Non
 # --- Charts -----------------------------------------------------------------
 
 
+def _series_day_counts(request_qs: QuerySet, filters: dict | None) -> list[tuple[date, str, str, int]]:
+    """(день, ключ серии, подпись, число загрузок) по сотрудникам.
+
+    При включённых rollup’ах читает дневные агрегаты по тем же фильтрам,
+    иначе группирует сырые заявки request_qs.
+    """
+    if filters is not None and use_rollups():
+        rows = (
+            _build_rollup_qs(filters).order_by()
+            .values('day', 'user_id', 'user__username', 'user__first_name', 'user__last_name')
+            .annotate(c=Sum('requests_count'))
+        )
+        prefix, day_field = 'user', 'day'
+    else:
+        rows = (
+            request_qs.values('created_at__date', 'created_by_id', 'created_by__username',
+                              'created_by__first_name', 'created_by__last_name')
+            .annotate(c=Count('id'))
+        )
+        prefix, day_field = 'created_by', 'created_at__date'
+
+    result = []
+    for row in rows:
+        user_id = row[f'{prefix}_id']
+        if user_id is None:
+            key = '__unassigned__'
+            label = 'Без автора'
+        else:
+            key = f'u{user_id}'
+            full = (f"{row[f'{prefix}__first_name']} {row[f'{prefix}__last_name']}").strip()
+            label = full or row[f'{prefix}__username'] or f'user#{user_id}'
+        result.append((row[day_field], key, label, row['c']))
+    return result
+
+
 def _daily_counts(request_qs: QuerySet, filters: dict) -> dict[str, list]:
     """Возвращает labels (даты) и series (по сотрудникам) для линии загрузок по дням."""
     if filters['start_date'] and filters['end_date']:
@@ -694,24 +841,12 @@ def _daily_counts(request_qs: QuerySet, filters: dict) -> dict[str, list]:
         days.append(cur)
         cur += timedelta(days=1)
 
-    rows = list(
-        request_qs.values('created_at__date', 'created_by_id', 'created_by__username',
-                          'created_by__first_name', 'created_by__last_name')
-        .annotate(c=Count('id'))
-    )
     # series_key → label
     series_keys: dict[str, str] = {}
     series_data: dict[str, dict[date, int]] = defaultdict(lambda: defaultdict(int))
-    for row in rows:
-        if row['created_by_id'] is None:
-            key = '__unassigned__'
-            label = 'Без автора'
-        else:
-            key = f"u{row['created_by_id']}"
-            full = (f"{row['created_by__first_name']} {row['created_by__last_name']}").strip()
-            label = full or row['created_by__username'] or f'user#{row["created_by_id"]}'
+    for day, key, label, count in _series_day_counts(request_qs, filters):
         series_keys[key] = label
-        series_data[key][row['created_at__date']] += row['c']
+        series_data[key][day] += count
 
     series = []
     for key, label in sorted(series_keys.items(), key=lambda kv: kv[1].lower()):
@@ -738,11 +873,8 @@ def _daily_counts(request_qs: QuerySet, filters: dict) -> dict[str, list]:
     }
 
 
-def _weekly_stacked(request_qs: QuerySet) -> dict[str, list]:
-    rows = list(
-        request_qs.values('created_at__date', 'created_by_id', 'created_by__username',
-                          'created_by__first_name', 'created_by__last_name')
-    )
+def _weekly_stacked(request_qs: QuerySet, filters: dict | None = None) -> dict[str, list]:
+    rows = _series_day_counts(request_qs, filters)
     if not rows:
         return {'labels': [], 'series': []}
 
@@ -750,21 +882,13 @@ def _weekly_stacked(request_qs: QuerySet) -> dict[str, list]:
     series_labels: dict[str, str] = {}
     week_set: set[str] = set()
 
-    for row in rows:
-        d = row['created_at__date']
+    for d, key, label, count in rows:
         # Неделя как ISO «YYYY-Www»
         iso_year, iso_week, _ = d.isocalendar()
         week_key = f'{iso_year}-W{iso_week:02d}'
         week_set.add(week_key)
-        if row['created_by_id'] is None:
-            key = '__unassigned__'
-            label = 'Без автора'
-        else:
-            key = f"u{row['created_by_id']}"
-            full = (f"{row['created_by__first_name']} {row['created_by__last_name']}").strip()
-            label = full or row['created_by__username'] or f'user#{row["created_by_id"]}'
         series_labels[key] = label
-        weeks[week_key][key] += 1
+        weeks[week_key][key] += count
 
     labels = sorted(week_set)
     series = []
@@ -782,6 +906,15 @@ def _weekly_stacked(request_qs: QuerySet) -> dict[str, list]:
 
 def _build_manager_rows(filters: dict) -> tuple[list[dict], dict]:
     """Возвращает (rows, team_aggregate). Каждая строка — метрики на сотрудника."""
+    if use_rollups():
+        rows, team_completeness, team_portfolio = _manager_rows_from_rollups(filters)
+    else:
+        rows, team_completeness, team_portfolio = _manager_rows_from_raw(filters)
+    return _finalize_manager_rows(rows, team_completeness, team_portfolio)
+
+
+def _manager_rows_from_raw(filters: dict) -> tuple[list[dict], dict, dict]:
+    """Строки сотрудников по сырым заявкам/сводам окна."""
     request_qs = _build_request_qs(filters)
     summary_qs = _build_summary_qs(filters)
 
@@ -824,7 +957,7 @@ def _build_manager_rows(filters: dict) -> tuple[list[dict], dict]:
             'sent_to_completed_h': _avg(m['sent_to_completed_h'] for m in per_summary_metrics),
             'avg_cycle_h': _avg(cycle_values),
             'p50_cycle_h': _median(cycle_values),
-            'p90_cycle_h': _percentile(cycle_values, 0.9),
+            'p90_cycle_h': percentile(cycle_values, 0.9),
         }
 
         # Просрочка по response_deadline (по активным заявкам)
@@ -864,12 +997,163 @@ def _build_manager_rows(filters: dict) -> tuple[list[dict], dict]:
             'patterns': patterns,
         })
 
+    all_requests = [req for reqs in requests_by_user.values() for req in reqs]
+    return rows, _aggregate_completeness(all_requests), _portfolio_for_user(all_requests)
+
+
+ROLLUP_SUM_FIELDS = (
+    'requests_count', 'summaries_count', 'accepted_count', 'rejected_count',
+    'active_requests_count', 'active_summaries_count',
+    'premium_total', 'sum_total',
+    'late_count', 'weekend_count', 'prolongation_count',
+) + COMPLETENESS_COUNTER_KEYS
+
+
+def _manager_rows_from_rollups(filters: dict) -> tuple[list[dict], dict, dict]:
+    """Строки сотрудников по дневным агрегатам: стоимость не зависит от длины окна.
+
+    p50/p90 цикла — оценка по гистограмме; просрочка считается живым
+    агрегатом по заявкам, т.к. зависит от текущего момента.
+    """
+    rollup_qs = _build_rollup_qs(filters)
+    now = timezone.now()
+
+    totals_by_user = {
+        row['user_id']: row
+        for row in rollup_qs.order_by().values('user_id').annotate(
+            first_request_at_min=Min('first_request_at'),
+            last_request_at_max=Max('last_request_at'),
+            **{f'total_{f}': Sum(f) for f in ROLLUP_SUM_FIELDS},
+        )
+    }
+
+    by_type: dict[int | None, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    flags: dict[int | None, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    time_to_totals: dict[int | None, dict[str, list]] = defaultdict(lambda: defaultdict(lambda: [0.0, 0]))
+    histograms: dict[int | None, list[int]] = defaultdict(_empty_cycle_histogram)
+    for row in rollup_qs.values(
+        'user_id', 'insurance_type', 'requests_count',
+        'flag_counts', 'time_to_totals', 'cycle_histogram',
+    ):
+        user_id = row['user_id']
+        by_type[user_id][row['insurance_type'] or 'не указан'] += row['requests_count']
+        for flag, count in (row['flag_counts'] or {}).items():
+            flags[user_id][flag] += count
+        for key, (total, count) in (row['time_to_totals'] or {}).items():
+            time_to_totals[user_id][key][0] += total
+            time_to_totals[user_id][key][1] += count
+        for idx, count in enumerate(row['cycle_histogram'] or []):
+            histograms[user_id][idx] += count
+
+    overdue_by_user = dict(
+        _build_request_qs(filters)
+        .filter(response_deadline__lt=now)
+        .exclude(status='emails_sent')
+        .order_by()
+        .values('created_by_id')
+        .annotate(c=Count('id'))
+        .values_list('created_by_id', 'c')
+    )
+    users = User.objects.in_bulk([uid for uid in totals_by_user if uid is not None])
+
+    def _time_avg(user_id: int | None, key: str) -> float | None:
+        total, count = time_to_totals[user_id][key]
+        return total / count if count else None
+
+    rows: list[dict] = []
+    team_counters = dict.fromkeys(COMPLETENESS_COUNTER_KEYS, 0)
+    team_portfolio = {
+        'by_insurance_type': defaultdict(int),
+        'prolongation_count': 0,
+        'flag_counts': defaultdict(int),
+    }
+    for user_id, agg in totals_by_user.items():
+        n = agg['total_requests_count'] or 0
+        if not n:
+            continue
+        user = users.get(user_id)
+        accepted = agg['total_accepted_count'] or 0
+        rejected = agg['total_rejected_count'] or 0
+        completed = accepted + rejected
+        premium_total = agg['total_premium_total'] or Decimal('0')
+        counters = {k: agg[f'total_{k}'] or 0 for k in COMPLETENESS_COUNTER_KEYS}
+        portfolio = {
+            'by_insurance_type': dict(by_type[user_id]),
+            'prolongation_count': agg['total_prolongation_count'] or 0,
+            'flag_counts': dict(flags[user_id]),
+        }
+        for key in COMPLETENESS_COUNTER_KEYS:
+            team_counters[key] += counters[key]
+        for key, count in portfolio['by_insurance_type'].items():
+            team_portfolio['by_insurance_type'][key] += count
+        team_portfolio['prolongation_count'] += portfolio['prolongation_count']
+        for key, count in portfolio['flag_counts'].items():
+            team_portfolio['flag_counts'][key] += count
+
+        first_at = agg['first_request_at_min']
+        last_at = agg['last_request_at_max']
+        active_requests = agg['total_active_requests_count'] or 0
+        active_summaries = agg['total_active_summaries_count'] or 0
+
+        rows.append({
+            'user_id': user_id,
+            'display': _user_display(user),
+            'username': user.username if user else None,
+            'is_unassigned': user_id is None,
+            'requests_total': n,
+            'summaries_total': agg['total_summaries_count'] or 0,
+            'accepted': accepted,
+            'rejected': rejected,
+            'win_rate': (accepted / completed * 100) if completed else None,
+            'premium_total': premium_total,
+            'sum_total': agg['total_sum_total'] or Decimal('0'),
+            'avg_ticket': (premium_total / accepted) if accepted else Decimal('0'),
+            'time_to': {
+                'upload_to_summary_h': _time_avg(user_id, 'upload_to_summary_h'),
+                'summary_to_first_offer_h': _time_avg(user_id, 'summary_to_first_offer_h'),
+                'summary_to_sent_h': _time_avg(user_id, 'summary_to_sent_h'),
+                'sent_to_completed_h': _time_avg(user_id, 'sent_to_completed_h'),
+                'avg_cycle_h': _time_avg(user_id, 'total_cycle_h'),
+                'p50_cycle_h': _histogram_percentile(histograms[user_id], 0.5),
+                'p90_cycle_h': _histogram_percentile(histograms[user_id], 0.9),
+            },
+            'active_requests': active_requests,
+            'active_summaries': active_summaries,
+            'active_total': active_requests + active_summaries,
+            'overdue_count': overdue_by_user.get(user_id, 0),
+            'last_activity': last_at,
+            'completeness': _completeness_from_counters(counters, n),
+            'portfolio': _portfolio_from_counters(portfolio, n),
+            'patterns': {
+                'cadence_hours': (
+                    (last_at - first_at).total_seconds() / 3600.0 / (n - 1)
+                    if n >= 2 and first_at and last_at else None
+                ),
+                'late_pct': (agg['total_late_count'] or 0) / n * 100,
+                'weekend_pct': (agg['total_weekend_count'] or 0) / n * 100,
+                'days_since_last': (now - last_at).total_seconds() / 86400.0 if last_at else None,
+            },
+        })
+
+    team_n = sum(r['requests_total'] for r in rows)
+    return (
+        rows,
+        _completeness_from_counters(team_counters, team_n),
+        _portfolio_from_counters(team_portfolio, team_n),
+    )
+
+
+def _finalize_manager_rows(
+    rows: list[dict],
+    team_completeness: dict[str, Any],
+    team_portfolio: dict[str, Any],
+) -> tuple[list[dict], dict]:
+    """Сортировка, командный агрегат, quality-score и радар — общие для обоих источников."""
     # Сортируем: сначала реальные сотрудники по объёму, в конце «Без автора»
     rows.sort(key=lambda r: (r['is_unassigned'], -r['requests_total'], r['display']))
 
     # Команда (агрегация)
     real_rows = [r for r in rows if not r['is_unassigned']]
-    all_requests = [req for reqs in requests_by_user.values() for req in reqs]
 
     team = {
         'requests_total': sum(r['requests_total'] for r in rows),
@@ -881,8 +1165,8 @@ def _build_manager_rows(filters: dict) -> tuple[list[dict], dict]:
         'active_total': sum(r['active_total'] for r in rows),
         'overdue_count': sum(r['overdue_count'] for r in rows),
         'managers_count': sum(1 for r in rows if not r['is_unassigned']),
-        'completeness': _aggregate_completeness(all_requests),
-        'portfolio': _portfolio_for_user(all_requests),
+        'completeness': team_completeness,
+        'portfolio': team_portfolio,
     }
     completed = team['accepted'] + team['rejected']
     team['win_rate'] = (team['accepted'] / completed * 100) if completed else None
@@ -1240,7 +1524,7 @@ def _cycle_outlier_alert(filters: dict) -> dict[str, Any]:
     if not cycles:
         return {'threshold_h': None, 'team_baseline_h': None, 'outliers': []}
 
-    team_p75 = _percentile(cycles, 0.75)
+    team_p75 = percentile(cycles, 0.75)
     if team_p75 is None or team_p75 <= 0:
         return {'threshold_h': None, 'team_baseline_h': None, 'outliers': []}
 
@@ -1298,7 +1582,7 @@ def build_overview_payload(filters: dict) -> dict[str, Any]:
     funnel = _build_funnel(filters)
     request_qs = _build_request_qs(filters)
     daily = _daily_counts(request_qs, filters)
-    weekly = _weekly_stacked(request_qs)
+    weekly = _weekly_stacked(request_qs, filters)
 
     if filters['start_date'] and filters['end_date']:
         days_span = max((filters['end_date'] - filters['start_date']).days + 1, 1)
@@ -1615,10 +1899,18 @@ def _personal_timeline(user_id: int, *, limit: int = 50) -> list[dict[str, Any]]
 
     # 2. CRUDEvent — CREATE / UPDATE (не-status) / DELETE
     if easyaudit_available:
+        # UPDATE берём только если по индексу полей в нём есть что-то кроме
+        # status и шумовых полей — иначе «с запасом» съедали бы пустые правки.
+        meaningful_update = Exists(
+            FieldChange.objects.filter(event_id=OuterRef('pk'))
+            .exclude(field_name__in=TIMELINE_NOISY_FIELDS | {'status'})
+        )
         crud_qs = CRUDEvent.objects.filter(
             Q(content_type=request_ct, object_id__in=[str(i) for i in request_ids])
             | Q(content_type=summary_ct, object_id__in=[str(i) for i in summary_ids])
             | Q(content_type=offer_ct, object_id__in=[str(i) for i in offer_ids])
+        ).filter(
+            ~Q(event_type=CRUDEvent.UPDATE) | meaningful_update
         ).order_by('-datetime')[:limit * 3]  # с запасом, после фильтрации может ужаться
 
         for evt in crud_qs:
@@ -3,7 +3,9 @@
 Источник данных:
 - RequestFieldEdit — нормализованные строки правок (что и как правили);
 - InsuranceRequest.parser_confidence / manual_edits_count — денормализованные
-  показатели для долей и динамики без разбора JSON.
+  показатели для долей и динамики без разбора JSON;
+- при PARSER_EDITS_USE_ROLLUPS — дневные агрегаты ParserDailyRollup и
+  ParserFieldEditDailyRollup (см. analytics_parser_rollups) вместо обоих.
 
 Популяция «V2-заявок» определяется как заявки с проставленной
 parser_confidence (его выставляет только новый загрузчик при создании) —
@@ -11,12 +13,17 @@ parser_confidence (его выставляет только новый загр
 """
 from datetime import timedelta
 
-from django.db.models import Avg, Count
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models import Avg, Count, Sum
 from django.db.models.functions import TruncMonth
 from django.utils import timezone
 
 from insurance_requests.models import InsuranceRequest, RequestFieldEdit
 
+from ..models import ParserDailyRollup, ParserFieldEditDailyRollup
+from .analytics_parser_rollups import parser_version_of
+
 DEFAULT_DAYS = 90
 MAX_DAYS = 3650
 TOP_LIMIT = 20
@@ -36,6 +43,9 @@ TYPE_LABELS = {
     'individual_entrepreneur': 'ИП',
     'unknown': 'Не указан',
 }
+VERSION_LABELS = {
+    'unknown': 'Не указана',
+}
 
 
 def parse_filters(params):
@@ -53,8 +63,8 @@ def parse_filters(params):
     }
 
 
-def _segment(requests_values, key_name, labels):
-    """Сегментировать V2-заявки по полю шаблона (формат/тип).
+def _segment(requests_values, value_of, labels):
+    """Сегментировать V2-заявки по признаку шаблона (формат/тип/версия парсера).
 
     Считаем по денормализованному manual_edits_count, без JSON-запросов:
     сколько заявок в сегменте, в скольких были правки на входе и какова доля
@@ -62,14 +72,19 @@ def _segment(requests_values, key_name, labels):
     """
     buckets = {}
     for row in requests_values:
-        ad = row['additional_data'] or {}
-        value = ad.get(key_name) or 'unknown'
+        value = value_of(row['additional_data'] or {})
         mec = row['manual_edits_count'] or 0
-        bucket = buckets.setdefault(value, {'requests': 0, 'with_edits': 0, 'edits': 0})
+        bucket = buckets.setdefault(value, {'requests': 0, 'with_edits': 0, 'edits': 0, 'confidence': 0.0})
         bucket['requests'] += 1
         bucket['edits'] += mec
+        bucket['confidence'] += row['parser_confidence'] or 0
         if mec > 0:
             bucket['with_edits'] += 1
+    return _segment_rows(buckets, labels)
+
+
+def _segment_rows(buckets, labels):
+    """Строки сегментов из корзин {значение: {requests, with_edits, edits, confidence}}."""
     out = []
     for value, bucket in buckets.items():
         requests = bucket['requests']
@@ -81,6 +96,7 @@ def _segment(requests_values, key_name, labels):
             'edits': bucket['edits'],
             'error_rate_percent': round(bucket['with_edits'] / requests * 100, 1) if requests else 0.0,
             'avg_edits': round(bucket['edits'] / requests, 2) if requests else 0.0,
+            'avg_confidence_percent': _percent(bucket['confidence'] / requests) if requests else None,
         })
     return sorted(out, key=lambda r: (-r['error_rate_percent'], -r['requests']))
 
@@ -97,8 +113,67 @@ def _percent(value):
     return round(value * 100, 1) if value is not None else None
 
 
-def build_payload(filters):
-    """Собрать полный payload дашборда правок за выбранный период."""
+def use_rollups():
+    """Читать дашборд из дневных агрегатов ParserDailyRollup/ParserFieldEditDailyRollup.
+
+    Включается настройкой PARSER_EDITS_USE_ROLLUPS после первичного
+    заполнения командой rebuild_parser_rollups. Период тогда считается
+    целыми локальными днями, начиная с дня filters['since'].
+    """
+    return bool(getattr(settings, 'PARSER_EDITS_USE_ROLLUPS', False))
+
+
+def _timeline(monthly_edits, monthly_conf):
+    """Помесячная динамика из {месяц: правок} и {месяц: {requests, avg}}."""
+    timeline = []
+    for month in sorted(set(monthly_edits) | set(monthly_conf)):
+        conf = monthly_conf.get(month, {})
+        timeline.append({
+            'month': month,
+            'label': month.strftime('%m.%Y') if month else '—',
+            'edits': monthly_edits.get(month, 0),
+            'requests': conf.get('requests', 0),
+            'avg_confidence_percent': _percent(conf.get('avg')),
+        })
+    return timeline
+
+
+def _totals(total_v2, requests_with_edits, total_edits, avg_conf, avg_conf_with, avg_conf_without):
+    return {
+        'total_v2': total_v2,
+        'requests_with_edits': requests_with_edits,
+        'requests_clean': total_v2 - requests_with_edits,
+        'edited_share_percent': round(requests_with_edits / total_v2 * 100, 1) if total_v2 else 0.0,
+        'total_edits': total_edits,
+        'avg_edits_per_request': round(total_edits / total_v2, 2) if total_v2 else 0.0,
+        'avg_confidence_percent': _percent(avg_conf),
+        'avg_confidence_with_edits_percent': _percent(avg_conf_with),
+        'avg_confidence_without_edits_percent': _percent(avg_conf_without),
+    }
+
+
+def _top_field_rows(rows, total_v2):
+    return [
+        {
+            'field_name': row['field_name'],
+            'field_label': row['field_label'] or row['field_name'],
+            'count': row['count'],
+            'requests': row['requests'],
+            'error_rate_percent': round(row['requests'] / total_v2 * 100, 1) if total_v2 else 0.0,
+        }
+        for row in rows
+    ]
+
+
+def _labelled(rows, field, key, labels):
+    return [
+        {key: row[field], 'label': labels.get(row[field], row[field]), 'count': row['count']}
+        for row in rows
+    ]
+
+
+def _raw_sections(filters):
+    """Разделы дашборда по сырым заявкам и RequestFieldEdit."""
     since = filters['since']
 
     v2_requests = InsuranceRequest.objects.filter(
@@ -113,30 +188,22 @@ def build_payload(filters):
     # Топ полей с метрикой точности парсера: доля заявок, где оператор
     # поправил поле на входе (error_rate). Это и есть основной сигнал
     # «где парсер чаще всего ошибается».
-    top_fields = [
-        {
-            'field_name': row['field_name'],
-            'field_label': row['field_label'] or row['field_name'],
-            'count': row['count'],
-            'requests': row['requests'],
-            'error_rate_percent': round(row['requests'] / total_v2 * 100, 1) if total_v2 else 0.0,
-        }
-        for row in edits.values('field_name', 'field_label')
+    top_fields = _top_field_rows(
+        edits.values('field_name', 'field_label')
         .annotate(count=Count('id'), requests=Count('request', distinct=True))
-        .order_by('-requests', '-count', 'field_name')[:TOP_LIMIT]
-    ]
+        .order_by('-requests', '-count', 'field_name')[:TOP_LIMIT],
+        total_v2,
+    )
 
     # По типу правки и области.
-    by_type = [
-        {'type': row['edit_type'], 'label': EDIT_TYPE_LABELS.get(row['edit_type'], row['edit_type']),
-         'count': row['count']}
-        for row in edits.values('edit_type').annotate(count=Count('id')).order_by('-count')
-    ]
-    by_scope = [
-        {'scope': row['scope'], 'label': SCOPE_LABELS.get(row['scope'], row['scope']),
-         'count': row['count']}
-        for row in edits.values('scope').annotate(count=Count('id')).order_by('-count')
-    ]
+    by_type = _labelled(
+        edits.values('edit_type').annotate(count=Count('id')).order_by('-count', 'edit_type'),
+        'edit_type', 'type', EDIT_TYPE_LABELS,
+    )
+    by_scope = _labelled(
+        edits.values('scope').annotate(count=Count('id')).order_by('-count', 'scope'),
+        'scope', 'scope', SCOPE_LABELS,
+    )
 
     # По филиалам.
     by_branch = [
@@ -171,22 +238,142 @@ def build_payload(filters):
         for row in v2_requests.annotate(month=TruncMonth('created_at'))
         .values('month').annotate(avg=Avg('parser_confidence'), requests=Count('id'))
     }
-    months = sorted(set(monthly_edits) | set(monthly_conf))
-    timeline = []
-    for month in months:
-        conf = monthly_conf.get(month, {})
-        timeline.append({
-            'month': month,
-            'label': month.strftime('%m.%Y') if month else '—',
-            'edits': monthly_edits.get(month, 0),
-            'requests': conf.get('requests', 0),
-            'avg_confidence_percent': _percent(conf.get('avg')),
+
+    # Сегментация по шаблону заявки: на каком формате/типе/версии парсер слабее.
+    request_values = list(v2_requests.values('additional_data', 'manual_edits_count', 'parser_confidence'))
+
+    avg_conf = v2_requests.aggregate(avg=Avg('parser_confidence'))['avg']
+    avg_conf_with = v2_requests.filter(manual_edits_count__gt=0).aggregate(
+        avg=Avg('parser_confidence'))['avg']
+    avg_conf_without = v2_requests.filter(manual_edits_count=0).aggregate(
+        avg=Avg('parser_confidence'))['avg']
+
+    return {
+        'totals': _totals(total_v2, requests_with_edits, total_edits, avg_conf, avg_conf_with, avg_conf_without),
+        'top_fields': top_fields,
+        'by_type': by_type,
+        'by_scope': by_scope,
+        'by_branch': by_branch,
+        'by_operator': by_operator,
+        'by_format': _segment(
+            request_values, lambda ad: ad.get('application_format') or 'unknown', FORMAT_LABELS),
+        'by_app_type': _segment(
+            request_values, lambda ad: ad.get('application_type') or 'unknown', TYPE_LABELS),
+        'by_parser_version': _segment(request_values, parser_version_of, VERSION_LABELS),
+        'timeline': _timeline(monthly_edits, monthly_conf),
+    }
+
+
+def _rollup_segment(requests, dimension, labels):
+    buckets = {
+        row[dimension]: row
+        for row in requests.values(dimension).annotate(
+            requests=Sum('requests_count'), with_edits=Sum('with_edits_count'),
+            edits=Sum('edits_total'), confidence=Sum('confidence_sum'),
+        ).order_by()
+    }
+    return _segment_rows(buckets, labels)
+
+
+def _rollup_sections(filters):
+    """Те же разделы по дневным агрегатам — без сырых заявок и правок."""
+    since_day = timezone.localdate(filters['since'])
+    requests = ParserDailyRollup.objects.filter(day__gte=since_day)
+    edits = ParserFieldEditDailyRollup.objects.filter(day__gte=since_day)
+
+    sums = requests.aggregate(
+        total_v2=Sum('requests_count'), with_edits=Sum('with_edits_count'),
+        confidence=Sum('confidence_sum'), confidence_with=Sum('confidence_with_edits_sum'),
+    )
+    total_v2 = sums['total_v2'] or 0
+    requests_with_edits = sums['with_edits'] or 0
+    confidence = sums['confidence'] or 0.0
+    confidence_with = sums['confidence_with'] or 0.0
+    clean = total_v2 - requests_with_edits
+    total_edits = edits.aggregate(n=Sum('edits_count'))['n'] or 0
+
+    top_fields = _top_field_rows(
+        edits.values('field_name', 'field_label')
+        .annotate(count=Sum('edits_count'), requests=Sum('requests_count'))
+        .order_by('-requests', '-count', 'field_name')[:TOP_LIMIT],
+        total_v2,
+    )
+    by_type = _labelled(
+        edits.values('edit_type').annotate(count=Sum('edits_count')).order_by('-count', 'edit_type'),
+        'edit_type', 'type', EDIT_TYPE_LABELS,
+    )
+    by_scope = _labelled(
+        edits.values('scope').annotate(count=Sum('edits_count')).order_by('-count', 'scope'),
+        'scope', 'scope', SCOPE_LABELS,
+    )
+
+    branch_requests = {
+        row['branch']: row['requests']
+        for row in requests.values('branch').annotate(requests=Sum('edited_requests_count')).order_by()
+    }
+    by_branch = [
+        {
+            'branch': row['branch'] or 'Не указан',
+            'count': row['count'],
+            'requests': branch_requests.get(row['branch'], 0),
+        }
+        for row in edits.values('branch').annotate(count=Sum('edits_count')).order_by('-count')[:TOP_LIMIT]
+    ]
+
+    operator_rows = list(
+        edits.values('user_id').annotate(count=Sum('edits_count')).order_by('-count')[:TOP_LIMIT]
+    )
+    users = {
+        user['id']: user
+        for user in User.objects.filter(id__in=[r['user_id'] for r in operator_rows if r['user_id']])
+        .values('id', 'username', 'last_name', 'first_name')
+    }
+    by_operator = []
+    for row in operator_rows:
+        user = users.get(row['user_id'], {})
+        by_operator.append({
+            'operator': _operator_label({
+                'request__created_by__username': user.get('username'),
+                'request__created_by__last_name': user.get('last_name'),
+                'request__created_by__first_name': user.get('first_name'),
+            }),
+            'count': row['count'],
         })
 
-    # Сегментация по шаблону заявки: на каком формате/типе парсер слабее.
-    request_values = list(v2_requests.values('additional_data', 'manual_edits_count'))
-    by_format = _segment(request_values, 'application_format', FORMAT_LABELS)
-    by_app_type = _segment(request_values, 'application_type', TYPE_LABELS)
+    monthly_edits = {
+        row['month']: row['count']
+        for row in edits.annotate(month=TruncMonth('day')).values('month')
+        .annotate(count=Sum('edits_count')).order_by()
+    }
+    monthly_conf = {
+        row['month']: {'requests': row['requests'], 'avg': row['confidence'] / row['requests']}
+        for row in requests.annotate(month=TruncMonth('day')).values('month')
+        .annotate(requests=Sum('requests_count'), confidence=Sum('confidence_sum')).order_by()
+        if row['requests']
+    }
+
+    return {
+        'totals': _totals(
+            total_v2, requests_with_edits, total_edits,
+            confidence / total_v2 if total_v2 else None,
+            confidence_with / requests_with_edits if requests_with_edits else None,
+            (confidence - confidence_with) / clean if clean else None,
+        ),
+        'top_fields': top_fields,
+        'by_type': by_type,
+        'by_scope': by_scope,
+        'by_branch': by_branch,
+        'by_operator': by_operator,
+        'by_format': _rollup_segment(requests, 'application_format', FORMAT_LABELS),
+        'by_app_type': _rollup_segment(requests, 'application_type', TYPE_LABELS),
+        'by_parser_version': _rollup_segment(requests, 'parser_version', VERSION_LABELS),
+        'timeline': _timeline(monthly_edits, monthly_conf),
+    }
+
+
+def build_payload(filters):
+    """Собрать полный payload дашборда правок за выбранный период."""
+    sections = _rollup_sections(filters) if use_rollups() else _raw_sections(filters)
 
     # Дрилл-даун в конкретное поле: примеры пар «распознано → исправлено»
     # как готовый материал для тест-кейсов парсера.
@@ -195,7 +382,7 @@ def build_payload(filters):
     selected_field_label = ''
     if selected_field:
         example_qs = (
-            edits.filter(field_name=selected_field)
+            RequestFieldEdit.objects.filter(created_at__gte=filters['since'], field_name=selected_field)
             .order_by('-created_at')[:EXAMPLES_LIMIT]
         )
         for edit in example_qs:
@@ -209,33 +396,9 @@ def build_payload(filters):
                 'created_at': edit.created_at,
             })
 
-    avg_conf = v2_requests.aggregate(avg=Avg('parser_confidence'))['avg']
-    avg_conf_with = v2_requests.filter(manual_edits_count__gt=0).aggregate(
-        avg=Avg('parser_confidence'))['avg']
-    avg_conf_without = v2_requests.filter(manual_edits_count=0).aggregate(
-        avg=Avg('parser_confidence'))['avg']
-
     return {
         'filters': filters,
-        'totals': {
-            'total_v2': total_v2,
-            'requests_with_edits': requests_with_edits,
-            'requests_clean': total_v2 - requests_with_edits,
-            'edited_share_percent': round(requests_with_edits / total_v2 * 100, 1) if total_v2 else 0.0,
-            'total_edits': total_edits,
-            'avg_edits_per_request': round(total_edits / total_v2, 2) if total_v2 else 0.0,
-            'avg_confidence_percent': _percent(avg_conf),
-            'avg_confidence_with_edits_percent': _percent(avg_conf_with),
-            'avg_confidence_without_edits_percent': _percent(avg_conf_without),
-        },
-        'top_fields': top_fields,
-        'by_type': by_type,
-        'by_scope': by_scope,
-        'by_branch': by_branch,
-        'by_operator': by_operator,
-        'by_format': by_format,
-        'by_app_type': by_app_type,
-        'timeline': timeline,
+        **sections,
         'selected_field': selected_field,
         'selected_field_label': selected_field_label,
         'field_examples': field_examples,
@@ -0,0 +1,211 @@
+"""Дневные rollup’ы качества парсера V2 (ParserDailyRollup, ParserFieldEditDailyRollup).
+
+Корзина пересчёта — (локальный день создания заявки, created_by), как у
+ManagerDailyRollup. Внутри неё строки разбиты по версии парсера, формату и
+типу заявки и филиалу; правки — ещё по полю, области и типу правки. Правки
+относятся к дню своей заявки: RequestFieldEdit пишется в той же транзакции,
+что и заявка.
+
+Инкрементальное обновление: _record_request_field_edits (создание V2-заявок
+из превью) и сигналы сохранения/удаления V2-заявок помечают корзину
+«грязной», после коммита она пересчитывается целиком (delete + bulk_create).
+Правки, записанные в обход этих путей, догоняет команда rebuild_parser_rollups.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Iterable
+
+from django.db import transaction
+from django.utils import timezone
+
+from insurance_requests.models import InsuranceRequest, RequestFieldEdit
+
+from ..models import ParserDailyRollup, ParserFieldEditDailyRollup
+from .analytics_rollups import BucketKey, _day_bounds, bucket_key_for
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_MODELS = (ParserDailyRollup, ParserFieldEditDailyRollup)
+
+
+def parser_version_of(additional_data) -> str:
+    """Версия парсера заявки: точная из parser_v2.version, иначе метка parser_version."""
+    ad = additional_data or {}
+    version = (ad.get('parser_v2') or {}).get('version') or ad.get('parser_version') or 'unknown'
+    return str(version)[:32]
+
+
+def _request_dimensions(created_at, created_by_id, branch, additional_data) -> tuple:
+    ad = additional_data or {}
+    day, user_id = bucket_key_for(created_at, created_by_id)
+    return (
+        day,
+        user_id,
+        parser_version_of(ad),
+        str(ad.get('application_format') or 'unknown')[:32],
+        str(ad.get('application_type') or 'unknown')[:32],
+        branch or '',
+    )
+
+
+_DIMENSION_FIELDS = ('day', 'user_id', 'parser_version', 'application_format', 'application_type', 'branch')
+
+
+def _build_rollups(start: datetime, end: datetime, user_id: int | None = None, *, any_user: bool = False):
+    """Несохранённые строки обоих агрегатов за [start, end)."""
+    requests = InsuranceRequest.objects.filter(
+        parser_confidence__isnull=False, created_at__gte=start, created_at__lt=end,
+    )
+    if not any_user:
+        requests = (requests.filter(created_by_id=user_id) if user_id is not None
+                    else requests.filter(created_by__isnull=True))
+
+    dimensions_by_request = {}
+    request_groups: dict[tuple, list] = defaultdict(lambda: [0, 0, 0, 0.0, 0.0])
+    for pk, created_at, created_by_id, branch, additional_data, confidence, edits in requests.values_list(
+        'pk', 'created_at', 'created_by_id', 'branch', 'additional_data', 'parser_confidence',
+        'manual_edits_count',
+    ):
+        dims = dimensions_by_request[pk] = _request_dimensions(created_at, created_by_id, branch, additional_data)
+        group = request_groups[dims]
+        edits = edits or 0
+        group[0] += 1
+        group[2] += edits
+        group[3] += confidence
+        if edits > 0:
+            group[1] += 1
+            group[4] += confidence
+
+    edit_groups: dict[tuple, list] = defaultdict(lambda: [0, set()])
+    edited_requests: dict[tuple, set] = defaultdict(set)
+    if dimensions_by_request:
+        for request_id, scope, field_name, field_label, edit_type in RequestFieldEdit.objects.filter(
+            request_id__in=list(dimensions_by_request),
+        ).values_list('request_id', 'scope', 'field_name', 'field_label', 'edit_type'):
+            dims = dimensions_by_request[request_id]
+            group = edit_groups[dims + (scope, field_name, field_label, edit_type)]
+            group[0] += 1
+            group[1].add(request_id)
+            edited_requests[dims].add(request_id)
+
+    request_rollups = [
+        ParserDailyRollup(
+            **dict(zip(_DIMENSION_FIELDS, dims)),
+            requests_count=requests_count,
+            with_edits_count=with_edits,
+            edited_requests_count=len(edited_requests.get(dims, ())),
+            edits_total=edits_total,
+            confidence_sum=confidence_sum,
+            confidence_with_edits_sum=confidence_with_edits_sum,
+        )
+        for dims, (requests_count, with_edits, edits_total, confidence_sum, confidence_with_edits_sum)
+        in request_groups.items()
+    ]
+
+    edit_rollups = [
+        ParserFieldEditDailyRollup(
+            **dict(zip(_DIMENSION_FIELDS, key[:6])),
+            scope=key[6],
+            field_name=key[7],
+            field_label=key[8],
+            edit_type=key[9],
+            edits_count=edits_count,
+            requests_count=len(request_ids),
+        )
+        for key, (edits_count, request_ids) in edit_groups.items()
+    ]
+    return request_rollups, edit_rollups
+
+
+def _write(request_rollups, edit_rollups, *stale_querysets) -> None:
+    with transaction.atomic():
+        for qs in stale_querysets:
+            qs.delete()
+        ParserDailyRollup.objects.bulk_create(request_rollups)
+        ParserFieldEditDailyRollup.objects.bulk_create(edit_rollups)
+
+
+def refresh_bucket(day: date, user_id: int | None) -> int:
+    """Пересчитывает одну корзину (день, сотрудник). Возвращает число строк."""
+    start, end = _day_bounds(day)
+    request_rollups, edit_rollups = _build_rollups(start, end, user_id)
+    stale = []
+    for model in ROLLUP_MODELS:
+        qs = model.objects.filter(day=day)
+        stale.append(qs.filter(user_id=user_id) if user_id is not None else qs.filter(user__isnull=True))
+    _write(request_rollups, edit_rollups, *stale)
+    return len(request_rollups) + len(edit_rollups)
+
+
+def rebuild_rollups(start: date | None = None, end: date | None = None, *, chunk_days: int = 31) -> dict[str, int]:
+    """Пересобирает оба агрегата за [start, end] (по умолчанию — за всю историю V2).
+
+    Идёт окнами по chunk_days дней; окно пересчитывается одной транзакцией.
+    """
+    if start is None or end is None:
+        bounds = (InsuranceRequest.objects.filter(parser_confidence__isnull=False)
+                  .order_by('created_at').values_list('created_at', flat=True))
+        first, last = bounds.first(), bounds.last()
+        if first is None:
+            removed = sum(model.objects.all().delete()[0] for model in ROLLUP_MODELS)
+            return {'days': 0, 'rows': 0, 'removed': removed}
+        start = start or timezone.localdate(first)
+        end = end or timezone.localdate(last)
+
+    stats = {'days': 0, 'rows': 0, 'removed': 0}
+    cursor = start
+    while cursor <= end:
+        chunk_end = min(cursor + timedelta(days=chunk_days - 1), end)
+        range_start, _ = _day_bounds(cursor)
+        _, range_end = _day_bounds(chunk_end)
+        request_rollups, edit_rollups = _build_rollups(range_start, range_end, any_user=True)
+        stale = [model.objects.filter(day__gte=cursor, day__lte=chunk_end) for model in ROLLUP_MODELS]
+        stats['removed'] += sum(qs.count() for qs in stale)
+        _write(request_rollups, edit_rollups, *stale)
+        stats['days'] += (chunk_end - cursor).days + 1
+        stats['rows'] += len(request_rollups) + len(edit_rollups)
+        cursor = chunk_end + timedelta(days=1)
+    return stats
+
+
+# --- Инкрементальное обновление ---------------------------------------------
+
+_pending = threading.local()
+
+
+def _pending_buckets() -> set[BucketKey]:
+    buckets = getattr(_pending, 'buckets', None)
+    if buckets is None:
+        buckets = _pending.buckets = set()
+    return buckets
+
+
+def mark_bucket_dirty(created_at: datetime | None, user_id: int | None) -> None:
+    """Планирует пересчёт корзины после коммита текущей транзакции."""
+    key = bucket_key_for(created_at, user_id)
+    if key is None:
+        return
+    _pending_buckets().add(key)
+    transaction.on_commit(_flush_pending)
+
+
+def mark_requests_dirty(requests: Iterable[InsuranceRequest]) -> None:
+    """Пакетная пометка корзин созданных/изменённых V2-заявок."""
+    for req in requests:
+        if req.parser_confidence is not None:
+            mark_bucket_dirty(req.created_at, req.created_by_id)
+
+
+def _flush_pending() -> None:
+    # Как в analytics_rollups: первый on_commit забирает всё накопленное.
+    buckets = set(_pending_buckets())
+    _pending_buckets().clear()
+    for day, user_id in buckets:
+        try:
+            refresh_bucket(day, user_id)
+        except Exception:  # noqa: BLE001 — аналитика не должна ронять сохранение
+            logger.exception('ParserDailyRollup: failed to refresh bucket %s / user %s', day, user_id)
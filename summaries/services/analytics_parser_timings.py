@@ -0,0 +1,155 @@
+"""Аналитика скорости разбора Parser V2 по этапам.
+
+Источник — отчёт профилировщика raw_debug['timings'], который парсер пишет при
+PARSER_V2_PROFILING (см. insurance_requests/parsers/excel_v2/profiling.py) и
+который сохраняется в additional_data['parser_v2']['raw_debug'] заявки.
+
+Единица счёта — загрузка, а не заявка: все заявки партии (один файл на
+несколько объектов) несут один и тот же отчёт, такие дубли схлопываются по
+(имя файла, общее время разбора). Время этапа — собственное (self_ms), без
+вложенных этапов, поэтому доли этапов в сумме дают 100%.
+"""
+from datetime import timedelta
+
+from django.utils import timezone
+
+from insurance_requests.models import InsuranceRequest
+
+from .analytics_stats import percentile
+
+DEFAULT_DAYS = 30
+MAX_DAYS = 3650
+SLOWEST_LIMIT = 20
+
+# Подписи этапов (методы ExcelRequestParserV2); неизвестные показываются как есть.
+STAGE_LABELS = {
+    'parse': 'Сборка результата',
+    '_read_cells': 'Чтение книги',
+    '_rows': 'Индекс строк',
+    '_extract_client_name': 'Клиент',
+    '_extract_inn': 'ИНН',
+    '_extract_labeled_value': 'Поля по подписям',
+    '_extract_branch': 'Филиал',
+    '_extract_dfa_number': 'Номер ДФА',
+    '_extract_insurance_type': 'Вид страхования',
+    '_extract_insurance_period': 'Период страхования',
+    '_extract_objects': 'Объекты страхования',
+    '_detect_application_type': 'Тип заявки (юрлицо/ИП)',
+    '_extract_franchise_type': 'Франшиза',
+    '_extract_autostart': 'Автозапуск',
+    '_extract_transportation_required': 'Перевозка',
+    '_extract_transportation_details': 'Детали перевозки',
+    '_contains_any': 'Поиск маркеров',
+    '_extract_manufacturing_year': 'Год выпуска',
+    '_extract_asset_status': 'Статус имущества',
+    '_extract_telematics_complex': 'Телематика',
+    '_extract_insured_party': 'Страхователь',
+    '_extract_property_location_right_holder': 'Правообладатель места',
+    '_extract_premium_frequency': 'Периодичность взносов',
+    '_build_warnings': 'Предупреждения',
+    '_build_notes': 'Примечания',
+    '_calculate_confidence': 'Уверенность',
+}
+
+
+def parse_filters(params):
+    """Разобрать GET-параметр периода (?days=N)."""
+    try:
+        days = int(params.get('days', DEFAULT_DAYS))
+    except (TypeError, ValueError):
+        days = DEFAULT_DAYS
+    days = max(1, min(days, MAX_DAYS))
+    return {'days': days, 'since': timezone.now() - timedelta(days=days)}
+
+
+def _uploads(since):
+    """Профилированные загрузки периода: [(request_id, имя файла, timings)], без дублей партий."""
+    rows = (
+        InsuranceRequest.objects
+        .filter(parser_confidence__isnull=False, created_at__gte=since,
+                additional_data__parser_v2__raw_debug__has_key='timings')
+        .order_by('pk')
+        .values_list('pk', 'additional_data__parser_v2__source_file_name',
+                     'additional_data__parser_v2__raw_debug__timings')
+    )
+    seen = set()
+    uploads = []
+    for pk, file_name, timings in rows:
+        if not isinstance(timings, dict) or not isinstance(timings.get('stages'), dict):
+            continue
+        key = (file_name or '', timings.get('total_ms'))
+        if key in seen:
+            continue
+        seen.add(key)
+        uploads.append((pk, file_name or '', timings))
+    return uploads
+
+
+def _round(value, digits=1):
+    return round(value, digits) if value is not None else None
+
+
+def _stage_rows(uploads):
+    per_stage = {}
+    for _, _, timings in uploads:
+        for name, stage in timings['stages'].items():
+            bucket = per_stage.setdefault(name, {'self_ms': [], 'calls': 0, 'cells': 0, 'regex': 0})
+            bucket['self_ms'].append(float(stage.get('self_ms') or 0))
+            bucket['calls'] += int(stage.get('calls') or 0)
+            bucket['cells'] += int(stage.get('cells') or 0)
+            bucket['regex'] += int(stage.get('regex') or 0)
+
+    grand_total = sum(sum(bucket['self_ms']) for bucket in per_stage.values())
+    out = []
+    for name, bucket in per_stage.items():
+        total = sum(bucket['self_ms'])
+        uploads_count = len(bucket['self_ms'])
+        out.append({
+            'stage': name,
+            'label': STAGE_LABELS.get(name, name),
+            'uploads': uploads_count,
+            'calls': bucket['calls'],
+            'total_ms': _round(total),
+            'avg_ms': _round(total / uploads_count, 2),
+            'p95_ms': _round(percentile(bucket['self_ms'], 0.95), 2),
+            'max_ms': _round(max(bucket['self_ms']), 2),
+            'share_percent': _round(total / grand_total * 100) if grand_total else 0.0,
+            'avg_cells': round(bucket['cells'] / uploads_count),
+            'avg_regex': round(bucket['regex'] / uploads_count),
+        })
+    return sorted(out, key=lambda r: (-r['total_ms'], r['stage']))
+
+
+def _slowest_uploads(uploads):
+    out = []
+    for pk, file_name, timings in uploads:
+        stages = timings['stages']
+        slowest = max(stages, key=lambda name: stages[name].get('self_ms') or 0, default='')
+        out.append({
+            'request_id': pk,
+            'file_name': file_name,
+            'total_ms': _round(timings.get('total_ms') or 0),
+            'cells_scanned': timings.get('cells_scanned') or 0,
+            'regex_evals': timings.get('regex_evals') or 0,
+            'slowest_stage': STAGE_LABELS.get(slowest, slowest),
+            'slowest_stage_ms': _round((stages.get(slowest) or {}).get('self_ms') or 0),
+        })
+    out.sort(key=lambda r: -r['total_ms'])
+    return out[:SLOWEST_LIMIT]
+
+
+def build_payload(filters):
+    """Контекст страницы: KPI, этапы по суммарному времени и самые медленные загрузки."""
+    uploads = _uploads(filters['since'])
+    totals_ms = [float(timings.get('total_ms') or 0) for _, _, timings in uploads]
+    return {
+        'filters': filters,
+        'totals': {
+            'uploads': len(uploads),
+            'avg_ms': _round(sum(totals_ms) / len(totals_ms)) if totals_ms else None,
+            'p95_ms': _round(percentile(totals_ms, 0.95)),
+            'max_ms': _round(max(totals_ms, default=None)),
+        },
+        'stages': _stage_rows(uploads),
+        'slowest': _slowest_uploads(uploads),
+    }
@@ -1,6 +1,7 @@
 """Аналитика правок ПОСЛЕ создания заявки (контроль операторов и процесса).
 
-Источник — журнал django-easy-audit (CRUDEvent, UPDATE по InsuranceRequest).
+Источник — журнал django-easy-audit (CRUDEvent, UPDATE по InsuranceRequest),
+через индекс изменённых полей FieldChange.
 В отличие от RequestFieldEdit (правки на входе = чистый сигнал качества
 парсера), здесь фиксируются изменения уже сохранённой заявки:
 - операционный дрейф — что и кто меняет после создания;
@@ -15,10 +16,13 @@
 import json
 from datetime import timedelta
 
+from django.contrib.auth.models import User
+from django.db.models import BigIntegerField, Count, F, OuterRef, Subquery
+from django.db.models.functions import Cast
 from django.utils import timezone
 
 from insurance_requests.edit_tracking import get_object_field_meta, get_scalar_field_meta
-from insurance_requests.models import InsuranceRequest, RequestFieldEdit
+from insurance_requests.models import FieldChange, InsuranceRequest, RequestFieldEdit
 
 DEFAULT_DAYS = 90
 MAX_DAYS = 3650
@@ -49,11 +53,11 @@ def _field_labels():
     return labels
 
 
-def _editor_label(event):
-    if not event.user_id:
+def _editor_label(user):
+    if user is None:
         return 'Без автора'
-    full = f"{(event.user.last_name or '').strip()} {(event.user.first_name or '').strip()}".strip()
-    return full or event.user.username
+    full = f"{(user.last_name or '').strip()} {(user.first_name or '').strip()}".strip()
+    return full or user.username
 
 
 def _empty_payload(filters, audit_available):
@@ -71,8 +75,24 @@ def _empty_payload(filters, audit_available):
     }
 
 
+def _change_values(event, field_name):
+    """Пара (было, стало) поля из CRUDEvent.changed_fields."""
+    try:
+        delta = json.loads(event.changed_fields) if event and event.changed_fields else {}
+    except (TypeError, ValueError):
+        delta = {}
+    change = delta.get(field_name, '') if isinstance(delta, dict) else ''
+    if isinstance(change, list) and len(change) == 2:
+        return change[0], change[1]
+    return '', change
+
+
 def build_payload(filters):
-    """Собрать дашборд правок после создания за выбранный период."""
+    """Собрать дашборд правок после создания за выбранный период.
+
+    Счётчики — агрегаты по индексу FieldChange; JSON событий разбирается только
+    для строк списка «подозрений» (значения было/стало).
+    """
     try:
         from django.contrib.contenttypes.models import ContentType
         from easyaudit.models import CRUDEvent
@@ -81,110 +101,106 @@ def build_payload(filters):
 
     since = filters['since']
     labels = _field_labels()
-    tracked = set(labels)
-
-    # V2-заявки: id → служебные поля для атрибуции и отсечения хвоста создания.
-    req_meta = {
-        row['id']: row
-        for row in InsuranceRequest.objects.filter(parser_confidence__isnull=False).values(
-            'id', 'created_at'
-        )
-    }
-    if not req_meta:
+    tracked = set(labels) - IGNORED_FIELDS
+
+    # Правки V2-заявок позже хвоста создания: created_at заявки подтягивается
+    # подзапросом, у не-V2 заявок он NULL и сравнение отсекает строку.
+    request_created = InsuranceRequest.objects.filter(
+        pk=Cast(OuterRef('object_id'), BigIntegerField()), parser_confidence__isnull=False,
+    ).values('created_at')[:1]
+    changes = (
+        FieldChange.objects
+        .filter(content_type=ContentType.objects.get_for_model(InsuranceRequest),
+                changed_at__gte=since, field_name__in=tracked)
+        .annotate(request_created_at=Subquery(request_created))
+        .filter(changed_at__gt=F('request_created_at') + POST_CREATE_EPSILON)
+    )
+
+    totals = changes.aggregate(
+        total_post_edits=Count('id'),
+        requests_with_post_edits=Count('object_id', distinct=True),
+    )
+    if not totals['total_post_edits']:
         return _empty_payload(filters, audit_available=True)
 
+    by_field_rows = [
+        {'field_name': row['field_name'], 'field_label': labels.get(row['field_name'], row['field_name']),
+         'edits': row['edits'], 'requests': row['requests']}
+        for row in changes.values('field_name')
+        .annotate(edits=Count('id'), requests=Count('object_id', distinct=True))
+        .order_by('-requests', '-edits')[:TOP_LIMIT]
+    ]
+
+    # Редакторы с одинаковой подписью (и «Без автора») сливаются, как в списке на экране
+    editor_rows = list(
+        changes.values('user_id')
+        .annotate(edits=Count('id'), requests=Count('object_id', distinct=True))
+        .order_by()
+    )
+    users = User.objects.in_bulk([row['user_id'] for row in editor_rows if row['user_id']])
+    by_editor = {}
+    for row in editor_rows:
+        editor = _editor_label(users.get(row['user_id']))
+        be = by_editor.setdefault(editor, {'edits': 0, 'requests': 0})
+        be['edits'] += row['edits']
+        be['requests'] += row['requests']
+    if len(by_editor) < len(editor_rows):
+        # Точное число заявок для слитых подписей — по парам (редактор, заявка)
+        merged = {}
+        for user_id, object_id in changes.values_list('user_id', 'object_id').distinct():
+            merged.setdefault(_editor_label(users.get(user_id)), set()).add(object_id)
+        for editor, object_ids in merged.items():
+            by_editor[editor]['requests'] = len(object_ids)
+    by_editor_rows = sorted(
+        ({'editor': editor, 'edits': data['edits'], 'requests': data['requests']}
+         for editor, data in by_editor.items()),
+        key=lambda r: (-r['edits'], -r['requests']),
+    )[:TOP_LIMIT]
+
     # (заявка, поле), которые правили на входе — для отсева из «подозрений».
     intake_pairs = set(
-        RequestFieldEdit.objects.filter(request_id__in=req_meta.keys())
+        RequestFieldEdit.objects.filter(request__parser_confidence__isnull=False)
         .values_list('request_id', 'field_name')
     )
 
-    events = (
-        CRUDEvent.objects
-        .filter(content_type=ContentType.objects.get_for_model(InsuranceRequest),
-                event_type=CRUDEvent.UPDATE, datetime__gte=since)
-        .select_related('user')
-        .order_by('-datetime')
-    )
-
-    by_field = {}
-    by_editor = {}
-    requests_with_post = set()
-    total_post_edits = 0
-    suspected = []
+    # Не правили на входе, но изменили позже → кандидат в пропущенные ошибки
+    # парсера. Идём от свежих правок, поэтому значения — последние.
+    suspected_rows = []
     seen_pairs = set()
-
-    for event in events:
-        try:
-            rid = int(event.object_id)
-        except (TypeError, ValueError):
-            continue
-        meta = req_meta.get(rid)
-        if not meta:
-            continue
-        created = meta['created_at']
-        if created and event.datetime and event.datetime <= created + POST_CREATE_EPSILON:
-            continue  # хвост создания, не поздняя правка
-        try:
-            delta = json.loads(event.changed_fields) if event.changed_fields else {}
-        except (TypeError, ValueError):
-            continue
-        if not isinstance(delta, dict):
+    for object_id, field_name, changed_at, user_id, event_id in (
+        changes.order_by('-changed_at', '-event_id')
+        .values_list('object_id', 'field_name', 'changed_at', 'user_id', 'event_id')
+        .iterator()
+    ):
+        pair = (int(object_id), field_name)
+        if pair in seen_pairs:
             continue
+        seen_pairs.add(pair)
+        if pair not in intake_pairs:
+            suspected_rows.append((pair, changed_at, user_id, event_id))
+            if len(suspected_rows) >= SUSPECTED_LIMIT:
+                break
 
-        editor = _editor_label(event)
-        for field_name, change in delta.items():
-            if field_name in IGNORED_FIELDS or field_name not in tracked:
-                continue
-            if isinstance(change, list) and len(change) == 2:
-                old_value, new_value = change
-            else:
-                old_value, new_value = '', change
-
-            total_post_edits += 1
-            requests_with_post.add(rid)
-            bf = by_field.setdefault(field_name, {'edits': 0, 'requests': set()})
-            bf['edits'] += 1
-            bf['requests'].add(rid)
-            be = by_editor.setdefault(editor, {'edits': 0, 'requests': set()})
-            be['edits'] += 1
-            be['requests'].add(rid)
-
-            pair = (rid, field_name)
-            if pair in seen_pairs:
-                continue
-            seen_pairs.add(pair)
-            # Не правили на входе, но изменили позже → кандидат в пропущенные
-            # ошибки парсера (idём от свежих событий, поэтому значения — последние).
-            if pair not in intake_pairs and len(suspected) < SUSPECTED_LIMIT:
-                suspected.append({
-                    'request_id': rid,
-                    'field_name': field_name,
-                    'field_label': labels.get(field_name, field_name),
-                    'old_value': old_value,
-                    'new_value': new_value,
-                    'editor': editor,
-                    'changed_at': event.datetime,
-                })
-
-    by_field_rows = sorted(
-        ({'field_name': name, 'field_label': labels.get(name, name),
-          'edits': data['edits'], 'requests': len(data['requests'])}
-         for name, data in by_field.items()),
-        key=lambda r: (-r['requests'], -r['edits']),
-    )[:TOP_LIMIT]
-    by_editor_rows = sorted(
-        ({'editor': editor, 'edits': data['edits'], 'requests': len(data['requests'])}
-         for editor, data in by_editor.items()),
-        key=lambda r: (-r['edits'], -r['requests']),
-    )[:TOP_LIMIT]
+    events = CRUDEvent.objects.in_bulk([row[3] for row in suspected_rows])
+    suspected = []
+    for (rid, field_name), changed_at, user_id, event_id in suspected_rows:
+        old_value, new_value = _change_values(events.get(event_id), field_name)
+        suspected.append({
+            'request_id': rid,
+            'field_name': field_name,
+            'field_label': labels.get(field_name, field_name),
+            'old_value': old_value,
+            'new_value': new_value,
+            'editor': _editor_label(users.get(user_id)),
+            'changed_at': changed_at,
+        })
 
     return {
         'filters': filters,
         'audit_available': True,
         'totals': {
-            'requests_with_post_edits': len(requests_with_post),
-            'total_post_edits': total_post_edits,
+            'requests_with_post_edits': totals['requests_with_post_edits'],
+            'total_post_edits': totals['total_post_edits'],
             'suspected_count': len(suspected),
         },
         'by_field': by_field_rows,
@@ -0,0 +1,302 @@
+"""Дневные rollup’ы аналитики сотрудников (ManagerDailyRollup).
+
+Корзина пересчёта — (локальный день создания заявки, created_by). Внутри неё
+строки дополнительно разбиты по branch / insurance_type / deal_status, чтобы
+фильтры дашборда применялись к агрегатам без сырых заявок.
+
+Инкрементальное обновление: сигналы сохранения/удаления заявок, сводов и
+предложений помечают корзину «грязной», после коммита транзакции корзина
+пересчитывается целиком (delete + bulk_create) — это дёшево, т.к. в корзине
+заявки одного сотрудника за один день. Изменения, обходящие сигналы
+(queryset.update, смена created_by/created_at задним числом), догоняет команда
+rebuild_manager_rollups (--reconcile).
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Iterable
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from insurance_requests.models import InsuranceRequest
+
+from ..models import ManagerDailyRollup
+from .analytics_managers import (
+    ACTIVE_REQUEST_STATUSES,
+    ACTIVE_SUMMARY_STATUSES,
+    TIME_TO_KEYS,
+    WEEKEND_DAYS,
+    _accepted_premium,
+    _accepted_sum,
+    _completeness_counters,
+    _empty_cycle_histogram,
+    _is_late,
+    _portfolio_counters,
+    _summary_time_to_metrics,
+    cycle_histogram_bucket,
+)
+
+logger = logging.getLogger(__name__)
+
+BucketKey = tuple[date, int | None]
+
+# Поля, сравниваемые при сверке (всё, кроме служебных id/refreshed_at).
+_COMPARE_FIELDS = tuple(
+    f.name for f in ManagerDailyRollup._meta.concrete_fields
+    if f.name not in {'id', 'refreshed_at'}
+)
+
+
+def bucket_key_for(created_at: datetime | None, user_id: int | None) -> BucketKey | None:
+    if created_at is None:
+        return None
+    return timezone.localdate(created_at), user_id
+
+
+def _day_bounds(day: date) -> tuple[datetime, datetime]:
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(day, time.min), tz)
+    return start, start + timedelta(days=1)
+
+
+def _requests_for_range(start: datetime, end: datetime, user_id: int | None = None, *, any_user: bool = False):
+    qs = (
+        InsuranceRequest.objects
+        .filter(created_at__gte=start, created_at__lt=end)
+        .select_related('summary')
+        .prefetch_related('summary__offers')
+        .order_by('created_at')
+    )
+    if not any_user:
+        qs = qs.filter(created_by_id=user_id) if user_id is not None else qs.filter(created_by__isnull=True)
+    return qs
+
+
+def _build_rollups(requests: Iterable[InsuranceRequest]) -> list[ManagerDailyRollup]:
+    """Собирает несохранённые ManagerDailyRollup по списку заявок."""
+    groups: dict[tuple, list[InsuranceRequest]] = defaultdict(list)
+    for req in requests:
+        key = bucket_key_for(req.created_at, req.created_by_id)
+        if key is None:
+            continue
+        groups[key + (req.branch or '', req.insurance_type or '', req.deal_status or '')].append(req)
+
+    rollups = []
+    for (day, user_id, branch, insurance_type, deal_status), reqs in sorted(
+        groups.items(), key=lambda kv: (kv[0][0], kv[0][1] or 0, kv[0][2:])
+    ):
+        rollups.append(_rollup_for_group(day, user_id, branch, insurance_type, deal_status, reqs))
+    return rollups
+
+
+def _rollup_for_group(day, user_id, branch, insurance_type, deal_status, reqs) -> ManagerDailyRollup:
+    summaries = []
+    for req in reqs:
+        try:
+            summaries.append(req.summary)
+        except InsuranceRequest.summary.RelatedObjectDoesNotExist:
+            continue
+
+    accepted = [s for s in summaries if s.status == 'completed_accepted']
+    time_to_totals: dict[str, list] = {key: [0.0, 0] for key in TIME_TO_KEYS}
+    histogram = _empty_cycle_histogram()
+    for summary in summaries:
+        metrics = _summary_time_to_metrics(summary)
+        for key in TIME_TO_KEYS:
+            value = metrics[key]
+            if value is None:
+                continue
+            time_to_totals[key][0] += value
+            time_to_totals[key][1] += 1
+        if metrics['total_cycle_h'] is not None:
+            histogram[cycle_histogram_bucket(metrics['total_cycle_h'])] += 1
+
+    portfolio = _portfolio_counters(reqs)
+    created = [r.created_at for r in reqs if r.created_at]
+
+    return ManagerDailyRollup(
+        day=day,
+        user_id=user_id,
+        branch=branch,
+        insurance_type=insurance_type,
+        deal_status=deal_status,
+        requests_count=len(reqs),
+        summaries_count=len(summaries),
+        accepted_count=len(accepted),
+        rejected_count=sum(1 for s in summaries if s.status == 'completed_rejected'),
+        active_requests_count=sum(1 for r in reqs if r.status in ACTIVE_REQUEST_STATUSES),
+        active_summaries_count=sum(1 for s in summaries if s.status in ACTIVE_SUMMARY_STATUSES),
+        premium_total=sum((_accepted_premium(s) for s in accepted), Decimal('0')),
+        sum_total=sum((_accepted_sum(s) for s in accepted), Decimal('0')),
+        time_to_totals={k: v for k, v in time_to_totals.items() if v[1]},
+        cycle_histogram=histogram,
+        prolongation_count=portfolio['prolongation_count'],
+        flag_counts=portfolio['flag_counts'],
+        late_count=sum(1 for dt in created if _is_late(dt)),
+        weekend_count=sum(1 for dt in created if dt.weekday() in WEEKEND_DAYS),
+        first_request_at=min(created) if created else None,
+        last_request_at=max(created) if created else None,
+        **_completeness_counters(reqs),
+    )
+
+
+def _bucket_qs(day: date, user_id: int | None):
+    qs = ManagerDailyRollup.objects.filter(day=day)
+    return qs.filter(user_id=user_id) if user_id is not None else qs.filter(user__isnull=True)
+
+
+def refresh_bucket(day: date, user_id: int | None) -> int:
+    """Пересчитывает одну корзину (день, сотрудник). Возвращает число строк."""
+    start, end = _day_bounds(day)
+    rollups = _build_rollups(_requests_for_range(start, end, user_id))
+    with transaction.atomic():
+        _bucket_qs(day, user_id).delete()
+        ManagerDailyRollup.objects.bulk_create(rollups)
+    return len(rollups)
+
+
+def _rollup_signature(rollup: ManagerDailyRollup) -> tuple:
+    values = []
+    for name in _COMPARE_FIELDS:
+        value = getattr(rollup, 'user_id' if name == 'user' else name)
+        if isinstance(value, Decimal):
+            value = value.quantize(Decimal('0.01'))
+        elif isinstance(value, dict):
+            value = sorted((k, tuple(v) if isinstance(v, list) else v) for k, v in value.items())
+        elif isinstance(value, list):
+            value = tuple(value)
+        values.append(value)
+    return tuple(values)
+
+
+def rebuild_rollups(
+    start: date | None = None,
+    end: date | None = None,
+    *,
+    reconcile: bool = False,
+    dry_run: bool = False,
+    chunk_days: int = 31,
+) -> dict[str, int]:
+    """Пересобирает rollup’ы за [start, end] (по умолчанию — за всю историю).
+
+    Идёт окнами по chunk_days дней, в каждом окне заявки читаются одним
+    запросом. В режиме reconcile перезаписываются только корзины, которые
+    разошлись с сырыми данными; dry_run только считает расхождения.
+    """
+    if start is None or end is None:
+        bounds = InsuranceRequest.objects.order_by('created_at').values_list('created_at', flat=True)
+        first, last = bounds.first(), bounds.last()
+        if first is None:
+            stale = ManagerDailyRollup.objects.all()
+            removed = stale.count()
+            if not dry_run:
+                stale.delete()
+            return {'buckets': 0, 'rows': 0, 'changed': removed}
+        start = start or timezone.localdate(first)
+        end = end or timezone.localdate(last)
+
+    stats = {'buckets': 0, 'rows': 0, 'changed': 0}
+    cursor = start
+    while cursor <= end:
+        chunk_end = min(cursor + timedelta(days=chunk_days - 1), end)
+        range_start, _ = _day_bounds(cursor)
+        _, range_end = _day_bounds(chunk_end)
+
+        fresh: dict[BucketKey, list[ManagerDailyRollup]] = defaultdict(list)
+        for rollup in _build_rollups(_requests_for_range(range_start, range_end, any_user=True)):
+            fresh[(rollup.day, rollup.user_id)].append(rollup)
+
+        stored: dict[BucketKey, list[ManagerDailyRollup]] = defaultdict(list)
+        for rollup in ManagerDailyRollup.objects.filter(day__gte=cursor, day__lte=chunk_end):
+            stored[(rollup.day, rollup.user_id)].append(rollup)
+
+        for key in set(fresh) | set(stored):
+            stats['buckets'] += 1
+            stats['rows'] += len(fresh.get(key, []))
+            if reconcile:
+                fresh_sig = sorted(_rollup_signature(r) for r in fresh.get(key, []))
+                stored_sig = sorted(_rollup_signature(r) for r in stored.get(key, []))
+                if fresh_sig == stored_sig:
+                    continue
+            stats['changed'] += 1
+            if dry_run:
+                continue
+            with transaction.atomic():
+                _bucket_qs(*key).delete()
+                ManagerDailyRollup.objects.bulk_create(fresh.get(key, []))
+
+        cursor = chunk_end + timedelta(days=1)
+    return stats
+
+
+# --- Инкрементальное обновление из сигналов ---------------------------------
+
+_pending = threading.local()
+
+
+def _pending_state() -> dict[str, set]:
+    state = getattr(_pending, 'state', None)
+    if state is None:
+        state = _pending.state = {'buckets': set(), 'requests': set(), 'summaries': set()}
+    return state
+
+
+def mark_bucket_dirty(created_at: datetime | None, user_id: int | None) -> None:
+    """Планирует пересчёт корзины после коммита текущей транзакции."""
+    key = bucket_key_for(created_at, user_id)
+    if key is None:
+        return
+    _pending_state()['buckets'].add(key)
+    transaction.on_commit(_flush_pending)
+
+
+def mark_request_dirty(request_id: int | None) -> None:
+    """То же по id заявки: корзина вычисляется при сбросе одним запросом."""
+    mark_many_dirty(request_ids=[request_id])
+
+
+def mark_summary_dirty(summary_id: int | None) -> None:
+    """То же по id свода (для предложений)."""
+    mark_many_dirty(summary_ids=[summary_id])
+
+
+def mark_many_dirty(*, request_ids: Iterable[int | None] = (), summary_ids: Iterable[int | None] = ()) -> None:
+    """Пакетная пометка для массовых операций в обход сигналов."""
+    state = _pending_state()
+    added = False
+    for kind, ids in (('requests', request_ids), ('summaries', summary_ids)):
+        for pk in ids:
+            if pk:
+                state[kind].add(pk)
+                added = True
+    if added:
+        transaction.on_commit(_flush_pending)
+
+
+def _flush_pending() -> None:
+    # Каждый save регистрирует свой on_commit; первый вызов забирает всё
+    # накопленное, остальные находят пустое состояние и ничего не делают.
+    state = _pending_state()
+    buckets, request_ids, summary_ids = (set(state[k]) for k in ('buckets', 'requests', 'summaries'))
+    for pending in state.values():
+        pending.clear()
+    if not (buckets or request_ids or summary_ids):
+        return
+    if request_ids or summary_ids:
+        for created_at, user_id in InsuranceRequest.objects.filter(
+            Q(pk__in=request_ids) | Q(summary__pk__in=summary_ids)
+        ).values_list('created_at', 'created_by_id'):
+            key = bucket_key_for(created_at, user_id)
+            if key is not None:
+                buckets.add(key)
+    for day, user_id in buckets:
+        try:
+            refresh_bucket(day, user_id)
+        except Exception:  # noqa: BLE001 — аналитика не должна ронять сохранение
+            logger.exception('ManagerDailyRollup: failed to refresh bucket %s / user %s', day, user_id)
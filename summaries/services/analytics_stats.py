@@ -0,0 +1,16 @@
+"""Общие статистические функции страниц аналитики."""
+from __future__ import annotations
+
+
+def percentile(values: list[float], q: float) -> float | None:
+    """Линейная интерполяция p-квантили. q ∈ [0, 1]."""
+    if not values:
+        return None
+    if len(values) == 1:
+        return float(values[0])
+    sorted_v = sorted(values)
+    pos = q * (len(sorted_v) - 1)
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_v) - 1)
+    frac = pos - lo
+    return float(sorted_v[lo] + (sorted_v[hi] - sorted_v[lo]) * frac)
@@ -3,10 +3,10 @@
 """
 
 import logging
-import re
 from typing import Optional, List, Tuple
 from difflib import SequenceMatcher
 
+from ..company_registry import normalize_for_lookup
 from ..constants import get_matchable_company_names, normalize_company_name
 
 
@@ -137,19 +137,7 @@ class CompanyNameMatcher:
         Returns:
             Нормализованное название для сопоставления
         """
-        if not name:
-            return ''
-        
-        # Приводим к нижнему регистру и убираем лишние пробелы
-        normalized = name.lower().strip()
-        
-        # Убираем множественные пробелы
-        normalized = re.sub(r'\s+', ' ', normalized)
-        
-        # Убираем некоторые символы, которые могут мешать сопоставлению
-        normalized = re.sub(r'["\'\-\.]', '', normalized)
-        
-        return normalized
+        return normalize_for_lookup(name)
     
     def get_matching_statistics(self, input_names: List[str]) -> dict:
         """
@@ -2815,7 +2815,8 @@ class ExcelResponseProcessor:
                 cell_address = f"{column_letter}{row_num}"
                 mappings[year_key][field_name] = cell_address
         
-        self.logger.debug(f"Сгенерированы маппинги для {len(mappings)} лет: {list(mappings.keys())}")
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Сгенерированы маппинги для %s лет: %s", len(mappings), list(mappings))
         return mappings
     
     def _detect_available_years(self, worksheet) -> List[int]:
@@ -2833,13 +2834,13 @@ class ExcelResponseProcessor:
         year_config = self.CELL_MAPPING['year_rows']
         year_column = year_config['columns']['year']
         
-        self.logger.info(f"Начинаем обнаружение данных лет в строках {year_config['start_row']}-{year_config['end_row']}")
+        self.logger.info("Начинаем обнаружение данных лет в строках %s-%s", year_config['start_row'], year_config['end_row'])
         
         for row_num in range(year_config['start_row'], year_config['end_row'] + 1):
             year_cell = f"{year_column}{row_num}"
             year_value = self._get_cell_value(worksheet, year_cell)
             
-            self.logger.debug(f"Строка {row_num}: проверяем ячейку {year_cell}, значение: '{year_value}'")
+            self.logger.debug("Строка %s: проверяем ячейку %s, значение: '%s'", row_num, year_cell, year_value)
             
             # Проверяем, есть ли валидное значение года
             if year_value is not None and str(year_value).strip():
@@ -2847,22 +2848,22 @@ class ExcelResponseProcessor:
                     year_int = int(year_value)
                     if 1 <= year_int <= 10:  # Разумные ограничения для года страхования
                         available_rows.append(row_num)
-                        self.logger.info(f"Строка {row_num}: найден валидный год страхования {year_int}")
+                        self.logger.info("Строка %s: найден валидный год страхования %s", row_num, year_int)
                     else:
                         skipped_rows.append(row_num)
-                        self.logger.warning(f"Строка {row_num}: год {year_int} вне допустимого диапазона (1-10), строка пропущена")
+                        self.logger.warning("Строка %s: год %s вне допустимого диапазона (1-10), строка пропущена", row_num, year_int)
                 except (ValueError, TypeError):
                     skipped_rows.append(row_num)
-                    self.logger.warning(f"Строка {row_num}: некорректное значение года '{year_value}', строка пропущена")
+                    self.logger.warning("Строка %s: некорректное значение года '%s', строка пропущена", row_num, year_value)
                     continue
             else:
                 skipped_rows.append(row_num)
-                self.logger.debug(f"Строка {row_num}: пустое значение года, строка пропущена")
+                self.logger.debug("Строка %s: пустое значение года, строка пропущена", row_num)
         
-        self.logger.info(f"Обнаружение завершено: найдено {len(available_rows)} строк с данными, пропущено {len(skipped_rows)} строк")
-        self.logger.info(f"Строки с данными: {available_rows}")
+        self.logger.info("Обнаружение завершено: найдено %s строк с данными, пропущено %s строк", len(available_rows), len(skipped_rows))
+        self.logger.info("Строки с данными: %s", available_rows)
         if skipped_rows:
-            self.logger.info(f"Пропущенные строки: {skipped_rows}")
+            self.logger.info("Пропущенные строки: %s", skipped_rows)
         
         return available_rows
     
@@ -2899,11 +2900,11 @@ class ExcelResponseProcessor:
         years_processed = []
         processing_errors = []
         
-        self.logger.info(f"Будет обработано {len(available_rows)} строк с данными: {available_rows}")
+        self.logger.info("Будет обработано %s строк с данными: %s", len(available_rows), available_rows)
         
         for row_num in available_rows:
             try:
-                self.logger.debug(f"Обрабатываем строку {row_num}")
+                self.logger.debug("Обрабатываем строку %s", row_num)
                 
                 # Создаем маппинг для конкретной строки
                 row_mapping = {}
@@ -2911,22 +2912,22 @@ class ExcelResponseProcessor:
                     cell_address = f"{column_letter}{row_num}"
                     row_mapping[field_name] = cell_address
                 
-                self.logger.debug(f"Строка {row_num}: маппинг ячеек создан - {row_mapping}")
+                self.logger.debug("Строка %s: маппинг ячеек создан - %s", row_num, row_mapping)
                 
                 # Извлекаем данные для этой строки
                 year_data = self._extract_year_data(worksheet, row_mapping, row_num)
                 if year_data:
                     all_years_data.append(year_data)
                     years_processed.append(year_data['year'])
-                    self.logger.info(f"Строка {row_num}: успешно извлечены данные для {year_data['year']} года (сумма: {year_data['insurance_sum']}, премия: {year_data['premium']})")
+                    self.logger.info("Строка %s: успешно извлечены данные для %s года (сумма: %s, премия: %s)", row_num, year_data['year'], year_data['insurance_sum'], year_data['premium'])
                 else:
-                    self.logger.warning(f"Строка {row_num}: данные не извлечены (пустая строка)")
+                    self.logger.warning("Строка %s: данные не извлечены (пустая строка)", row_num)
                     
             except RowProcessingError as e:
                 # Логируем ошибку обработки строки и добавляем строку в пропущенные
                 error_info = f"Строка {row_num}: {str(e)}"
                 processing_errors.append(error_info)
-                self.logger.error(f"Ошибка обработки - {error_info}")
+                self.logger.error("Ошибка обработки - %s", error_info)
                 
                 if row_num in available_rows:
                     available_rows.remove(row_num)
@@ -2943,14 +2944,14 @@ class ExcelResponseProcessor:
         }
         
         # Итоговое логирование
-        self.logger.info(f"Извлечение данных завершено:")
-        self.logger.info(f"  - Всего проверено строк: {total_rows_checked}")
-        self.logger.info(f"  - Успешно обработано лет: {len(all_years_data)}")
-        self.logger.info(f"  - Годы страхования: {sorted(years_processed) if years_processed else 'нет'}")
-        self.logger.info(f"  - Пропущено строк: {len(rows_skipped)} {rows_skipped if rows_skipped else ''}")
+        self.logger.info("Извлечение данных завершено:")
+        self.logger.info("  - Всего проверено строк: %s", total_rows_checked)
+        self.logger.info("  - Успешно обработано лет: %s", len(all_years_data))
+        self.logger.info("  - Годы страхования: %s", sorted(years_processed) if years_processed else 'нет')
+        self.logger.info("  - Пропущено строк: %s %s", len(rows_skipped), rows_skipped if rows_skipped else '')
         
         if processing_errors:
-            self.logger.warning(f"  - Ошибки обработки ({len(processing_errors)}): {processing_errors}")
+            self.logger.warning("  - Ошибки обработки (%s): %s", len(processing_errors), processing_errors)
         
         return {
             'years': all_years_data,
@@ -3201,7 +3202,7 @@ class ExcelResponseProcessor:
             # Проверяем, есть ли год в ячейке
             year_value = self._get_cell_value(worksheet, year_mapping['year'])
             if not year_value:
-                self.logger.debug(f"Строка {row_number}: год не указан, пропускаем")
+                self.logger.debug("Строка %s: год не указан, пропускаем", row_number)
                 return None
             
             # Извлекаем основные данные года с обработкой ошибок для конкретной строки
@@ -3262,7 +3263,7 @@ class ExcelResponseProcessor:
                     required=False
                 )
             
-            self.logger.debug(f"Строка {row_number}: извлечены данные для {year_data['year']} года")
+            self.logger.debug("Строка %s: извлечены данные для %s года", row_number, year_data['year'])
             return year_data
             
         except RowProcessingError:
@@ -3271,7 +3272,7 @@ class ExcelResponseProcessor:
         except Exception as e:
             # Неожиданные ошибки оборачиваем в RowProcessingError
             error_msg = f"Неожиданная ошибка при обработке данных: {str(e)}"
-            self.logger.error(f"Строка {row_number}: {error_msg}")
+            self.logger.error("Строка %s: %s", row_number, error_msg)
             raise RowProcessingError(row_number, 'общая обработка', error_msg)
     
     def _get_cell_value(self, worksheet, cell_address: str):
@@ -3290,7 +3291,7 @@ class ExcelResponseProcessor:
             value = cell.value
             return value
         except Exception as e:
-            self.logger.warning(f"Ошибка при чтении ячейки {cell_address}: {str(e)}")
+            self.logger.warning("Ошибка при чтении ячейки %s: %s", cell_address, e)
             return None
     
     def _parse_year(self, value, cell_address: str) -> int:
@@ -0,0 +1,90 @@
+"""Массовая смена статусов с сохранением истории StatusEvent.
+
+`queryset.update(status=...)` обходит pre_save/post_save из summaries.signals,
+поэтому массовые операции не оставляли следа в StatusEvent. Здесь то же
+самое делается пакетно: старые статусы читаются одним запросом, UPDATE идёт
+пачками по pk, события пишутся одним bulk_create. Дневные rollup’ы аналитики
+помечаются к пересчёту так же, как это делают сигналы.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import models, transaction
+
+from insurance_requests.models import InsuranceRequest
+
+from .._current_user import get_current_user
+from ..models import InsuranceSummary, StatusEvent
+from . import analytics_rollups
+
+logger = logging.getLogger(__name__)
+
+UPDATE_CHUNK_SIZE = 500
+
+
+def bulk_transition_status(
+    queryset: models.QuerySet,
+    to_status: str,
+    *,
+    changed_by=None,
+    note: str = '',
+    extra_updates: dict[str, Any] | None = None,
+) -> int:
+    """Переводит объекты queryset в to_status и пишет StatusEvent на каждый.
+
+    Объекты, уже находящиеся в to_status, не трогаются. extra_updates
+    применяются в том же UPDATE (например, сброс выбранной СК). changed_by по
+    умолчанию берётся из thread-local текущего пользователя, как в сигналах.
+    Возвращает число переведённых объектов.
+    """
+    model = queryset.model
+    if model not in (InsuranceRequest, InsuranceSummary):
+        raise ValueError(f'StatusEvent не ведётся для модели {model.__name__}')
+    if changed_by is None:
+        changed_by = get_current_user()
+
+    with transaction.atomic():
+        previous = list(
+            queryset.exclude(status=to_status)
+            .select_for_update()
+            .order_by('pk')
+            .values_list('pk', 'status')
+        )
+        if not previous:
+            return 0
+
+        pks = [pk for pk, _ in previous]
+        for start in range(0, len(pks), UPDATE_CHUNK_SIZE):
+            model.objects.filter(pk__in=pks[start:start + UPDATE_CHUNK_SIZE]).update(
+                status=to_status, **(extra_updates or {}),
+            )
+
+        content_type = ContentType.objects.get_for_model(model)
+        StatusEvent.objects.bulk_create(
+            [
+                StatusEvent(
+                    content_type=content_type,
+                    object_id=pk,
+                    from_status=old_status or '',
+                    to_status=to_status,
+                    changed_by=changed_by,
+                    note=note,
+                )
+                for pk, old_status in previous
+            ],
+            batch_size=UPDATE_CHUNK_SIZE,
+        )
+
+        if model is InsuranceSummary:
+            analytics_rollups.mark_many_dirty(summary_ids=pks)
+        else:
+            analytics_rollups.mark_many_dirty(request_ids=pks)
+
+    logger.info(
+        'Bulk status transition: model=%s to=%s count=%s',
+        model.__name__, to_status, len(previous),
+    )
+    return len(previous)
@@ -3,18 +3,25 @@
 Логика:
 - pre_save определяет, изменился ли `status` относительно сохранённого в БД.
 - post_save создаёт StatusEvent, если изменение было (или это создание объекта).
+- post_save/post_delete заявок, сводов и предложений помечают дневную корзину
+  ManagerDailyRollup для пересчёта после коммита; V2-заявок — ещё и корзину
+  агрегатов качества парсера (ParserDailyRollup).
+- post_save/post_delete InsuranceCompany и post_migrate сбрасывают справочник
+  страховых компаний в памяти (company_registry).
 """
 import logging
 
 from django.contrib.contenttypes.models import ContentType
 from django.db import models
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_save
 from django.dispatch import receiver
 
 from insurance_requests.models import InsuranceRequest
 
 from ._current_user import get_current_user
-from .models import InsuranceSummary, StatusEvent
+from .company_registry import company_registry
+from .models import InsuranceCompany, InsuranceOffer, InsuranceSummary, StatusEvent
+from .services import analytics_parser_rollups, analytics_rollups
 
 logger = logging.getLogger(__name__)
 
@@ -23,8 +30,11 @@ _FLAG_TO = '_status_event_to'
 _FLAG_IS_CREATE = '_status_event_is_create'
 
 
-def _capture_status_change(sender: type[models.Model], instance) -> None:
+def _capture_status_change(sender: type[models.Model], instance, update_fields=None) -> None:
     """Сравнивает текущий status с сохранённым и помечает instance флагами."""
+    if update_fields is not None and 'status' not in update_fields:
+        # save(update_fields=...) без status не может сменить статус — не читаем БД
+        return
     if not instance.pk:
         # новый объект: фиксируем как «событие создания»
         setattr(instance, _FLAG_FROM, '')
@@ -78,8 +88,8 @@ def _emit_status_event(sender: type[models.Model], instance, created: bool) -> N
 
 
 @receiver(pre_save, sender=InsuranceRequest)
-def insurance_request_pre_save(sender, instance, **kwargs):
-    _capture_status_change(sender, instance)
+def insurance_request_pre_save(sender, instance, update_fields=None, **kwargs):
+    _capture_status_change(sender, instance, update_fields)
 
 
 @receiver(post_save, sender=InsuranceRequest)
@@ -88,10 +98,44 @@ def insurance_request_post_save(sender, instance, created, **kwargs):
 
 
 @receiver(pre_save, sender=InsuranceSummary)
-def insurance_summary_pre_save(sender, instance, **kwargs):
-    _capture_status_change(sender, instance)
+def insurance_summary_pre_save(sender, instance, update_fields=None, **kwargs):
+    _capture_status_change(sender, instance, update_fields)
 
 
 @receiver(post_save, sender=InsuranceSummary)
 def insurance_summary_post_save(sender, instance, created, **kwargs):
     _emit_status_event(sender, instance, created)
+
+
+# --- Дневные rollup’ы аналитики сотрудников ---------------------------------
+
+
+@receiver(post_save, sender=InsuranceRequest)
+@receiver(post_delete, sender=InsuranceRequest)
+def insurance_request_rollup(sender, instance, **kwargs):
+    analytics_rollups.mark_bucket_dirty(instance.created_at, instance.created_by_id)
+    analytics_parser_rollups.mark_requests_dirty([instance])
+
+
+@receiver(post_save, sender=InsuranceSummary)
+@receiver(post_delete, sender=InsuranceSummary)
+def insurance_summary_rollup(sender, instance, **kwargs):
+    analytics_rollups.mark_request_dirty(instance.request_id)
+
+
+@receiver(post_save, sender=InsuranceOffer)
+@receiver(post_delete, sender=InsuranceOffer)
+def insurance_offer_rollup(sender, instance, **kwargs):
+    analytics_rollups.mark_summary_dirty(instance.summary_id)
+
+
+@receiver(post_save, sender=InsuranceCompany)
+@receiver(post_delete, sender=InsuranceCompany)
+def insurance_company_changed(sender, instance, **kwargs):
+    company_registry.invalidate()
+
+
+@receiver(post_migrate)
+def company_table_migrated(sender, **kwargs):
+    # Миграции и flush меняют таблицу компаний в обход save()
+    company_registry.invalidate()
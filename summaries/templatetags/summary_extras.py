@@ -1,3 +1,5 @@
+import hashlib
+
 from django import template
 from django.http import QueryDict
 from decimal import Decimal
@@ -289,4 +291,59 @@ def has_variant2(offers):
                 return True
         return False
     except (ValueError, TypeError, AttributeError):
-        return False
\ No newline at end of file
+        return False
+
+class CacheFragmentNode(template.Node):
+    def __init__(self, nodelist, namespace, vary_on, template_digest):
+        self.nodelist = nodelist
+        self.namespace = namespace
+        self.vary_on = vary_on
+        self.template_digest = template_digest
+
+    def render(self, context):
+        from onlineservice.cache import get_namespace
+
+        name = self.namespace.resolve(context)
+        namespace = get_namespace(name)
+        if namespace is None:
+            raise template.TemplateSyntaxError(f'cache_fragment: неизвестное пространство кэша {name!r}')
+        # Версия пространства читается один раз на рендер страницы, а не на каждую строку
+        versions = context.render_context.setdefault('cache_fragment_versions', {})
+        if name not in versions:
+            versions[name] = namespace.version()
+        parts = [self.template_digest] + [str(var.resolve(context)) for var in self.vary_on]
+        key = hashlib.md5(':'.join(parts).encode()).hexdigest()
+        return namespace.get_or_set(key, lambda: self.nodelist.render(context), version=versions[name])
+
+
+@register.tag
+def cache_fragment(parser, token):
+    """Кэширует фрагмент шаблона в пространстве имён onlineservice.cache.
+
+        {% cache_fragment "summary_list_rows" summary.pk summary.updated_at %}
+            ...строка списка...
+        {% endcache_fragment %}
+
+    Ключ — перечисленные значения (обычно pk и updated_at объекта плюс то,
+    что меняется без его сохранения) и хэш файла шаблона: правка шаблона
+    не отдаёт старую вёрстку. Всё, что зависит от пользователя, внутрь
+    фрагмента класть нельзя.
+    """
+    nodelist = parser.parse(('endcache_fragment',))
+    parser.delete_first_token()
+    bits = token.split_contents()
+    if len(bits) < 3:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' tag requires a namespace and at least one vary-on value")
+    origin = getattr(parser, 'origin', None)
+    source = getattr(origin, 'name', '') or ''
+    try:
+        with open(source, 'rb') as template_file:
+            source = template_file.read()
+    except (OSError, TypeError):
+        source = str(source).encode()
+    return CacheFragmentNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        [parser.compile_filter(bit) for bit in bits[2:]],
+        hashlib.md5(source).hexdigest(),
+    )
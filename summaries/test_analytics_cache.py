@@ -0,0 +1,61 @@
+"""Тесты страницы «Кэш»: пространства имён, доля попаданий и ручной сброс."""
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from insurance_requests.exporters import CARD_ROWS_CACHE
+from onlineservice.metrics import registry
+
+
+class AnalyticsCacheViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        self.addCleanup(registry.reset)
+        admin_group, _ = Group.objects.get_or_create(name='Администраторы')
+        user_group, _ = Group.objects.get_or_create(name='Пользователи')
+        self.admin = User.objects.create_user(username='a', password='x')
+        self.admin.groups.add(admin_group)
+        self.regular = User.objects.create_user(username='u', password='x')
+        self.regular.groups.add(user_group)
+
+    def test_admin_sees_namespaces_with_hit_ratio(self):
+        CARD_ROWS_CACHE.set('1:2024', [('additional_data', '{}')])
+        CARD_ROWS_CACHE.get_many(['1:2024', '2:2024'])
+
+        self.client.login(username='a', password='x')
+        response = self.client.get(reverse('summaries:analytics_cache'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'summaries/analytics_cache.html')
+        row = next(row for row in response.context['namespaces'] if row['name'] == 'request_card_rows')
+        self.assertEqual(row['hit_ratio_percent'], 50.0)
+        self.assertContains(response, 'login_rate_limit')
+
+    def test_admin_can_invalidate_namespace(self):
+        CARD_ROWS_CACHE.set('1:2024', ['rows'])
+        self.client.login(username='a', password='x')
+
+        response = self.client.post(reverse('summaries:analytics_cache'), {'namespace': 'request_card_rows'})
+
+        self.assertRedirects(response, reverse('summaries:analytics_cache'))
+        self.assertIsNone(CARD_ROWS_CACHE.get('1:2024'))
+
+    def test_state_namespaces_cannot_be_invalidated(self):
+        from insurance_requests.security import LOGIN_RATE_LIMIT_CACHE
+
+        LOGIN_RATE_LIMIT_CACHE.set('lock:ip:1.2.3.4', 123)
+        self.client.login(username='a', password='x')
+
+        response = self.client.get(reverse('summaries:analytics_cache'))
+        self.assertNotContains(response, 'name="namespace" value="login_rate_limit"')
+
+        response = self.client.post(reverse('summaries:analytics_cache'), {'namespace': 'login_rate_limit'})
+        self.assertRedirects(response, reverse('summaries:analytics_cache'))
+        self.assertEqual(LOGIN_RATE_LIMIT_CACHE.get('lock:ip:1.2.3.4'), 123)
+
+    def test_regular_user_forbidden(self):
+        self.client.login(username='u', password='x')
+        response = self.client.get(reverse('summaries:analytics_cache'))
+        self.assertEqual(response.status_code, 403)
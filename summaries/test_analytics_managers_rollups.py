@@ -0,0 +1,179 @@
+"""Дневные rollup’ы аналитики сотрудников: паритет с сырым расчётом,
+инкрементальное обновление сигналами, сверка и команда бэкфилла."""
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from insurance_requests.models import InsuranceRequest
+
+from .models import InsuranceCompany, InsuranceOffer, InsuranceSummary, ManagerDailyRollup
+from .services import analytics_managers, analytics_rollups
+
+
+class ManagerRollupParityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user(username='alice', password='p', first_name='Алиса')
+        cls.bob = User.objects.create_user(username='bob', password='p', first_name='Боб')
+        InsuranceCompany.objects.get_or_create(
+            name='Альфа',
+            defaults={'display_name': 'Альфа', 'is_active': True, 'sort_order': 10},
+        )
+        now = timezone.now()
+
+        def _request(user, days_ago, **extra):
+            req = InsuranceRequest.objects.create(
+                client_name='Клиент', inn='1234567890', created_by=user, **extra,
+            )
+            InsuranceRequest.objects.filter(pk=req.pk).update(created_at=now - timedelta(days=days_ago))
+            req.refresh_from_db()
+            return req
+
+        accepted_req = _request(
+            cls.alice, 10, insurance_type='КАСКО', branch='Москва', status='emails_sent',
+        )
+        summary = InsuranceSummary.objects.create(
+            request=accepted_req, status='completed_accepted',
+            selected_company='Альфа', selected_franchise_variant=1,
+        )
+        InsuranceSummary.objects.filter(pk=summary.pk).update(
+            created_at=now - timedelta(days=9),
+            sent_to_client_at=now - timedelta(days=8),
+            completed_at=now - timedelta(days=5),
+        )
+        InsuranceOffer.objects.create(
+            summary=summary, company_name='Альфа',
+            insurance_sum=Decimal('1000000'), insurance_year=1,
+            franchise_1=Decimal('0'), premium_with_franchise_1=Decimal('50000'),
+        )
+        rejected_req = _request(
+            cls.alice, 20, insurance_type='КАСКО', branch='Москва',
+            status='emails_sent', deal_status='prolongation',
+        )
+        InsuranceSummary.objects.create(request=rejected_req, status='completed_rejected')
+        _request(cls.alice, 2, insurance_type='КАСКО', branch='Москва', status='email_generated')
+        bob_req = _request(
+            cls.bob, 3, insurance_type='страхование имущества', branch='Казань', status='emails_sent',
+        )
+        InsuranceSummary.objects.create(request=bob_req, status='collecting')
+        _request(None, 4, insurance_type='другое', status='uploaded')
+
+    def _filters(self, **overrides):
+        f = analytics_managers.parse_filters({})
+        f.update(overrides)
+        return f
+
+    def _payloads(self, filters):
+        raw = analytics_managers.build_overview_payload(filters)
+        analytics_rollups.rebuild_rollups()
+        with override_settings(MANAGER_ANALYTICS_USE_ROLLUPS=True):
+            rolled = analytics_managers.build_overview_payload(filters)
+        return raw, rolled
+
+    def test_rows_match_raw_calculation(self):
+        raw, rolled = self._payloads(self._filters())
+        self.assertEqual(raw['kpi'], rolled['kpi'])
+        raw_rows = {r['user_id']: r for r in raw['rows']}
+        rolled_rows = {r['user_id']: r for r in rolled['rows']}
+        self.assertEqual(set(raw_rows), set(rolled_rows))
+        exact_keys = (
+            'requests_total', 'summaries_total', 'accepted', 'rejected', 'win_rate',
+            'premium_total', 'sum_total', 'avg_ticket', 'active_total', 'overdue_count',
+            'last_activity', 'completeness', 'portfolio', 'quality_score',
+        )
+        for user_id, row in raw_rows.items():
+            for key in exact_keys:
+                self.assertEqual(row[key], rolled_rows[user_id][key], key)
+            for key in ('upload_to_summary_h', 'summary_to_sent_h', 'avg_cycle_h'):
+                self.assertEqual(row['time_to'][key], rolled_rows[user_id]['time_to'][key], key)
+            for key in ('cadence_hours', 'late_pct', 'weekend_pct'):
+                self.assertAlmostEqual(row['patterns'][key] or 0, rolled_rows[user_id]['patterns'][key] or 0)
+        self.assertEqual(raw['team']['completeness'], rolled['team']['completeness'])
+        self.assertEqual(raw['team']['portfolio'], rolled['team']['portfolio'])
+
+    def test_charts_and_trend_match_raw_calculation(self):
+        raw, rolled = self._payloads(self._filters(branch='Москва'))
+        self.assertEqual(raw['charts']['daily'], rolled['charts']['daily'])
+        self.assertEqual(raw['charts']['weekly'], rolled['charts']['weekly'])
+        self.assertEqual(raw['trend'], rolled['trend'])
+
+    def test_cycle_percentile_is_bucket_estimate(self):
+        raw, rolled = self._payloads(self._filters(user_ids=[self.alice.pk]))
+        alice = next(r for r in rolled['rows'] if r['user_id'] == self.alice.pk)
+        # цикл ≈ 120 ч попадает в корзину (72, 168]
+        self.assertGreater(alice['time_to']['p50_cycle_h'], 72)
+        self.assertLessEqual(alice['time_to']['p50_cycle_h'], 168)
+
+
+class ManagerRollupMaintenanceTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='m', password='p')
+
+    def test_signal_refreshes_bucket_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            req = InsuranceRequest.objects.create(
+                client_name='X', inn='1234567890', insurance_type='КАСКО', created_by=self.user,
+            )
+        rollup = ManagerDailyRollup.objects.get(user=self.user)
+        self.assertEqual(rollup.day, timezone.localdate(req.created_at))
+        self.assertEqual(rollup.requests_count, 1)
+        self.assertEqual(rollup.active_requests_count, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            InsuranceSummary.objects.create(request=req, status='completed_rejected')
+        rollup = ManagerDailyRollup.objects.get(user=self.user)
+        self.assertEqual(rollup.summaries_count, 1)
+        self.assertEqual(rollup.rejected_count, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            req.delete()
+        self.assertFalse(ManagerDailyRollup.objects.exists())
+
+    def test_reconcile_rewrites_only_drifted_buckets(self):
+        now = timezone.now()
+        for days_ago in (1, 5):
+            req = InsuranceRequest.objects.create(
+                client_name='X', inn='1234567890', insurance_type='КАСКО', created_by=self.user,
+            )
+            InsuranceRequest.objects.filter(pk=req.pk).update(created_at=now - timedelta(days=days_ago))
+        analytics_rollups.rebuild_rollups()
+        self.assertEqual(analytics_rollups.rebuild_rollups(reconcile=True)['changed'], 0)
+
+        # queryset.update обходит сигналы — агрегат расходится с сырыми данными
+        InsuranceRequest.objects.filter(created_at__lt=now - timedelta(days=3)).update(status='emails_sent')
+        stats = analytics_rollups.rebuild_rollups(reconcile=True, dry_run=True)
+        self.assertEqual(stats['changed'], 1)
+        self.assertEqual(ManagerDailyRollup.objects.filter(active_requests_count=1).count(), 2)
+
+        analytics_rollups.rebuild_rollups(reconcile=True)
+        self.assertEqual(ManagerDailyRollup.objects.filter(active_requests_count=1).count(), 1)
+
+    def test_histogram_percentile(self):
+        counts = [0] * (len(analytics_managers.CYCLE_HISTOGRAM_EDGES_HOURS) + 1)
+        self.assertIsNone(analytics_managers._histogram_percentile(counts, 0.5))
+        counts[analytics_managers.cycle_histogram_bucket(10)] = 1
+        self.assertTrue(0 < analytics_managers._histogram_percentile(counts, 0.5) <= 24)
+        counts = [0] * len(counts)
+        counts[-1] = 3
+        self.assertEqual(
+            analytics_managers._histogram_percentile(counts, 0.9),
+            float(analytics_managers.CYCLE_HISTOGRAM_EDGES_HOURS[-1]),
+        )
+
+    def test_command_backfills_and_validates_arguments(self):
+        InsuranceRequest.objects.create(
+            client_name='X', inn='1234567890', insurance_type='КАСКО', created_by=self.user,
+        )
+        out = StringIO()
+        call_command('rebuild_manager_rollups', stdout=out)
+        self.assertIn('changed: 1', out.getvalue())
+        self.assertEqual(ManagerDailyRollup.objects.count(), 1)
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_manager_rollups', start='2025-02-01', end='2025-01-01')
@@ -0,0 +1,114 @@
+"""Дневные агрегаты качества парсера: паритет дашборда правок с сырым расчётом,
+инкрементальное обновление и команда бэкфилла."""
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from insurance_requests.models import InsuranceRequest, RequestFieldEdit
+from insurance_requests.views import _record_request_field_edits
+
+from .models import ParserDailyRollup, ParserFieldEditDailyRollup
+from .services import analytics_parser_edits, analytics_parser_rollups
+
+
+def _v2_request(*, confidence, edits_count, created_by=None, branch='Казань', version='2.0.0',
+                application_format='casco_equipment'):
+    return InsuranceRequest.objects.create(
+        client_name='ООО Тест', inn='1234567890', branch=branch, created_by=created_by,
+        parser_confidence=confidence, manual_edits_count=edits_count,
+        additional_data={'parser_version': 'v2', 'parser_v2': {'version': version},
+                         'application_format': application_format,
+                         'application_type': 'legal_entity'},
+    )
+
+
+def _edit(req, field_name, *, scope='common', edit_type='changed'):
+    return RequestFieldEdit.objects.create(
+        request=req, scope=scope, field_name=field_name, field_label=field_name.upper(),
+        original_value='a', modified_value='b', edit_type=edit_type,
+    )
+
+
+class ParserRollupParityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.operator = User.objects.create_user('op', first_name='Иван', last_name='Петров')
+        req_a = _v2_request(confidence=0.7, edits_count=3, created_by=cls.operator)
+        _edit(req_a, 'inn')
+        _edit(req_a, 'inn')
+        _edit(req_a, 'brand', scope='object', edit_type='filled')
+        req_b = _v2_request(confidence=0.85, edits_count=1, branch='Москва', version='2.1.0',
+                            application_format='property')
+        _edit(req_b, 'client_name', edit_type='cleared')
+        _v2_request(confidence=0.95, edits_count=0, created_by=cls.operator, version='2.1.0')
+        InsuranceRequest.objects.create(client_name='не V2', inn='1')
+
+    def _payloads(self):
+        filters = analytics_parser_edits.parse_filters({})
+        raw = analytics_parser_edits.build_payload(filters)
+        analytics_parser_rollups.rebuild_rollups()
+        with override_settings(PARSER_EDITS_USE_ROLLUPS=True):
+            rolled = analytics_parser_edits.build_payload(filters)
+        return raw, rolled
+
+    def test_sections_match_raw_calculation(self):
+        raw, rolled = self._payloads()
+        self.assertEqual(rolled['totals'], raw['totals'])
+        for key in ('top_fields', 'by_type', 'by_scope'):
+            self.assertEqual(rolled[key], raw[key], key)
+        for key in ('by_branch', 'by_operator'):
+            self.assertCountEqual(rolled[key], raw[key], key)
+        for key in ('by_format', 'by_app_type', 'by_parser_version'):
+            self.assertEqual(
+                sorted(rolled[key], key=lambda r: r['value']),
+                sorted(raw[key], key=lambda r: r['value']), key,
+            )
+        self.assertEqual(
+            [(r['label'], r['edits'], r['requests'], r['avg_confidence_percent']) for r in rolled['timeline']],
+            [(r['label'], r['edits'], r['requests'], r['avg_confidence_percent']) for r in raw['timeline']],
+        )
+
+    def test_parser_versions_are_compared(self):
+        _, rolled = self._payloads()
+        versions = {r['value']: r for r in rolled['by_parser_version']}
+        self.assertEqual(versions['2.0.0']['requests'], 1)
+        self.assertEqual(versions['2.1.0']['requests'], 2)
+        self.assertEqual(versions['2.1.0']['error_rate_percent'], 50.0)
+        self.assertEqual(versions['2.1.0']['avg_confidence_percent'], 90.0)
+
+
+class ParserRollupMaintenanceTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('m')
+
+    def test_recording_edits_refreshes_bucket_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            req = _v2_request(confidence=0.6, edits_count=1, created_by=self.user)
+            _record_request_field_edits([req], {
+                'field_edits': [{'field': 'inn', 'label': 'ИНН', 'original': '1', 'modified': '2'}],
+            })
+        rollup = ParserDailyRollup.objects.get(user=self.user)
+        self.assertEqual((rollup.requests_count, rollup.with_edits_count, rollup.edited_requests_count), (1, 1, 1))
+        edit_rollup = ParserFieldEditDailyRollup.objects.get(user=self.user)
+        self.assertEqual((edit_rollup.field_name, edit_rollup.edits_count), ('inn', 1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            req.delete()
+        self.assertFalse(ParserDailyRollup.objects.exists())
+        self.assertFalse(ParserFieldEditDailyRollup.objects.exists())
+
+    def test_non_v2_requests_are_ignored(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            InsuranceRequest.objects.create(client_name='X', inn='1', created_by=self.user)
+        self.assertFalse(ParserDailyRollup.objects.exists())
+
+    def test_command_backfills(self):
+        req = _v2_request(confidence=0.9, edits_count=1, created_by=self.user)
+        _edit(req, 'inn')
+        out = StringIO()
+        call_command('rebuild_parser_rollups', stdout=out)
+        self.assertIn('rows: 2', out.getvalue())
+        self.assertEqual(ParserDailyRollup.objects.count(), 1)
+        self.assertEqual(ParserFieldEditDailyRollup.objects.count(), 1)
@@ -0,0 +1,75 @@
+"""Тесты страницы скорости разбора парсера V2 (отчёты профилировщика)."""
+from django.contrib.auth.models import Group, User
+from django.test import TestCase
+from django.urls import reverse
+
+from insurance_requests.models import InsuranceRequest
+from summaries.services import analytics_parser_timings as service
+
+
+def _timings(total_ms, **stages):
+    return {
+        'total_ms': total_ms,
+        'cells_scanned': 100,
+        'regex_evals': 50,
+        'stages': {
+            name: {'calls': 1, 'ms': ms, 'self_ms': ms, 'cells': 10, 'regex': 5}
+            for name, ms in stages.items()
+        },
+    }
+
+
+def _profiled_request(file_name, timings):
+    return InsuranceRequest.objects.create(
+        client_name='ООО Тест', inn='1', parser_confidence=0.9,
+        additional_data={'parser_version': 'v2', 'parser_v2': {
+            'source_file_name': file_name,
+            'raw_debug': {'reader': 'openpyxl', 'timings': timings},
+        }},
+    )
+
+
+class ParserTimingsServiceTests(TestCase):
+    def test_batches_are_counted_once_and_stages_ranked(self):
+        slow = _timings(120.0, _read_cells=20.0, _extract_objects=90.0, parse=10.0)
+        # Партия из двух объектов — один и тот же отчёт в двух заявках
+        first = _profiled_request('big.xlsx', slow)
+        _profiled_request('big.xlsx', slow)
+        _profiled_request('small.xlsx', _timings(30.0, _read_cells=20.0, _extract_objects=6.0, parse=4.0))
+        InsuranceRequest.objects.create(client_name='Без профиля', inn='1', parser_confidence=0.9,
+                                        additional_data={'parser_v2': {'raw_debug': {}}})
+
+        payload = service.build_payload(service.parse_filters({}))
+
+        self.assertEqual(payload['totals']['uploads'], 2)
+        self.assertEqual(payload['totals']['max_ms'], 120.0)
+        stages = payload['stages']
+        self.assertEqual([row['stage'] for row in stages], ['_extract_objects', '_read_cells', 'parse'])
+        self.assertEqual(stages[0]['label'], 'Объекты страхования')
+        self.assertEqual(stages[0]['avg_ms'], 48.0)
+        self.assertEqual(stages[0]['share_percent'], 64.0)
+        self.assertEqual(payload['slowest'][0]['request_id'], first.pk)
+        self.assertEqual(payload['slowest'][0]['slowest_stage'], 'Объекты страхования')
+
+
+class ParserTimingsViewTests(TestCase):
+    def setUp(self):
+        admin_group, _ = Group.objects.get_or_create(name='Администраторы')
+        user_group, _ = Group.objects.get_or_create(name='Пользователи')
+        self.admin = User.objects.create_user(username='a', password='x')
+        self.admin.groups.add(admin_group)
+        self.regular = User.objects.create_user(username='u', password='x')
+        self.regular.groups.add(user_group)
+
+    def test_admin_can_open(self):
+        _profiled_request('a.xlsx', _timings(10.0, _read_cells=10.0))
+        self.client.login(username='a', password='x')
+        response = self.client.get(reverse('summaries:analytics_parser_timings'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'summaries/analytics_parser_timings.html')
+        self.assertContains(response, 'Чтение книги')
+
+    def test_regular_user_forbidden(self):
+        self.client.login(username='u', password='x')
+        response = self.client.get(reverse('summaries:analytics_parser_timings'))
+        self.assertEqual(response.status_code, 403)
@@ -7,7 +7,7 @@ from django.contrib.contenttypes.models import ContentType
 from django.test import Client, TestCase
 from django.urls import reverse
 
-from insurance_requests.models import InsuranceRequest, RequestFieldEdit
+from insurance_requests.models import FieldChange, InsuranceRequest, RequestFieldEdit
 from summaries.services import analytics_post_creation as service
 
 
@@ -28,6 +28,7 @@ def _crud_update(req, changed_fields, *, user, when):
         object_repr='req', changed_fields=json.dumps(changed_fields), user=user,
     )
     CRUDEvent.objects.filter(pk=ev.pk).update(datetime=when)
+    FieldChange.objects.filter(event_id=ev.pk).update(changed_at=when)
     return ev
 
 
@@ -7,7 +7,7 @@ from django.test import TestCase
 from django.utils import timezone
 
 from insurance_requests.models import InsuranceRequest
-from summaries.models import InsuranceSummary
+from summaries.models import InsuranceSummary, StatusEvent
 
 
 class AutoCloseStaleSummariesCommandTests(TestCase):
@@ -64,6 +64,11 @@ class AutoCloseStaleSummariesCommandTests(TestCase):
         self.assertIsNone(summary.selected_company)
         self.assertIsNone(summary.selected_franchise_variant)
 
+        event = StatusEvent.objects.filter(
+            object_id=summary.pk, to_status="completed_rejected"
+        ).get()
+        self.assertEqual(event.from_status, "sent")
+
     def test_does_not_touch_completed_accepted(self):
         old_time = timezone.now() - timedelta(days=45)
         summary = self._create_summary(
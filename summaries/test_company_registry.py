@@ -0,0 +1,104 @@
+"""
+Тесты справочника страховых компаний в памяти (summaries/company_registry.py)
+"""
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from insurance_requests.models import InsuranceRequest
+from summaries import constants
+from summaries.company_registry import CompanyRegistry
+from summaries.forms import OfferForm
+from summaries.models import InsuranceCompany, InsuranceOffer, InsuranceSummary
+
+
+def _company_queries(queries):
+    return [query['sql'] for query in queries if 'summaries_insurancecompany' in query['sql']]
+
+
+class CompanyRegistryTestCase(TestCase):
+    def setUp(self):
+        self.registry = CompanyRegistry()
+        for target in ('summaries.company_registry.company_registry', 'summaries.signals.company_registry'):
+            patcher = patch(target, self.registry)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_loaded_once_for_names_choices_and_validation(self):
+        with CaptureQueriesContext(connection) as queries:
+            names = constants.get_company_names()
+            choices = constants.get_company_choices()
+            self.assertTrue(constants.is_valid_company_name('Ингосстрах'))
+            self.assertFalse(constants.is_valid_company_name('Неизвестная СК'))
+            self.assertEqual(InsuranceCompany.get_company_names(), names)
+            self.assertEqual(constants.INSURANCE_COMPANIES, choices)
+
+        self.assertEqual(len(_company_queries(queries)), 1)
+        self.assertEqual(names[:3], ['Абсолют', 'Альфа', 'ВСК'])
+        self.assertEqual(choices[0], ('', 'Выберите страховщика'))
+        self.assertIn(('другое', 'Другое'), choices)
+
+    def test_offer_save_and_form_do_not_query_company_table(self):
+        constants.get_company_names()
+        insurance_request = InsuranceRequest.objects.create(client_name='Клиент', inn='1234567890')
+        summary = InsuranceSummary.objects.create(request=insurance_request)
+
+        with CaptureQueriesContext(connection) as queries:
+            for year in (1, 2, 3):
+                InsuranceOffer.objects.create(
+                    summary=summary,
+                    company_name='Согаз',
+                    insurance_year=year,
+                    insurance_sum=Decimal('1000000'),
+                    premium_with_franchise_1=Decimal('50000'),
+                )
+            OfferForm()
+
+        self.assertEqual(_company_queries(queries), [])
+
+    def test_invalidated_on_company_save_and_delete(self):
+        self.assertFalse(self.registry.is_valid('Новая СК'))
+
+        company = InsuranceCompany.objects.create(name='Новая СК', display_name='Новая', sort_order=1)
+        self.assertTrue(self.registry.is_valid('Новая СК'))
+        self.assertEqual(self.registry.choices[1], ('Новая СК', 'Новая'))
+
+        company.is_active = False
+        company.save()
+        self.assertFalse(self.registry.is_valid('Новая СК'))
+
+        company.delete()
+        self.assertNotIn('Новая СК', self.registry.names)
+
+    def test_rolled_back_company_does_not_stay_cached(self):
+        class Rollback(Exception):
+            pass
+
+        with self.assertRaises(Rollback), transaction.atomic():
+            InsuranceCompany.objects.create(name='Откат СК', display_name='Откат СК')
+            self.assertTrue(self.registry.is_valid('Откат СК'))
+            raise Rollback
+
+        self.assertFalse(self.registry.is_valid('Откат СК'))
+
+    @override_settings(COMPANY_REGISTRY_TTL=0)
+    def test_reloaded_after_ttl(self):
+        self.registry.names
+        with CaptureQueriesContext(connection) as queries:
+            self.registry.names
+        self.assertEqual(len(_company_queries(queries)), 1)
+
+    def test_normalized_lookup(self):
+        self.assertEqual(self.registry.lookup('  ингосстрах '), 'Ингосстрах')
+        self.assertIsNone(self.registry.lookup('ПСБ страхование'))
+        self.assertEqual(self.registry.lookup('псб-страхование.'), 'ПСБ-страхование')
+        self.assertIsNone(self.registry.lookup(''))
+
+    def test_falls_back_when_table_is_unavailable(self):
+        with patch.object(CompanyRegistry, '_load', side_effect=Exception('no such table')), \
+                self.assertLogs('summaries.company_registry', 'WARNING'):
+            self.assertTrue(self.registry.is_valid('Зетта'))
+        self.assertIsNone(self.registry._snapshot)
@@ -2,11 +2,11 @@
 Тесты для валидации актуальности справочной документации
 """
 from django.test import TestCase
-from unittest.mock import Mock, patch
+from unittest.mock import patch
 import tempfile
 import os
-from openpyxl import Workbook, load_workbook
-from core.excel_utils import ExcelReader
+from openpyxl import Workbook
+from core.excel_utils import CASCO_CELLS, PROPERTY_CELLS, ExcelReader
 
 
 class DocumentationValidationTests(TestCase):
@@ -42,123 +42,56 @@ class DocumentationValidationTests(TestCase):
         if os.path.exists(self.temp_file.name):
             os.unlink(self.temp_file.name)
     
+    def _read(self, application_type, application_format, cells=None):
+        """Читает заявку с заданными ячейками через ExcelReader"""
+        path = self.temp_file.name
+        if cells is not None:
+            workbook = Workbook()
+            sheet = workbook.active
+            for address, value in cells.items():
+                sheet[address] = value
+            workbook.save(path)
+            workbook.close()
+        return ExcelReader(path, application_type=application_type, application_format=application_format).read_insurance_request()
+
     def test_casco_ce_row_45_validation(self):
         """Тест валидации строки 45 для КАСКО кат. C/E"""
-        # Тест для юр.лица
-        reader = ExcelReader(
-            self.temp_file.name, 
-            application_type='legal_entity',
-            application_format='casco_equipment'
-        )
-        
-        # Проверяем, что метод _determine_casco_ce_openpyxl использует строку 45
-        with patch.object(reader, '_get_cell_with_adjustment_openpyxl') as mock_get_cell:
-            mock_get_cell.return_value = 'КАСКО C/E данные'
-            
-            # Создаем мок листа
-            mock_sheet = Mock()
-            result = reader._determine_casco_ce_openpyxl(mock_sheet)
-            
-            # Проверяем, что метод вызывался с правильными параметрами
-            calls = mock_get_cell.call_args_list
-            row_45_calls = [call for call in calls if call[0][2] == 45]
-            
-            self.assertTrue(len(row_45_calls) > 0, "Метод должен проверять строку 45")
-            self.assertTrue(result, "Должен вернуть True при наличии данных в строке 45")
-    
+        # Карта ячеек должна проверять строку 45 (столбцы C-I)
+        self.assertEqual(CASCO_CELLS['has_casco_ce'].cells, tuple((column, 45) for column in 'CDEFGHI'))
+
+        data = self._read('legal_entity', 'casco_equipment')
+        self.assertTrue(data['has_casco_ce'], "Должен вернуть True при наличии данных в строке 45")
+
+        data = self._read('legal_entity', 'casco_equipment', {'C44': 'Не строка 45'})
+        self.assertFalse(data['has_casco_ce'], "Должен вернуть False при пустой строке 45")
+
     def test_transportation_parameter_c44_validation(self):
         """Тест валидации ячейки C44 для параметра перевозки"""
-        reader = ExcelReader(
-            self.temp_file.name,
-            application_type='legal_entity',
-            application_format='property'
-        )
-        
-        # Проверяем, что метод использует ячейку C44
-        with patch.object(reader, '_get_cell_with_adjustment_openpyxl') as mock_get_cell:
-            mock_get_cell.return_value = 'Перевозка данные'
-            
-            mock_sheet = Mock()
-            result = reader._detect_transportation_parameter_openpyxl(mock_sheet)
-            
-            # Проверяем, что метод вызывался с правильными параметрами
-            mock_get_cell.assert_called_with(mock_sheet, 'C', 44)
-            self.assertTrue(result, "Должен вернуть True при наличии данных в C44")
-    
+        self.assertEqual(PROPERTY_CELLS['has_transportation'].cells, (('C', 44),))
+
+        data = self._read('legal_entity', 'property', {'C44': 'Перевозка данные'})
+        self.assertTrue(data['has_transportation'], "Должен вернуть True при наличии данных в C44")
+        self.assertFalse(data['has_construction_work'])
+
     def test_construction_work_parameter_c48_validation(self):
         """Тест валидации ячейки C48 для параметра СМР"""
-        reader = ExcelReader(
-            self.temp_file.name,
-            application_type='legal_entity',
-            application_format='property'
-        )
-        
-        # Проверяем, что метод использует ячейку C48
-        with patch.object(reader, '_get_cell_with_adjustment_openpyxl') as mock_get_cell:
-            mock_get_cell.return_value = 'СМР данные'
-            
-            mock_sheet = Mock()
-            result = reader._detect_construction_work_parameter_openpyxl(mock_sheet)
-            
-            # Проверяем, что метод вызывался с правильными параметрами
-            mock_get_cell.assert_called_with(mock_sheet, 'C', 48)
-            self.assertTrue(result, "Должен вернуть True при наличии данных в C48")
+        self.assertEqual(PROPERTY_CELLS['has_construction_work'].cells, (('C', 48),))
+
+        data = self._read('legal_entity', 'property', {'C48': 'СМР данные'})
+        self.assertTrue(data['has_construction_work'], "Должен вернуть True при наличии данных в C48")
+        self.assertFalse(data['has_transportation'])
 
     def test_asset_status_column_k_validation(self):
         """Тест извлечения статуса имущества из столбца K (юр.лицо)"""
-        temp_file = tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False)
-        temp_file.close()
-
-        try:
-            workbook = Workbook()
-            sheet = workbook.active
-            sheet['K43'] = 'новое'
-            sheet['K45'] = 'в эксплуатации'
-            workbook.save(temp_file.name)
-            workbook.close()
+        data = self._read('legal_entity', 'casco_equipment', {'K43': 'новое', 'K45': 'в эксплуатации'})
 
-            reader = ExcelReader(
-                temp_file.name,
-                application_type='legal_entity',
-                application_format='casco_equipment'
-            )
-
-            workbook = load_workbook(temp_file.name, data_only=True)
-            sheet = workbook.active
-            result = reader._find_asset_status_openpyxl(sheet)
-
-            self.assertEqual(result, 'новое в эксплуатации')
-        finally:
-            if os.path.exists(temp_file.name):
-                os.unlink(temp_file.name)
+        self.assertEqual(data['asset_status'], 'новое в эксплуатации')
 
     def test_asset_status_ip_row_offset_validation(self):
         """Тест извлечения статуса имущества из K44/K46/K48/K50 для ИП"""
-        temp_file = tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False)
-        temp_file.close()
-
-        try:
-            workbook = Workbook()
-            sheet = workbook.active
-            sheet['K44'] = 'новое'
-            sheet['K46'] = 'в эксплуатации'
-            workbook.save(temp_file.name)
-            workbook.close()
-
-            reader = ExcelReader(
-                temp_file.name,
-                application_type='individual_entrepreneur',
-                application_format='casco_equipment'
-            )
+        data = self._read('individual_entrepreneur', 'casco_equipment', {'K44': 'новое', 'K46': 'в эксплуатации'})
 
-            workbook = load_workbook(temp_file.name, data_only=True)
-            sheet = workbook.active
-            result = reader._find_asset_status_openpyxl(sheet)
-
-            self.assertEqual(result, 'новое в эксплуатации')
-        finally:
-            if os.path.exists(temp_file.name):
-                os.unlink(temp_file.name)
+        self.assertEqual(data['asset_status'], 'новое в эксплуатации')
     
     def test_ip_row_offset_logic_validation(self):
         """Тест валидации логики смещения строк для ИП"""
@@ -184,75 +117,55 @@ class DocumentationValidationTests(TestCase):
     
     def test_franchise_type_values_validation(self):
         """Тест валидации значений типов франшизы"""
-        reader = ExcelReader(
-            self.temp_file.name,
-            application_type='legal_entity',
-            application_format='casco_equipment'
-        )
-        
-        # Тестируем возможные значения франшизы
-        with patch.object(reader, '_get_cell_with_adjustment_openpyxl') as mock_get_cell:
-            mock_sheet = Mock()
-            
-            # Тест 'none' - только D29 заполнена
-            mock_get_cell.side_effect = lambda sheet, col, row: {
-                ('D', 29): 'Без франшизы',
-                ('E', 29): None,
-                ('F', 29): None
-            }.get((col, row))
-            
-            result = reader._determine_franchise_type(mock_sheet, is_openpyxl=True)
-            self.assertEqual(result, 'none', "Должен вернуть 'none' когда только D29 заполнена")
-            
-            # Тест 'with_franchise' - только E29 или F29 заполнены
-            mock_get_cell.side_effect = lambda sheet, col, row: {
-                ('D', 29): None,
-                ('E', 29): 'С франшизой',
-                ('F', 29): None
-            }.get((col, row))
-            
-            result = reader._determine_franchise_type(mock_sheet, is_openpyxl=True)
-            self.assertEqual(result, 'with_franchise', "Должен вернуть 'with_franchise' когда только E29 заполнена")
-            
-            # Тест 'both_variants' - D29 и (E29 или F29) заполнены
-            mock_get_cell.side_effect = lambda sheet, col, row: {
-                ('D', 29): 'Без франшизы',
-                ('E', 29): 'С франшизой',
-                ('F', 29): None
-            }.get((col, row))
-            
-            result = reader._determine_franchise_type(mock_sheet, is_openpyxl=True)
-            self.assertEqual(result, 'both_variants', "Должен вернуть 'both_variants' когда D29 и E29 заполнены")
-    
+        cases = [
+            # 'none' - только D29 заполнена
+            ({'D29': 'Без франшизы'}, 'none'),
+            # 'with_franchise' - только E29 или F29 заполнены
+            ({'E29': 'С франшизой'}, 'with_franchise'),
+            # 'both_variants' - D29 и (E29 или F29) заполнены
+            ({'D29': 'Без франшизы', 'E29': 'С франшизой'}, 'both_variants'),
+        ]
+        for cells, expected in cases:
+            with self.subTest(cells=cells):
+                data = self._read('legal_entity', 'casco_equipment', cells)
+                self.assertEqual(data['franchise_type'], expected)
+
     def test_additional_parameters_cells_validation(self):
         """Тест валидации ячеек для дополнительных параметров КАСКО"""
-        reader = ExcelReader(
-            self.temp_file.name,
-            application_type='legal_entity',
-            application_format='casco_equipment'
-        )
-        
-        # Проверяем, что метод извлечения дополнительных параметров существует
-        self.assertTrue(
-            hasattr(reader, '_extract_casco_additional_parameters_openpyxl'),
-            "Должен существовать метод извлечения дополнительных параметров КАСКО"
-        )
-        
-        # Проверяем, что метод возвращает словарь с ожидаемыми ключами
-        with patch.object(reader, '_get_cell_with_adjustment_openpyxl') as mock_get_cell:
-            mock_get_cell.return_value = 'Тестовое значение'
-            mock_sheet = Mock()
-            
-            result = reader._extract_casco_additional_parameters_openpyxl(mock_sheet)
-            
-            # Проверяем наличие ожидаемых полей
-            expected_fields = [
-                'key_completeness', 'pts_psm', 'creditor_bank',
-                'usage_purposes', 'telematics_complex'
-            ]
-            
-            for field in expected_fields:
-                self.assertIn(field, result, f"Поле '{field}' должно присутствовать в дополнительных параметрах")
+        data = self._read('legal_entity', 'casco_equipment', {
+            'M25': 'Тестовое значение',
+            'M26': 'Тестовое значение',
+            'D17': 'Тестовое значение',
+            'D37': 'Тестовое значение',
+            'D63': 'Тестовое значение',
+        })
+
+        expected_fields = [
+            'key_completeness', 'pts_psm', 'creditor_bank',
+            'usage_purposes', 'telematics_complex'
+        ]
+
+        for field in expected_fields:
+            self.assertEqual(data[field], 'Тестовое значение', f"Поле '{field}' должно присутствовать в дополнительных параметрах")
+
+    def test_openpyxl_and_pandas_read_same_data(self):
+        """Обе библиотеки чтения дают одинаковые данные по одной карте ячеек"""
+        cells = {
+            'C4': 'Казанский филиал', 'C5': 'Менеджер', 'H2': 'ДФА-1', 'N17': 'x',
+            'D21': 'x', 'M24': 'да', 'K43': 'новое', 'C43': 'Экскаватор',
+        }
+        for application_type in ('legal_entity', 'individual_entrepreneur'):
+            with self.subTest(application_type=application_type):
+                from_openpyxl = self._read(application_type, 'casco_equipment', cells)
+                with patch('core.excel_utils.load_workbook', side_effect=ValueError('not xlsx')):
+                    from_pandas = self._read(application_type, 'casco_equipment')
+
+                for data in (from_openpyxl, from_pandas):
+                    data.pop('response_deadline')
+                    data['additional_data'].pop('extraction_timestamp')
+                    data['additional_data']['franchise_details'].pop('extraction_method')
+                self.assertEqual(from_openpyxl, from_pandas)
+                self.assertEqual(from_openpyxl['branch'], 'Казань')
     
     def test_property_format_specific_parameters(self):
         """Тест специфичных параметров для формата 'имущество'"""
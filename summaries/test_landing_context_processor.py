@@ -1,4 +1,6 @@
+from django.contrib.auth.models import Group, User
 from django.test import RequestFactory, TestCase, override_settings
+from django.urls import resolve
 
 from onlineservice.context_processors import navigation_context
 
@@ -25,3 +27,35 @@ class LandingContextProcessorTests(TestCase):
 
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, 'здесь есть флоу')
+
+
+class NavigationMemoTests(TestCase):
+    def setUp(self):
+        self.request_factory = RequestFactory()
+        admin_group, _ = Group.objects.get_or_create(name='Администраторы')
+        self.admin = User.objects.create_user(username='nav_admin', password='x')
+        self.admin.groups.add(admin_group)
+        self.regular = User.objects.create_user(username='nav_user', password='x')
+
+    def _request(self, path, user):
+        request = self.request_factory.get(path)
+        request.resolver_match = resolve(path)
+        request.user = User.objects.get(pk=user.pk)
+        return request
+
+    def test_navigation_is_shared_per_page_and_role(self):
+        first = navigation_context(self._request('/summaries/', self.admin))
+        second = navigation_context(self._request('/summaries/', self.admin))
+        regular = navigation_context(self._request('/summaries/', self.regular))
+
+        self.assertIs(first, second)
+        labels = [item['label'] for item in first['app_navigation']['main_items']]
+        self.assertIn('Аналитика', labels)
+        self.assertNotIn('Аналитика', [item['label'] for item in regular['app_navigation']['main_items']])
+        self.assertTrue(next(item for item in first['app_navigation']['main_items'] if item['label'] == 'Своды')['active'])
+
+    def test_group_lookup_runs_once_per_request(self):
+        request = self._request('/summaries/deals/', self.admin)
+        with self.assertNumQueries(1):
+            navigation_context(request)
+            navigation_context(request)
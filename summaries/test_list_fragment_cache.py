@@ -0,0 +1,72 @@
+"""Тесты кэша строк списков заявок, сводов и сделок (тег cache_fragment)."""
+from decimal import Decimal
+
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.template import Context, Template, TemplateSyntaxError
+from django.test import TestCase
+from django.urls import reverse
+
+from insurance_requests.models import InsuranceRequest
+from summaries.models import InsuranceOffer, InsuranceSummary
+
+
+class ListRowFragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        admin_group, _ = Group.objects.get_or_create(name='Администраторы')
+        self.user = User.objects.create_user('rows', password='x', first_name='Иван', last_name='Петров')
+        self.user.groups.add(admin_group)
+        self.client.force_login(self.user)
+        self.request = InsuranceRequest.objects.create(
+            created_by=self.user, client_name='ООО Ромашка', inn='1234567890',
+            insurance_type='КАСКО', dfa_number='ДФА-1', branch='Казань',
+        )
+        self.summary = InsuranceSummary.objects.create(
+            request=self.request, status='completed_accepted', selected_company='Абсолют',
+            selected_franchise_variant=1,
+        )
+
+    def _rename_without_save(self, name):
+        # update() не трогает updated_at — строка должна остаться из кэша
+        InsuranceRequest.objects.filter(pk=self.request.pk).update(client_name=name)
+
+    def test_request_rows_are_reused_until_request_is_saved(self):
+        url = reverse('insurance_requests:request_list')
+        self.assertContains(self.client.get(url), 'ООО Ромашка')
+
+        self._rename_without_save('ООО Лютик')
+        self.assertContains(self.client.get(url), 'ООО Ромашка')
+
+        self.request.refresh_from_db()
+        self.request.save()
+        self.assertContains(self.client.get(url), 'ООО Лютик')
+
+    def test_summary_rows_are_reset_by_offer_changes(self):
+        url = reverse('summaries:summary_list')
+        self.client.get(url)
+        self._rename_without_save('ООО Лютик')
+        self.assertContains(self.client.get(url), 'ООО Ромашка')
+
+        InsuranceOffer.objects.create(
+            summary=self.summary, company_name='Абсолют', insurance_year=1,
+            insurance_sum=Decimal('1000000'), franchise_1=Decimal('0'), premium_with_franchise_1=Decimal('10000'),
+        )
+        self.assertContains(self.client.get(url), 'ООО Лютик')
+
+    def test_deal_rows_follow_summary_updated_at(self):
+        url = reverse('summaries:deal_list')
+        self.assertContains(self.client.get(url), 'ООО Ромашка')
+
+        self._rename_without_save('ООО Лютик')
+        self.assertContains(self.client.get(url), 'ООО Ромашка')
+
+        self.summary.save()
+        self.request.refresh_from_db()
+        self.request.save()
+        self.assertContains(self.client.get(url), 'ООО Лютик')
+
+    def test_unknown_namespace_is_an_error(self):
+        template = Template('{% load summary_extras %}{% cache_fragment "missing" 1 %}x{% endcache_fragment %}')
+        with self.assertRaises(TemplateSyntaxError):
+            template.render(Context())
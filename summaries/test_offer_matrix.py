@@ -0,0 +1,111 @@
+"""
+Тесты матрицы предложений свода (summaries/offer_matrix.py) и числа запросов страницы свода
+"""
+from decimal import Decimal
+
+from django.contrib.auth.models import Group, User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from insurance_requests.models import InsuranceRequest
+from summaries.models import InsuranceOffer, InsuranceSummary
+
+COMPANIES = ['Абсолют', 'Альфа', 'ВСК', 'Согаз', 'РЕСО', 'Ингосстрах', 'Ренессанс', 'Росгосстрах']
+
+
+class OfferMatrixTestCase(TestCase):
+    """Методы InsuranceSummary, работающие через OfferMatrix"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='matrix', password='testpass123')
+        self.user.groups.add(Group.objects.get_or_create(name='Пользователи')[0])
+        self.client.login(username='matrix', password='testpass123')
+
+        self.request = InsuranceRequest.objects.create(
+            dfa_number='MATRIX-001',
+            client_name='Тестовый клиент',
+            inn='1234567890',
+            insurance_type='КАСКО',
+            insurance_period='2 года',
+            branch='msk',
+            status='uploaded',
+            created_by=self.user,
+        )
+        self.summary = InsuranceSummary.objects.create(request=self.request, status='collecting')
+
+    def _offer(self, company_name, year, premium_1, premium_2=None, notes='', is_valid=True):
+        return InsuranceOffer.objects.create(
+            summary=self.summary,
+            company_name=company_name,
+            insurance_year=year,
+            insurance_sum=Decimal('1000000.00'),
+            franchise_1=Decimal('0'),
+            premium_with_franchise_1=premium_1,
+            franchise_2=Decimal('30000') if premium_2 is not None else None,
+            premium_with_franchise_2=premium_2,
+            notes=notes,
+            is_valid=is_valid,
+        )
+
+    def _add_companies(self, count):
+        for company_name in COMPANIES[:count]:
+            for year in (1, 2):
+                self._offer(company_name, year, Decimal('50000'), Decimal('45000'), notes=f'{company_name}: КАСКО')
+
+    def test_groupings_totals_and_notes(self):
+        self._offer('Альфа', 2, Decimal('40000'), notes='Без ГАП')
+        self._offer('Альфа', 1, Decimal('50000'), Decimal('45000'), notes='Без ГАП')
+        self._offer('Абсолют', 1, Decimal('60000'), Decimal('0'), notes='  ')
+        self._offer('ВСК', 1, Decimal('10000'), is_valid=False)
+
+        self.assertEqual(self.summary.get_unique_companies_list(), ['Абсолют', 'Альфа'])
+        self.assertEqual(self.summary.get_unique_companies_count(), 2)
+        self.assertEqual(
+            [offer.insurance_year for offer in self.summary.get_offers_grouped_by_company()['Альфа']],
+            [1, 2],
+        )
+        self.assertEqual(self.summary.get_companies_with_year_counts(), {'Альфа': 2, 'Абсолют': 1})
+        self.assertEqual(self.summary.get_company_notes(), {'Альфа': ['Без ГАП'], 'Абсолют': []})
+
+        totals = self.summary.get_company_totals()
+        self.assertEqual(totals['Альфа']['total_premium_1'], Decimal('90000'))
+        self.assertEqual(totals['Альфа']['total_premium_2'], Decimal('45000'))
+        self.assertTrue(totals['Альфа']['is_multiyear'])
+        self.assertFalse(totals['Абсолют']['is_multiyear'])
+
+        # Вариант 2 у Альфы есть не за все годы, у Абсолюта премия по нему нулевая
+        self.assertEqual(self.summary.get_company_available_variants('Альфа'), [1])
+        self.assertEqual(self.summary.get_company_available_variants('Абсолют'), [1])
+        self.assertEqual(self.summary.get_company_available_variants('ВСК'), [])
+        self.assertEqual(self.summary.get_default_variant('Альфа'), 1)
+        self.assertFalse(self.summary.requires_variant_choice('Альфа'))
+
+    def test_prefetched_matrix_is_built_once(self):
+        self._add_companies(3)
+        summary = InsuranceSummary.objects.prefetch_related('offers').get(pk=self.summary.pk)
+
+        with self.assertNumQueries(0):
+            matrix = summary.get_offer_matrix()
+            summary.get_company_totals()
+            summary.get_company_available_variants('Альфа')
+
+        self.assertIs(summary.get_offer_matrix(), matrix)
+        self.assertEqual(summary.get_offer_matrix().variant_requirements()['Альфа']['available_variants'], [1, 2])
+
+    def test_detail_page_query_count_does_not_depend_on_companies(self):
+        url = reverse('summaries:summary_detail', args=[self.summary.pk])
+
+        self._add_companies(2)
+        with CaptureQueriesContext(connection) as few:
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+        InsuranceOffer.objects.filter(summary=self.summary).delete()
+        self._add_companies(len(COMPANIES))
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['sorted_companies']), len(COMPANIES))
+        self.assertEqual(len(many), len(few))
@@ -6,15 +6,20 @@
 - не создают повторных записей при save() без смены status;
 - работают для InsuranceSummary;
 - подхватывают current user из thread-local.
+
+Плюс bulk_transition_status: массовая смена статуса пишет те же события.
 """
 from django.contrib.auth.models import User
 from django.contrib.contenttypes.models import ContentType
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from insurance_requests.models import InsuranceRequest
 
 from ._current_user import set_current_user
 from .models import InsuranceSummary, StatusEvent
+from .services.status_transitions import bulk_transition_status
 
 
 def _events_for(instance):
@@ -107,3 +112,55 @@ class StatusEventOnInsuranceSummaryTests(TestCase):
         self.assertEqual(len(events), 2)
         self.assertEqual(events[1].from_status, 'collecting')
         self.assertEqual(events[1].to_status, 'ready')
+
+    def test_save_with_update_fields_without_status_skips_lookup(self):
+        summary = InsuranceSummary.objects.create(request=self.request)
+        summary.total_offers = 3
+        with CaptureQueriesContext(connection) as ctx:
+            summary.save(update_fields=['total_offers'])
+        status_lookup = 'SELECT "summaries_insurancesummary"."status" FROM'
+        self.assertFalse(any(q['sql'].startswith(status_lookup) for q in ctx.captured_queries))
+        self.assertEqual(_events_for(summary).count(), 1)
+
+
+class BulkStatusTransitionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='bulk', password='pwd')
+        self.summaries = []
+        for i, status in enumerate(('collecting', 'ready', 'completed_rejected')):
+            request = InsuranceRequest.objects.create(
+                client_name=f'ООО Пакет-{i}',
+                inn='1234567890',
+                insurance_type='КАСКО',
+                status='emails_sent',
+                created_by=self.user,
+            )
+            self.summaries.append(InsuranceSummary.objects.create(request=request, status=status))
+
+    def test_transition_emits_event_per_changed_object(self):
+        qs = InsuranceSummary.objects.filter(pk__in=[s.pk for s in self.summaries])
+        changed = bulk_transition_status(
+            qs, 'completed_rejected', changed_by=self.user, note='пакетно',
+            extra_updates={'selected_company': None},
+        )
+
+        self.assertEqual(changed, 2)
+        self.assertEqual(qs.filter(status='completed_rejected').count(), 3)
+        for summary, old_status in zip(self.summaries[:2], ('collecting', 'ready')):
+            event = _events_for(summary).filter(to_status='completed_rejected').get()
+            self.assertEqual(event.from_status, old_status)
+            self.assertEqual(event.changed_by, self.user)
+            self.assertEqual(event.note, 'пакетно')
+        # уже закрытый свод события не получает
+        self.assertFalse(_events_for(self.summaries[2]).filter(from_status='completed_rejected').exists())
+
+    def test_query_count_does_not_grow_with_objects(self):
+        qs = InsuranceSummary.objects.filter(pk__in=[s.pk for s in self.summaries])
+        with CaptureQueriesContext(connection) as ctx:
+            bulk_transition_status(qs, 'sent', changed_by=self.user)
+        # SELECT старых статусов, UPDATE, ContentType (кэш), bulk INSERT, savepoint’ы
+        self.assertLessEqual(len(ctx.captured_queries), 6)
+
+    def test_rejects_models_without_status_events(self):
+        with self.assertRaises(ValueError):
+            bulk_transition_status(User.objects.all(), 'x')
@@ -16,6 +16,8 @@ urlpatterns = [
     path('statistics/export/', views.export_statistics_widget, name='export_statistics_widget'),
     path('analytics/', views.analytics_placeholder, name='analytics'),
     path('analytics/parser-edits/', views.analytics_parser_edits, name='analytics_parser_edits'),
+    path('analytics/parser-timings/', views.analytics_parser_timings, name='analytics_parser_timings'),
+    path('analytics/cache/', views.analytics_cache, name='analytics_cache'),
     path('analytics/post-creation/', views.analytics_post_creation, name='analytics_post_creation'),
     path('analytics/insurance-offers/', views.analytics_insurance_offers, name='analytics_insurance_offers'),
     path('analytics/insurance-companies/', views.analytics_insurance_companies, name='analytics_insurance_companies'),
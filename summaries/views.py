@@ -1,6 +1,7 @@
 """
 Представления для работы со сводами предложений
 """
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.http import JsonResponse, HttpResponse
@@ -17,6 +18,9 @@ import os
 from .models import InsuranceSummary, InsuranceOffer, SummaryTemplate
 from insurance_requests.models import InsuranceRequest
 from insurance_requests.decorators import user_required, admin_required
+from onlineservice import cache as cache_namespaces
+from onlineservice.cache import CacheNamespace
+from onlineservice.metrics import registry as metrics_registry
 from .forms import OfferForm, SummaryForm, AddOfferToSummaryForm, DealListFilterForm
 from .exceptions import DuplicateOfferError
 from .services.analytics_insurance_companies import (
@@ -26,10 +30,23 @@ from .services.analytics_insurance_companies import (
 )
 from .services import analytics_managers as analytics_managers_service
 from .services import analytics_parser_edits as analytics_parser_edits_service
+from .services import analytics_parser_timings as analytics_parser_timings_service
 from .services import analytics_post_creation as analytics_post_creation_service
 
 logger = logging.getLogger(__name__)
 
+# Отрисованные строки списков сводов и сделок (cache_fragment в шаблонах): ключ —
+# pk и updated_at свода и заявки; предложения меняют строку без сохранения свода,
+# поэтому любое их изменение сбрасывает пространство целиком.
+SUMMARY_LIST_ROWS_CACHE = CacheNamespace(
+    'summary_list_rows', timeout=settings.FRAGMENT_CACHE_TIMEOUT,
+    invalidate_on=('summaries.InsuranceOffer',), description='Строки списка сводов',
+)
+DEAL_LIST_ROWS_CACHE = CacheNamespace(
+    'deal_list_rows', timeout=settings.FRAGMENT_CACHE_TIMEOUT,
+    invalidate_on=('summaries.InsuranceOffer',), description='Строки списка сделок',
+)
+
 
 @user_required
 def summary_list(request):
@@ -144,6 +161,10 @@ def summary_list(request):
     else:
         summaries = summaries.order_by('-created_at')
     
+    # Счётчик компаний в строке строится по матрице предложений: prefetch
+    # даёт один запрос на страницу вместо нескольких на каждый свод
+    summaries = summaries.prefetch_related('offers')
+
     # Реализация пагинации (требование 5.1, 5.2)
     paginator = Paginator(summaries, 30)  # 30 сводов на страницу
     page = request.GET.get('page')
@@ -683,41 +704,39 @@ def summary_detail(request, pk):
         pk=pk
     )
     
+    # Все группировки, итоги и варианты франшизы считаются в памяти по одной матрице
+    # предложений, построенной из prefetch — число запросов не зависит от числа компаний
+    offer_matrix = summary.get_offer_matrix()
+
     # Получаем предложения с правильной сортировкой по новой структуре
-    offers = summary.offers.filter(is_valid=True).order_by('company_name', 'insurance_year')
+    offers = offer_matrix.ordered_offers()
     
     # Группируем предложения по компаниям (company-first grouping)
-    companies_with_offers = summary.get_offers_grouped_by_company()
+    companies_with_offers = offer_matrix.grouped_by_company()
     
     # Получаем структурированные данные для шаблона (company-year matrix)
-    company_year_matrix = summary.get_company_year_matrix()
+    company_year_matrix = offer_matrix.company_year_matrix()
     
     # Сортируем компании по алфавиту
-    sorted_companies = sorted(companies_with_offers.keys())
+    sorted_companies = offer_matrix.company_names
     
     # Получаем корректное количество уникальных компаний
-    unique_companies_count = summary.get_unique_companies_count()
+    unique_companies_count = offer_matrix.companies_count()
     
     # Получаем данные о компаниях с количеством лет для отображения тегов
-    companies_with_year_counts = summary.get_companies_with_year_counts()
+    companies_with_year_counts = offer_matrix.year_counts()
     
     # Получаем данные об итоговых суммах по компаниям для многолетних предложений
-    company_totals = summary.get_company_totals()
+    company_totals = offer_matrix.totals()
     
     # Получаем комментарии, сгруппированные по компаниям
-    company_notes = summary.get_company_notes()
+    company_notes = offer_matrix.notes()
 
     # Компактная аналитика для бокового блока сводной информации
     summary_analytics = _build_summary_compact_analytics(summary, offers)
 
     # Данные о доступных франшизных вариантах по компаниям для UI статусов
-    company_variant_requirements = {}
-    for company_name in sorted_companies:
-        company_variant_requirements[company_name] = {
-            'available_variants': summary.get_company_available_variants(company_name),
-            'requires_choice': summary.requires_variant_choice(company_name),
-            'default_variant': summary.get_default_variant(company_name),
-        }
+    company_variant_requirements = offer_matrix.variant_requirements()
     
     return render(request, 'summaries/summary_detail.html', {
         'summary': summary,
@@ -3130,6 +3149,39 @@ def analytics_parser_edits(request):
     return render(request, 'summaries/analytics_parser_edits.html', payload)
 
 
+@admin_required
+def analytics_parser_timings(request):
+    """Скорость разбора парсера V2 по этапам (по отчётам профилировщика)."""
+    filters = analytics_parser_timings_service.parse_filters(request.GET)
+    payload = analytics_parser_timings_service.build_payload(filters)
+    payload['profiling_enabled'] = settings.PARSER_V2_PROFILING
+    return render(request, 'summaries/analytics_parser_timings.html', payload)
+
+
+@admin_required
+@require_http_methods(["GET", "POST"])
+def analytics_cache(request):
+    """Кэш: доля попаданий по пространствам имён (этот процесс) и ручной сброс."""
+    if request.method == 'POST':
+        namespace = cache_namespaces.get_namespace(request.POST.get('namespace', ''))
+        if namespace is None:
+            messages.error(request, 'Неизвестное пространство кэша')
+        elif not namespace.manual_invalidation:
+            messages.error(request, f'Кэш «{namespace.name}» нельзя сбросить вручную')
+        else:
+            namespace.invalidate()
+            messages.success(request, f'Кэш «{namespace.name}» сброшен')
+        return redirect('summaries:analytics_cache')
+
+    hit_ratio = metrics_registry.cache_hit_ratio('default')
+    return render(request, 'summaries/analytics_cache.html', {
+        'namespaces': cache_namespaces.stats(),
+        'backend': settings.CACHE_BACKEND,
+        'backend_hit_ratio_percent': round(hit_ratio * 100, 1) if hit_ratio is not None else None,
+        'process_id': os.getpid(),
+    })
+
+
 @admin_required
 def analytics_post_creation(request):
     """Аналитика правок после создания заявки (контроль операторов/процесса)."""